@@ -0,0 +1,8 @@
+-- Enable trigram matching for substring keyword search
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- CreateIndex
+CREATE INDEX "repository_files_path_idx" ON "repository_files" USING GIN ("path" gin_trgm_ops);
+
+-- CreateIndex
+CREATE INDEX "repository_files_summary_idx" ON "repository_files" USING GIN ("summary" gin_trgm_ops);
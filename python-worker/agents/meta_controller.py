@@ -20,7 +20,7 @@ from typing import Dict, Any, List, Optional
 from dataclasses import dataclass, asdict
 from utils.logger import get_logger
 from services.database_service import database_service
-from services.redis_client import redis_client
+from services.status_publisher import status_publisher
 from agents.deep_understanding_agent import DeepUnderstandingAgent, IssueUnderstanding
 from agents.precision_retrieval_agent import PrecisionRetrievalAgent, RetrievedFile
 from agents.complete_file_generator import CompleteFileGenerator
@@ -668,7 +668,7 @@ Click 'Answer Questions' below to provide clarification."""
                 'FAILED': 'failed'
             }
             
-            await redis_client.update_task_status(
+            await status_publisher.publish_status(
                 task_id=self.task_id,
                 status=job_status_mapping.get(status, 'ready_for_review'),
                 result={
@@ -743,7 +743,7 @@ Click 'Answer Questions' below to provide clarification."""
             
             job_status = job_status_mapping.get(status, status.lower())
             
-            await redis_client.update_task_status(
+            await status_publisher.publish_status(
                 task_id=self.task_id,
                 status=job_status,
                 result=None
@@ -492,25 +492,25 @@ Use the available tools to find the top {max_files} most relevant files for fixi
         
         This is the OLD method that only works if repo is indexed in Qdrant.
         """
-        logger.info("📥 Loading pre-indexed files from Qdrant (fallback method)...")
-        all_files_with_content = await database_service.get_files_with_content(repository_id)
+        logger.info("📥 Loading pre-indexed file handles (fallback method, lazy content)...")
+        file_handles = await database_service.get_file_handles(repository_id)
         
-        if not all_files_with_content:
+        if not file_handles:
             logger.warning(f"⚠️ No indexed files found for repository {repository_id}")
             logger.warning("⚠️ Repository needs to be indexed in Qdrant first!")
             return []
         
-        logger.info(f"✅ Loaded {len(all_files_with_content)} indexed files from repository")
+        logger.info(f"✅ Loaded {len(file_handles)} indexed file handles from repository")
         
         # Build question from issue understanding
         question = self._build_search_query(understanding)
         logger.info(f"🔍 Search query: {question}")
         
-        # Use hybrid retrieval (requires pre-indexed data)
-        selected_files, retrieval_stats = await hybrid_retrieval.retrieve_context(
+        # Use hybrid retrieval (requires pre-indexed data); only the shortlist is downloaded
+        selected_files, retrieval_stats = await hybrid_retrieval.retrieve_context_lazy(
             repository_id=repository_id,
             question=question,
-            all_files=all_files_with_content,
+            file_handles=file_handles,
             max_files=max_files
         )
         
@@ -841,11 +841,15 @@ Use the available tools to find the top {max_files} most relevant files for fixi
             logger.warning("Failed to generate 3 queries, skipping query rewriting strategy")
             return []
         
-        # Search with each query in parallel
-        query_results = await asyncio.gather(
-            *[self._search_with_query(query, repository_id) for query in queries],
-            return_exceptions=True
-        )
+        # Embed all queries in one call and search them in one Qdrant round trip
+        try:
+            query_results = await self._search_with_queries(queries, repository_id)
+        except Exception as e:
+            logger.warning(f"Batched query search failed, searching queries individually: {str(e)}")
+            query_results = await asyncio.gather(
+                *[self._search_with_query(query, repository_id) for query in queries],
+                return_exceptions=True
+            )
         
         # Flatten results
         all_results = []
@@ -856,7 +860,7 @@ Use the available tools to find the top {max_files} most relevant files for fixi
                 all_results.extend(result)
         
         # Apply RRF to fuse the different query results
-        fused = self._reciprocal_rank_fusion_simple(all_results)
+        fused = self._reciprocal_rank_fusion(all_results)
         
         logger.info(f"Strategy 5: Retrieved {len(fused)} files via query rewriting + RRF")
         
@@ -935,28 +939,50 @@ Respond in JSON:
                 score_threshold=0.3
             )
             
-            retrieved = []
-            for result in results:
-                metadata = result.get('metadata', {})
-                file_path = metadata.get('file_path')
-                file_content = metadata.get('text', '')
-                score = result.get('score', 0.0)
-                
-                if file_path and file_content:
-                    retrieved.append(RetrievedFile(
-                        path=file_path,
-                        content=file_content[:10000],
-                        language=self._detect_language(file_path),
-                        retrieval_score=score,
-                        retrieval_method='query_rewrite',
-                        relevance_explanation=f'Query rewrite match: {score:.2f}'
-                    ))
-            
-            return retrieved
+            return self._query_results_to_files(results)
         except Exception as e:
             logger.warning(f"Query search failed: {str(e)}")
             return []
     
+    async def _search_with_queries(
+        self,
+        queries: List[str],
+        repository_id: str
+    ) -> List[List[RetrievedFile]]:
+        """Search with several queries: one batched embedding call and one batched vector search."""
+        query_embeddings = await self.gemini_client.generate_embeddings_batch(queries, use_cache=True)
+        if len(query_embeddings) != len(queries):
+            raise ValueError(f"expected {len(queries)} embeddings, got {len(query_embeddings)}")
+        
+        results = await qdrant_client.search_many(
+            query_embeddings,
+            repo_id=repository_id,
+            limit=5,
+            score_threshold=0.3
+        )
+        return [self._query_results_to_files(query_results) for query_results in results]
+    
+    def _query_results_to_files(self, results: List[Dict[str, Any]]) -> List[RetrievedFile]:
+        """Convert vector search hits into query-rewrite RetrievedFiles."""
+        retrieved = []
+        for result in results:
+            metadata = result.get('metadata', {})
+            file_path = metadata.get('file_path')
+            file_content = metadata.get('text', '')
+            score = result.get('score', 0.0)
+            
+            if file_path and file_content:
+                retrieved.append(RetrievedFile(
+                    path=file_path,
+                    content=file_content[:10000],
+                    language=self._detect_language(file_path),
+                    retrieval_score=score,
+                    retrieval_method='query_rewrite',
+                    relevance_explanation=f'Query rewrite match: {score:.2f}'
+                ))
+        
+        return retrieved
+    
     def _reciprocal_rank_fusion(
         self,
         all_results: List[RetrievedFile]
@@ -1009,13 +1035,6 @@ Respond in JSON:
         
         return fused_results
     
-    def _reciprocal_rank_fusion_simple(
-        self,
-        results: List[RetrievedFile]
-    ) -> List[RetrievedFile]:
-        """Simplified RRF for a single list of results."""
-        return self._reciprocal_rank_fusion(results)
-    
     def _build_semantic_query(self, understanding: IssueUnderstanding) -> str:
         """Build a semantic search query from understanding."""
         query_parts = [
@@ -243,6 +243,88 @@ async def debug_reset_circuit_breakers():
     except Exception as e:
         return {"error": str(e), "message": "Failed to reset circuit breakers"}
 
+@app.get("/debug/content-cache-stats")
+async def debug_content_cache_stats():
+    """Debug endpoint to check repository content cache hit/miss/bytes metrics."""
+    try:
+        from services.repository_content_cache import repository_content_cache
+        return repository_content_cache.get_stats()
+    except Exception as e:
+        return {"error": str(e)}
+
+@app.get("/debug/embedding-cache-stats")
+async def debug_embedding_cache_stats():
+    """Debug endpoint to check query embedding cache hit rate."""
+    try:
+        from services.embedding_cache import embedding_cache
+        return embedding_cache.get_stats()
+    except Exception as e:
+        return {"error": str(e)}
+
+@app.get("/debug/llm-cache-stats")
+async def debug_llm_cache_stats():
+    """Debug endpoint to check LLM response cache hit rate and saved tokens/latency."""
+    try:
+        from services.llm_response_cache import llm_response_cache
+        return llm_response_cache.get_stats()
+    except Exception as e:
+        return {"error": str(e)}
+
+@app.get("/debug/keyword-index-stats")
+async def debug_keyword_index_stats():
+    """Debug endpoint to check keyword index builds, loads and memory use."""
+    try:
+        from services.keyword_index import keyword_index
+        return keyword_index.get_stats()
+    except Exception as e:
+        return {"error": str(e)}
+
+@app.get("/debug/rate-limiter-stats")
+async def debug_rate_limiter_stats():
+    """Debug endpoint to check LLM rate limiter waits, cooldowns, shared-state mode and summary concurrency."""
+    try:
+        from services.quota_coordinator import quota_coordinator
+        from services.rate_limiter import gemini_rate_limiter, github_models_rate_limiter
+        from services.summarization_scheduler import summarization_scheduler
+        return {
+            "gemini": gemini_rate_limiter.get_stats(),
+            "github_models": github_models_rate_limiter.get_stats(),
+            "shared_state": quota_coordinator.get_stats(),
+            "summarization_concurrency": summarization_scheduler.concurrency.get_stats()
+        }
+    except Exception as e:
+        return {"error": str(e)}
+
+@app.get("/debug/b2-transfer-stats")
+async def debug_b2_transfer_stats():
+    """Debug endpoint to check B2 transfer engine counters."""
+    try:
+        from services.b2_transfer_engine import b2_transfer_engine
+        return b2_transfer_engine.get_stats()
+    except Exception as e:
+        return {"error": str(e)}
+
+@app.get("/debug/local-vector-index-stats")
+async def debug_local_vector_index_stats():
+    """Debug endpoint to check which repositories are served from the local vector index."""
+    try:
+        from services.local_vector_index import local_vector_index
+        return local_vector_index.get_stats()
+    except Exception as e:
+        return {"error": str(e)}
+
+@app.post("/debug/migrate-file-index")
+async def debug_migrate_file_index():
+    """Debug endpoint to build per-repository file indexes from existing file hashes (SCAN, no KEYS)."""
+    try:
+        from services.file_index import file_index
+        from services.redis_client import redis_client
+        if not redis_client.redis:
+            await redis_client.connect()
+        return await file_index.migrate_all()
+    except Exception as e:
+        return {"error": str(e)}
+
 # Request/Response models
 class QnARequest(BaseModel):
     """Request model for Q&A processing."""
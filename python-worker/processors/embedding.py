@@ -5,7 +5,7 @@ Now includes multi-step retrieval, hybrid retrieval (embeddings + graph + summar
 """
 import json
 import re
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from config.settings import get_settings
 from services.gemini_client import gemini_client
 from services.qdrant_client import qdrant_client
@@ -314,9 +314,9 @@ class EmbeddingProcessor:
                     ]
                     commit_content = ["\n".join(commit_content)]
             
-            # Get files with content from database (using smart retrieval)
-            files_with_content = await database_service.get_files_with_content(repository_id)
-            logger.info(f"Retrieved {len(files_with_content)} files from database")
+            # Get lazy file handles from database (content is only fetched for shortlisted files)
+            files_with_content = await database_service.get_file_handles(repository_id)
+            logger.info(f"Retrieved {len(files_with_content)} file handles from database")
             
             # Process attachments if present
             attachment_content = []
@@ -511,7 +511,7 @@ class EmbeddingProcessor:
                 initial_context = {
                     'repo_info': repo_info,
                     'attachments': attachment_content,
-                    'files_with_content': files_with_content
+                    'file_handles': files_with_content
                 }
                 
                 # Use multi-step retrieval
@@ -572,10 +572,10 @@ class EmbeddingProcessor:
                 
                 try:
                     # Use hybrid retrieval system
-                    selected_files, retrieval_stats = await hybrid_retrieval.retrieve_context(
+                    selected_files, retrieval_stats = await hybrid_retrieval.retrieve_context_lazy(
                         repository_id=repository_id,
                         question=question,
-                        all_files=files_with_content,
+                        file_handles=files_with_content,
                         max_files=15
                     )
                     
@@ -614,14 +614,14 @@ class EmbeddingProcessor:
                 except Exception as e:
                     logger.warning(f"Hybrid retrieval failed: {str(e)}, falling back to smart context")
                     # Fallback to smart context builder
-                    files_content, relevant_file_paths = smart_context_builder.build_smart_context(
-                        question_analysis, files_with_content, question
+                    files_content, relevant_file_paths = await self._build_smart_context_lazy(
+                        question_analysis, files_with_content, question, repository_id
                     )
             else:
                 # When hybrid is disabled, use smart context builder
                 logger.info("📋 Using smart context builder")
-                files_content, relevant_file_paths = smart_context_builder.build_smart_context(
-                    question_analysis, files_with_content, question
+                files_content, relevant_file_paths = await self._build_smart_context_lazy(
+                    question_analysis, files_with_content, question, repository_id
                 )
             
             # CRITICAL DEBUG: Log relevant files after retrieval
@@ -929,3 +929,27 @@ class EmbeddingProcessor:
             
             raise
 
+
+    async def _build_smart_context_lazy(
+        self,
+        question_analysis: Dict[str, Any],
+        file_handles: List[Dict[str, Any]],
+        question: str,
+        repository_id: Optional[str] = None
+    ):
+        """
+        Build smart context from lazy file handles.
+        
+        Files are shortlisted on path, summary and the keyword index first so
+        that only the shortlist's content is downloaded before the content-aware
+        smart context scoring.
+        """
+        shortlist = [
+            file_info for _, file_info in smart_context_builder.rank_by_metadata(
+                question_analysis, file_handles, question, repository_id=repository_id
+            )
+        ]
+        await database_service.hydrate_file_handles(shortlist)
+        logger.info(f"Hydrated {len(shortlist)}/{len(file_handles)} files for smart context")
+        
+        return smart_context_builder.build_smart_context(question_analysis, shortlist, question, repository_id)
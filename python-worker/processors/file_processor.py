@@ -469,11 +469,19 @@ class FileProcessor:
             # Process all files
             files_result = await self.process_repository_files(temp_dir, repo_id)
               # Store files in database
-            await self._store_files_in_database(repo_id, files_result['files'], task_logger)            # Generate individual file summaries
+            await self._store_files_in_database(repo_id, files_result['files'], task_logger)
+            
+            # Re-ingested content supersedes anything cached for Q&A/issue-fix retrieval
+            self._invalidate_content_cache(repo_id, task_logger)
+            
+            # Generate individual file summaries
             await self._generate_file_summaries(repo_id, files_result['files'], task_logger)
             
+            # Keyword index over paths, identifiers, summaries and content for retrieval scorers
+            await self._build_keyword_index(repo_id, files_result['files'], task_logger)
+            
             # Generate embeddings for processed files
-            await self._generate_embeddings(repo_id, files_result['files'], task_logger)
+            embedding_stats = await self._generate_embeddings(repo_id, files_result['files'], task_logger)
             
             # Build code graph if enabled
             if self.settings.enable_graph_retrieval:
@@ -493,7 +501,18 @@ class FileProcessor:
                 "files_processed": files_result['stats']['total_files'],
                 "files_skipped": files_result['stats']['skipped_files'],
                 "total_size": files_result['stats']['total_size'],
-                "summary_generated": bool(summary)
+                "summary_generated": bool(summary),
+                "embedding_throughput": {
+                    "files_per_second": embedding_stats.get('files_per_second', 0),
+                    "points_per_second": embedding_stats.get('points_per_second', 0),
+                    "points_created": embedding_stats.get('points_created', 0),
+                    "points_failed": embedding_stats.get('points_failed', 0),
+                    "duration_seconds": embedding_stats.get('duration_seconds', 0),
+                    "chunks_total": embedding_stats.get('chunks_total', 0),
+                    "chunks_unchanged": embedding_stats.get('chunks_unchanged', 0),
+                    "points_deleted": embedding_stats.get('points_deleted', 0),
+                    "stale_points_kept": embedding_stats.get('stale_points_kept', 0)
+                }
             }
             
         except subprocess.TimeoutExpired:
@@ -514,13 +533,36 @@ class FileProcessor:
                     task_logger.info("Cleaned up temp directory")
                 except Exception as e:
                     task_logger.warning("Failed to cleanup temp directory", error=str(e))    
+    def _invalidate_content_cache(self, repo_id: str, task_logger) -> None:
+        """Invalidate the repository content cache after a re-ingest."""
+        from services.repository_content_cache import repository_content_cache
+        
+        try:
+            repository_content_cache.invalidate(repo_id)
+            task_logger.info("Invalidated repository content cache", repo_id=repo_id)
+        except Exception as e:
+            task_logger.warning("Failed to invalidate repository content cache", error=str(e))
+
+    async def _build_keyword_index(self, repo_id: str, files: List[Dict[str, Any]], task_logger) -> None:
+        """Build the repository's keyword index (CPU-bound, runs in a thread)."""
+        import asyncio
+        from services.keyword_index import keyword_index
+        
+        try:
+            index = await asyncio.to_thread(keyword_index.build, repo_id, files)
+            if index is not None:
+                task_logger.info("Built keyword index", files=len(index.paths), terms=len(index.vocab))
+        except Exception as e:
+            task_logger.warning("Failed to build keyword index", error=str(e))
+
     async def _update_repository_status(self, repo_id: str, status: str):
         """Update repository embedding status via Redis (for node-worker to pick up)."""
         from services.redis_client import redis_client
         
         try:
+            pipe = redis_client.pipeline(transaction=True)
             # Store status update in Redis for node-worker to process
-            await redis_client.hset(
+            pipe.hset(
                 f"repository_status:{repo_id}",
                 mapping={
                     "embedding_status": status,
@@ -530,10 +572,11 @@ class FileProcessor:
             )
             
             # Also publish an event for real-time updates
-            await redis_client.publish(
+            pipe.publish(
                 "repository_updates",
                 f"{repo_id}:{status}"
             )
+            await pipe.execute()
             
             logger.info(f"Updated repository {repo_id} status to {status}")
             
@@ -543,6 +586,8 @@ class FileProcessor:
     async def _store_files_in_database(self, repo_id: str, files: List[Dict], task_logger):
         """Store processed files in B2 storage and queue metadata for node-worker to handle."""
         from services.b2_storage_sdk_fixed import B2StorageService
+        from services.b2_transfer_engine import b2_transfer_engine
+        from services.file_index import file_index
         from services.redis_client import redis_client
         
         try:            # Initialize B2 storage service
@@ -556,15 +601,20 @@ class FileProcessor:
             failed_uploads = 0
             file_metadata_list = []
             
-            # Upload files to B2 and collect metadata
-            for file_data in files:                
+            # Upload files to B2 concurrently (bounded by the transfer engine)
+            upload_results = await b2_transfer_engine.upload_many(
+                [
+                    {'repo_id': repo_id, 'file_path': file_data['path'], 'content': file_data['content']}
+                    for file_data in files
+                ],
+                storage=b2_storage
+            )
+            
+            # Collect metadata
+            for file_data, upload_result in zip(files, upload_results):
                 try:
-                    # Upload file content to B2
-                    upload_result = await b2_storage.upload_file_content(
-                        repo_id=repo_id,
-                        file_path=file_data['path'],
-                        content=file_data['content']
-                    )
+                    if isinstance(upload_result, Exception):
+                        raise upload_result
                     
                     # Check if upload succeeded or failed with fallback content
                     if upload_result.get('fallback_content'):
@@ -620,21 +670,24 @@ class FileProcessor:
                     file_metadata_list.append(file_metadata)
               # Store file metadata in Redis for node-worker to process
             if file_metadata_list:
+                # One MULTI for the queue push, per-file hashes, file list and file index
+                pipe = redis_client.pipeline(transaction=True)
+                
                 # Queue for node-worker to process (store in database)
-                await redis_client.lpush(
+                pipe.lpush(
                     "file_metadata_queue",
                     *[json.dumps(metadata) for metadata in file_metadata_list]
                 )
-                  # Store individual file metadata for Q&A retrieval
+                # Store individual file metadata for Q&A retrieval
                 for metadata in file_metadata_list:
                     file_key = f"file:{repo_id}:{metadata['path']}"
                     # Convert all values to strings for Redis
                     string_metadata = {k: str(v) for k, v in metadata.items()}
-                    await redis_client.hset(file_key, mapping=string_metadata)
+                    pipe.hset(file_key, mapping=string_metadata)
                 
                 # Store file list for easy Q&A access
                 file_paths_list = [metadata['path'] for metadata in file_metadata_list]
-                await redis_client.hset(
+                pipe.hset(
                     f"repo_files:{repo_id}",
                     mapping={
                         "file_count": str(len(file_metadata_list)),
@@ -644,6 +697,9 @@ class FileProcessor:
                         "file_paths": json.dumps(file_paths_list)
                     }
                 )
+                # Per-repository file index (lets readers avoid KEYS file:{repo_id}:*)
+                file_index.queue_replace(pipe, repo_id, file_paths_list)
+                await pipe.execute()
             
             task_logger.info(
                 f"File storage complete: {successful_uploads} uploaded to B2, {failed_uploads} stored as fallback"
@@ -653,28 +709,29 @@ class FileProcessor:
             task_logger.error("Failed to store files", error=str(e))
             # Don't fail the entire task for storage issues            raise Exception(f"File storage failed: {str(e)}")
 
-    async def _generate_embeddings(self, repo_id: str, files: List[Dict[str, Any]], task_logger):
-        """Generate embeddings for processed files."""
-        from services.gemini_client import gemini_client
-        from services.qdrant_client import qdrant_client
+    async def _generate_embeddings(self, repo_id: str, files: List[Dict[str, Any]], task_logger) -> Dict[str, Any]:
+        """Embed every file chunk and incrementally re-index the repository's vectors."""
+        from services.embedding_pipeline import embedding_pipeline, chunk_point_id
+        from utils.hashing import content_hash
         
         try:
             task_logger.info(f"Starting embedding generation for {len(files)} files")
             
-            embeddings_created = 0
-            embeddings_failed = 0
+            created_at = datetime.utcnow().isoformat()
+            max_chunks = self.settings.embedding_max_chunks_per_file
+            items = []
             
             for file_data in files:
-                try:                    # Skip empty files or very large files, but allow short meaningful files
-                    content = file_data.get('content', '')
-                    if not content or len(content.strip()) < 1 or len(content) > 100000:  # 100KB limit
-                        task_logger.debug(f"Skipping embedding for {file_data['path']}: empty, too short, or too large")
-                        continue
-                    
-                    # Generate embedding using Gemini
-                    task_logger.debug(f"Generating embedding for {file_data['path']}")
-                    embedding = await gemini_client.generate_embedding(content)
-                    
+                chunks = [c for c in file_data.get('chunks') or [] if c.get('content', '').strip()]
+                if not chunks:
+                    task_logger.debug(f"Skipping embedding for {file_data['path']}: empty")
+                    continue
+                if len(chunks) > max_chunks:
+                    task_logger.debug(f"Embedding first {max_chunks}/{len(chunks)} chunks of {file_data['path']}")
+                    chunks = chunks[:max_chunks]
+                
+                for chunk in chunks:
+                    chunk_hash = content_hash(chunk['content'])
                     # Prepare metadata for Qdrant
                     metadata = {
                         "repo_id": repo_id,
@@ -684,118 +741,116 @@ class FileProcessor:
                         "language": file_data.get('language', ''),
                         "content_type": "file",
                         "size": file_data.get('size', 0),
-                        "tokens": file_data.get('tokens', 0),
-                        "created_at": datetime.utcnow().isoformat()                    }
-                    
-                    # Store embedding in Qdrant with repo-specific filtering
-                    point_id = str(uuid.uuid4())  # Generate a proper UUID for Qdrant
-                    await qdrant_client.store_embedding_with_metadata(
-                        embedding=embedding,
-                        metadata=metadata,
-                        point_id=point_id
-                    )
-                    
-                    embeddings_created += 1
-                    task_logger.debug(f"Created embedding for {file_data['path']}")
+                        "tokens": chunk.get('tokens', 0),
+                        "chunk_index": chunk['index'],
+                        "chunk_count": len(chunks),
+                        "start_line": chunk['start_line'],
+                        "end_line": chunk['end_line'],
+                        "content_hash": chunk_hash,
+                        "text": chunk['content'],
+                        "created_at": created_at
+                    }
                     
-                except Exception as e:
-                    embeddings_failed += 1
-                    task_logger.warning(f"Failed to create embedding for {file_data['path']}: {str(e)}")
-                    continue
-                task_logger.info(f"Embedding generation complete: {embeddings_created} created, {embeddings_failed} failed")
+                    items.append({
+                        'id': chunk_point_id(repo_id, file_data['path'], chunk['index'], chunk_hash),
+                        'text': chunk['content'],
+                        'payload': metadata
+                    })
+            
+            stats = await embedding_pipeline.reindex(repo_id, items)
+            
+            task_logger.info(
+                f"Embedding generation complete: {stats['points_created']} created, "
+                f"{stats['chunks_unchanged']} unchanged, {stats['points_deleted']} stale deleted, "
+                f"{stats['points_failed']} failed",
+                files_per_second=stats['files_per_second'],
+                points_per_second=stats['points_per_second']
+            )
+            return stats
             
         except Exception as e:
             task_logger.error(f"Error in embedding generation: {str(e)}")
             # Don't fail the entire task for embedding issues
+            return {}
+
+    def _needs_summary(self, file_data: Dict[str, Any], task_logger) -> bool:
+        """Skip empty files, very large files, or binary files."""
+        content = file_data.get('content', '')
+        file_path = file_data.get('path', '')
+        file_ext = file_data.get('extension', '').lower()
+        if not content or len(content.strip()) < 3:  # Lowered from 10 to 3 characters
+            task_logger.debug(f"Skipping summary for {file_path}: too short or empty")
+            return False
+        
+        # Lower threshold for important config/documentation files
+        is_important_file = any(file_path.lower().endswith(ext) for ext in [
+            '.md', '.txt', '.json', '.yml', '.yaml', '.toml', '.ini', '.conf', 
+            '.cfg', '.env', '.gitignore', 'dockerfile', 'makefile', 'readme', 'license'
+        ]) or any(name in file_path.lower() for name in [
+            'readme', 'license', 'changelog', 'contributing', 'dockerfile', 'makefile'
+        ])
+        
+        # For important files, process even very short content (3+ chars)
+        # For code files, require at least 10 characters
+        min_length = 3 if is_important_file else 10
+        if len(content.strip()) < min_length:
+            task_logger.debug(f"Skipping summary for {file_path}: too short")
+            return False
+        
+        if len(content) > 50000:  # 50KB limit for summarization
+            task_logger.debug(f"Skipping summary for {file_path}: too large")
+            return False
+        
+        # Skip binary-like files
+        if file_ext in {'.png', '.jpg', '.jpeg', '.gif', '.pdf', '.exe', '.dll', '.bin'}:
+            task_logger.debug(f"Skipping summary for {file_path}: binary file")
+            return False
+        
+        return True
 
     async def _generate_file_summaries(self, repo_id: str, files: List[Dict[str, Any]], task_logger):
-        """Generate summaries for individual files."""
-        from services.redis_client import redis_client
+        """Generate summaries for individual files (concurrently, most important files first)."""
+        from processors.summarization import SummarizationProcessor
+        from services.summarization_scheduler import summarization_scheduler
+        from services.summary_packing import pack_items
         
         try:
-            task_logger.info(f"Starting file summary generation for {len(files)} files")
+            summary_files = [file_data for file_data in files if self._needs_summary(file_data, task_logger)]
+            task_logger.info(f"Starting file summary generation for {len(summary_files)} of {len(files)} files")
             
-            summaries_created = 0
-            summaries_failed = 0
-            file_summary_updates = []
+            summarization_processor = SummarizationProcessor()
             
-            for file_data in files:
-                try:
-                    # Skip empty files, very large files, or binary files
-                    content = file_data.get('content', '')
-                    file_path = file_data.get('path', '')
-                    file_ext = file_data.get('extension', '').lower()                    # Skip files that don't need summaries
-                    if not content or len(content.strip()) < 3:  # Lowered from 10 to 3 characters
-                        task_logger.debug(f"Skipping summary for {file_path}: too short or empty")
-                        continue
-                    
-                    # Lower threshold for important config/documentation files
-                    is_important_file = any(file_path.lower().endswith(ext) for ext in [
-                        '.md', '.txt', '.json', '.yml', '.yaml', '.toml', '.ini', '.conf', 
-                        '.cfg', '.env', '.gitignore', 'dockerfile', 'makefile', 'readme', 'license'
-                    ]) or any(name in file_path.lower() for name in [
-                        'readme', 'license', 'changelog', 'contributing', 'dockerfile', 'makefile'
-                    ])
-                    
-                    # For important files, process even very short content (3+ chars)
-                    # For code files, require at least 10 characters
-                    min_length = 3 if is_important_file else 10
-                    if len(content.strip()) < min_length:
-                        task_logger.debug(f"Skipping summary for {file_path}: too short")
-                        continue
-                    
-                    if len(content) > 50000:  # 50KB limit for summarization
-                        task_logger.debug(f"Skipping summary for {file_path}: too large")
-                        continue
-                    
-                    # Skip binary-like files
-                    if file_ext in {'.png', '.jpg', '.jpeg', '.gif', '.pdf', '.exe', '.dll', '.bin'}:
-                        task_logger.debug(f"Skipping summary for {file_path}: binary file")
-                        continue
-                    
-                    # Generate file summary using summarization processor
-                    from processors.summarization import SummarizationProcessor
-                    summarization_processor = SummarizationProcessor()
-                    
-                    summary_task_data = {
-                        "filePath": file_path,
-                        "content": content,
+            async def summarize(batch: List[Dict[str, Any]]) -> List[Any]:
+                summary_results = await summarization_processor.summarize_files([
+                    {
+                        "filePath": file_data.get('path', ''),
+                        "content": file_data.get('content', ''),
                         "language": file_data.get('language', ''),
                         "repositoryId": repo_id
                     }
-                    
-                    summary_result = await summarization_processor.summarize_file(
-                        summary_task_data, task_logger
-                    )
-                    
-                    if summary_result.get('status') == 'completed':
-                        # Queue file summary update for node-worker to handle
-                        file_summary_update = {
-                            "type": "file_summary",
-                            "repository_id": repo_id,
-                            "file_path": file_path,
-                            "summary": summary_result.get('summary', ''),
-                            "updated_at": datetime.utcnow().isoformat()
-                        }
-                        file_summary_updates.append(file_summary_update)
-                        summaries_created += 1
-                        
-                        task_logger.debug(f"Generated summary for {file_path}")
-                    
-                except Exception as e:
-                    summaries_failed += 1
-                    task_logger.warning(f"Failed to create summary for {file_data.get('path', 'unknown')}: {str(e)}")
-                    continue
+                    for file_data in batch
+                ], task_logger)
+                return [
+                    result.get('summary', '') if result.get('status') == 'completed'
+                    else result.get('exception') or Exception(result.get('error', 'Summary generation failed'))
+                    for result in summary_results
+                ]
+            
+            # Small files share a packed request (5-20x fewer requests on typical repositories)
+            pack = None
+            if self.settings.summary_packing_enabled:
+                pack = lambda pending: pack_items(pending, text=lambda file_data: file_data.get('content', ''))
+            
+            # Completed summaries are streamed to file_summary_queue for node-worker as they finish
+            stats = await summarization_scheduler.run(repo_id, summary_files, summarize, task_logger, pack=pack)
             
-            # Queue all file summary updates for node-worker to process
-            if file_summary_updates:
-                await redis_client.lpush(
-                    "file_summary_queue",
-                    *[json.dumps(update) for update in file_summary_updates]
-                )
-                task_logger.info(f"Queued {len(file_summary_updates)} file summary updates")
-            
-            task_logger.info(f"File summary generation complete: {summaries_created} created, {summaries_failed} failed")
+            task_logger.info(
+                f"File summary generation complete: {stats['created']} created, "
+                f"{stats['resumed']} resumed, {stats['failed']} failed",
+                batches=stats['batches'],
+                queued=stats['queued'],
+                concurrency=stats['concurrency']['limit']
+            )
             
         except Exception as e:
             task_logger.error(f"Error in file summary generation: {str(e)}")
@@ -844,13 +899,14 @@ class FileProcessor:
                 "completed_by": "python_worker"
             }
             
-            await redis_client.hset(
+            pipe = redis_client.pipeline(transaction=True)
+            pipe.hset(
                 f"repository_completion:{repo_id}",
                 mapping=completion_data
             )
             
             # Also update the status tracking
-            await redis_client.hset(
+            pipe.hset(
                 f"repository_status:{repo_id}",
                 mapping={
                     "embedding_status": "COMPLETED",
@@ -860,10 +916,11 @@ class FileProcessor:
             )
             
             # Publish completion event
-            await redis_client.publish(
+            pipe.publish(
                 "repository_updates",
                 f"{repo_id}:COMPLETED"
             )
+            await pipe.execute()
             
             logger.info(f"Updated repository {repo_id} completion data")
             
@@ -6,6 +6,7 @@ Supports two modes:
 1. LIGHTWEIGHT (Render free tier): Uses AssemblyAI for transcription + Gemini for embeddings
 2. FULL (local dev / paid tier): Uses Whisper + SentenceTransformers locally
 """
+import asyncio
 import os
 import math
 import subprocess
@@ -22,6 +23,7 @@ from config.settings import get_settings
 from utils.logger import get_logger
 from services.gemini_client import gemini_client
 from services.qdrant_client import qdrant_client
+from services.rate_limiter import estimate_tokens, gemini_rate_limiter, key_id
 from services.redis_client import redis_client
 
 # AssemblyAI for cloud-based transcription (lightweight mode)
@@ -253,73 +255,73 @@ class MeetingProcessor:
                 boundaries.append(i + stride)
         return boundaries
 
-    def generate_title_gemini(self, text, api_key, model="gemini-2.0-flash-lite"):
-        """Generate title using Gemini API."""
+    async def _generate_gemini(self, prompt, api_key, model):
+        """Call Gemini once the shared rate limiter grants the key a request slot."""
+        await gemini_rate_limiter.acquire(key_id(api_key), estimate_tokens(prompt))
         genai.configure(api_key=api_key)
+        gen_model = genai.GenerativeModel(model)
+        response = await gen_model.generate_content_async(prompt)
+        return response.text
+
+    async def generate_title_gemini(self, text, api_key, model="gemini-2.0-flash-lite"):
+        """Generate title using Gemini API."""
         prompt = (
             "Give me a single, concise 3–6 word title (not a list, not options, just one title) "
             "that best captures the following text. Do NOT use any Markdown, formatting, or special characters—just plain text:\n"
             f"{text}"
         )
-        gen_model = genai.GenerativeModel(model)
-        response = gen_model.generate_content(prompt)
-        return response.text.strip().split('\n')[0]
+        response_text = await self._generate_gemini(prompt, api_key, model)
+        return response_text.strip().split('\n')[0]
 
-    def batch_generate_titles_gemini(self, segment_texts, api_key, model="gemini-2.0-flash-lite"):
+    async def batch_generate_titles_gemini(self, segment_texts, api_key, model="gemini-2.0-flash-lite"):
         """Generate titles for multiple segments using Gemini API."""
-        genai.configure(api_key=api_key)
         prompt = (
             "For each numbered transcript below, give a single, concise 3–6 word plain text title (no Markdown, no formatting, no special characters, just plain text). "
             "Return the titles as a numbered list, one per line, matching the order of the transcripts.\n\n"
         )
         prompt += "".join(f"{idx}. {text}\n" for idx, text in enumerate(segment_texts, 1))
-        gen_model = genai.GenerativeModel(model)
-        response = gen_model.generate_content(prompt)
-        lines = response.text.strip().split('\n')
+        response_text = await self._generate_gemini(prompt, api_key, model)
+        lines = response_text.strip().split('\n')
         titles = [re.sub(r"^\d+\.\s*", "", line).strip() for line in lines if line.strip()]
         if len(titles) != len(segment_texts):
             raise ValueError("Mismatch between number of segments and returned titles.")
         return titles
 
-    def _summarize_batch(self, batch_texts, api_key, model):
+    async def _summarize_batch(self, batch_texts, api_key, model):
         """Summarize a batch of texts using Gemini API."""
         self.gemini_call_count += 1
-        genai.configure(api_key=api_key)
         prompt = (
             "For each numbered transcript below, write a concise, content-rich summary (2–3 sentences) of the transcript. "
             "Do not refer to the segment itself. Return the summaries as a numbered list, one per line, matching the order of the transcripts.\n\n"
         )
         prompt += "".join(f"{idx}. {text}\n" for idx, text in enumerate(batch_texts, 1))
-        gen_model = genai.GenerativeModel(model)
-        response = gen_model.generate_content(prompt)
-        lines = [line.strip() for line in response.text.strip().split('\n') if line.strip()]
+        response_text = await self._generate_gemini(prompt, api_key, model)
+        lines = [line.strip() for line in response_text.strip().split('\n') if line.strip()]
         summaries = [re.sub(r"^\d+\.\s*", "", line).strip() for line in lines if re.match(r"^\d+\.\s*", line)]
         if len(summaries) != len(batch_texts):
-            summaries = [self.summarize_segment_gemini(text, api_key, model) for text in batch_texts]
+            summaries = [await self.summarize_segment_gemini(text, api_key, model) for text in batch_texts]
         return summaries
 
-    def summarize_segment_gemini(self, text, api_key, model="gemini-2.0-flash-lite", max_chunk_words=500):
+    async def summarize_segment_gemini(self, text, api_key, model="gemini-2.0-flash-lite", max_chunk_words=500):
         """Summarize a single segment using Gemini API."""
-        genai.configure(api_key=api_key)
-        gen_model = genai.GenerativeModel(model)
         def split_into_chunks(words, chunk_size):
             return [" ".join(words[i:i+chunk_size]) for i in range(0, len(words), chunk_size)]
         words = re.findall(r"\w+|[.,!?;]", text)
         if len(words) > max_chunk_words:
             chunks = split_into_chunks(words, max_chunk_words)
-            summaries = [self.summarize_segment_gemini(chunk, api_key, model, max_chunk_words) for chunk in chunks]
+            summaries = [await self.summarize_segment_gemini(chunk, api_key, model, max_chunk_words) for chunk in chunks]
             combined = " ".join(summaries)
-            return self.summarize_segment_gemini(combined, api_key, model, max_chunk_words)
+            return await self.summarize_segment_gemini(combined, api_key, model, max_chunk_words)
         else:
             prompt = (
                 "Write a concise, content-rich summary (2–3 sentences) of the following transcript, "
                 "without saying 'this segment' or referring to the segment itself. Focus only on the facts and main ideas:\n"
                 f"{text}"
             )
-            response = gen_model.generate_content(prompt)
-            return response.text.strip()
+            response_text = await self._generate_gemini(prompt, api_key, model)
+            return response_text.strip()
 
-    def batch_generate_summaries_gemini(self, segment_texts, api_key, model="gemini-2.0-flash-lite", max_batch_words=120):
+    async def batch_generate_summaries_gemini(self, segment_texts, api_key, model="gemini-2.0-flash-lite", max_batch_words=120):
         """Generate summaries for multiple segments using batch processing."""
         summaries = []
         i = 0
@@ -331,10 +333,10 @@ class MeetingProcessor:
                 seg_words = len(segment_texts[i].split())
                 if seg_words > max_batch_words:
                     if batch:
-                        summaries.extend(self._summarize_batch(batch, api_key, model))
+                        summaries.extend(await self._summarize_batch(batch, api_key, model))
                         batch = []
                         batch_word_count = 0
-                    summaries.append(self.summarize_segment_gemini(segment_texts[i], api_key, model))
+                    summaries.append(await self.summarize_segment_gemini(segment_texts[i], api_key, model))
                     i += 1
                     break
                 else:
@@ -344,7 +346,7 @@ class MeetingProcessor:
                     if batch_word_count > max_batch_words * 3:
                         break
             if batch:
-                summaries.extend(self._summarize_batch(batch, api_key, model))
+                summaries.extend(await self._summarize_batch(batch, api_key, model))
         return summaries
 
     def extract_titlestamp_and_excerpt(self, words, segment_start_idx, segment_end_idx, method="first", excerpt_len=15):
@@ -486,9 +488,9 @@ class MeetingProcessor:
             logger.info(f"[meeting_summarizer] Sending summarizing payload: {json.dumps(summarizing_payload)[:500]}...")
             await self.update_meeting_status(meeting_id, "summarizing", summarizing_payload)
             segment_texts = [s["segment_text"] for s in segment_data]
-            titles = self.batch_generate_titles_gemini(segment_texts, api_key, model=title_model)
-            summaries = self.batch_generate_summaries_gemini(segment_texts, api_key, model=summary_model)
-            meeting_title = self.generate_title_gemini(full_transcript, api_key, model=title_model)
+            titles = await self.batch_generate_titles_gemini(segment_texts, api_key, model=title_model)
+            summaries = await self.batch_generate_summaries_gemini(segment_texts, api_key, model=summary_model)
+            meeting_title = await self.generate_title_gemini(full_transcript, api_key, model=title_model)
             # Prepare segments for storage
             segments_for_qdrant = []
             segments = []
@@ -599,8 +601,7 @@ class MeetingProcessor:
                 
                 if backfill_success:
                     # Wait a moment for Qdrant to index
-                    import time
-                    time.sleep(1)
+                    await asyncio.sleep(1)
                     
                     # Try search again after backfill
                     search_results = await qdrant_client.search_meeting_segments(
@@ -704,6 +705,7 @@ Answer:"""
 
             try:
                 import google.generativeai as genai
+                await gemini_rate_limiter.acquire(key_id(self.settings.gemini_api_key), estimate_tokens(prompt, 1000))
                 genai.configure(api_key=self.settings.gemini_api_key)
                 model = genai.GenerativeModel('gemini-2.0-flash-lite')
                 
@@ -958,6 +960,7 @@ ANALYZE THE MEETING CONTENT AND EXTRACT ALL ACTION ITEMS:"""
 
             try:
                 import google.generativeai as genai
+                await gemini_rate_limiter.acquire(key_id(self.settings.gemini_api_key), estimate_tokens(prompt, 2000))
                 genai.configure(api_key=self.settings.gemini_api_key)
                 model = genai.GenerativeModel('gemini-2.0-flash-lite')
                 
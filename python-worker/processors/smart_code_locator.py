@@ -180,19 +180,22 @@ class SmartCodeLocator:
         """Use Qdrant semantic search to find relevant code."""
         
         try:
-            results = await self.qdrant.search(
-                collection_name="gittldr_embeddings",
-                query_text=requirement,
-                filter_conditions={"repository_id": repository_id},
+            from services.gemini_client import gemini_client
+            
+            query_embedding = await gemini_client.generate_embedding(requirement)
+            results = (await self.qdrant.search_many(
+                [query_embedding],
+                repo_id=repository_id,
                 limit=10
-            )
+            ))[0]
             
             semantic_files = []
             for result in results:
+                metadata = result.get("metadata") or {}
                 semantic_files.append({
-                    "file_path": result.get("file_path"),
+                    "file_path": metadata.get("file_path"),
                     "score": result.get("score"),
-                    "content_preview": result.get("content", "")[:200],
+                    "content_preview": metadata.get("text", "")[:200],
                     "reason": "Semantically similar to requirement"
                 })
             
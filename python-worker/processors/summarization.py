@@ -86,7 +86,56 @@ class SummarizationProcessor:
         except Exception as e:
             logger.error(f"Failed to summarize file {file_path}: {str(e)}")
             raise
-    
+
+    async def summarize_files(self, task_data_list: List[Dict[str, Any]], logger) -> List[Dict[str, Any]]:
+        """
+        Summarize several small files with one packed request.
+
+        Files the packed response did not cover cleanly are summarized one by one;
+        those that still fail get a result with status "failed", the error and
+        the exception it was raised as.
+        """
+        if len(task_data_list) == 1:
+            return [await self.summarize_file(task_data_list[0], logger)]
+
+        items = []
+        for task_data in task_data_list:
+            file_language = task_data.get("language", "")
+            items.append({
+                "name": task_data.get("filePath"),
+                "text": task_data.get("content", ""),
+                "context": f"file ({file_language})" if file_language else "file"
+            })
+
+        summaries = await gemini_client.generate_packed_summaries(items)
+        logger.info(f"Generated packed summaries for {sum(1 for s in summaries if s)} of {len(items)} files")
+
+        results = []
+        for task_data, summary in zip(task_data_list, summaries):
+            if summary:
+                results.append({
+                    "status": "completed",
+                    "file_path": task_data.get("filePath"),
+                    "summary": summary,
+                    "repository_id": task_data.get("repositoryId"),
+                    "language": task_data.get("language", "")
+                })
+                continue
+
+            # Fall back to a request of its own
+            try:
+                results.append(await self.summarize_file(task_data, logger))
+            except Exception as e:
+                results.append({
+                    "status": "failed",
+                    "file_path": task_data.get("filePath"),
+                    "error": str(e),
+                    "exception": e,  # Kept so callers can tell rate limits from other failures
+                    "repository_id": task_data.get("repositoryId")
+                })
+
+        return results
+
     # async def process_meeting(self, task_data: Dict[str, Any], logger) -> Dict[str, Any]:
     #     """Process meeting audio/transcript for summarization."""
     #     logger.info("Processing meeting summarization")
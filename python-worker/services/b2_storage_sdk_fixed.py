@@ -9,6 +9,7 @@ from io import BytesIO
 from typing import Optional, Dict, Any
 from b2sdk.v2 import InMemoryAccountInfo, B2Api
 from config.settings import get_settings
+from services.b2_transfer_engine import b2_transfer_engine
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -52,7 +53,9 @@ class B2StorageService:
         """Test B2 connection."""
         try:
             # Try to list files to check connection - use correct B2 SDK API
-            file_list = list(self.bucket.ls(folder_to_list='', recursive=False))
+            file_list = await b2_transfer_engine.run_blocking(
+                lambda: list(self.bucket.ls(folder_to_list='', recursive=False))
+            )
             logger.info("B2 SDK connection test successful")
             return True
         except Exception as e:
@@ -63,60 +66,58 @@ class B2StorageService:
         """Alias for test_connection for compatibility."""
         return await self.test_connection()
 
+    def upload_file_content_sync(self, repo_id: str, file_path: str, content: str) -> Dict[str, Any]:
+        """
+        Blocking upload of file content to B2 using the official SDK.
+        
+        Runs on the B2 transfer engine's thread pool; use upload_file_content
+        from async code.
+        """
+        file_key = self.generate_file_key(repo_id, file_path)
+        content_bytes = content.encode('utf-8')
+        
+        logger.info(f"Uploading file to B2 using SDK: {file_key}")
+        
+        # Upload bytes directly
+        file_info = self.bucket.upload_bytes(
+            data_bytes=content_bytes,
+            file_name=file_key,
+            content_type='text/plain'
+        )
+        
+        # Get download URL (won't be directly accessible unless bucket is public)
+        file_url = f"https://f002.backblazeb2.com/file/{self.bucket_name}/{file_key}"
+        
+        logger.info(f"Successfully uploaded file to B2: {file_key}")
+        
+        return {
+            'file_url': file_url,
+            'file_key': file_key,
+            'bucket': self.bucket_name,
+            'size': len(content_bytes),
+            'uploaded_at': None
+        }
+
     async def upload_file_content(self, repo_id: str, file_path: str, content: str) -> Dict[str, Any]:
-        """Upload file content to B2 using the official SDK."""
+        """Upload file content to B2 without blocking the event loop."""
         try:
-            file_key = self.generate_file_key(repo_id, file_path)
-            content_bytes = content.encode('utf-8')
-            
-            logger.info(f"Uploading file to B2 using SDK: {file_key}")
-            
-            # Upload bytes directly
-            file_info = self.bucket.upload_bytes(
-                data_bytes=content_bytes,
-                file_name=file_key,
-                content_type='text/plain'
-            )
-            
-            # Get download URL (won't be directly accessible unless bucket is public)
-            file_url = f"https://f002.backblazeb2.com/file/{self.bucket_name}/{file_key}"
-            
-            logger.info(f"Successfully uploaded file to B2: {file_key}")
-            
-            return {
-                'file_url': file_url,
-                'file_key': file_key,
-                'bucket': self.bucket_name,
-                'size': len(content_bytes),
-                'uploaded_at': None
-            }
+            return await b2_transfer_engine.upload_text(repo_id, file_path, content, storage=self)
         except Exception as e:
             logger.error(f"B2 SDK upload failed for {file_path}: {str(e)}")
             
             raise Exception(f"Failed to upload file: {str(e)}")
 
     async def download_file_content(self, file_key: str) -> str:
-        """Download file content from B2 using the official SDK."""
+        """Download file content from B2 without blocking the event loop."""
         try:
-            logger.info(f"Downloading file from B2 using SDK: {file_key}")
-            
-            # Download file using BytesIO
-            downloaded_file = self.bucket.download_file_by_name(file_key)
-            content_io = BytesIO()
-            downloaded_file.save(content_io)
-            content_bytes = content_io.getvalue()
-            content = content_bytes.decode('utf-8')
-            
-            logger.info(f"Successfully downloaded file from B2: {file_key}")
-            return content
+            content_bytes = await b2_transfer_engine.download_bytes(file_key, storage=self)
+            return content_bytes.decode('utf-8')
+        except FileNotFoundError:
+            raise
         except Exception as e:
             error_str = str(e)
-            if "not_found" in error_str.lower() or "404" in error_str:
-                logger.error(f"File not found: {file_key}")
-                raise FileNotFoundError(f"File not found: {file_key}")
-            else:
-                logger.error(f"Download error: {error_str}")
-                raise Exception(f"Failed to download file from B2: {error_str}")
+            logger.error(f"Download error: {error_str}")
+            raise Exception(f"Failed to download file from B2: {error_str}")
 
     async def download_file_by_key(self, file_key: str) -> str:
         """Alias for download_file_content for compatibility."""
@@ -128,7 +129,9 @@ class B2StorageService:
             logger.info(f"Deleting file from B2 using SDK: {file_key}")
             
             # Find file versions - use correct B2 SDK API without limit
-            versions = list(self.bucket.list_file_versions(file_key))
+            versions = await b2_transfer_engine.run_blocking(
+                lambda: list(self.bucket.list_file_versions(file_key))
+            )
             
             if not versions:
                 logger.warning(f"File not found for deletion: {file_key}")
@@ -136,7 +139,9 @@ class B2StorageService:
             
             # Delete all versions of the file
             for file_version in versions:
-                self.bucket.delete_file_version(file_version.id_, file_version.file_name)
+                await b2_transfer_engine.run_blocking(
+                    self.bucket.delete_file_version, file_version.id_, file_version.file_name
+                )
             
             logger.info(f"Successfully deleted file from B2: {file_key}")
             return True
@@ -150,7 +155,10 @@ class B2StorageService:
             files = []
             
             # Use correct B2 SDK API - handle both tuple and object responses
-            for item in self.bucket.ls(folder_to_list=prefix, recursive=True):
+            listing = await b2_transfer_engine.run_blocking(
+                lambda: list(self.bucket.ls(folder_to_list=prefix, recursive=True))
+            )
+            for item in listing:
                 try:
                     # Handle different return types from B2 SDK
                     if isinstance(item, tuple):
@@ -205,9 +213,9 @@ class B2StorageService:
 
     def download_file(self, file_key: str) -> bytes:
         """
-        Synchronous download method for compatibility with asyncio.to_thread().
-        Alias for download_file_bytes().
+        Synchronous download method. Alias for download_file_bytes().
         
-        Used by database_service.py for hybrid search file retrieval.
+        From async code use b2_transfer_engine.download_bytes / download_many,
+        which run this on the transfer thread pool with retries.
         """
         return self.download_file_bytes(file_key)
\ No newline at end of file
@@ -0,0 +1,196 @@
+"""
+B2 transfer engine.
+
+The b2sdk is fully blocking, so every transfer is run on a dedicated thread
+pool instead of the event loop that also serves FastAPI and the Redis
+consumer. Transfers are bounded by a concurrency semaphore and retried with
+exponential backoff + full jitter.
+"""
+import asyncio
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+from config.settings import get_settings
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class B2TransferEngine:
+    """Bounded, retrying, non-blocking B2 transfers with batch APIs."""
+
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        retry_base_delay: Optional[float] = None
+    ):
+        settings = get_settings()
+        self.max_concurrency = max_concurrency or settings.b2_max_concurrency
+        self.max_retries = max_retries if max_retries is not None else settings.b2_max_retries
+        self.retry_base_delay = retry_base_delay if retry_base_delay is not None else settings.b2_retry_base_delay
+        self.retry_max_delay = 10.0
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency,
+            thread_name_prefix="b2-transfer"
+        )
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop = None
+
+        self.stats = {
+            'downloads': 0,
+            'uploads': 0,
+            'bytes_downloaded': 0,
+            'bytes_uploaded': 0,
+            'retries': 0,
+            'failures': 0
+        }
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """Semaphore bound to the running loop (API and worker run separate loops)."""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    @staticmethod
+    def _default_storage():
+        from services.b2_singleton import get_b2_storage
+        storage = get_b2_storage()
+        if storage is None:
+            raise RuntimeError("B2 storage not available")
+        return storage
+
+    async def run_blocking(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a blocking b2sdk call on the transfer pool, bounded by the semaphore."""
+        loop = asyncio.get_running_loop()
+        async with self._get_semaphore():
+            return await loop.run_in_executor(self._executor, lambda: func(*args, **kwargs))
+
+    async def _with_retries(self, description: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a blocking call with exponential backoff + full jitter between attempts."""
+        attempt = 0
+        while True:
+            try:
+                return await self.run_blocking(func, *args, **kwargs)
+            except FileNotFoundError:
+                # Missing files won't appear on retry
+                raise
+            except Exception as e:
+                if attempt >= self.max_retries:
+                    self.stats['failures'] += 1
+                    raise
+                delay = random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * (2 ** attempt)))
+                attempt += 1
+                self.stats['retries'] += 1
+                logger.warning(
+                    f"B2 {description} failed, retrying in {delay:.2f}s "
+                    f"(attempt {attempt}/{self.max_retries}): {str(e)}"
+                )
+                await asyncio.sleep(delay)
+
+    # ------------------------------------------------------------------
+    # Single transfers
+    # ------------------------------------------------------------------
+
+    async def download_bytes(self, file_key: str, storage=None) -> bytes:
+        """Download a file as bytes."""
+        storage = storage or self._default_storage()
+        content_bytes = await self._with_retries(f"download {file_key}", storage.download_file_bytes, file_key)
+        self.stats['downloads'] += 1
+        self.stats['bytes_downloaded'] += len(content_bytes)
+        return content_bytes
+
+    async def upload_text(self, repo_id: str, file_path: str, content: str, storage=None) -> Dict[str, Any]:
+        """Upload text content for a repository file."""
+        storage = storage or self._default_storage()
+        result = await self._with_retries(
+            f"upload {file_path}", storage.upload_file_content_sync, repo_id, file_path, content
+        )
+        self.stats['uploads'] += 1
+        self.stats['bytes_uploaded'] += result.get('size', 0)
+        return result
+
+    # ------------------------------------------------------------------
+    # Batch transfers
+    # ------------------------------------------------------------------
+
+    async def download_many(self, file_keys: Iterable[str], storage=None) -> Dict[str, bytes]:
+        """
+        Download many files concurrently.
+
+        Args:
+            file_keys: B2 file keys
+            storage: Optional B2StorageService (defaults to the singleton)
+
+        Returns:
+            Dict of file_key -> bytes; keys that failed to download are omitted
+        """
+        file_keys = list(dict.fromkeys(k for k in file_keys if k))
+        if not file_keys:
+            return {}
+
+        storage = storage or self._default_storage()
+        start_time = time.time()
+        results = await asyncio.gather(
+            *(self.download_bytes(key, storage) for key in file_keys),
+            return_exceptions=True
+        )
+
+        downloaded = {}
+        for key, result in zip(file_keys, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Failed to download {key} from B2: {str(result)}")
+            else:
+                downloaded[key] = result
+
+        logger.info(
+            f"Downloaded {len(downloaded)}/{len(file_keys)} files from B2",
+            duration_ms=round((time.time() - start_time) * 1000)
+        )
+        return downloaded
+
+    async def upload_many(
+        self,
+        items: Iterable[Dict[str, Any]],
+        storage=None
+    ) -> List[Union[Dict[str, Any], Exception]]:
+        """
+        Upload many repository files concurrently.
+
+        Args:
+            items: Dicts with 'repo_id', 'file_path' and 'content'
+            storage: Optional B2StorageService (defaults to the singleton)
+
+        Returns:
+            Upload results aligned with items; failures are returned as exceptions
+        """
+        items = list(items)
+        if not items:
+            return []
+
+        storage = storage or self._default_storage()
+        start_time = time.time()
+        results = await asyncio.gather(
+            *(self.upload_text(item['repo_id'], item['file_path'], item['content'], storage) for item in items),
+            return_exceptions=True
+        )
+
+        failed = sum(1 for r in results if isinstance(r, Exception))
+        logger.info(
+            f"Uploaded {len(items) - failed}/{len(items)} files to B2",
+            duration_ms=round((time.time() - start_time) * 1000)
+        )
+        return results
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get transfer counters."""
+        return {**self.stats, 'max_concurrency': self.max_concurrency}
+
+
+# Global instance
+b2_transfer_engine = B2TransferEngine()
@@ -3,15 +3,42 @@ Code Graph Builder - Parses code and builds graph structure in Neo4j.
 Analyzes code structure, relationships, and dependencies.
 """
 import ast
+import asyncio
 import re
-from typing import Dict, Any, List, Optional, Set
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional, Set, Tuple
 from pathlib import Path
 
+from config.settings import get_settings
+from utils.hashing import content_hash
+from services.graph_writer import GraphBatchWriter
 from services.neo4j_client import neo4j_client
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Files handed to a worker process per parse task
+PARSE_CHUNK_SIZE = 25
+
+_parse_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_parse_pool(workers: int) -> Optional[ProcessPoolExecutor]:
+    """Shared process pool for parsing (None when disabled)."""
+    global _parse_pool
+    if workers <= 0:
+        return None
+    if _parse_pool is None:
+        _parse_pool = ProcessPoolExecutor(max_workers=workers)
+    return _parse_pool
+
+
+def parse_files(sources: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+    """Parse (file_path, content) pairs. Runs inside a pool worker process."""
+    return [code_graph_builder.parse_file(file_path, content) for file_path, content in sources]
+
 
 class CodeGraphBuilder:
     """
@@ -35,7 +62,14 @@ class CodeGraphBuilder:
         files: List[Dict[str, Any]]
     ) -> Dict[str, Any]:
         """
-        Build complete graph for a repository.
+        Build or incrementally update the graph for a repository.
+        
+        Each File node stores the hash of the content it was built from. Only
+        new or changed files are parsed and re-written: their outgoing edges
+        are cleared, their Function/Class nodes are MERGEd in place and nodes
+        the new build no longer produces are pruned. Files that disappeared
+        from the repository are deleted with everything they contain, so the
+        cost of a re-analysis scales with the diff.
         
         Args:
             repository_id: Repository identifier
@@ -46,108 +80,200 @@ class CodeGraphBuilder:
             Dictionary with graph statistics
         """
         logger.info(f"Building code graph for repository: {repository_id}")
+        settings = get_settings()
+        started = time.perf_counter()
+        build_id = uuid.uuid4().hex
         
         # Create repository node
         await neo4j_client.create_repository_node(repository_id, repository_metadata)
         
         stats = {
             'files_processed': 0,
+            'files_unchanged': 0,
+            'files_deleted': 0,
             'functions_found': 0,
             'classes_found': 0,
             'imports_found': 0,
             'relationships_created': 0,
+            'nodes_pruned': 0,
             'errors': 0
         }
         
-        # Process each file
+        file_hashes: Dict[str, str] = {}
         for file_info in files:
-            try:
-                await self._process_file(repository_id, file_info, stats)
-            except Exception as e:
-                logger.error(f"Error processing file {file_info.get('path')}: {str(e)}")
-                stats['errors'] += 1
+            if file_info.get('content'):
+                file_hashes[file_info.get('path', '')] = content_hash(file_info['content'])
+            else:
+                logger.debug(f"Skipping empty file: {file_info.get('path', '')}")
+        
+        # Diff against the hashes stored on existing File nodes
+        existing_hashes = await neo4j_client.get_file_hashes(repository_id)
+        changed_files = [
+            f for f in files
+            if f.get('content') and existing_hashes.get(f.get('path', '')) != file_hashes[f.get('path', '')]
+        ]
+        deleted_paths = [path for path in existing_hashes if path not in file_hashes]
+        stats['files_unchanged'] = len(file_hashes) - len(changed_files)
         
+        if deleted_paths:
+            await neo4j_client.delete_file_subgraphs(repository_id, deleted_paths)
+            stats['files_deleted'] = len(deleted_paths)
+        
+        if changed_files:
+            # Edges are re-derived from the new content; incoming edges from unchanged files are kept
+            rebuilt_paths = [f.get('path', '') for f in changed_files if f.get('path', '') in existing_hashes]
+            if rebuilt_paths:
+                await neo4j_client.clear_outgoing_edges(repository_id, rebuilt_paths)
+            
+            # Parse changed files in parallel (process pool), off the event loop
+            parse_started = time.perf_counter()
+            parsed_files = await self._parse_files(changed_files, settings.graph_parse_workers)
+            stats['parse_seconds'] = round(time.perf_counter() - parse_started, 3)
+            
+            # Queue nodes and edges, then write them in UNWIND batches
+            writer = GraphBatchWriter(
+                neo4j_client.driver,
+                repository_id,
+                batch_size=settings.graph_write_batch_size,
+                build_id=build_id
+            )
+            for file_info, parsed_data in zip(changed_files, parsed_files):
+                try:
+                    await self._queue_file(writer, file_info, parsed_data, stats)
+                except Exception as e:
+                    logger.error(f"Error processing file {file_info.get('path')}: {str(e)}")
+                    stats['errors'] += 1
+                    # No hash is recorded, so the file is retried on the next build
+                    file_hashes.pop(file_info.get('path', ''), None)
+            await writer.flush()
+            
+            if rebuilt_paths:
+                stats['nodes_pruned'] = await neo4j_client.delete_stale_nodes(
+                    repository_id, rebuilt_paths, build_id
+                )
+            
+            write_stats = writer.get_stats()
+            stats['relationships_created'] = (
+                write_stats['rows_written']['calls'] + write_stats['rows_written']['inherits']
+            )
+            stats['write_seconds'] = write_stats['write_seconds']
+            stats['write_transactions'] = write_stats['transactions']
+            stats['rows_per_second'] = write_stats['rows_per_second']
+        
+        if changed_files or deleted_paths:
+            await neo4j_client.delete_orphan_modules(repository_id)
+            # Hashes are recorded last, so an interrupted build is redone next time
+            await neo4j_client.finalize_graph_build(
+                repository_id,
+                {f.get('path', ''): file_hashes[f.get('path', '')] for f in changed_files if f.get('path', '') in file_hashes},
+                build_id
+            )
+        
+        stats['duration_seconds'] = round(time.perf_counter() - started, 3)
         logger.info(f"Graph building completed for {repository_id}", **stats)
         
         return stats
     
-    async def _process_file(
+    async def _parse_files(self, files: List[Dict[str, Any]], workers: int) -> List[Dict[str, Any]]:
+        """Parse files in chunks on the process pool, falling back to a thread if the pool fails."""
+        sources = [(f.get('path', ''), f['content']) for f in files]
+        chunks = [sources[i:i + PARSE_CHUNK_SIZE] for i in range(0, len(sources), PARSE_CHUNK_SIZE)]
+        
+        loop = asyncio.get_running_loop()
+        pool = _get_parse_pool(workers)
+        
+        async def parse_chunk(chunk: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+            if pool is not None:
+                try:
+                    return await loop.run_in_executor(pool, parse_files, chunk)
+                except Exception as e:
+                    logger.warning(f"Process pool parsing failed, parsing in thread: {str(e)}")
+            return await asyncio.to_thread(parse_files, chunk)
+        
+        results = await asyncio.gather(*(parse_chunk(chunk) for chunk in chunks))
+        return [parsed for chunk_result in results for parsed in chunk_result]
+    
+    def parse_file(self, file_path: str, content: str) -> Dict[str, Any]:
+        """Parse a file based on its extension (empty result for unsupported languages)."""
+        parser = self.supported_languages.get(Path(file_path).suffix)
+        return parser(content, file_path) if parser else {}
+    
+    async def _queue_file(
         self,
-        repository_id: str,
+        writer: GraphBatchWriter,
         file_info: Dict[str, Any],
+        parsed_data: Dict[str, Any],
         stats: Dict[str, Any]
     ) -> None:
-        """Process a single file and add to graph."""
+        """Queue a file's node, its functions/classes and their edges on the batch writer."""
         file_path = file_info.get('path', '')
         content = file_info.get('content', '')
         
-        if not content:
-            logger.debug(f"Skipping empty file: {file_path}")
-            return
-        
-        # Create file node
-        file_metadata = {
+        # File node
+        await writer.add('files', {
+            'path': file_path,
             'name': file_info.get('name', Path(file_path).name),
             'extension': Path(file_path).suffix,
             'content_summary': content[:500] if len(content) > 500 else content,
             'size': len(content),
             'language': file_info.get('language', '')
-        }
-        
-        await neo4j_client.create_file_node(repository_id, file_path, file_metadata)
+        })
         stats['files_processed'] += 1
         
-        # Parse file based on extension
-        extension = Path(file_path).suffix
-        parser = self.supported_languages.get(extension)
+        # Function nodes
+        for func_data in parsed_data.get('functions', []):
+            await writer.add('functions', {
+                'file_path': file_path,
+                'name': func_data.get('name', ''),
+                'qualified_name': func_data.get('qualified_name', ''),
+                'signature': func_data.get('signature', ''),
+                'description': func_data.get('description', ''),
+                'start_line': func_data.get('start_line', 0),
+                'end_line': func_data.get('end_line', 0),
+                'complexity': func_data.get('complexity', 0),
+                'is_async': func_data.get('is_async', False),
+                'parameters': func_data.get('parameters', []),
+                'return_type': func_data.get('return_type', '')
+            })
+            stats['functions_found'] += 1
         
-        if parser:
-            parsed_data = parser(content, file_path)
-            
-            # Create function nodes
-            for func_data in parsed_data.get('functions', []):
-                await neo4j_client.create_function_node(repository_id, file_path, func_data)
-                stats['functions_found'] += 1
-            
-            # Create class nodes
-            for class_data in parsed_data.get('classes', []):
-                await neo4j_client.create_class_node(repository_id, file_path, class_data)
-                stats['classes_found'] += 1
-                
-                # Create inheritance relationships
-                for base_class in class_data.get('base_classes', []):
-                    try:
-                        await neo4j_client.create_inheritance_relationship(
-                            repository_id,
-                            class_data['qualified_name'],
-                            base_class
-                        )
-                        stats['relationships_created'] += 1
-                    except:
-                        pass  # Base class might not be in this repo
-            
-            # Create import relationships
-            for import_info in parsed_data.get('imports', []):
-                await neo4j_client.create_import_relationship(
-                    repository_id,
-                    file_path,
-                    import_info['module'],
-                    import_info.get('type', 'IMPORTS')
-                )
-                stats['imports_found'] += 1
+        # Class nodes and inheritance edges (base class might not be in this repo)
+        for class_data in parsed_data.get('classes', []):
+            await writer.add('classes', {
+                'file_path': file_path,
+                'name': class_data.get('name', ''),
+                'qualified_name': class_data.get('qualified_name', ''),
+                'description': class_data.get('description', ''),
+                'start_line': class_data.get('start_line', 0),
+                'end_line': class_data.get('end_line', 0),
+                'base_classes': class_data.get('base_classes', []),
+                'methods': class_data.get('methods', []),
+                'attributes': class_data.get('attributes', [])
+            })
+            stats['classes_found'] += 1
             
-            # Create call relationships
-            for call_info in parsed_data.get('calls', []):
-                try:
-                    await neo4j_client.create_call_relationship(
-                        repository_id,
-                        call_info['caller'],
-                        call_info['callee'],
-                        call_info.get('context')
-                    )
-                    stats['relationships_created'] += 1
-                except:
-                    pass  # Callee might not be in this repo
+            for base_class in class_data.get('base_classes', []):
+                await writer.add('inherits', {
+                    'child': class_data['qualified_name'],
+                    'parent': base_class
+                })
+        
+        # Import edges
+        for import_info in parsed_data.get('imports', []):
+            await writer.add('imports', {
+                'from_file': file_path,
+                'to_module': import_info['module'],
+                'import_type': import_info.get('type', 'IMPORTS')
+            })
+            stats['imports_found'] += 1
+        
+        # Call edges (callee might not be in this repo)
+        for call_info in parsed_data.get('calls', []):
+            await writer.add('calls', {
+                'caller': call_info['caller'],
+                'callee': call_info['callee'],
+                'context': call_info.get('context')
+            })
     
     def _parse_python(self, content: str, file_path: str) -> Dict[str, Any]:
         """Parse Python code using AST."""
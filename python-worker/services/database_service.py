@@ -4,9 +4,14 @@ Handles retrieving repository and file data from PostgreSQL database.
 """
 import asyncio
 import json
+import re
 from typing import List, Dict, Any, Optional
 import asyncpg
 from services.b2_singleton import get_b2_storage
+from services.b2_transfer_engine import b2_transfer_engine
+from services.repository_content_cache import repository_content_cache
+from services.keyword_index import keyword_index, NO_MATCH
+from services.file_handle import FileHandle, hydrate
 from utils.logger import get_logger
 from config.settings import get_settings
 
@@ -161,13 +166,15 @@ class DatabaseService:
             return []
     
     async def load_file_contents(self, files_metadata: List[Dict[str, Any]], 
-                                question_analysis: Dict[str, Any]) -> List[Dict[str, Any]]:
+                                question_analysis: Dict[str, Any],
+                                repository_id: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         Load file contents from B2 storage for relevant files.
         
         Args:
             files_metadata: List of file metadata from database
             question_analysis: Analysis of the question to prioritize files
+            repository_id: Repository ID; enables keyword index scoring when given
             
         Returns:
             List of files with content loaded
@@ -175,7 +182,7 @@ class DatabaseService:
         files_with_content = []
         
         # Filter files based on question analysis
-        relevant_files = self._filter_relevant_files(files_metadata, question_analysis)
+        relevant_files = self._filter_relevant_files(files_metadata, question_analysis, repository_id)
         
         # Load content for relevant files (limit to avoid overwhelming the AI)
         max_files = 20
@@ -197,14 +204,21 @@ class DatabaseService:
         return files_with_content
     
     def _filter_relevant_files(self, files_metadata: List[Dict[str, Any]], 
-                              question_analysis: Dict[str, Any]) -> List[Dict[str, Any]]:
+                              question_analysis: Dict[str, Any],
+                              repository_id: Optional[str] = None) -> List[Dict[str, Any]]:
         """Filter and prioritize files based on question analysis."""
         relevant_files = []
         
+        # Path/name keyword matches from the repository keyword index, if built
+        index = keyword_index.get(repository_id)
+        matches = index.match(question_analysis.get('keywords', []), fields=('path', 'name')) if index else {}
+        
         # Score files based on relevance
         scored_files = []
         for file_info in files_metadata:
-            score = self._calculate_file_relevance(file_info, question_analysis)
+            path = file_info.get('path', '')
+            keyword_match = matches.get(path, NO_MATCH) if index and path in index else None
+            score = self._calculate_file_relevance(file_info, question_analysis, keyword_match)
             if score > 0:
                 scored_files.append((score, file_info))
         
@@ -217,8 +231,14 @@ class DatabaseService:
         logger.info(f"Filtered {len(relevant_files)} relevant files from {len(files_metadata)} total files")
         return relevant_files
     def _calculate_file_relevance(self, file_info: Dict[str, Any], 
-                                 question_analysis: Dict[str, Any]) -> float:
-        """Calculate relevance score for a file based on question analysis."""
+                                 question_analysis: Dict[str, Any],
+                                 keyword_match=None) -> float:
+        """
+        Calculate relevance score for a file based on question analysis.
+        
+        keyword_match is the file's KeywordMatch from the repository keyword
+        index; without it, keywords are matched against path and name directly.
+        """
         score = 0.0
         
         file_path = file_info.get('path', '').lower()
@@ -251,11 +271,16 @@ class DatabaseService:
                 score += 7.0
         
         # Keyword matching in file path
-        for keyword in question_analysis.get('keywords', []):
-            if keyword in file_path:
-                score += 2.0
-            if keyword in file_name:
-                score += 1.5
+        if keyword_match is not None:
+            score += 2.0 * keyword_match.field_hits('path')
+            score += 1.5 * keyword_match.field_hits('name')
+            score += keyword_match.score
+        else:
+            for keyword in question_analysis.get('keywords', []):
+                if keyword in file_path:
+                    score += 2.0
+                if keyword in file_name:
+                    score += 1.5
         
         # File type preferences
         if file_type == 'file':
@@ -280,17 +305,34 @@ class DatabaseService:
         
         return score
     
-    async def _load_file_content(self, file_info: Dict[str, Any]) -> Optional[str]:
-        """Load file content from B2 storage."""
-        if not self.b2_storage:
-            logger.warning("B2 storage not available, cannot load file content")
-            return None
+    async def _load_file_content(
+        self,
+        file_info: Dict[str, Any],
+        repository_id: Optional[str] = None,
+        cache_version: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Load file content, using the repository content cache before B2 storage.
         
+        Args:
+            file_info: File metadata (must contain file_key)
+            repository_id: Repository ID; enables the content cache when given
+            cache_version: Pre-resolved cache version (avoids a lookup per file)
+        """
         file_key = file_info.get('file_key')
         if not file_key:
             logger.warning(f"No file_key for file: {file_info.get('path', 'unknown')}")
             return None
         
+        if repository_id:
+            cached_content = repository_content_cache.get(repository_id, file_key, cache_version)
+            if cached_content is not None:
+                return cached_content
+        
+        if not self.b2_storage:
+            logger.warning("B2 storage not available, cannot load file content")
+            return None
+        
         try:
             # Download file content from B2
             content = await self.b2_storage.download_file_content(file_key)
@@ -308,6 +350,8 @@ class DatabaseService:
             
             if content:
                 logger.info(f"✅ Downloaded {file_info.get('path')}: {len(content)} chars. Preview: {content[:100]!r}")
+                if repository_id:
+                    repository_content_cache.put(repository_id, file_key, content, cache_version)
             else:
                 logger.warning(f"⚠️ Downloaded empty content for {file_info.get('path')}")
             
@@ -1282,34 +1326,122 @@ class DatabaseService:
             
             # ✅ CRITICAL FIX: Load content for ALL files, not just filtered subset
             # This ensures hybrid retrieval can access any file's content
+            # Contents come from the content cache, misses are downloaded concurrently
+            contents = await self._load_file_contents_bulk(files_metadata, repository_id)
             files_with_content = []
             for file_info in files_metadata:
-                try:
-                    content = await self._load_file_content(file_info)
-                    if content:
-                        file_with_content = file_info.copy()
-                        file_with_content['content'] = content
-                        files_with_content.append(file_with_content)
-                    else:
-                        # Even if content load fails, include file with empty content
-                        # so it can still be used for path/metadata matching
-                        file_with_content = file_info.copy()
-                        file_with_content['content'] = ''
-                        files_with_content.append(file_with_content)
-                except Exception as e:
-                    logger.warning(f"Failed to load content for {file_info.get('path')}: {str(e)}")
-                    # Still include file with empty content
-                    file_with_content = file_info.copy()
-                    file_with_content['content'] = ''
-                    files_with_content.append(file_with_content)
+                # Even if content load fails, include file with empty content
+                # so it can still be used for path/metadata matching
+                file_with_content = file_info.copy()
+                file_with_content['content'] = contents.get(file_info.get('file_key'), '')
+                files_with_content.append(file_with_content)
             
-            logger.info(f"Successfully loaded content for {len(files_with_content)} files from repository {repository_id}")
+            cache_stats = repository_content_cache.get_stats()
+            logger.info(
+                f"Successfully loaded content for {len(files_with_content)} files from repository {repository_id}",
+                cache_hit_rate=round(cache_stats['hit_rate'], 3),
+                cache_memory_bytes=cache_stats['memory_bytes']
+            )
             return files_with_content
             
         except Exception as e:
             logger.error(f"Failed to get files with content for repository {repository_id}: {str(e)}")
             return []
 
+    async def _load_file_contents_bulk(
+        self,
+        files_metadata: List[Dict[str, Any]],
+        repository_id: str
+    ) -> Dict[str, str]:
+        """
+        Load contents for many files: content cache first, then one concurrent
+        B2 batch for the misses.
+        
+        Returns:
+            Dict of file_key -> content (files that could not be loaded are omitted)
+        """
+        cache_version = repository_content_cache.get_version(repository_id)
+        contents = {}
+        missing_keys = []
+        
+        for file_info in files_metadata:
+            file_key = file_info.get('file_key')
+            if not file_key:
+                continue
+            cached_content = repository_content_cache.get(repository_id, file_key, cache_version)
+            if cached_content is not None:
+                contents[file_key] = cached_content
+            else:
+                missing_keys.append(file_key)
+        
+        if missing_keys and self.b2_storage:
+            downloaded = await b2_transfer_engine.download_many(missing_keys, storage=self.b2_storage)
+            for file_key, content_bytes in downloaded.items():
+                content = self._decode_content(content_bytes)
+                if content:
+                    contents[file_key] = content
+                    repository_content_cache.put(repository_id, file_key, content, cache_version)
+        elif missing_keys:
+            logger.warning("B2 storage not available, cannot load file content")
+        
+        downloaded_count = sum(1 for k in missing_keys if k in contents)
+        logger.info(
+            f"Loaded {len(contents)}/{len(files_metadata)} file contents",
+            cache_hits=len(contents) - downloaded_count,
+            downloaded=downloaded_count
+        )
+        return contents
+    
+    @staticmethod
+    def _decode_content(content_bytes: bytes) -> Optional[str]:
+        """Decode downloaded bytes as UTF-8, falling back to latin-1."""
+        try:
+            return content_bytes.decode('utf-8')
+        except UnicodeDecodeError:
+            try:
+                return content_bytes.decode('latin-1')
+            except UnicodeDecodeError:
+                return None
+    
+    async def get_file_handles(self, repository_id: str) -> List[FileHandle]:
+        """
+        Get lazy file handles for metadata-first retrieval.
+        
+        Unlike get_files_with_content, no content is downloaded here: each
+        handle fetches its own content (through the content cache) only when
+        it is hydrated, so callers can rank on metadata across the whole
+        repository and download just the shortlisted files.
+        
+        Args:
+            repository_id: Repository ID
+            
+        Returns:
+            List of FileHandle objects (metadata dicts with lazy content)
+        """
+        files_metadata = await self.get_repository_files(repository_id)
+        if not files_metadata:
+            logger.warning(f"No files found in database for repository {repository_id}")
+            return []
+        
+        cache_version = repository_content_cache.get_version(repository_id)
+        
+        async def loader(file_info: Dict[str, Any]) -> Optional[str]:
+            return await self._load_file_content(file_info, repository_id, cache_version)
+        
+        return [FileHandle(file_info, loader) for file_info in files_metadata]
+    
+    async def hydrate_file_handles(self, files: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Load content for the given (shortlisted) file handles.
+        
+        Args:
+            files: FileHandle objects and/or plain file dicts
+            
+        Returns:
+            The same files with content loaded
+        """
+        return await hydrate(files)
+
     async def get_user_info(self, user_id: str) -> Optional[Dict[str, Any]]:
         """
         Get user information including GitHub token.
@@ -1650,14 +1782,18 @@ class DatabaseService:
                     logger.warning(f"File not found: {file_path} in repo {repository_id}")
                     return None
                 
-                # Load content from B2 storage
+                # Load content from the content cache or B2 storage
                 if row['file_key']:
+                    cached_content = repository_content_cache.get(repository_id, row['file_key'])
+                    if cached_content is not None:
+                        return cached_content
                     try:
-                        content_bytes = await asyncio.to_thread(
-                            self.b2_storage.download_file,
-                            row['file_key']
+                        content_bytes = await b2_transfer_engine.download_bytes(
+                            row['file_key'],
+                            storage=self.b2_storage
                         )
                         content = content_bytes.decode('utf-8', errors='ignore')
+                        repository_content_cache.put(repository_id, row['file_key'], content)
                         return content
                     except Exception as e:
                         logger.error(f"Failed to load file from B2: {str(e)}")
@@ -1679,6 +1815,12 @@ class DatabaseService:
         """
         Search files by keywords using full-text search.
         
+        Candidates are matched with parameterized ILIKE on path and summary
+        (served by the pg_trgm GIN indexes) and ranked with ts_rank, path
+        terms weighted above summary terms. Contents come from the content
+        cache, with misses downloaded concurrently through the B2 transfer
+        engine.
+        
         Args:
             repository_id: Repository ID
             keywords: List of keywords to search for
@@ -1688,54 +1830,75 @@ class DatabaseService:
             List of matching files with content
         """
         try:
-            pool = await self._get_connection_pool()
-            
-            # Build keyword search query
-            keyword_conditions = []
-            for keyword in keywords[:10]:  # Limit to 10 keywords
-                keyword_conditions.append(f"(path ILIKE '%{keyword}%' OR summary ILIKE '%{keyword}%')")
-            
-            if not keyword_conditions:
+            keywords = list(dict.fromkeys(k.strip() for k in keywords if k and k.strip()))[:10]  # Limit to 10 keywords
+            tsquery = self._keyword_tsquery(keywords)
+            if not keywords or not tsquery:
                 return []
             
+            # Keywords are bound as $4.. - never interpolated into the SQL text
+            keyword_conditions = [
+                f"path ILIKE ${i} OR summary ILIKE ${i}"
+                for i in range(4, 4 + len(keywords))
+            ]
             query = f"""
-                SELECT id, path, name, size, summary, language, file_key, file_url
+                SELECT id, path, name, size, summary, language, file_key, file_url,
+                       ts_rank(
+                           setweight(to_tsvector('simple', translate(path, '/._-', '    ')), 'A') ||
+                           setweight(to_tsvector('simple', coalesce(summary, '')), 'B'),
+                           to_tsquery('simple', $2),
+                           32
+                       ) AS rank
                 FROM repository_files
                 WHERE repository_id = $1 AND ({' OR '.join(keyword_conditions)})
-                ORDER BY size ASC
-                LIMIT {limit}
+                ORDER BY rank DESC, size ASC
+                LIMIT $3
             """
             
+            pool = await self._get_connection_pool()
             async with pool.acquire() as connection:
-                rows = await connection.fetch(query, repository_id)
-                
-                # Load file contents
-                results = []
-                for row in rows:
-                    if row['file_key']:
-                        try:
-                            content_bytes = await asyncio.to_thread(
-                                self.b2_storage.download_file,
-                                row['file_key']
-                            )
-                            content = content_bytes.decode('utf-8', errors='ignore')
-                            
-                            results.append({
-                                'file_path': row['path'],
-                                'content': content[:10000],  # Limit to 10K chars
-                                'match_score': 0.7  # Base score for keyword match
-                            })
-                        except Exception as e:
-                            logger.warning(f"Failed to load {row['path']}: {str(e)}")
-                            continue
-                
-                logger.info(f"Found {len(results)} files matching keywords")
-                return results
+                rows = await connection.fetch(
+                    query, repository_id, tsquery, limit,
+                    *[self._like_pattern(kw) for kw in keywords]
+                )
+            
+            # Load file contents (content cache, then one concurrent B2 batch)
+            contents = await self._load_file_contents_bulk([dict(row) for row in rows], repository_id)
+            
+            results = []
+            for row in rows:
+                content = contents.get(row['file_key']) if row['file_key'] else None
+                if not content:
+                    continue
+                
+                results.append({
+                    'file_path': row['path'],
+                    'content': content[:10000],  # Limit to 10K chars
+                    'match_score': 0.5 + 0.5 * float(row['rank'] or 0.0)  # rank/(rank+1) is in [0, 1)
+                })
+            
+            logger.info(f"Found {len(results)} files matching keywords")
+            return results
                 
         except Exception as e:
             logger.error(f"Failed to search files by keywords: {str(e)}")
             return []
     
+    @staticmethod
+    def _keyword_tsquery(keywords: List[str]) -> str:
+        """OR of prefix terms for to_tsquery (keywords reduced to [a-z0-9], so always valid syntax)."""
+        terms = []
+        for keyword in keywords:
+            words = re.findall(r'[a-z0-9]+', keyword.lower())
+            if words:
+                terms.append(' & '.join(f"{word}:*" for word in words))
+        return ' | '.join(f"({term})" for term in terms)
+    
+    @staticmethod
+    def _like_pattern(keyword: str) -> str:
+        """Substring ILIKE pattern with LIKE wildcards in the keyword escaped."""
+        escaped = keyword.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        return f"%{escaped}%"
+    
     async def get_file_dependencies(
         self,
         repository_id: str,
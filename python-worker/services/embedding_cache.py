@@ -0,0 +1,186 @@
+"""
+Shared cache of question/query embeddings.
+
+Entries are keyed by embedding model + SHA-256 of the text, so keys are stable
+across restarts and identical in the API and worker processes (unlike Python's
+per-process randomized `hash()`):
+
+1. In-process LRU bounded by entry count (vectors kept as float32 arrays)
+2. Optional Redis tier shared by every process, storing float16 or float32
+   bytes (base64, since the Redis client decodes responses) with a TTL
+
+Only real model outputs should be cached; callers skip fallback vectors.
+"""
+import base64
+import hashlib
+import struct
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from config.settings import get_settings
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_DTYPE_CODES = {'float16': 'e', 'float32': 'f'}
+
+
+def embedding_cache_key(model: str, text: str) -> str:
+    """Cache key for a text embedded by a model."""
+    digest = hashlib.sha256(text.encode('utf-8', errors='replace')).hexdigest()
+    return f"emb:{model}:{digest}"
+
+
+class EmbeddingCache:
+    """Two-tier (memory LRU + Redis) embedding cache."""
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        redis_enabled: Optional[bool] = None,
+        redis_ttl: Optional[int] = None,
+        redis_dtype: Optional[str] = None
+    ):
+        settings = get_settings()
+        self.max_entries = max_entries if max_entries is not None else settings.embedding_cache_max_entries
+        self.redis_enabled = redis_enabled if redis_enabled is not None else settings.embedding_cache_redis_enabled
+        self.redis_ttl = redis_ttl or settings.embedding_cache_redis_ttl
+        dtype = redis_dtype or settings.embedding_cache_redis_dtype
+        self.redis_code = _DTYPE_CODES.get(dtype, 'e')
+
+        self._memory: "OrderedDict[str, array]" = OrderedDict()
+        self._lock = threading.RLock()
+
+        self.stats = {
+            'memory_hits': 0,
+            'redis_hits': 0,
+            'misses': 0,
+            'stores': 0,
+            'evictions': 0,
+            'redis_errors': 0
+        }
+
+    @property
+    def redis(self):
+        """Connected redis.asyncio client, or None (the Redis tier is skipped)."""
+        if not self.redis_enabled:
+            return None
+        from services.redis_client import redis_client
+        return redis_client.redis
+
+    async def get(self, model: str, text: str) -> Optional[List[float]]:
+        """Cached embedding of text for model, or None."""
+        return (await self.get_many(model, [text]))[0]
+
+    async def get_many(self, model: str, texts: List[str]) -> List[Optional[List[float]]]:
+        """Cached embeddings for many texts (one Redis round trip for the memory misses)."""
+        keys = [embedding_cache_key(model, text) for text in texts]
+        results: List[Optional[List[float]]] = [None] * len(keys)
+
+        missing = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    self.stats['memory_hits'] += 1
+                    results[i] = vector.tolist()
+                else:
+                    missing.append(i)
+
+        redis = self.redis
+        if missing and redis is not None:
+            try:
+                values = await redis.mget([keys[i] for i in missing])
+            except Exception as e:
+                self.stats['redis_errors'] += 1
+                logger.debug(f"Embedding cache Redis read failed: {str(e)}")
+                values = [None] * len(missing)
+            for i, value in zip(missing, values):
+                if value:
+                    vector = self._decode(value)
+                    self._put_memory(keys[i], vector)
+                    results[i] = vector.tolist()
+                    self.stats['redis_hits'] += 1
+
+        self.stats['misses'] += sum(1 for vector in results if vector is None)
+        return results
+
+    async def put(self, model: str, text: str, embedding: List[float]) -> None:
+        """Store an embedding in both tiers."""
+        await self.put_many(model, [text], [embedding])
+
+    async def put_many(self, model: str, texts: List[str], embeddings: List[List[float]]) -> None:
+        """Store many embeddings (one Redis pipeline)."""
+        entries = [
+            (embedding_cache_key(model, text), array('f', embedding))
+            for text, embedding in zip(texts, embeddings)
+            if embedding
+        ]
+        for key, vector in entries:
+            self._put_memory(key, vector)
+        self.stats['stores'] += len(entries)
+
+        redis = self.redis
+        if entries and redis is not None:
+            try:
+                pipe = redis.pipeline(transaction=False)
+                for key, vector in entries:
+                    pipe.setex(key, self.redis_ttl, self._encode(vector))
+                await pipe.execute()
+            except Exception as e:
+                self.stats['redis_errors'] += 1
+                logger.debug(f"Embedding cache Redis write failed: {str(e)}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss metrics for both tiers."""
+        with self._lock:
+            hits = self.stats['memory_hits'] + self.stats['redis_hits']
+            lookups = hits + self.stats['misses']
+            return {
+                **self.stats,
+                'hit_rate': hits / lookups if lookups else 0.0,
+                'memory_entries': len(self._memory),
+                'max_entries': self.max_entries,
+                'redis_enabled': self.redis_enabled
+            }
+
+    def _put_memory(self, key: str, vector: array) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._memory[key] = vector
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def _encode(self, vector: array) -> str:
+        data = vector.tobytes() if self.redis_code == 'f' else array_to_half(vector)
+        return f"{self.redis_code}:{base64.b64encode(data).decode('ascii')}"
+
+    @staticmethod
+    def _decode(value: str) -> array:
+        code, _, payload = value.partition(':')
+        data = base64.b64decode(payload)
+        if code == 'e':
+            return half_to_array(data)
+        vector = array('f')
+        vector.frombytes(data)
+        return vector
+
+
+def array_to_half(vector: array) -> bytes:
+    """Pack float32 values as IEEE half-precision bytes."""
+    return struct.pack(f'<{len(vector)}e', *vector)
+
+
+def half_to_array(data: bytes) -> array:
+    """Unpack IEEE half-precision bytes into a float32 array."""
+    return array('f', struct.unpack(f'<{len(data) // 2}e', data))
+
+
+# Global instance
+embedding_cache = EmbeddingCache()
@@ -0,0 +1,327 @@
+"""
+Batched embedding ingestion pipeline.
+
+Items flow through three stages connected by bounded queues so that
+embedding requests and Qdrant upserts overlap instead of alternating:
+
+    producer (batches of texts) -> embedding workers -> upsert consumer
+
+The collection is checked once per job and points are upserted in chunks.
+Point ids are deterministic (see chunk_point_id), so re-ingesting a repository
+only embeds chunks whose content changed and deletes points that no longer exist.
+"""
+import asyncio
+import time
+import uuid
+from typing import Any, Dict, Iterable, List, Optional
+
+from config.settings import get_settings
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_DONE = object()
+
+# Namespace for deterministic chunk point ids
+CHUNK_ID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "https://gittldr.vercel.app/chunks")
+
+
+
+def chunk_point_id(repo_id: str, file_path: str, chunk_index: int, chunk_hash: str) -> str:
+    """Stable Qdrant point id for a chunk: identical content at the same position keeps its id."""
+    return str(uuid.uuid5(CHUNK_ID_NAMESPACE, f"{repo_id}:{file_path}:{chunk_index}:{chunk_hash}"))
+
+
+class EmbeddingPipeline:
+    """Producer/consumer pipeline that embeds items in batches and upserts them in chunks."""
+
+    def __init__(
+        self,
+        batch_size: Optional[int] = None,
+        upsert_batch_size: Optional[int] = None,
+        embed_workers: Optional[int] = None,
+        queue_size: Optional[int] = None
+    ):
+        settings = get_settings()
+        self.batch_size = batch_size or settings.embedding_batch_size
+        self.upsert_batch_size = upsert_batch_size or settings.qdrant_upsert_batch_size
+        self.embed_workers = embed_workers or settings.embedding_workers
+        self.queue_size = queue_size or settings.embedding_queue_size
+
+    @staticmethod
+    def _default_embedder():
+        from services.gemini_client import gemini_client
+        return gemini_client
+
+    @staticmethod
+    def _default_vector_store():
+        from services.qdrant_client import qdrant_client
+        return qdrant_client
+
+    async def run(
+        self,
+        items: Iterable[Dict[str, Any]],
+        collection_name: Optional[str] = None,
+        dimension: Optional[int] = None,
+        embedder=None,
+        vector_store=None
+    ) -> Dict[str, Any]:
+        """
+        Embed and store items.
+
+        Args:
+            items: Dicts with 'id', 'text' and 'payload' (payload should carry 'file_path')
+            collection_name: Target collection (defaults to the main collection)
+            dimension: Vector size used if the collection has to be created
+            embedder: Object with generate_embeddings_batch/generate_embedding (defaults to gemini_client)
+            vector_store: Object with ensure_collection_exists/upsert_points (defaults to qdrant_client)
+
+        Returns:
+            Throughput report: points/files stored and failed (failed_files lists the paths
+            with at least one chunk not stored), durations, files/s and points/s
+        """
+        settings = get_settings()
+        embedder = embedder or self._default_embedder()
+        vector_store = vector_store or self._default_vector_store()
+        collection_name = collection_name or settings.collection_name
+        dimension = dimension or settings.embedding_dimension
+
+        stats = {
+            'points_created': 0,
+            'points_failed': 0,
+            'files_embedded': 0,
+            'embedding_batches': 0,
+            'upsert_requests': 0,
+            'embed_seconds': 0.0,
+            'upsert_seconds': 0.0
+        }
+        embedded_files = set()
+        failed_files = set()
+        start_time = time.time()
+
+        # One collection check per job instead of one per point
+        await asyncio.to_thread(vector_store.ensure_collection_exists, collection_name, dimension)
+
+        embed_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        upsert_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+
+        async def produce():
+            batch = []
+            for item in items:
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    await embed_queue.put(batch)
+                    batch = []
+            if batch:
+                await embed_queue.put(batch)
+            for _ in range(self.embed_workers):
+                await embed_queue.put(_DONE)
+
+        async def embed_worker():
+            while True:
+                batch = await embed_queue.get()
+                if batch is _DONE:
+                    await upsert_queue.put(_DONE)
+                    return
+                points = await self._embed_batch(batch, embedder, stats, failed_files)
+                if points:
+                    await upsert_queue.put(points)
+
+        async def upsert_consumer():
+            buffer: List[Dict[str, Any]] = []
+            finished_workers = 0
+            while finished_workers < self.embed_workers:
+                points = await upsert_queue.get()
+                if points is _DONE:
+                    finished_workers += 1
+                    continue
+                buffer.extend(points)
+                while len(buffer) >= self.upsert_batch_size:
+                    chunk, buffer = buffer[:self.upsert_batch_size], buffer[self.upsert_batch_size:]
+                    await self._upsert_chunk(chunk, collection_name, vector_store, stats, embedded_files, failed_files)
+            if buffer:
+                await self._upsert_chunk(buffer, collection_name, vector_store, stats, embedded_files, failed_files)
+
+        await asyncio.gather(
+            produce(),
+            *(embed_worker() for _ in range(self.embed_workers)),
+            upsert_consumer()
+        )
+
+        duration = max(time.time() - start_time, 1e-6)
+        stats['files_embedded'] = len(embedded_files)
+        stats['failed_files'] = sorted(path for path in failed_files if path is not None)
+        stats['duration_seconds'] = round(duration, 3)
+        stats['files_per_second'] = round(stats['files_embedded'] / duration, 2)
+        stats['points_per_second'] = round(stats['points_created'] / duration, 2)
+        stats['embed_seconds'] = round(stats['embed_seconds'], 3)
+        stats['upsert_seconds'] = round(stats['upsert_seconds'], 3)
+
+        logger.info(
+            f"📦 Embedding pipeline stored {stats['points_created']} points "
+            f"({stats['points_failed']} failed) for {stats['files_embedded']} files",
+            files_per_second=stats['files_per_second'],
+            points_per_second=stats['points_per_second']
+        )
+        return stats
+
+    async def reindex(
+        self,
+        repo_id: str,
+        items: Iterable[Dict[str, Any]],
+        collection_name: Optional[str] = None,
+        dimension: Optional[int] = None,
+        embedder=None,
+        vector_store=None
+    ) -> Dict[str, Any]:
+        """
+        Incrementally re-index a repository.
+
+        Items whose id already exists are skipped (their content hash is part of
+        the id); only their line range is refreshed if it moved. Points stored
+        for the repository that are not in `items` are deleted afterwards, except
+        those of files whose replacement chunks failed to embed or upsert (the
+        old vectors keep serving the file until the next re-index).
+
+        Args:
+            repo_id: Repository id (points are scoped by the 'repo_id' payload)
+            items: Dicts with deterministic 'id', 'text' and 'payload'
+
+        Returns:
+            The run() report plus chunks_total, chunks_unchanged, payloads_updated,
+            points_deleted and stale_points_kept
+        """
+        vector_store = vector_store or self._default_vector_store()
+        items = list(items)
+
+        try:
+            existing = await asyncio.to_thread(
+                vector_store.get_repository_point_index,
+                repo_id,
+                ['start_line', 'end_line', 'file_path'],
+                collection_name
+            )
+        except Exception as e:
+            # Without the current index we can't diff safely: embed everything, delete nothing
+            logger.warning(f"Could not load existing points for {repo_id}, running full index: {str(e)}")
+            stats = await self.run(items, collection_name, dimension, embedder, vector_store)
+            stats.update({
+                'chunks_total': len(items), 'chunks_unchanged': 0, 'payloads_updated': 0,
+                'points_deleted': 0, 'stale_points_kept': 0
+            })
+            return stats
+
+        to_embed = []
+        moved = {}
+        for item in items:
+            stored = existing.get(item['id'])
+            if stored is None:
+                to_embed.append(item)
+                continue
+            lines = {'start_line': item['payload'].get('start_line'), 'end_line': item['payload'].get('end_line')}
+            if any(stored.get(k) != v for k, v in lines.items()):
+                moved[item['id']] = lines
+
+        stats = await self.run(to_embed, collection_name, dimension, embedder, vector_store)
+
+        payloads_updated = 0
+        if moved:
+            try:
+                payloads_updated = await asyncio.to_thread(vector_store.set_point_payloads, moved, collection_name)
+            except Exception as e:
+                logger.warning(f"Failed to refresh line ranges for {len(moved)} chunks: {str(e)}")
+
+        current_ids = {item['id'] for item in items}
+        failed_files = set(stats['failed_files'])
+        stale_ids = [
+            point_id for point_id, stored in existing.items()
+            if point_id not in current_ids and stored.get('file_path') not in failed_files
+        ]
+        stale_kept = sum(1 for point_id in existing if point_id not in current_ids) - len(stale_ids)
+        if stale_kept:
+            logger.warning(
+                f"Keeping {stale_kept} stale points of {len(failed_files)} files whose new chunks were not stored"
+            )
+        points_deleted = 0
+        if stale_ids:
+            try:
+                points_deleted = await asyncio.to_thread(vector_store.delete_points, stale_ids, collection_name)
+            except Exception as e:
+                logger.warning(f"Failed to delete {len(stale_ids)} stale points: {str(e)}")
+
+        if payloads_updated or points_deleted:
+            # Upserts invalidate the local index themselves; these writes carry no repo_id
+            from services.local_vector_index import local_vector_index
+            local_vector_index.invalidate(repo_id)
+
+        stats.update({
+            'chunks_total': len(items),
+            'chunks_unchanged': len(items) - len(to_embed),
+            'payloads_updated': payloads_updated,
+            'points_deleted': points_deleted,
+            'stale_points_kept': stale_kept
+        })
+        logger.info(
+            f"♻️ Re-indexed {repo_id}: {len(to_embed)}/{len(items)} chunks embedded, "
+            f"{points_deleted} stale points deleted"
+        )
+        return stats
+
+    async def _embed_batch(
+        self, batch: List[Dict[str, Any]], embedder, stats: Dict[str, Any], failed_files: set
+    ) -> List[Dict[str, Any]]:
+        """Embed one batch; falls back to per-item requests if the batch call fails."""
+        texts = [item['text'] for item in batch]
+        started = time.time()
+        try:
+            vectors = await embedder.generate_embeddings_batch(texts)
+            if len(vectors) != len(texts):
+                raise ValueError(f"expected {len(texts)} embeddings, got {len(vectors)}")
+        except Exception as e:
+            logger.warning(f"Batch embedding failed, embedding {len(texts)} items individually: {str(e)}")
+            vectors = []
+            for text in texts:
+                try:
+                    vectors.append(await embedder.generate_embedding(text))
+                except Exception as item_error:
+                    logger.warning(f"Failed to embed item: {str(item_error)}")
+                    vectors.append(None)
+        finally:
+            stats['embed_seconds'] += time.time() - started
+            stats['embedding_batches'] += 1
+
+        points = []
+        for item, vector in zip(batch, vectors):
+            if vector is None:
+                stats['points_failed'] += 1
+                failed_files.add(item['payload'].get('file_path'))
+                continue
+            points.append({'id': item['id'], 'vector': vector, 'payload': item['payload']})
+        return points
+
+    async def _upsert_chunk(
+        self,
+        points: List[Dict[str, Any]],
+        collection_name: str,
+        vector_store,
+        stats: Dict[str, Any],
+        embedded_files: set,
+        failed_files: set
+    ) -> None:
+        """Upsert one chunk of points and record it."""
+        started = time.time()
+        try:
+            await vector_store.upsert_points(points, collection_name=collection_name, batch_size=self.upsert_batch_size)
+            stats['points_created'] += len(points)
+            embedded_files.update(p['payload'].get('file_path') for p in points)
+        except Exception as e:
+            stats['points_failed'] += len(points)
+            failed_files.update(p['payload'].get('file_path') for p in points)
+            logger.warning(f"Failed to upsert {len(points)} points: {str(e)}")
+        finally:
+            stats['upsert_seconds'] += time.time() - started
+            stats['upsert_requests'] += 1
+
+
+# Global instance
+embedding_pipeline = EmbeddingPipeline()
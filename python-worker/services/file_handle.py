@@ -0,0 +1,82 @@
+"""
+Lazy file handles for metadata-first retrieval.
+
+A FileHandle carries a repository file's metadata (path, summary, file_key, ...)
+and only downloads its content when it is shortlisted. Because it is a dict, it
+can be passed anywhere a file metadata dict is expected.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+ContentLoader = Callable[[Dict[str, Any]], Awaitable[Optional[str]]]
+
+
+class FileHandle(dict):
+    """File metadata dict whose 'content' is fetched on first load."""
+
+    def __init__(self, metadata: Dict[str, Any], loader: Optional[ContentLoader] = None):
+        super().__init__(metadata)
+        # Metadata-only until hydrated; `.get('content', '')` keeps working
+        if self.get('content') is None:
+            self.pop('content', None)
+        self._loader = loader
+        self._load_task: Optional[asyncio.Task] = None
+
+    @property
+    def is_loaded(self) -> bool:
+        """Whether the content has been fetched (or was provided up front)."""
+        return 'content' in self
+
+    @property
+    def content(self) -> Optional[str]:
+        """Loaded content, or None if the handle has not been hydrated yet."""
+        return self.get('content')
+
+    async def load_content(self) -> str:
+        """
+        Fetch the content on first call and memoize it.
+
+        Concurrent callers share one download. Failed loads resolve to an
+        empty string so the file can still be used for metadata matching.
+        """
+        if self.is_loaded:
+            return self['content']
+
+        if self._loader is None:
+            self['content'] = ''
+            return ''
+
+        if self._load_task is None:
+            self._load_task = asyncio.ensure_future(self._load())
+        return await self._load_task
+
+    async def _load(self) -> str:
+        try:
+            content = await self._loader(self)
+        except Exception as e:
+            logger.warning(f"Failed to load content for {self.get('path', 'unknown')}: {str(e)}")
+            content = None
+
+        self['content'] = content or ''
+        return self['content']
+
+
+async def hydrate(files: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Load content for every FileHandle in `files` concurrently.
+
+    Plain dicts (e.g. attachments) are passed through unchanged.
+
+    Returns:
+        The same files, in the same order
+    """
+    files = list(files)
+    pending = [f for f in files if isinstance(f, FileHandle) and not f.is_loaded]
+    if pending:
+        await asyncio.gather(*(f.load_content() for f in pending))
+        logger.info(f"Hydrated content for {len(pending)} shortlisted files")
+    return files
@@ -0,0 +1,124 @@
+"""
+Per-repository file index in Redis.
+
+File metadata lives in one hash per file (`file:{repo_id}:{path}`). Instead of
+discovering those hashes with KEYS (O(keyspace), blocks every tenant on a
+shared Redis), the writer maintains:
+
+- `repo_file_index:{repo_id}`: SET of indexed file paths for the repository
+- `repo_file_index:repos`: SET of repository ids that have an index
+
+Repositories ingested before the index existed are backfilled with SCAN, either
+lazily on first read or for the whole keyspace via `migrate_all()`.
+"""
+from typing import Any, Dict, List, Optional
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+REPO_INDEX_KEY = "repo_file_index:repos"
+
+
+def file_index_key(repo_id: str) -> str:
+    return f"repo_file_index:{repo_id}"
+
+
+def file_metadata_key(repo_id: str, file_path: str) -> str:
+    return f"file:{repo_id}:{file_path}"
+
+
+class FileIndex:
+    """Maintains and reads the per-repository file index."""
+
+    def __init__(self, scan_count: int = 1000):
+        self.scan_count = scan_count
+
+    @property
+    def redis_client(self):
+        from services.redis_client import redis_client
+        return redis_client
+
+    def queue_replace(self, pipe, repo_id: str, file_paths: List[str]) -> None:
+        """Add the commands that replace a repository's index to a (MULTI) pipeline."""
+        pipe.delete(file_index_key(repo_id))
+        if file_paths:
+            pipe.sadd(file_index_key(repo_id), *file_paths)
+        pipe.sadd(REPO_INDEX_KEY, repo_id)
+
+    async def get_paths(self, repo_id: str, backfill: bool = True) -> List[str]:
+        """Indexed file paths of a repository, backfilling the index with SCAN if it is missing."""
+        paths = await self.redis_client.smembers(file_index_key(repo_id))
+        if not paths and backfill:
+            paths = await self.backfill(repo_id)
+        return sorted(paths)
+
+    async def get_repository_ids(self) -> List[str]:
+        """Repositories that have a file index."""
+        return await self.redis_client.smembers(REPO_INDEX_KEY)
+
+    async def get_metadata(self, repo_id: str, file_paths: List[str]) -> Dict[str, Dict[str, str]]:
+        """File metadata hashes for many paths in one pipelined round trip (missing paths are omitted)."""
+        keys = [file_metadata_key(repo_id, path) for path in file_paths]
+        hashes = await self.redis_client.hgetall_many(keys)
+        return {path: data for path, data in zip(file_paths, hashes) if data}
+
+    async def find_in_repositories(self, file_paths: List[str], exclude_repo_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Look up the given paths (e.g. alternative spellings of one path) in every indexed repository.
+
+        Returns:
+            List of {'repo_id', 'path', 'metadata'} for the hashes that exist
+        """
+        repo_ids = [r for r in await self.get_repository_ids() if r != exclude_repo_id]
+        candidates = [(repo_id, path) for repo_id in repo_ids for path in file_paths]
+        hashes = await self.redis_client.hgetall_many(
+            [file_metadata_key(repo_id, path) for repo_id, path in candidates]
+        )
+        return [
+            {'repo_id': repo_id, 'path': path, 'metadata': data}
+            for (repo_id, path), data in zip(candidates, hashes)
+            if data
+        ]
+
+    async def backfill(self, repo_id: str) -> List[str]:
+        """Build the index of one repository from its existing `file:` hashes using SCAN."""
+        prefix = file_metadata_key(repo_id, "")
+        keys = await self.redis_client.scan_keys(f"{prefix}*", count=self.scan_count)
+        paths = [key[len(prefix):] for key in keys]
+        if paths:
+            pipe = self.redis_client.pipeline(transaction=True)
+            self.queue_replace(pipe, repo_id, paths)
+            await pipe.execute()
+            logger.info(f"Backfilled file index for repository {repo_id} with {len(paths)} files")
+        return paths
+
+    async def migrate_all(self) -> Dict[str, int]:
+        """
+        Build indexes for every repository that has `file:` hashes (one SCAN over the keyspace).
+
+        Safe to re-run; existing indexes are extended, not replaced.
+        """
+        paths_by_repo: Dict[str, List[str]] = {}
+        for key in await self.redis_client.scan_keys("file:*", count=self.scan_count):
+            parts = key.split(':', 2)
+            if len(parts) == 3:
+                paths_by_repo.setdefault(parts[1], []).append(parts[2])
+
+        pipe = self.redis_client.pipeline(transaction=False)
+        for repo_id, paths in paths_by_repo.items():
+            pipe.sadd(file_index_key(repo_id), *paths)
+            pipe.sadd(REPO_INDEX_KEY, repo_id)
+        if paths_by_repo:
+            await pipe.execute()
+
+        stats = {
+            'repositories': len(paths_by_repo),
+            'files': sum(len(paths) for paths in paths_by_repo.values())
+        }
+        logger.info("File index migration complete", **stats)
+        return stats
+
+
+# Global instance
+file_index = FileIndex()
@@ -7,6 +7,7 @@ import json
 from typing import List, Dict, Any, Optional
 from services.b2_singleton import get_b2_storage
 from services.redis_client import redis_client
+from services.file_index import file_index
 from services.database_service import DatabaseService
 from utils.logger import get_logger
 
@@ -55,7 +56,7 @@ class FileRetrievalService:
             # Ensure Redis is connected
             redis_available = await self._ensure_redis_connected()
             file_list = []
-            file_keys = []  # Initialize file_keys to avoid NameError
+            file_paths = []  # Initialize file_paths to avoid NameError
             
             if redis_available:
                 # Check if we have repository file data
@@ -65,33 +66,17 @@ class FileRetrievalService:
                 if not repo_files_data or not repo_files_data.get('file_paths'):
                     logger.warning(f"No file metadata found in Redis for repository {repo_id}")
                     
-                    # Fallback 1: Try to find files by searching all file keys for this repo_id
-                    logger.info(f"Searching for files using pattern: file:{repo_id}:*")
-                    file_keys = await redis_client.keys(f"file:{repo_id}:*")
+                    # Fallback 1: Use the per-repository file index (backfilled with SCAN if missing)
+                    file_paths = await file_index.get_paths(repo_id)
                 
-                if file_keys:
-                    logger.info(f"Found {len(file_keys)} files directly for repo {repo_id}")
-                    for file_key in file_keys:
+                if file_paths:
+                    logger.info(f"Found {len(file_paths)} indexed files for repo {repo_id}")
+                    metadata_by_path = await file_index.get_metadata(repo_id, file_paths)
+                    for path, file_metadata in metadata_by_path.items():
                         try:
-                            file_metadata = await redis_client.hgetall(file_key)
-                            if file_metadata:
-                                # Extract path from key
-                                path = file_key.split(':', 2)[2]  # Remove "file:{repo_id}:"
-                                
-                                file_dict = {
-                                    'id': f"redis_{repo_id}_{path}",
-                                    'path': file_metadata.get('path', path),
-                                    'name': file_metadata.get('name', path.split('\\')[-1].split('/')[-1]),
-                                    'type': file_metadata.get('type', 'file'),
-                                    'size': int(file_metadata.get('size', 0)),
-                                    'language': file_metadata.get('language', ''),
-                                    'file_url': file_metadata.get('file_url'),
-                                    'file_key': file_metadata.get('file_key'),
-                                    'content': file_metadata.get('content')
-                                }
-                                file_list.append(file_dict)
+                            file_list.append(self._to_file_dict(repo_id, path, file_metadata))
                         except Exception as e:
-                            logger.warning(f"Error processing file key {file_key}: {str(e)}")
+                            logger.warning(f"Error processing file {path}: {str(e)}")
                 
                 # Fallback 2: Try to list files directly from B2 storage
                 if not file_list and self.b2_storage:
@@ -123,42 +108,30 @@ class FileRetrievalService:
                 if not file_list:
                     logger.info(f"Searching across all repositories for any repository files")
                     
-                    # Get all repo_files keys
-                    all_repo_files_keys = await redis_client.keys("repo_files:*")
-                    for repo_key in all_repo_files_keys:
+                    other_repo_ids = [r for r in await file_index.get_repository_ids() if r != repo_id]
+                    other_repo_data = await redis_client.hgetall_many(
+                        [f"repo_files:{other_repo_id}" for other_repo_id in other_repo_ids]
+                    )
+                    for other_repo_id, repo_data in zip(other_repo_ids, other_repo_data):
                         try:
-                            other_repo_data = await redis_client.hgetall(repo_key)
-                            if other_repo_data and other_repo_data.get('file_paths'):
+                            if repo_data and repo_data.get('file_paths'):
                                 # Try to parse and see if it has vosk or similar files
-                                file_paths = json.loads(other_repo_data['file_paths'])
-                                if any('vosk' in path.lower() or 'model.conf' in path.lower() for path in file_paths):
-                                    logger.info(f"Found potential matching repository: {repo_key}")
-                                    other_repo_id = repo_key.split(':')[1]
+                                other_paths = json.loads(repo_data['file_paths'])
+                                if any('vosk' in path.lower() or 'model.conf' in path.lower() for path in other_paths):
+                                    logger.info(f"Found potential matching repository: {other_repo_id}")
                                     
                                     # Use this repository's files
-                                    for file_path in file_paths[:50]:  # Limit to avoid too many files
-                                        file_key = f"file:{other_repo_id}:{file_path}"
-                                        file_metadata = await redis_client.hgetall(file_key)
-                                        
-                                        if file_metadata:
-                                            file_dict = {
-                                                'id': f"redis_{other_repo_id}_{file_path}",
-                                                'path': file_metadata.get('path', file_path),
-                                                'name': file_metadata.get('name', file_path.split('\\')[-1].split('/')[-1]),
-                                                'type': file_metadata.get('type', 'file'),
-                                                'size': int(file_metadata.get('size', 0)),
-                                                'language': file_metadata.get('language', ''),
-                                                'file_url': file_metadata.get('file_url'),
-                                                'file_key': file_metadata.get('file_key'),
-                                                'content': file_metadata.get('content')
-                                            }
-                                            file_list.append(file_dict)
+                                    metadata_by_path = await file_index.get_metadata(
+                                        other_repo_id, other_paths[:50]  # Limit to avoid too many files
+                                    )
+                                    for path, file_metadata in metadata_by_path.items():
+                                        file_list.append(self._to_file_dict(other_repo_id, path, file_metadata))
                                     
                                     if file_list:
                                         logger.info(f"Using files from repository {other_repo_id} as fallback")
                                         break
                         except Exception as e:
-                            logger.debug(f"Error checking repository {repo_key}: {str(e)}")
+                            logger.debug(f"Error checking repository {other_repo_id}: {str(e)}")
                             continue
                 
                 if not file_list:
@@ -174,24 +147,12 @@ class FileRetrievalService:
                 logger.error(f"Invalid file_paths data in Redis for repository {repo_id}")
                 return []
             
+            # One pipelined round trip for all file hashes
+            metadata_by_path = await file_index.get_metadata(repo_id, file_paths)
             for file_path in file_paths:
-                file_key = f"file:{repo_id}:{file_path}"
-                file_metadata = await redis_client.hgetall(file_key)
-                
+                file_metadata = metadata_by_path.get(file_path)
                 if file_metadata:
-                    # Convert Redis hash data to expected format
-                    file_dict = {
-                        'id': f"redis_{repo_id}_{file_path}",
-                        'path': file_metadata.get('path', file_path),
-                        'name': file_metadata.get('name', file_path.split('\\')[-1].split('/')[-1]),
-                        'type': file_metadata.get('type', 'file'),
-                        'size': int(file_metadata.get('size', 0)),
-                        'language': file_metadata.get('language', ''),
-                        'file_url': file_metadata.get('file_url'),
-                        'file_key': file_metadata.get('file_key'),
-                        'content': file_metadata.get('content')  # Fallback content for failed uploads
-                    }
-                    file_list.append(file_dict)
+                    file_list.append(self._to_file_dict(repo_id, file_path, file_metadata))
                 else:
                     logger.warning(f"File metadata not found for {file_path} in repository {repo_id}")
             
@@ -202,6 +163,20 @@ class FileRetrievalService:
             logger.error(f"Failed to get repository files: {str(e)}")
             return []
     
+    def _to_file_dict(self, repo_id: str, file_path: str, file_metadata: Dict[str, str]) -> Dict[str, Any]:
+        """Convert a Redis file metadata hash to the expected format."""
+        return {
+            'id': f"redis_{repo_id}_{file_path}",
+            'path': file_metadata.get('path', file_path),
+            'name': file_metadata.get('name', file_path.split('\\')[-1].split('/')[-1]),
+            'type': file_metadata.get('type', 'file'),
+            'size': int(file_metadata.get('size', 0)),
+            'language': file_metadata.get('language', ''),
+            'file_url': file_metadata.get('file_url'),
+            'file_key': file_metadata.get('file_key'),
+            'content': file_metadata.get('content')  # Fallback content for failed uploads
+        }
+    
     def _detect_language_from_path(self, file_path: str) -> str:
         """Detect programming language from file path."""
         if not file_path:
@@ -282,60 +257,43 @@ class FileRetrievalService:
                 '/' + file_path.lstrip('/\\')
             ]
             
-            for alt_path in alternative_paths:
-                if alt_path != file_path:
-                    alt_file_key = f"file:{repo_id}:{alt_path}"
-                    alt_metadata = await redis_client.hgetall(alt_file_key)
-                    
-                    if alt_metadata and alt_metadata.get('content'):
-                        logger.debug(f"Retrieved file content from Redis using alternative path: {alt_path}")
-                        return alt_metadata['content']
+            alt_paths = [alt_path for alt_path in dict.fromkeys(alternative_paths) if alt_path != file_path]
+            alt_metadata_by_path = await file_index.get_metadata(repo_id, alt_paths)
+            for alt_path, alt_metadata in alt_metadata_by_path.items():
+                if alt_metadata.get('content'):
+                    logger.debug(f"Retrieved file content from Redis using alternative path: {alt_path}")
+                    return alt_metadata['content']
             
-            # Fallback 2: Search across ALL repository IDs for this file path
+            # Fallback 2: Search across ALL indexed repository IDs for this file path
             # This handles the case where the same repository exists under multiple IDs
             logger.info(f"Searching across all repositories for file: {file_path}")
             
-            # Get all file keys that match this path pattern
-            all_file_keys = await redis_client.keys(f"file:*:{file_path}")
-            
-            # Also try alternative path formats across all repos
-            for alt_path in alternative_paths:
-                alt_keys = await redis_client.keys(f"file:*:{alt_path}")
-                all_file_keys.extend(alt_keys)
+            # One pipelined lookup of the path (and its alternative formats) in every repository
+            matches = await file_index.find_in_repositories([file_path] + alt_paths)
             
-            # Remove duplicates
-            all_file_keys = list(set(all_file_keys))
+            logger.debug(f"Found {len(matches)} potential matches for {file_path}")
             
-            logger.debug(f"Found {len(all_file_keys)} potential matches for {file_path}")
-            
-            # Try each key to find one with content
-            for key in all_file_keys:
-                try:
-                    metadata = await redis_client.hgetall(key)
-                    if metadata and metadata.get('content'):
-                        logger.info(f"Found file content in different repository: {key}")
-                        return metadata['content']
-                except Exception as e:
-                    logger.debug(f"Error checking key {key}: {str(e)}")
-                    continue
+            # Try each match to find one with content
+            for match in matches:
+                if match['metadata'].get('content'):
+                    logger.info(f"Found file content in different repository: {match['repo_id']}")
+                    return match['metadata']['content']
             
             # If still no content found, try B2 storage with any available file_key
-            for key in all_file_keys:
-                try:
-                    metadata = await redis_client.hgetall(key)
-                    if metadata and metadata.get('file_key') and self.b2_storage:
-                        try:
-                            content = await self.b2_storage.download_file_content(
-                                file_key=metadata['file_key']
-                            )
-                            logger.info(f"Retrieved file content from B2 using different repository: {key}")
-                            return content
-                        except Exception as e:
-                            logger.debug(f"Failed to get B2 content for {key}: {str(e)}")
-                            continue
-                except Exception as e:
-                    logger.debug(f"Error checking B2 for key {key}: {str(e)}")
-                    continue            # Try database fallback before giving up
+            for match in matches:
+                metadata = match['metadata']
+                if metadata.get('file_key') and self.b2_storage:
+                    try:
+                        content = await self.b2_storage.download_file_content(
+                            file_key=metadata['file_key']
+                        )
+                        logger.info(f"Retrieved file content from B2 using different repository: {match['repo_id']}")
+                        return content
+                    except Exception as e:
+                        logger.debug(f"Failed to get B2 content for {match['repo_id']}:{match['path']}: {str(e)}")
+                        continue
+            
+            # Try database fallback before giving up
             logger.info(f"Redis cache miss - attempting database fallback for: {file_path}")
             content = await self._get_file_content_from_database(repo_id, file_path)
             if content:
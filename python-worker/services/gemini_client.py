@@ -4,7 +4,6 @@ Gemini API client for AI-powered processing with API key rotation and enhanced r
 import asyncio
 import time
 import random
-import redis
 from typing import List, Dict, Any, Optional
 import google.generativeai as genai
 from google.generativeai.types import HarmCategory, HarmBlockThreshold
@@ -19,54 +18,50 @@ except ImportError:
     SENTENCE_TRANSFORMERS_AVAILABLE = False
 
 from config.settings import get_settings
+from services.embedding_cache import embedding_cache
+from services.quota_coordinator import HealthTracker, quota_coordinator
+from services.rate_limiter import RateLimiter, gemini_rate_limiter, key_id, estimate_tokens
+from services.summary_packing import format_packed_text, packed_output_instructions, parse_packed_summaries
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Embedding cache model keys (vectors from different models/task types never mix)
+GEMINI_EMBEDDING_CACHE_MODEL = "gemini/text-embedding-004/SEMANTIC_SIMILARITY"
+LOCAL_EMBEDDING_CACHE_MODEL = "local/paraphrase-mpnet-base-v2"
+
 
 class APIKeyManager:
-    """Manages multiple API keys with rotation and rate limiting tracking."""
+    """
+    Manages multiple API keys with rotation and rate limiting tracking.
     
-    def __init__(self, api_keys: List[str], redis_client: Optional[redis.Redis] = None):
+    Pacing (per-key and per-IP RPM/TPM) and rate-limit cooldowns live in the
+    shared asyncio RateLimiter; async callers take a key with
+    `await acquire_key()` / `acquire_key_with_index()`, which wait without
+    blocking the event loop. Cooldowns and per-key failure streaks are shared
+    with every other process through Redis (services.quota_coordinator).
+    """
+    
+    def __init__(self, api_keys: List[str], limiter: Optional[RateLimiter] = None,
+                 health: Optional[HealthTracker] = None):
         self.api_keys = api_keys
         self.current_index = 0
-        self.redis_client = redis_client  # For persistent rate limit tracking
-        self.key_status = {}  # Track status of each key
-        self.key_last_error_time = {}  # Track when each key last had an error
-        self.key_last_rate_limit_time = {}  # Track when each key was last rate limited
-        self.key_consecutive_failures = {}  # Track consecutive failures per key
-        self.key_last_success_time = {}  # Track when each key last succeeded
+        self.limiter = limiter or gemini_rate_limiter
         self.circuit_breaker_timeout = 300  # 5 minutes
-        self.rate_limit_cooldown = 180  # 180 seconds cooldown after rate limit hit (3 minutes for IP-based limiting)
+        self.rate_limit_cooldown = get_settings().gemini_rate_limit_cooldown  # 3 minutes for IP-based limiting
         self.max_consecutive_failures = 3  # Lower threshold per key
-        self.inter_key_delay = 5.0  # Minimum 5 seconds between rotating keys (IP-based rate limit)
-        self.min_request_interval = 20.0  # Minimum 20 seconds between ANY requests from this IP
+        # Consecutive failures per key (by key_id), expiring after the circuit breaker timeout
+        self.health = health or HealthTracker(
+            "gemini_keys", self.circuit_breaker_timeout, coordinator=quota_coordinator
+        )
+        self.key_status = {}  # Track status of each key ("disabled" keys are never used)
+        self.key_last_success_time = {}  # Track when each key last succeeded
         
         # Initialize status for all keys
         for key in api_keys:
             self.key_status[key] = "active"
-            self.key_last_error_time[key] = None
-            self.key_consecutive_failures[key] = 0
             self.key_last_success_time[key] = None
             
-            # Load rate limit time from Redis if available
-            if self.redis_client:
-                try:
-                    redis_key = f"gemini_rate_limit:{self._hash_key(key)}"
-                    stored_time = self.redis_client.get(redis_key)
-                    if stored_time:
-                        self.key_last_rate_limit_time[key] = float(stored_time)
-                        time_since = time.time() - float(stored_time)
-                        if time_since < self.rate_limit_cooldown:
-                            logger.info(f"API key index {self.api_keys.index(key)} still in cooldown (started {time_since:.0f}s ago, {self.rate_limit_cooldown - time_since:.0f}s remaining)")
-                    else:
-                        self.key_last_rate_limit_time[key] = None
-                except Exception as e:
-                    logger.warning(f"Failed to load rate limit time from Redis: {e}")
-                    self.key_last_rate_limit_time[key] = None
-            else:
-                self.key_last_rate_limit_time[key] = None
-            
         logger.info(f"Initialized API key manager with {len(api_keys)} keys")
         
         # Log status of all keys
@@ -75,32 +70,18 @@ class APIKeyManager:
     
     def _hash_key(self, api_key: str) -> str:
         """Create a safe hash of the API key for Redis storage."""
-        import hashlib
-        return hashlib.sha256(api_key.encode()).hexdigest()[:16]
+        return key_id(api_key)
     
     def get_active_key(self) -> Optional[str]:
-        """Get the next active API key for use."""
+        """Get the next active API key (no pacing; async callers should use acquire_key)."""
         key, _ = self.get_active_key_with_index()
         return key
     
     def get_active_key_with_index(self) -> tuple[Optional[str], int]:
-        """Get the next active API key with its index for quotaUser."""
+        """Get the next active API key with its index for quotaUser (no pacing)."""
         if not self.api_keys:
             return None, -1
         
-        # CRITICAL: Enforce minimum interval between ANY requests (IP-based rate limit)
-        # Check if we need to wait before making ANY request
-        most_recent_success = max(
-            (t for t in self.key_last_success_time.values() if t is not None),
-            default=None
-        )
-        if most_recent_success:
-            time_since_last = time.time() - most_recent_success
-            if time_since_last < self.min_request_interval:
-                wait_time = self.min_request_interval - time_since_last
-                logger.warning(f"⏰ IP rate limit: Waiting {wait_time:.1f}s before next request (last request {time_since_last:.1f}s ago)")
-                time.sleep(wait_time)
-            
         # Find the next available key
         attempts = 0
         while attempts < len(self.api_keys):
@@ -118,80 +99,61 @@ class APIKeyManager:
         logger.warning("🚫 All API keys are currently unavailable - IP rate limit exhausted")
         return None, -1
     
+    async def acquire_key(self, tokens: int = 0, scope: str = "generate") -> Optional[str]:
+        """Get the next active API key once the limiter grants it a request slot."""
+        key, _ = await self.acquire_key_with_index(tokens, scope)
+        return key
+    
+    async def acquire_key_with_index(self, tokens: int = 0, scope: str = "generate") -> tuple[Optional[str], int]:
+        """
+        Get the next active API key with its index, awaiting its per-key and
+        per-IP budgets (RPM, and TPM for `tokens`) without blocking the loop.
+        """
+        key, index = self.get_active_key_with_index()
+        if key is not None:
+            await self.limiter.acquire(self._hash_key(key), tokens=tokens, scope=scope)
+        return key, index
+    
     def _is_key_available(self, key: str) -> bool:
         """Check if a specific key is available for use."""
         if self.key_status[key] == "disabled":
             return False
         
         # CRITICAL: Check rate limit cooldown first
-        # Don't reuse a key that was just rate-limited (give it 90s to reset + burst limit recovery)
-        last_rate_limit_time = self.key_last_rate_limit_time.get(key)
-        if last_rate_limit_time:
-            time_since_rate_limit = time.time() - last_rate_limit_time
-            if time_since_rate_limit < self.rate_limit_cooldown:
-                # Key is in cooldown period after rate limit
-                return False
+        # Don't reuse a key that was just rate-limited (give it time to reset + burst limit recovery)
+        if self.limiter.cooldown_remaining(self._hash_key(key)) > 0:
+            return False
             
-        # Check circuit breaker
-        consecutive_failures = self.key_consecutive_failures[key]
-        if consecutive_failures >= self.max_consecutive_failures:
-            last_error_time = self.key_last_error_time[key]
-            if last_error_time:
-                time_since_error = time.time() - last_error_time
-                if time_since_error < self.circuit_breaker_timeout:
-                    return False
-                else:
-                    # Reset circuit breaker
-                    logger.info(f"Resetting circuit breaker for API key index {self.api_keys.index(key)}")
-                    self.key_consecutive_failures[key] = 0
-                    self.key_status[key] = "active"
-        
-        return True
+        # Check circuit breaker (the failure streak expires after circuit_breaker_timeout)
+        return self.health.failures(self._hash_key(key)) < self.max_consecutive_failures
     
     def record_success(self, key: str):
         """Record successful API call for a key."""
-        if key in self.key_consecutive_failures:
-            self.key_consecutive_failures[key] = 0
-            self.key_status[key] = "active"
-            # Record success time for IP-based rate limiting
+        if key in self.key_status:
             self.key_last_success_time[key] = time.time()
-            # Clear rate limit cooldown on success
-            self.key_last_rate_limit_time[key] = None
-            
-            # Clear from Redis
-            if self.redis_client:
-                try:
-                    redis_key = f"gemini_rate_limit:{self._hash_key(key)}"
-                    self.redis_client.delete(redis_key)
-                except Exception as e:
-                    logger.warning(f"Failed to clear rate limit from Redis: {e}")
+            # Clear failure streak and rate limit cooldown on success (in every process)
+            self.health.reset(self._hash_key(key))
+            self.limiter.clear_cooldown(self._hash_key(key))
             
     def record_failure(self, key: str, error_str: str):
         """Record failed API call for a key."""
-        self.key_consecutive_failures[key] = self.key_consecutive_failures.get(key, 0) + 1
-        self.key_last_error_time[key] = time.time()
+        failures = self.health.record_failure(self._hash_key(key))
         
         # CRITICAL: Track rate limit separately for cooldown
         error_lower = error_str.lower()
         if "429" in error_str or "resource_exhausted" in error_lower or "rate limit" in error_lower or "quota" in error_lower:
-            current_time = time.time()
-            self.key_last_rate_limit_time[key] = current_time
-            logger.warning(f"🚫 API key index {self.api_keys.index(key)} rate limited - entering 180s cooldown (IP-based rate limit)")
-            
-            # Persist to Redis so cooldown survives worker restarts
-            if self.redis_client:
-                try:
-                    redis_key = f"gemini_rate_limit:{self._hash_key(key)}"
-                    # Store with 120s expiry (30s buffer beyond cooldown)
-                    self.redis_client.setex(redis_key, 120, str(current_time))
-                except Exception as e:
-                    logger.warning(f"Failed to save rate limit to Redis: {e}")
+            self.limiter.cooldown(self.rate_limit_cooldown, key=self._hash_key(key))
+            logger.warning(f"🚫 API key index {self.api_keys.index(key)} rate limited - entering {self.rate_limit_cooldown}s cooldown (IP-based rate limit)")
         
         # Check if key should be temporarily disabled
-        if self.key_consecutive_failures[key] >= self.max_consecutive_failures:
-            self.key_status[key] = "circuit_breaker"
+        if failures == self.max_consecutive_failures:
             logger.warning(f"Circuit breaker triggered for API key index {self.api_keys.index(key)}")
     
+    def reset_key_health(self):
+        """Clear every key's failure streak."""
+        for key in self.api_keys:
+            self.health.reset(self._hash_key(key))
+    
     def all_keys_exhausted(self) -> bool:
         """
         Check if ALL keys are in cooldown due to IP-based rate limiting.
@@ -204,47 +166,31 @@ class APIKeyManager:
         if not self.api_keys:
             return True
         
-        current_time = time.time()
-        
-        # Check if ALL keys are in rate limit cooldown
-        available_count = 0
-        for key in self.api_keys:
-            last_rate_limit = self.key_last_rate_limit_time.get(key)
-            if not last_rate_limit:
-                # Key has never been rate limited
-                available_count += 1
-            elif (current_time - last_rate_limit) >= self.rate_limit_cooldown:
-                # Key cooldown expired
-                available_count += 1
-        
-        # All keys exhausted if none available
-        exhausted = (available_count == 0)
+        exhausted = not any(self.limiter.is_available(self._hash_key(key)) for key in self.api_keys)
         if exhausted:
             logger.warning(f"🚫 All {len(self.api_keys)} Gemini keys are in IP-based rate limit cooldown")
         
         return exhausted
     
     def rotate_to_next_key(self):
-        """Manually rotate to the next key with delay to avoid burst limits."""
-        # Add small delay to avoid burst limits when rapidly rotating keys
-        time.sleep(self.inter_key_delay)
+        """Rotate to the next key (bursts across keys are paced by the limiter's per-IP budget)."""
         self.current_index = (self.current_index + 1) % len(self.api_keys)
         
     def get_status(self) -> Dict[str, Any]:
         """Get status of all API keys."""
         status = {}
         for i, key in enumerate(self.api_keys):
-            last_rate_limit = self.key_last_rate_limit_time.get(key)
-            time_since_rate_limit = time.time() - last_rate_limit if last_rate_limit else None
-            in_cooldown = time_since_rate_limit is not None and time_since_rate_limit < self.rate_limit_cooldown
+            cooldown_remaining = self.limiter.cooldown_remaining(self._hash_key(key))
+            failures = self.health.failures(self._hash_key(key))
+            last_error_time = self.health.last_failure(self._hash_key(key))
             
             status[f"key_{i}"] = {
-                "status": self.key_status[key],
-                "consecutive_failures": self.key_consecutive_failures[key],
-                "time_since_last_error": time.time() - self.key_last_error_time[key] 
-                    if self.key_last_error_time[key] else None,
-                "time_since_rate_limit": time_since_rate_limit,
-                "in_cooldown": in_cooldown
+                "status": "circuit_breaker" if self.key_status[key] == "active" and failures >= self.max_consecutive_failures
+                    else self.key_status[key],
+                "consecutive_failures": failures,
+                "time_since_last_error": time.time() - last_error_time if last_error_time else None,
+                "cooldown_remaining": cooldown_remaining,
+                "in_cooldown": cooldown_remaining > 0
             }
         return status
 
@@ -252,11 +198,13 @@ class APIKeyManager:
 class RateLimitManager:
     """Manages rate limiting, retries, and circuit breaker functionality for API calls."""
     
-    def __init__(self):
-        self.consecutive_failures = 0
-        self.last_failure_time = None
+    def __init__(self, health: Optional[HealthTracker] = None):
         self.circuit_breaker_timeout = 180  # 3 minutes (reduced from 5)
         self.max_consecutive_failures = 3  # Reduced from 5 to be less aggressive
+        # Consecutive API failures, shared by every process using the Gemini keys
+        self.health = health or HealthTracker(
+            "gemini_client", self.circuit_breaker_timeout, coordinator=quota_coordinator
+        )
         
         # Rate limiting detection patterns
         self.rate_limit_indicators = [
@@ -301,6 +249,14 @@ class RateLimitManager:
             "connection refused"
         ]
     
+    @property
+    def consecutive_failures(self) -> int:
+        return self.health.failures("api")
+    
+    @property
+    def last_failure_time(self) -> Optional[float]:
+        return self.health.last_failure("api")
+    
     def is_circuit_breaker_open(self) -> bool:
         """Check if circuit breaker is open (should skip API calls)."""
         if self.consecutive_failures < self.max_consecutive_failures:
@@ -357,16 +313,14 @@ class RateLimitManager:
         """Record successful API call."""
         # Reset circuit breaker completely on success
         was_open = self.is_circuit_breaker_open()
-        self.consecutive_failures = 0
-        self.last_failure_time = None
+        self.health.reset("api")
         
         if was_open:
             logger.info("Circuit breaker reset due to successful API call")
     
     def record_failure(self):
         """Record failed API call."""
-        self.consecutive_failures += 1
-        self.last_failure_time = time.time()
+        self.health.record_failure("api")
     
     def get_circuit_breaker_status(self) -> Dict[str, Any]:
         """Get current circuit breaker status for logging."""
@@ -378,8 +332,7 @@ class RateLimitManager:
     
     def reset_circuit_breaker(self):
         """Manually reset the circuit breaker."""
-        self.consecutive_failures = 0
-        self.last_failure_time = None
+        self.health.reset("api")
         logger.info("Circuit breaker manually reset")
 
 
@@ -405,10 +358,7 @@ class GeminiClient:
         
         # Rate limiting manager
         self.rate_limit_manager = RateLimitManager()
-        
-        # Embedding cache to reduce API calls
-        self.embedding_cache = {}
-        self.cache_max_size = 1000
+
     def count_tokens(self, text: str) -> int:
         """Count tokens in text."""
         self._ensure_configured()
@@ -438,10 +388,11 @@ class GeminiClient:
     async def _generate_gemini_embedding(self, text: str) -> List[float]:
         """Generate embedding using Gemini API with rotation and rate limiting."""
         # Check cache first
-        text_hash = hash(text)
-        if text_hash in self.embedding_cache:
+        cached = await embedding_cache.get(GEMINI_EMBEDDING_CACHE_MODEL, text)
+        if cached is not None:
             logger.debug("Using cached embedding")
-            return self.embedding_cache[text_hash]
+            return cached
+        original_text = text
         
         # Check circuit breaker
         if self.rate_limit_manager.is_circuit_breaker_open():
@@ -454,7 +405,7 @@ class GeminiClient:
         for attempt in range(max_retries):
             try:
                 # Get active API key
-                current_key = self.api_key_manager.get_active_key()
+                current_key = await self.api_key_manager.acquire_key(estimate_tokens(text), scope="embed")
                 if not current_key:
                     logger.warning("No active API keys available, falling back to local embeddings")
                     return await self._generate_local_embedding(text)
@@ -500,8 +451,7 @@ class GeminiClient:
                 self.rate_limit_manager.record_success()
                 
                 # Cache the result
-                if len(self.embedding_cache) < self.cache_max_size:
-                    self.embedding_cache[text_hash] = embedding
+                await embedding_cache.put(GEMINI_EMBEDDING_CACHE_MODEL, original_text, embedding)
                 
                 logger.debug("Generated Gemini embedding", text_length=len(text), embedding_dim=len(embedding))
                 return embedding
@@ -553,6 +503,11 @@ class GeminiClient:
                     embedding.append(0.0)
                 return embedding[:384]  # Return fixed size
             
+            cached = await embedding_cache.get(LOCAL_EMBEDDING_CACHE_MODEL, text)
+            if cached is not None:
+                return cached
+            original_text = text
+            
             # Truncate text if too long (sentence-transformers has different limits)
             # Most sentence-transformers models have a max sequence length of 512 tokens
             token_count = self.count_tokens(text)
@@ -578,6 +533,7 @@ class GeminiClient:
             if hasattr(embedding, 'tolist'):
                 embedding = embedding.tolist()
             
+            await embedding_cache.put(LOCAL_EMBEDDING_CACHE_MODEL, original_text, embedding)
             logger.debug("Generated local embedding", text_length=len(text), embedding_dim=len(embedding))
             return embedding
             
@@ -592,6 +548,106 @@ class GeminiClient:
                 embedding.append(0.0)
             return embedding[:384]
 
+    async def generate_embeddings_batch(self, texts: List[str], batch_size: int = 32) -> List[List[float]]:
+        """Generate embeddings for many texts (Gemini batchEmbedContents or local batch encode)."""
+        self._ensure_configured()
+        if not texts:
+            return []
+
+        if self.settings.use_gemini_embeddings:
+            return await self._generate_gemini_embeddings_batch(texts)
+        else:
+            return await self._generate_local_embeddings_batch(texts, batch_size)
+
+    def _truncate_to_tokens(self, text: str, max_tokens: int) -> str:
+        """Keep the first max_tokens tokens of text."""
+        tokens = self.encoder.encode(text)
+        if len(tokens) <= max_tokens:
+            return text
+        return self.encoder.decode(tokens[:max_tokens])
+
+    async def _generate_gemini_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings via batchEmbedContents (up to 100 texts per request)."""
+        if self.rate_limit_manager.is_circuit_breaker_open():
+            logger.warning("Circuit breaker open for embeddings, falling back to local model")
+            return await self._generate_local_embeddings_batch(texts)
+
+        base_url = "https://generativelanguage.googleapis.com/v1beta/models/text-embedding-004:batchEmbedContents"
+        headers = {"Content-Type": "application/json"}
+        texts = [self._truncate_to_tokens(text, 2000) for text in texts]
+
+        if not hasattr(self, 'http_client'):
+            import httpx
+            self.http_client = httpx.AsyncClient()
+
+        embeddings: List[List[float]] = []
+        for start in range(0, len(texts), 100):
+            batch = texts[start:start + 100]
+            data = {
+                "requests": [
+                    {
+                        "model": "models/text-embedding-004",
+                        "content": {"parts": [{"text": text}]},
+                        "taskType": "SEMANTIC_SIMILARITY"
+                    }
+                    for text in batch
+                ]
+            }
+
+            current_key = await self.api_key_manager.acquire_key(
+                sum(estimate_tokens(text) for text in batch), scope="embed"
+            )
+            if not current_key:
+                logger.warning("No active API keys available, falling back to local embeddings")
+                embeddings.extend(await self._generate_local_embeddings_batch(batch))
+                continue
+
+            try:
+                response = await self.http_client.post(
+                    base_url, params={"key": current_key}, headers=headers, json=data, timeout=60.0
+                )
+                response.raise_for_status()
+                embeddings.extend(item['values'] for item in response.json()['embeddings'])
+
+                self.api_key_manager.record_success(current_key)
+                self.rate_limit_manager.record_success()
+
+            except Exception as e:
+                error_str = str(e)
+                self.api_key_manager.record_failure(current_key, error_str)
+                self.rate_limit_manager.record_failure()
+                if self.rate_limit_manager.is_rate_limited(error_str):
+                    self.api_key_manager.rotate_to_next_key()
+                logger.warning(f"Gemini batch embedding failed, falling back to local model: {error_str[:100]}")
+                embeddings.extend(await self._generate_local_embeddings_batch(batch))
+
+        logger.debug("Generated Gemini batch embeddings", count=len(embeddings))
+        return embeddings
+
+    async def _generate_local_embeddings_batch(self, texts: List[str], batch_size: int = 32) -> List[List[float]]:
+        """Generate embeddings with one sentence-transformers encode call per batch."""
+        if self.embedding_model is None:
+            return [await self._generate_local_embedding(text) for text in texts]
+
+        try:
+            # Same conservative 500-token limit as the single-text path
+            texts = [self._truncate_to_tokens(text, 500) for text in texts]
+
+            embeddings = await asyncio.to_thread(
+                self.embedding_model.encode,
+                texts,
+                batch_size=batch_size,
+                convert_to_tensor=False
+            )
+
+            embeddings = [e.tolist() if hasattr(e, 'tolist') else list(e) for e in embeddings]
+            logger.debug("Generated local batch embeddings", count=len(embeddings), batch_size=batch_size)
+            return embeddings
+
+        except Exception as e:
+            logger.error("Failed to generate local batch embeddings", error=str(e))
+            return [await self._generate_local_embedding(text) for text in texts]
+
     async def generate_summary(self, text: str, context: str = "code repository") -> str:
         """
         Generate summary using UnifiedAIClient (Grok-3-mini → Gemini fallback).
@@ -641,7 +697,7 @@ class GeminiClient:
         for attempt in range(max_retries):
             try:
                 # Get active API key
-                current_key = self.api_key_manager.get_active_key()
+                current_key = await self.api_key_manager.acquire_key(estimate_tokens(text, 1000))
                 if not current_key:
                     raise Exception("No active API keys available for summary generation")
                 
@@ -780,7 +836,9 @@ class GeminiClient:
         for attempt in range(max_retries):
             try:
                 # Get active API key
-                current_key = self.api_key_manager.get_active_key()
+                current_key = await self.api_key_manager.acquire_key(
+                    estimate_tokens(question + context) + sum(estimate_tokens(content) for content in files_content)
+                )
                 if not current_key:
                     raise Exception("No active API keys available for Q&A")
                 
@@ -987,95 +1045,34 @@ class GeminiClient:
     async def generate_batch_summaries(self, texts_with_context: List[Dict[str, str]], 
                                       batch_delay: float = 0.5) -> List[Dict[str, Any]]:
         """
-        Generate summaries for multiple texts with intelligent rate limiting and API key rotation.
+        Generate summaries for multiple texts concurrently, under the shared adaptive limit.
         
         Args:
             texts_with_context: List of dicts with 'text' and 'context' keys
-            batch_delay: Base delay between API calls (will be adjusted based on rate limiting)
+            batch_delay: Unused; pacing is done by the shared rate limiter (kept for compatibility)
         
         Returns:
-            List of results with 'summary', 'success', and 'error' keys
+            List of results with 'summary', 'success', and 'error' keys (in input order)
         """
-        results = []
-        adaptive_delay = batch_delay
-        consecutive_rate_limits = 0
+        from services.summarization_scheduler import summarization_scheduler
         
-        for i, item in enumerate(texts_with_context):
-            try:
-                # Check circuit breaker before each call
-                if self.rate_limit_manager.is_circuit_breaker_open():
-                    circuit_status = self.rate_limit_manager.get_circuit_breaker_status()
-                    logger.warning(
-                        f"Circuit breaker open, skipping batch item {i+1}/{len(texts_with_context)}", 
-                        **circuit_status
-                    )
-                    results.append({
-                        'summary': None,
-                        'success': False,
-                        'error': 'Circuit breaker open - too many consecutive failures'
-                    })
-                    continue
-                
-                # Check if we have available API keys
-                if not self.api_key_manager.get_active_key():
-                    logger.warning(f"No active API keys, skipping batch item {i+1}/{len(texts_with_context)}")
-                    results.append({
-                        'summary': None,
-                        'success': False,
-                        'error': 'No active API keys available'
-                    })
-                    continue
-                
-                # Add adaptive delay between requests
-                if i > 0:
-                    await asyncio.sleep(adaptive_delay)
-                
-                # Generate summary
-                summary = await self.generate_summary(
-                    item.get('text', ''), 
-                    item.get('context', 'code')
-                )
-                
-                results.append({
-                    'summary': summary,
-                    'success': True,
-                    'error': None
-                })
-                
-                # Reset adaptive delay and consecutive rate limits on success
-                adaptive_delay = batch_delay
-                consecutive_rate_limits = 0
-                
-                logger.debug(f"Batch summary {i+1}/{len(texts_with_context)} completed successfully")
-                
-            except Exception as e:
-                error_str = str(e)
-                
-                # Increase adaptive delay if we hit rate limits
-                if self.rate_limit_manager.is_rate_limited(error_str):
-                    consecutive_rate_limits += 1
-                    adaptive_delay = min(adaptive_delay * (1.5 ** consecutive_rate_limits), 60)  # Cap at 60 seconds
-                    logger.warning(f"Rate limit detected, increasing batch delay to {adaptive_delay}s (consecutive: {consecutive_rate_limits})")
-                    
-                    # If we have multiple consecutive rate limits, rotate key proactively
-                    if consecutive_rate_limits >= 2:
-                        self.api_key_manager.rotate_to_next_key()
-                        logger.info(f"Rotating to next API key due to consecutive rate limits (new index: {self.api_key_manager.current_index})")
-                        
-                elif self.rate_limit_manager.is_service_unavailable(error_str):
-                    adaptive_delay = min(adaptive_delay * 1.5, 30)  # Cap at 30 seconds
-                    logger.warning(f"Service issues detected, increasing batch delay to {adaptive_delay}s")
-                else:
-                    # Reset consecutive rate limits for other errors
-                    consecutive_rate_limits = 0
-                
-                results.append({
-                    'summary': None,
-                    'success': False,
-                    'error': error_str
-                })
-                
-                logger.error(f"Batch summary {i+1}/{len(texts_with_context)} failed", error=error_str)
+        async def summarize(item: Dict[str, str]) -> str:
+            # Check circuit breaker and keys before each call
+            if self.rate_limit_manager.is_circuit_breaker_open():
+                raise Exception('Circuit breaker open - too many consecutive failures')
+            if not self.api_key_manager.get_active_key():
+                raise Exception('No active API keys available')
+            return await self.generate_summary(item.get('text', ''), item.get('context', 'code'))
+        
+        outcomes = await summarization_scheduler.map(texts_with_context, summarize)
+        
+        results = []
+        for i, outcome in enumerate(outcomes):
+            if isinstance(outcome, Exception):
+                results.append({'summary': None, 'success': False, 'error': str(outcome)})
+                logger.error(f"Batch summary {i+1}/{len(texts_with_context)} failed", error=str(outcome))
+            else:
+                results.append({'summary': outcome, 'success': True, 'error': None})
         
         # Log batch completion stats
         successful = sum(1 for r in results if r['success'])
@@ -1087,7 +1084,7 @@ class GeminiClient:
             successful=successful,
             failed=failed,
             success_rate=f"{(successful/len(results)*100):.1f}%" if results else "0%",
-            final_delay=adaptive_delay,
+            concurrency=summarization_scheduler.concurrency.get_stats(),
             api_key_status=self.api_key_manager.get_status() if self.api_key_manager else None
         )
         
@@ -1101,7 +1098,7 @@ class GeminiClient:
             "configured": self._configured,
             "initialized": self._initialized,
             "embedding_mode": "gemini" if self.settings and self.settings.use_gemini_embeddings else "local",
-            "embedding_cache_size": len(self.embedding_cache) if hasattr(self, 'embedding_cache') else 0
+            "embedding_cache": embedding_cache.get_stats()
         }
         
         if self.api_key_manager:
@@ -1117,14 +1114,16 @@ class GeminiClient:
         """Reset all circuit breakers to clear previous failures."""
         self.rate_limit_manager.reset_circuit_breaker()
         if self.api_key_manager:
-            for key in self.api_key_manager.api_keys:
-                self.api_key_manager.key_consecutive_failures[key] = 0
-                self.api_key_manager.key_last_error_time[key] = None
-                self.api_key_manager.key_status[key] = "active"
+            self.api_key_manager.reset_key_health()
         logger.info("All circuit breakers have been reset")
 
-    def _build_summary_prompt(self, text: str, context: str) -> str:
-        """Build prompt for summarization."""
+    @staticmethod
+    def _build_summary_prompt(
+        text: str,
+        context: str,
+        output_instructions: str = "Provide a clear, structured summary in 2-3 paragraphs:"
+    ) -> str:
+        """Build prompt for summarization (packed prompts pass their own output instructions)."""
         if context == "git commit":
             return f"""
 You are an expert code analyst. Provide a very concise summary of this git commit.
@@ -1156,8 +1155,8 @@ Focus on:
 Content to summarize:
 {text}
 
-Provide a clear, structured summary in 2-3 paragraphs:
-""" 
+{output_instructions}
+"""
 
     async def generate_chain_of_thought(self, question: str, context: str, files_content: List[str]) -> Dict[str, Any]:
         """Generate step-by-step chain-of-thought reasoning using Gemini's multi-step capabilities."""
@@ -1458,18 +1457,8 @@ Provide a comprehensive, technical answer that demonstrates deep understanding o
             if not api_keys:
                 raise ValueError("Please set valid GEMINI_API_KEY or GEMINI_API_KEYS in your environment variables")
             
-            # Get Redis client for persistent rate limit tracking
-            redis_conn = None
-            try:
-                from services.redis_client import redis_client
-                if hasattr(redis_client, 'client') and redis_client.client:
-                    redis_conn = redis_client.client
-                    logger.info("Connected to Redis for persistent rate limit tracking")
-            except Exception as e:
-                logger.warning(f"Could not connect to Redis for rate limit tracking: {e}")
-            
-            # Initialize API key manager with Redis support
-            self.api_key_manager = APIKeyManager(api_keys, redis_client=redis_conn)
+            # Initialize API key manager (cooldowns and key health are shared via Redis)
+            self.api_key_manager = APIKeyManager(api_keys)
             
             # Get first available key (for compatibility, but we use REST API now)
             first_key = self.api_key_manager.get_active_key()
@@ -1563,7 +1552,8 @@ Provide a comprehensive, technical answer that demonstrates deep understanding o
             "confidence": 0.1
         }
 
-    def _build_categorization_prompt(self, question: str, repository_context: str) -> str:
+    @staticmethod
+    def _build_categorization_prompt(question: str, repository_context: str) -> str:
         """Build prompt for question categorization."""
         return f"""
 You are an expert at categorizing programming and software development questions. 
@@ -1599,7 +1589,8 @@ Confidence: [0.0-1.0]
 Analyze the question and respond:
 """
 
-    def _parse_categorization_response(self, response_text: str) -> Dict[str, Any]:
+    @staticmethod
+    def _parse_categorization_response(response_text: str) -> Dict[str, Any]:
         """Parse the AI categorization response."""
         try:
             lines = response_text.strip().split('\n')
@@ -1658,7 +1649,9 @@ Analyze the question and respond:
         for attempt in range(max_retries):
             try:
                 # Get active API key with rotation
-                current_key, key_idx = self.api_key_manager.get_active_key_with_index()
+                current_key, key_idx = await self.api_key_manager.acquire_key_with_index(
+                    estimate_tokens(prompt, max_tokens)
+                )
                 if not current_key:
                     logger.warning("No active API keys available for content generation")
                     raise Exception("No API keys available")
@@ -1803,7 +1796,7 @@ Analyze the question and respond:
         for attempt in range(max_retries):
             try:
                 # Get active API key
-                current_key = self.api_key_manager.get_active_key()
+                current_key = await self.api_key_manager.acquire_key(estimate_tokens(prompt))
                 if not current_key:
                     logger.warning("No active API keys available for vision analysis")
                     return "Unable to analyze image - no API keys available"
@@ -1910,7 +1903,7 @@ Analyze the question and respond:
         for attempt in range(max_retries):
             try:
                 # Get active API key
-                current_key = self.api_key_manager.get_active_key()
+                current_key = await self.api_key_manager.acquire_key(estimate_tokens(prompt, max_tokens))
                 if not current_key:
                     logger.warning("No active API keys available for tool-use generation")
                     raise Exception("No API keys available")
@@ -2049,7 +2042,11 @@ class GeminiClientWrapper:
     async def generate_embedding(self, text: str) -> List[float]:
         """Generate embeddings using GitHub's embedding model"""
         return await self.unified_client.generate_embedding(text)
-    
+
+    async def generate_embeddings_batch(self, texts: List[str], use_cache: bool = False) -> List[List[float]]:
+        """Generate embeddings for many texts in one provider request per batch (use_cache for query texts)"""
+        return await self.unified_client.generate_embeddings_batch(texts, use_cache=use_cache)
+
     async def generate_summary(self, text: str, context: str = "code repository") -> str:
         """Generate summary using unified client"""
         prompt = f"""Please provide a concise summary of the following {context}:
@@ -2061,8 +2058,56 @@ Focus on key functionality, main components, and notable patterns."""
         return await self.unified_client.generate_content_async(
             prompt=prompt,
             max_tokens=1500,
-            temperature=0.3
+            temperature=0.3,
+            task_type='summary'
+        )
+    
+    async def generate_packed_summaries(self, items: List[Dict[str, str]]) -> List[Optional[str]]:
+        """
+        Summarize several small texts in one request.
+        
+        Args:
+            items: Dicts with 'name', 'text' and 'context' keys
+        
+        Returns:
+            One summary per item, or None where the response did not cover it cleanly
+        """
+        settings = get_settings()
+        prompt = GeminiClient._build_summary_prompt(
+            format_packed_text(items),
+            "set of repository files",
+            output_instructions=packed_output_instructions(len(items))
+        )
+        response = await self.unified_client.generate_content_async(
+            prompt=prompt,
+            max_tokens=200 + settings.summary_pack_output_tokens_per_file * len(items),
+            temperature=0.3,
+            task_type='summary',
+            # Only a response covering every item is cached; a partial one would be replayed on every retry
+            cache_validator=lambda text: len(parse_packed_summaries(text, items)) == len(items)
         )
+        summaries = parse_packed_summaries(response, items)
+        if len(summaries) < len(items):
+            logger.warning(f"Packed summary response covered {len(summaries)} of {len(items)} items")
+        return [summaries.get(index) for index in range(len(items))]
+    
+    async def categorize_question(self, question: str, repository_context: str = "") -> Dict[str, Any]:
+        """Categorize a question using unified client (repeat questions are served from the response cache)"""
+        try:
+            response = await self.unified_client.generate_content_async(
+                prompt=GeminiClient._build_categorization_prompt(question, repository_context),
+                max_tokens=200,
+                temperature=0.1,  # Low temperature for consistent categorization
+                task_type='categorization'
+            )
+            return GeminiClient._parse_categorization_response(response)
+        except Exception as e:
+            logger.warning("Failed to categorize question, using default", error=str(e))
+            return {
+                "category": "general",
+                "tags": ["question"],
+                "confidence": 0.2
+            }
     
     async def answer_question(self, question: str, context: str, files_content: List[str]) -> Dict[str, Any]:
         """Answer question using unified client"""
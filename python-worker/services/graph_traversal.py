@@ -0,0 +1,275 @@
+"""
+Bounded, relationship-typed traversal of the code graph.
+
+Instead of an unconstrained `(start)-[*1..3]-(related)` match (which explodes
+through hub nodes such as the Repository node), each repository's graph is
+loaded once into an in-process adjacency snapshot in CSR form:
+
+- `offsets[i]:offsets[i + 1]` is the slice of node i's neighbours
+- `targets` holds the neighbour indexes, `rel_types` the relationship type codes
+
+Only CALLS, IMPORTS, INHERITS and CONTAINS (File -> Function/Class) edges are
+kept, in both directions. Traversal is a Dijkstra search over relationship
+weights with a hop limit and per-type fan-out caps, ranked by weighted distance.
+
+Snapshots are cached per repository and keyed by the Repository node's
+`graph_version` (set by each graph build), so repeated questions are answered
+without touching Neo4j until the version changes.
+"""
+import asyncio
+import heapq
+import time
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.settings import get_settings
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+REL_TYPES = ['CALLS', 'IMPORTS', 'INHERITS', 'CONTAINS']
+
+# Cost of following one relationship of each type
+REL_WEIGHTS = {'CALLS': 1.0, 'IMPORTS': 1.5, 'INHERITS': 1.0, 'CONTAINS': 0.5}
+
+# Neighbours of each type expanded per node (bounds hub nodes such as widely imported modules)
+FANOUT_CAPS = {'CALLS': 25, 'IMPORTS': 15, 'INHERITS': 10, 'CONTAINS': 50}
+
+NODES_QUERY = """
+MATCH (n:File {repository_id: $repository_id})
+RETURN elementId(n) AS id, 'File' AS type, n.name AS name, n.path AS path,
+       n.name AS qualified_name, n.description AS description, n.content_summary AS content_summary
+UNION ALL
+MATCH (n:Function {repository_id: $repository_id})
+RETURN elementId(n) AS id, 'Function' AS type, n.name AS name, n.file_path AS path,
+       COALESCE(n.qualified_name, n.name) AS qualified_name, n.description AS description, null AS content_summary
+UNION ALL
+MATCH (n:Class {repository_id: $repository_id})
+RETURN elementId(n) AS id, 'Class' AS type, n.name AS name, n.file_path AS path,
+       COALESCE(n.qualified_name, n.name) AS qualified_name, n.description AS description, null AS content_summary
+UNION ALL
+MATCH (n:Module {repository_id: $repository_id})
+RETURN elementId(n) AS id, 'Module' AS type, n.name AS name, null AS path,
+       n.name AS qualified_name, null AS description, null AS content_summary
+"""
+
+EDGES_QUERY = """
+MATCH (f:File {repository_id: $repository_id})-[r:CONTAINS|IMPORTS]->(n)
+RETURN elementId(f) AS source, elementId(n) AS target, type(r) AS type
+UNION ALL
+MATCH (a:Function {repository_id: $repository_id})-[:CALLS]->(b:Function)
+RETURN elementId(a) AS source, elementId(b) AS target, 'CALLS' AS type
+UNION ALL
+MATCH (a:Class {repository_id: $repository_id})-[:INHERITS]->(b:Class)
+RETURN elementId(a) AS source, elementId(b) AS target, 'INHERITS' AS type
+"""
+
+VERSION_QUERY = "MATCH (r:Repository {repository_id: $repository_id}) RETURN r.graph_version AS version"
+
+
+@dataclass
+class AdjacencySnapshot:
+    """Immutable CSR adjacency of one repository's code graph."""
+    version: Optional[str]
+    nodes: List[Dict[str, Any]]
+    index: Dict[str, int]
+    offsets: array
+    targets: array
+    rel_types: array
+    checked_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.targets) // 2
+
+    @classmethod
+    def build(cls, version: Optional[str], nodes: List[Dict[str, Any]], edges: List[Tuple[str, str, str]]) -> 'AdjacencySnapshot':
+        """Build the CSR arrays; every edge is stored in both directions."""
+        index = {node['id']: i for i, node in enumerate(nodes)}
+        type_codes = {rel_type: code for code, rel_type in enumerate(REL_TYPES)}
+
+        pairs = []
+        for source, target, rel_type in edges:
+            a, b = index.get(source), index.get(target)
+            if a is None or b is None or a == b or rel_type not in type_codes:
+                continue
+            pairs.append((a, b, type_codes[rel_type]))
+            pairs.append((b, a, type_codes[rel_type]))
+
+        counts = [0] * (len(nodes) + 1)
+        for a, _, _ in pairs:
+            counts[a + 1] += 1
+        for i in range(len(nodes)):
+            counts[i + 1] += counts[i]
+        offsets = array('l', counts)
+
+        cursor = list(counts[:-1])
+        targets = array('l', [0]) * len(pairs)
+        rel_types = array('b', [0]) * len(pairs)
+        for a, b, code in pairs:
+            targets[cursor[a]] = b
+            rel_types[cursor[a]] = code
+            cursor[a] += 1
+
+        return cls(version=version, nodes=nodes, index=index, offsets=offsets, targets=targets, rel_types=rel_types)
+
+    def traverse(
+        self,
+        start_ids: List[str],
+        max_depth: int = 3,
+        max_nodes: int = 20,
+        weights: Optional[Dict[str, float]] = None,
+        fanout_caps: Optional[Dict[str, int]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Weighted, hop-bounded search from the start nodes.
+
+        Returns:
+            Up to max_nodes nodes ordered by weighted distance (start nodes first, distance 0)
+        """
+        weights = weights or REL_WEIGHTS
+        fanout_caps = fanout_caps or FANOUT_CAPS
+        type_weights = [weights.get(rel_type, 1.0) for rel_type in REL_TYPES]
+        type_caps = [fanout_caps.get(rel_type, 0) for rel_type in REL_TYPES]
+
+        best: Dict[int, Tuple[float, int]] = {}
+        heap: List[Tuple[float, int, int]] = []
+        for node_id in start_ids:
+            i = self.index.get(node_id)
+            if i is not None and i not in best:
+                best[i] = (0.0, 0)
+                heap.append((0.0, 0, i))
+        heapq.heapify(heap)
+
+        settled: List[Tuple[int, float, int]] = []
+        done = set()
+        while heap and len(settled) < max_nodes:
+            distance, hops, i = heapq.heappop(heap)
+            if i in done:
+                continue
+            done.add(i)
+            settled.append((i, distance, hops))
+            if hops >= max_depth:
+                continue
+
+            expanded = [0] * len(REL_TYPES)
+            for edge in range(self.offsets[i], self.offsets[i + 1]):
+                code = self.rel_types[edge]
+                if expanded[code] >= type_caps[code]:
+                    continue
+                expanded[code] += 1
+                j = self.targets[edge]
+                candidate = distance + type_weights[code]
+                if j not in done and (j not in best or candidate < best[j][0]):
+                    best[j] = (candidate, hops + 1)
+                    heapq.heappush(heap, (candidate, hops + 1, j))
+
+        return [
+            {
+                'type': self.nodes[i]['type'],
+                'id': self.nodes[i]['id'],
+                'name': self.nodes[i]['name'] or self.nodes[i]['qualified_name'],
+                'path': self.nodes[i]['path'],
+                'description': self.nodes[i]['description'],
+                'content_summary': self.nodes[i]['content_summary'],
+                'distance': round(distance, 3),
+                'hops': hops
+            }
+            for i, distance, hops in settled
+        ]
+
+
+class GraphTraversal:
+    """Caches per-repository adjacency snapshots and runs bounded traversals over them."""
+
+    def __init__(self, cache_size: Optional[int] = None, version_ttl: Optional[float] = None):
+        settings = get_settings()
+        self.cache_size = cache_size or settings.graph_snapshot_cache_size
+        # Seconds a cached snapshot is trusted before its graph_version is re-checked
+        self.version_ttl = version_ttl if version_ttl is not None else settings.graph_snapshot_ttl
+        self._snapshots: 'OrderedDict[str, AdjacencySnapshot]' = OrderedDict()
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self.stats = {'hits': 0, 'loads': 0, 'version_checks': 0}
+
+    def invalidate(self, repository_id: Optional[str] = None) -> None:
+        """Drop the cached snapshot of one repository (or all of them)."""
+        if repository_id is None:
+            self._snapshots.clear()
+        else:
+            self._snapshots.pop(repository_id, None)
+
+    async def get_snapshot(self, driver, repository_id: str) -> AdjacencySnapshot:
+        """Cached snapshot for the repository, reloaded when its graph_version changes."""
+        lock = self._locks.setdefault(repository_id, asyncio.Lock())
+        async with lock:
+            snapshot = self._snapshots.get(repository_id)
+            if snapshot and time.monotonic() - snapshot.checked_at < self.version_ttl:
+                self._snapshots.move_to_end(repository_id)
+                self.stats['hits'] += 1
+                return snapshot
+
+            async with driver.session() as session:
+                result = await session.run(VERSION_QUERY, repository_id=repository_id)
+                record = await result.single()
+            version = record['version'] if record else None
+            self.stats['version_checks'] += 1
+
+            if snapshot and snapshot.version == version:
+                snapshot.checked_at = time.monotonic()
+                self._snapshots.move_to_end(repository_id)
+                self.stats['hits'] += 1
+                return snapshot
+
+            snapshot = await self._load(driver, repository_id, version)
+            self._snapshots[repository_id] = snapshot
+            self._snapshots.move_to_end(repository_id)
+            while len(self._snapshots) > self.cache_size:
+                self._snapshots.popitem(last=False)
+            return snapshot
+
+    async def _load(self, driver, repository_id: str, version: Optional[str]) -> AdjacencySnapshot:
+        started = time.perf_counter()
+        async with driver.session() as session:
+            result = await session.run(NODES_QUERY, repository_id=repository_id)
+            nodes = [dict(record) async for record in result]
+            result = await session.run(EDGES_QUERY, repository_id=repository_id)
+            edges = [(record['source'], record['target'], record['type']) async for record in result]
+
+        snapshot = AdjacencySnapshot.build(version, nodes, edges)
+        self.stats['loads'] += 1
+        logger.info(
+            f"Loaded graph snapshot for {repository_id}",
+            version=version,
+            nodes=len(snapshot.nodes),
+            edges=snapshot.edge_count,
+            seconds=round(time.perf_counter() - started, 3)
+        )
+        return snapshot
+
+    async def traverse(
+        self,
+        driver,
+        repository_id: str,
+        start_ids: List[str],
+        max_depth: int = 3,
+        max_nodes: int = 20
+    ) -> List[Dict[str, Any]]:
+        """Related nodes of the start nodes, ranked by weighted distance."""
+        snapshot = await self.get_snapshot(driver, repository_id)
+        return snapshot.traverse(start_ids, max_depth=max_depth, max_nodes=max_nodes)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Cache counters and the size of each cached snapshot."""
+        return {
+            **self.stats,
+            'cached': {
+                repository_id: {'version': s.version, 'nodes': len(s.nodes), 'edges': s.edge_count}
+                for repository_id, s in self._snapshots.items()
+            }
+        }
+
+
+# Global instance
+graph_traversal = GraphTraversal()
@@ -7,11 +7,16 @@ Combines multiple retrieval strategies for optimal accuracy and performance:
 3. Graph-based traversal (code relationships)
 4. Smart context builder (keyword fallback)
 
-Uses weighted scoring to merge results intelligently.
+Uses weighted scoring to merge results intelligently. The layers are
+independent, so they run concurrently, each with its own timeout budget, under
+an overall deadline; a layer that misses its budget contributes no matches.
 """
+import asyncio
 import re
-from typing import List, Dict, Any, Optional, Tuple, Set
+import time
+from typing import List, Dict, Any, Optional, Tuple, Set, Callable, Awaitable
 from collections import defaultdict
+from config.settings import get_settings
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -35,6 +40,15 @@ class HybridRetrieval:
         self.min_confidence = 0.3
         self.high_confidence = 0.7
         
+        # Per-layer timeout budgets (seconds), all capped by the overall deadline
+        self.layer_timeouts = {
+            'summary': 2.0,
+            'semantic': 6.0,       # Includes embedding the question
+            'graph': 6.0,
+            'smart_context': 4.0
+        }
+        self.deadline = get_settings().hybrid_retrieval_deadline
+        
     async def retrieve_context(
         self,
         repository_id: str,
@@ -92,61 +106,19 @@ class HybridRetrieval:
         # Extract keywords for various methods
         keywords = self._extract_keywords(question)
         
-        # LAYER 1: Summary-based pre-filtering (fast, in-memory)
-        logger.info("📋 Layer 1: Summary-based filtering")
-        summary_candidates = self._filter_by_summaries(all_files, question, keywords)
-        retrieval_stats['methods_used'].append('summary')
-        retrieval_stats['files_per_method']['summary'] = len(summary_candidates)
-        logger.info(f"  → Found {len(summary_candidates)} candidates from summaries")
-        
-        # LAYER 2: Semantic search via embeddings
-        semantic_matches = []
-        try:
-            if await qdrant_client.check_connection():
-                logger.info("🔍 Layer 2: Semantic embedding search")
-                semantic_matches = await self._semantic_search(
-                    qdrant_client,
-                    repository_id,
-                    question,
-                    limit=20
-                )
-                retrieval_stats['methods_used'].append('semantic')
-                retrieval_stats['files_per_method']['semantic'] = len(semantic_matches)
-                logger.info(f"  → Found {len(semantic_matches)} semantic matches")
-        except Exception as e:
-            logger.warning(f"Semantic search failed: {str(e)}")
-        
-        # LAYER 3: Graph-based traversal
-        graph_matches = []
-        try:
-            if neo4j_client.is_connected():
-                logger.info("🕸️ Layer 3: Graph-based retrieval")
-                graph_matches = await neo4j_client.graph_based_context_retrieval(
-                    repository_id=repository_id,
-                    question_keywords=keywords,
-                    max_depth=2,
-                    max_nodes=15
-                )
-                retrieval_stats['methods_used'].append('graph')
-                retrieval_stats['files_per_method']['graph'] = len(graph_matches)
-                logger.info(f"  → Found {len(graph_matches)} graph matches")
-        except Exception as e:
-            logger.warning(f"Graph retrieval failed: {str(e)}")
-        
-        # LAYER 4: Smart context builder (keyword-based)
-        logger.info("🎯 Layer 4: Smart context builder")
-        question_analysis = smart_context_builder.analyze_question(question)
-        smart_files, smart_paths = smart_context_builder.build_smart_context(
-            question_analysis,
-            all_files,
-            question
-        )
-        
-        # Convert smart_files to structured format
-        smart_matches = self._parse_smart_context(smart_files, all_files)
-        retrieval_stats['methods_used'].append('smart_context')
-        retrieval_stats['files_per_method']['smart_context'] = len(smart_matches)
-        logger.info(f"  → Found {len(smart_matches)} smart context matches")
+        # LAYERS 1-4 run concurrently: summaries, semantic search, graph traversal, smart context
+        layer_results = await self._run_layers({
+            'summary': lambda: self._summary_layer(all_files, question, keywords, retrieval_stats, repository_id),
+            'semantic': lambda: self._semantic_layer(qdrant_client, repository_id, question, retrieval_stats),
+            'graph': lambda: self._graph_layer(neo4j_client, repository_id, keywords, retrieval_stats),
+            'smart_context': lambda: self._smart_context_layer(
+                smart_context_builder, all_files, question, retrieval_stats, repository_id
+            )
+        }, retrieval_stats)
+        summary_candidates = layer_results['summary'] or self._attachment_candidates(all_files)
+        semantic_matches = layer_results['semantic']
+        graph_matches = layer_results['graph']
+        smart_matches = layer_results['smart_context']
         
         # MERGE: Combine all results with confidence scoring
         logger.info("🔀 Merging results with weighted confidence scoring")
@@ -159,7 +131,283 @@ class HybridRetrieval:
         )
         
         # ✅ CRITICAL FIX #5.4: Ensure attachments are ALWAYS included before slicing
-        # Separate attachments from regular files
+        final_files = self._select_final_files(merged_results, max_files)
+        
+        self._finalize_stats(final_files, retrieval_stats)
+        
+        return final_files, retrieval_stats
+    
+    async def retrieve_context_lazy(
+        self,
+        repository_id: str,
+        question: str,
+        file_handles: List[Dict[str, Any]],
+        max_files: int = 15,
+        overfetch: int = 5
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Two-phase retrieval: rank on metadata, then hydrate only the shortlist.
+        
+        Phase 1 ranks every file using path, summary, Qdrant and graph signals
+        (no file content needed). Phase 2 downloads content for the top
+        max_files + overfetch candidates only, so B2 reads per question are
+        O(k) instead of O(repo).
+        
+        Args:
+            repository_id: Repository ID
+            question: User question
+            file_handles: FileHandle objects (plus already-loaded dicts such as attachments)
+            max_files: Maximum number of files to return
+            overfetch: Extra candidates hydrated to replace files whose content fails to load
+            
+        Returns:
+            (selected_files, retrieval_metadata)
+        """
+        from services.qdrant_client import qdrant_client
+        from services.neo4j_client import neo4j_client
+        from services.smart_context_builder import smart_context_builder
+        from services.file_handle import hydrate
+        
+        logger.info(f"🔄 Starting lazy hybrid retrieval for question: {question[:100]}...")
+        
+        file_handles = [f for f in file_handles if isinstance(f, dict)]
+        retrieval_stats = {
+            'total_files': len(file_handles),
+            'methods_used': [],
+            'files_per_method': {},
+            'merge_strategy': 'weighted_confidence',
+            'retrieval_mode': 'lazy'
+        }
+        
+        keywords = self._extract_keywords(question)
+        
+        # PHASE 1: Metadata-only ranking (layers run concurrently)
+        layer_results = await self._run_layers({
+            'summary': lambda: self._summary_layer(file_handles, question, keywords, retrieval_stats, repository_id),
+            'semantic': lambda: self._semantic_layer(qdrant_client, repository_id, question, retrieval_stats),
+            'graph': lambda: self._graph_layer(neo4j_client, repository_id, keywords, retrieval_stats),
+            'smart_context': lambda: self._smart_metadata_layer(
+                smart_context_builder, file_handles, question, retrieval_stats, repository_id
+            )
+        }, retrieval_stats)
+        summary_candidates = layer_results['summary'] or self._attachment_candidates(file_handles)
+        semantic_matches = layer_results['semantic']
+        graph_matches = layer_results['graph']
+        smart_matches = layer_results['smart_context']
+        
+        merged_results = self._merge_with_confidence(
+            summary_scores=summary_candidates,
+            semantic_matches=semantic_matches,
+            graph_matches=graph_matches,
+            smart_matches=smart_matches,
+            all_files=file_handles
+        )
+        
+        # PHASE 2: Hydrate content for the shortlist only
+        shortlist = self._select_final_files(merged_results, max_files + overfetch)
+        await hydrate(result['file'] for result in shortlist)
+        retrieval_stats['files_hydrated'] = len(shortlist)
+        
+        # Drop candidates whose content could not be loaded, then trim to max_files
+        loaded = [r for r in shortlist if r['file'].get('content')]
+        final_files = self._select_final_files(loaded, max_files)
+        
+        self._finalize_stats(final_files, retrieval_stats)
+        logger.info(f"   Hydrated {retrieval_stats['files_hydrated']}/{len(file_handles)} files")
+        
+        return final_files, retrieval_stats
+    
+    async def _run_layers(
+        self,
+        layers: Dict[str, Callable[[], Awaitable[List[Dict[str, Any]]]]],
+        retrieval_stats: Dict[str, Any]
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Fan out the retrieval layers concurrently.
+        
+        Each layer gets its own timeout budget; layers still running at the
+        overall deadline are cancelled. Failed, timed-out or cancelled layers
+        yield no matches. Per-layer latency and outcome are recorded in
+        retrieval_stats['layer_latencies_ms'] / ['layer_status'].
+        """
+        latencies = retrieval_stats.setdefault('layer_latencies_ms', {})
+        statuses = retrieval_stats.setdefault('layer_status', {})
+        started = time.perf_counter()
+        
+        async def run_layer(name: str, layer: Callable[[], Awaitable[List[Dict[str, Any]]]]):
+            layer_start = time.perf_counter()
+            try:
+                result = await asyncio.wait_for(
+                    layer(), timeout=min(self.layer_timeouts.get(name, self.deadline), self.deadline)
+                )
+                statuses[name] = 'ok'
+                return result
+            except asyncio.TimeoutError:
+                statuses[name] = 'timeout'
+                logger.warning(f"⏱️ Retrieval layer '{name}' exceeded its budget, continuing without it")
+            except asyncio.CancelledError:
+                statuses[name] = 'cancelled'
+                raise
+            except Exception as e:
+                statuses[name] = 'error'
+                logger.warning(f"Retrieval layer '{name}' failed: {str(e)}")
+            finally:
+                latencies[name] = round((time.perf_counter() - layer_start) * 1000, 1)
+            return []
+        
+        tasks = {name: asyncio.create_task(run_layer(name, layer)) for name, layer in layers.items()}
+        done, pending = await asyncio.wait(tasks.values(), timeout=self.deadline)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+            logger.warning(
+                f"⏱️ Retrieval deadline ({self.deadline}s) reached, cancelled: "
+                f"{[name for name, task in tasks.items() if task in pending]}"
+            )
+        
+        retrieval_stats['layers_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        logger.info("⏱️ Retrieval layer latencies (ms)", latencies=latencies, statuses=statuses)
+        return {
+            name: task.result() if task in done and not task.cancelled() else []
+            for name, task in tasks.items()
+        }
+    
+    async def _summary_layer(
+        self,
+        files: List[Dict[str, Any]],
+        question: str,
+        keywords: List[str],
+        retrieval_stats: Dict[str, Any],
+        repository_id: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """LAYER 1: Summary-based pre-filtering (CPU-bound, runs in a thread)."""
+        logger.info("📋 Layer 1: Summary-based filtering")
+        summary_candidates = await asyncio.to_thread(
+            self._filter_by_summaries, files, question, keywords, repository_id
+        )
+        retrieval_stats['methods_used'].append('summary')
+        retrieval_stats['files_per_method']['summary'] = len(summary_candidates)
+        logger.info(f"  → Found {len(summary_candidates)} candidates from summaries")
+        return summary_candidates
+    
+    async def _smart_context_layer(
+        self,
+        smart_context_builder,
+        all_files: List[Dict[str, Any]],
+        question: str,
+        retrieval_stats: Dict[str, Any],
+        repository_id: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """LAYER 4: Smart context builder over file contents (CPU-bound, runs in a thread)."""
+        logger.info("🎯 Layer 4: Smart context builder")
+        
+        def build() -> List[Dict[str, Any]]:
+            question_analysis = smart_context_builder.analyze_question(question)
+            smart_files, smart_paths = smart_context_builder.build_smart_context(
+                question_analysis,
+                all_files,
+                question,
+                repository_id
+            )
+            # Convert smart_files to structured format
+            return self._parse_smart_context(smart_files, all_files)
+        
+        smart_matches = await asyncio.to_thread(build)
+        retrieval_stats['methods_used'].append('smart_context')
+        retrieval_stats['files_per_method']['smart_context'] = len(smart_matches)
+        logger.info(f"  → Found {len(smart_matches)} smart context matches")
+        return smart_matches
+    
+    async def _smart_metadata_layer(
+        self,
+        smart_context_builder,
+        file_handles: List[Dict[str, Any]],
+        question: str,
+        retrieval_stats: Dict[str, Any],
+        repository_id: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """LAYER 4 (lazy mode): Smart context ranking without file contents (runs in a thread)."""
+        logger.info("🎯 Layer 4: Smart context (path/summary/keyword index only)")
+        
+        def rank() -> List[Dict[str, Any]]:
+            question_analysis = smart_context_builder.analyze_question(question)
+            return [
+                {
+                    'file_path': file_info.get('path'),
+                    'score': 0.7,
+                    'method': 'smart_context',
+                    'file': file_info
+                }
+                for _, file_info in smart_context_builder.rank_by_metadata(
+                    question_analysis, file_handles, question, limit=15, repository_id=repository_id
+                )
+            ]
+        
+        smart_matches = await asyncio.to_thread(rank)
+        retrieval_stats['methods_used'].append('smart_context')
+        retrieval_stats['files_per_method']['smart_context'] = len(smart_matches)
+        return smart_matches
+    
+    def _attachment_candidates(self, files: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """User attachments at maximum score (keeps them selected when the summary layer is skipped)."""
+        return [
+            {'file': file_info, 'score': 1.0, 'method': 'summary'}
+            for file_info in files
+            if file_info.get('path', '').startswith('attachment/') or file_info.get('is_attachment', False)
+        ]
+    
+    async def _semantic_layer(
+        self,
+        qdrant_client,
+        repository_id: str,
+        question: str,
+        retrieval_stats: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """LAYER 2: Semantic search via embeddings (skipped if Qdrant is down and no local index exists)."""
+        from services.local_vector_index import local_vector_index
+        if await qdrant_client.check_connection() or local_vector_index.can_serve(repository_id):
+            logger.info("🔍 Layer 2: Semantic embedding search")
+            semantic_matches = await self._semantic_search(
+                qdrant_client,
+                repository_id,
+                question,
+                limit=20
+            )
+            retrieval_stats['methods_used'].append('semantic')
+            retrieval_stats['files_per_method']['semantic'] = len(semantic_matches)
+            logger.info(f"  → Found {len(semantic_matches)} semantic matches")
+            return semantic_matches
+        return []
+    
+    async def _graph_layer(
+        self,
+        neo4j_client,
+        repository_id: str,
+        keywords: List[str],
+        retrieval_stats: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """LAYER 3: Graph-based traversal (skipped if Neo4j is down)."""
+        if neo4j_client.is_connected():
+            logger.info("🕸️ Layer 3: Graph-based retrieval")
+            graph_matches = await neo4j_client.graph_based_context_retrieval(
+                repository_id=repository_id,
+                question_keywords=keywords,
+                max_depth=2,
+                max_nodes=15
+            )
+            retrieval_stats['methods_used'].append('graph')
+            retrieval_stats['files_per_method']['graph'] = len(graph_matches)
+            logger.info(f"  → Found {len(graph_matches)} graph matches")
+            return graph_matches
+        return []
+    
+    def _select_final_files(
+        self,
+        merged_results: List[Dict[str, Any]],
+        max_files: int
+    ) -> List[Dict[str, Any]]:
+        """Select top results: ALL attachments + fill remaining slots with non-attachments."""
         attachments = []
         non_attachments = []
         
@@ -176,12 +424,14 @@ class HybridRetrieval:
             else:
                 non_attachments.append(result)
         
-        # Select top files: ALL attachments + fill remaining slots with non-attachments
         remaining_slots = max(0, max_files - len(attachments))
         final_files = attachments + non_attachments[:remaining_slots]
         
         logger.info(f"✅ Final selection: {len(attachments)} attachments + {len(final_files) - len(attachments)} repo files = {len(final_files)} total")
-        
+        return final_files
+    
+    def _finalize_stats(self, final_files: List[Dict[str, Any]], retrieval_stats: Dict[str, Any]) -> None:
+        """Record final selection statistics."""
         retrieval_stats['final_file_count'] = len(final_files)
         retrieval_stats['average_confidence'] = sum(f['confidence'] for f in final_files) / len(final_files) if final_files else 0
         retrieval_stats['high_confidence_count'] = sum(1 for f in final_files if f['confidence'] >= self.high_confidence)
@@ -189,21 +439,31 @@ class HybridRetrieval:
         logger.info(f"✅ Hybrid retrieval complete: {len(final_files)} files selected")
         logger.info(f"   Average confidence: {retrieval_stats['average_confidence']:.2f}")
         logger.info(f"   High confidence files: {retrieval_stats['high_confidence_count']}")
-        
-        return final_files, retrieval_stats
     
     def _filter_by_summaries(
         self,
         files: List[Dict[str, Any]],
         question: str,
-        keywords: List[str]
+        keywords: List[str],
+        repository_id: Optional[str] = None
     ) -> List[Dict[str, Any]]:
         """
         Fast pre-filtering using file summaries.
         Returns files with summary-based relevance scores.
+        
+        Summary matches come from the repository keyword index when one exists
+        (files missing from it are scanned as before).
         """
+        from services.keyword_index import keyword_index, NO_MATCH
+        
         scored_files = []
         question_lower = question.lower()
+        question_words = set(question_lower.split())
+        
+        index = keyword_index.get(repository_id)
+        if index:
+            keyword_matches_by_path = index.match(keywords, fields=('summary',))
+            overlap_by_path = index.match(question_words, fields=('summary',), prefix=False)
         
         for file_info in files:
             file_path = file_info.get('path', '')
@@ -234,17 +494,20 @@ class HybridRetrieval:
                 })
                 continue
             
-            summary_lower = summary.lower()
             score = 0.0
             
+            if index and file_path in index:
+                keyword_matches = keyword_matches_by_path.get(file_path, NO_MATCH).matched
+                overlap = overlap_by_path.get(file_path, NO_MATCH).matched
+            else:
+                summary_lower = summary.lower()
+                keyword_matches = sum(1 for kw in keywords if kw in summary_lower)
+                overlap = len(question_words & set(summary_lower.split()))
+            
             # Keyword matching in summary
-            keyword_matches = sum(1 for kw in keywords if kw in summary_lower)
             score += keyword_matches * 0.15
             
             # Question overlap in summary
-            question_words = set(question_lower.split())
-            summary_words = set(summary_lower.split())
-            overlap = len(question_words & summary_words)
             score += overlap * 0.05
             
             # Boost if summary is informative (not too short)
@@ -274,35 +537,39 @@ class HybridRetrieval:
         """
         Perform semantic search using embeddings.
         """
-        try:
-            # Import gemini_client locally
-            from services.gemini_client import gemini_client
-            
-            # Generate embedding for question using configured embedder (Gemini or local)
-            question_embedding = await gemini_client.generate_embedding(question)
-            
-            # Search in Qdrant
-            results = await qdrant_client.search_similar_in_repo(
-                query_embedding=question_embedding,
-                repo_id=repository_id,
-                limit=limit,
-                score_threshold=0.1  # Lower threshold to get more results
-            )
-            
-            # Format results
-            semantic_matches = []
-            for result in results:
-                semantic_matches.append({
-                    'file_path': result['metadata'].get('file_path'),
-                    'score': result['score'],
-                    'method': 'semantic'
-                })
-            
-            return semantic_matches
-            
-        except Exception as e:
-            logger.error(f"Semantic search error: {str(e)}")
-            return []
+        # Import gemini_client locally
+        from services.gemini_client import gemini_client
+
+        # Generate embedding for question using configured embedder (Gemini or local)
+        question_embedding = await gemini_client.generate_embedding(question)
+
+        # Search in Qdrant (points are per chunk, so over-fetch and keep the best chunk per file)
+        results = await qdrant_client.search_similar_in_repo(
+            query_embedding=question_embedding,
+            repo_id=repository_id,
+            limit=limit * 3,
+            score_threshold=0.1  # Lower threshold to get more results
+        )
+
+        # Format results
+        semantic_matches = []
+        seen_paths = set()
+        for result in results:
+            file_path = result['metadata'].get('file_path')
+            if file_path in seen_paths:
+                continue
+            seen_paths.add(file_path)
+            semantic_matches.append({
+                'file_path': file_path,
+                'score': result['score'],
+                'method': 'semantic',
+                'start_line': result['metadata'].get('start_line'),
+                'end_line': result['metadata'].get('end_line')
+            })
+            if len(semantic_matches) >= limit:
+                break
+
+        return semantic_matches
     
     def _parse_smart_context(
         self,
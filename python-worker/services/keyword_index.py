@@ -0,0 +1,497 @@
+"""
+Per-repository inverted keyword index (BM25).
+
+The keyword scorers used during retrieval (smart context, database file
+filtering, summary pre-filtering, multi-step follow-ups) used to lowercase
+every file's path and content and substring-scan it for every keyword on every
+question. Instead, each repository gets an inverted index built once during
+ingestion over five fields:
+
+- name: tokens of the file name
+- path: tokens of the full path
+- identifier: declared symbol names (def/class/function/...) in the content
+- summary: the AI file summary
+- content: the file content (first `keyword_index_max_content_chars`)
+
+Identifiers are split on snake_case/camelCase in addition to being indexed
+whole, and query keywords also match terms they prefix ("auth" matches
+"authentication"), approximating the substring checks they replace.
+
+Postings are stored per field as flat arrays (term offsets, doc ids, term
+frequencies, field lengths) in one binary file, next to a small JSON file with
+the paths and sorted vocabulary. Queries score into dense per-file arrays, so
+their cost depends on the postings touched rather than on file sizes. Loaded
+indexes are kept in an LRU; another process rebuilding a repository's index
+is picked up on the next lookup.
+"""
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from collections import Counter, OrderedDict
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Optional import - numpy comes with qdrant-client/pandas, but the index is disabled without it
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+from config.settings import get_settings
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+FIELDS = ('name', 'path', 'identifier', 'summary', 'content')
+FIELD_WEIGHTS = {'name': 3.0, 'path': 2.0, 'identifier': 2.0, 'summary': 1.5, 'content': 1.0}
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+MAX_PREFIX_EXPANSIONS = 32  # Vocabulary terms a keyword may expand to
+MIN_PREFIX_LENGTH = 3  # Shorter keywords only match whole terms
+MAX_TF = 0xFFFF  # Term frequencies are stored as unsigned shorts
+
+_WORD_RE = re.compile(r'[A-Za-z0-9_]+')
+_PART_RE = re.compile(r'[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+')
+_DECLARATION_RE = re.compile(
+    r'\b(?:def|class|function|interface|struct|enum|trait|type|fn|func|const|let|var)\s+([A-Za-z_$][\w$]*)'
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased terms of a text: whole identifiers plus their snake/camel-case parts."""
+    tokens = []
+    for word in _WORD_RE.findall(text or ''):
+        whole = word.strip('_').lower()
+        if len(whole) >= 2:
+            tokens.append(whole)
+        if '_' in whole or not word.islower():
+            parts = [part.lower() for piece in word.split('_') for part in _PART_RE.findall(piece)]
+            if len(parts) > 1:
+                tokens.extend(part for part in parts if len(part) >= 2)
+    return tokens
+
+
+def query_terms(keyword: str) -> Tuple[str, ...]:
+    """Whole-word terms of a query keyword (split parts would widen the match)."""
+    words = (word.strip('_') for word in _WORD_RE.findall((keyword or '').lower()))
+    return tuple(word for word in words if len(word) >= 2)
+
+
+def extract_identifiers(content: str) -> List[str]:
+    """Names declared in source code (functions, classes, types, variables)."""
+    return _DECLARATION_RE.findall(content or '')
+
+
+@dataclass
+class FieldPostings:
+    """Postings of one field: docs/tfs[offsets[t]:offsets[t + 1]] belong to term t."""
+    offsets: Any  # np.ndarray uint32, len(vocab) + 1
+    docs: Any  # np.ndarray uint32
+    tfs: Any  # np.ndarray uint16
+    lengths: Any  # np.ndarray uint32, field length (terms) per file
+    avg_length: float = 0.0
+
+    def __post_init__(self):
+        # BM25 length normalization per file, k1 * (1 - b + b * len / avg)
+        avg_length = self.avg_length or 1.0
+        self.norms = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths.astype(np.float32) / avg_length)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.offsets.nbytes + self.docs.nbytes + self.tfs.nbytes + self.lengths.nbytes + self.norms.nbytes)
+
+
+@dataclass
+class KeywordMatch:
+    """How a file matched a keyword query."""
+    score: float = 0.0  # BM25 summed over the queried fields (with field weights)
+    matched: int = 0  # Distinct keywords found in any queried field
+    hits: Dict[str, int] = field(default_factory=dict)  # Distinct keywords found per field
+
+    def field_hits(self, name: str) -> int:
+        return self.hits.get(name, 0)
+
+
+NO_MATCH = KeywordMatch()
+
+
+class KeywordMatches(Mapping):
+    """Read-only path -> KeywordMatch view over a query's dense score arrays."""
+
+    def __init__(self, index: "RepoKeywordIndex", scores, matched, hits: Dict[str, Any]):
+        self._index = index
+        self._scores = scores
+        self._matched = matched
+        self._hits = hits
+        self._docs = np.flatnonzero(matched)
+
+    def __getitem__(self, path: str) -> KeywordMatch:
+        doc = self._index.doc_id(path)
+        if doc is None or not self._matched[doc]:
+            raise KeyError(path)
+        return KeywordMatch(
+            score=float(self._scores[doc]),
+            matched=int(self._matched[doc]),
+            hits={name: int(values[doc]) for name, values in self._hits.items() if values[doc]}
+        )
+
+    def __iter__(self) -> Iterator[str]:
+        return (self._index.paths[doc] for doc in self._docs)
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+
+@dataclass
+class RepoKeywordIndex:
+    """One repository's inverted index."""
+    repo_id: str
+    build_id: str
+    paths: List[str]
+    vocab: List[str]  # Sorted; a term's position is its id
+    fields: Dict[str, FieldPostings]
+
+    def __post_init__(self):
+        self._doc_ids = {path: i for i, path in enumerate(self.paths)}
+
+    def __contains__(self, path: str) -> bool:
+        return path in self._doc_ids
+
+    def doc_id(self, path: str) -> Optional[int]:
+        return self._doc_ids.get(path)
+
+    @property
+    def nbytes(self) -> int:
+        postings = sum(f.nbytes for f in self.fields.values())
+        return postings + sum(len(t) for t in self.vocab) + sum(len(p) for p in self.paths)
+
+    def match(
+        self,
+        keywords: Iterable[str],
+        fields: Tuple[str, ...] = FIELDS,
+        prefix: bool = True
+    ) -> KeywordMatches:
+        """
+        Score files against keywords.
+
+        Args:
+            keywords: Query keywords (any case; multi-word keywords need all words)
+            fields: Fields to search
+            prefix: Let keywords match vocabulary terms they prefix
+
+        Returns:
+            Mapping of matching file path -> KeywordMatch
+        """
+        n_docs = len(self.paths)
+        scores = np.zeros(n_docs, dtype=np.float32)
+        matched = np.zeros(n_docs, dtype=np.int16)
+        hits = {name: np.zeros(n_docs, dtype=np.int16) for name in fields if name in self.fields}
+
+        queries = list(dict.fromkeys(terms for terms in map(query_terms, keywords) if terms))
+        for terms in queries:
+            term_ids = [self._term_ids(term, prefix) for term in terms]
+            if not all(term_ids):
+                continue
+
+            found = np.zeros(n_docs, dtype=bool)
+            for field_name in hits:
+                postings = self.fields[field_name]
+                tf = self._keyword_tfs(postings, term_ids, n_docs)
+                mask = tf > 0
+                df = int(np.count_nonzero(mask))
+                if not df:
+                    continue
+
+                idf = np.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                weight = FIELD_WEIGHTS.get(field_name, 1.0) * idf
+                scores[mask] += weight * tf[mask] * (BM25_K1 + 1) / (tf[mask] + postings.norms[mask])
+                hits[field_name] += mask
+                found |= mask
+            matched += found
+
+        return KeywordMatches(self, scores, matched, hits)
+
+    @staticmethod
+    def _keyword_tfs(postings: FieldPostings, term_ids: List[List[int]], n_docs: int):
+        """Dense per-file term frequency of a (possibly multi-word) keyword; 0 where absent."""
+        result = None
+        for ids in term_ids:
+            tf = np.zeros(n_docs, dtype=np.float32)
+            for term_id in ids:
+                start, end = postings.offsets[term_id], postings.offsets[term_id + 1]
+                tf[postings.docs[start:end]] += postings.tfs[start:end]
+            result = tf if result is None else np.minimum(result, tf)
+        return result
+
+    def _term_ids(self, term: str, prefix: bool) -> List[int]:
+        i = bisect_left(self.vocab, term)
+        if not prefix or len(term) < MIN_PREFIX_LENGTH:
+            return [i] if i < len(self.vocab) and self.vocab[i] == term else []
+        ids = []
+        while i < len(self.vocab) and self.vocab[i].startswith(term) and len(ids) < MAX_PREFIX_EXPANSIONS:
+            ids.append(i)
+            i += 1
+        return ids
+
+
+def build_repo_index(repo_id: str, files: List[Dict[str, Any]], max_content_chars: int) -> RepoKeywordIndex:
+    """Build an index from file dicts (path, content and optional name/summary)."""
+    paths: List[str] = []
+    seen_paths = set()
+    field_counts: Dict[str, List[Counter]] = {name: [] for name in FIELDS}
+
+    for file_data in files:
+        path = file_data.get('path')
+        if not path or path in seen_paths:
+            continue
+        seen_paths.add(path)
+        paths.append(path)
+
+        content = (file_data.get('content') or '')[:max_content_chars]
+        field_counts['name'].append(Counter(tokenize(file_data.get('name') or os.path.basename(path))))
+        field_counts['path'].append(Counter(tokenize(path)))
+        field_counts['identifier'].append(Counter(tokenize(' '.join(extract_identifiers(content)))))
+        field_counts['summary'].append(Counter(tokenize(file_data.get('summary') or '')))
+        field_counts['content'].append(Counter(tokenize(content)))
+
+    vocab = sorted(set().union(*(counts for docs in field_counts.values() for counts in docs)))
+    term_ids = {term: i for i, term in enumerate(vocab)}
+
+    fields = {}
+    for name, docs in field_counts.items():
+        terms, doc_ids, tfs = [], [], []
+        lengths = np.zeros(len(docs), dtype=np.uint32)
+        for doc, counts in enumerate(docs):
+            lengths[doc] = sum(counts.values())
+            terms.extend(term_ids[term] for term in counts)
+            doc_ids.extend([doc] * len(counts))
+            tfs.extend(min(tf, MAX_TF) for tf in counts.values())
+
+        terms = np.asarray(terms, dtype=np.uint32)
+        order = np.lexsort((np.asarray(doc_ids, dtype=np.uint32), terms))
+        fields[name] = FieldPostings(
+            offsets=np.searchsorted(terms[order], np.arange(len(vocab) + 1)).astype(np.uint32),
+            docs=np.asarray(doc_ids, dtype=np.uint32)[order],
+            tfs=np.asarray(tfs, dtype=np.uint16)[order],
+            lengths=lengths,
+            avg_length=float(lengths.mean()) if len(lengths) else 0.0
+        )
+
+    return RepoKeywordIndex(repo_id=repo_id, build_id=uuid.uuid4().hex, paths=paths, vocab=vocab, fields=fields)
+
+
+class KeywordIndex:
+    """Builds, persists and serves per-repository keyword indexes."""
+
+    META_FILE = "meta.json"
+
+    def __init__(
+        self,
+        enabled: Optional[bool] = None,
+        index_dir: Optional[str] = None,
+        cache_size: Optional[int] = None,
+        max_content_chars: Optional[int] = None
+    ):
+        settings = get_settings()
+        self.enabled = (enabled if enabled is not None else settings.keyword_index_enabled) and NUMPY_AVAILABLE
+        self.index_dir = (
+            index_dir or settings.keyword_index_dir
+            or os.path.join(tempfile.gettempdir(), "gittldr_keyword_index")
+        )
+        self.cache_size = cache_size if cache_size is not None else settings.keyword_index_cache_size
+        self.max_content_chars = (
+            max_content_chars if max_content_chars is not None
+            else settings.keyword_index_max_content_chars
+        )
+
+        # repo_id -> (meta.json mtime_ns when loaded, index)
+        self._indexes: "OrderedDict[str, Tuple[int, RepoKeywordIndex]]" = OrderedDict()
+        self._lock = threading.RLock()
+
+        self.stats = {
+            'builds': 0,
+            'loads': 0,
+            'lookups': 0,
+            'misses': 0,
+            'evictions': 0
+        }
+
+    def _repo_dir(self, repo_id: str) -> str:
+        return os.path.join(self.index_dir, re.sub(r'[^A-Za-z0-9_.-]', '_', repo_id))
+
+    def build(self, repo_id: str, files: List[Dict[str, Any]]) -> Optional[RepoKeywordIndex]:
+        """
+        Build and persist a repository's index (CPU-bound; call from a thread).
+
+        Args:
+            repo_id: Repository ID
+            files: File dicts with path, content and optional name/summary
+
+        Returns:
+            The new index, or None when disabled
+        """
+        if not self.enabled:
+            return None
+
+        started = time.perf_counter()
+        index = build_repo_index(repo_id, files, self.max_content_chars)
+        mtime = self._write(index)
+        with self._lock:
+            self._put(repo_id, mtime, index)
+            self.stats['builds'] += 1
+
+        logger.info(
+            f"Built keyword index for {repo_id}: {len(index.paths)} files, {len(index.vocab)} terms, "
+            f"{index.nbytes} bytes in {(time.perf_counter() - started) * 1000:.0f}ms"
+        )
+        return index
+
+    def get(self, repo_id: Optional[str]) -> Optional[RepoKeywordIndex]:
+        """A repository's index (loaded from disk if needed), or None if it was never built."""
+        if not self.enabled or not repo_id:
+            return None
+
+        meta_path = os.path.join(self._repo_dir(repo_id), self.META_FILE)
+        try:
+            mtime = os.stat(meta_path).st_mtime_ns
+        except OSError:
+            mtime = None
+
+        with self._lock:
+            self.stats['lookups'] += 1
+            cached = self._indexes.get(repo_id)
+            if cached is not None and (mtime is None or cached[0] == mtime):
+                self._indexes.move_to_end(repo_id)
+                return cached[1]
+            if mtime is None:
+                self.stats['misses'] += 1
+                return None
+
+            try:
+                index = self._read(repo_id)
+            except Exception as e:
+                logger.warning(f"Failed to load keyword index for {repo_id}: {str(e)}")
+                self.stats['misses'] += 1
+                return cached[1] if cached else None
+
+            self._put(repo_id, mtime, index)
+            self.stats['loads'] += 1
+            return index
+
+    def invalidate(self, repo_id: str) -> None:
+        """Drop a repository's index from memory and disk."""
+        with self._lock:
+            self._indexes.pop(repo_id, None)
+        try:
+            os.remove(os.path.join(self._repo_dir(repo_id), self.META_FILE))
+        except OSError:
+            pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Index usage metrics."""
+        with self._lock:
+            return {
+                **self.stats,
+                'enabled': self.enabled,
+                'loaded_repositories': len(self._indexes),
+                'loaded_bytes': sum(index.nbytes for _, index in self._indexes.values()),
+                'cache_size': self.cache_size,
+                'index_dir': self.index_dir
+            }
+
+    def _put(self, repo_id: str, mtime: int, index: RepoKeywordIndex) -> None:
+        self._indexes[repo_id] = (mtime, index)
+        self._indexes.move_to_end(repo_id)
+        while len(self._indexes) > max(self.cache_size, 1):
+            self._indexes.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    def _write(self, index: RepoKeywordIndex) -> int:
+        """Write postings then meta.json (which names the postings file); returns meta mtime."""
+        repo_dir = self._repo_dir(index.repo_id)
+        os.makedirs(repo_dir, exist_ok=True)
+
+        postings_file = f"postings-{index.build_id}.bin"
+        segments = []
+        chunks = []
+        position = 0
+        for name, postings in index.fields.items():
+            for part in ('offsets', 'docs', 'tfs', 'lengths'):
+                values = getattr(postings, part)
+                data = values.tobytes()
+                segments.append([name, part, values.dtype.str, position, len(values)])
+                chunks.append(data)
+                position += len(data)
+        self._atomic_write(os.path.join(repo_dir, postings_file), b''.join(chunks))
+
+        meta = {
+            'repo_id': index.repo_id,
+            'build_id': index.build_id,
+            'postings_file': postings_file,
+            'segments': segments,
+            'avg_lengths': {name: postings.avg_length for name, postings in index.fields.items()},
+            'paths': index.paths,
+            'vocab': index.vocab
+        }
+        meta_path = os.path.join(repo_dir, self.META_FILE)
+        self._atomic_write(meta_path, json.dumps(meta, separators=(',', ':')).encode('utf-8'))
+
+        # Remove postings of previous builds
+        for entry in os.listdir(repo_dir):
+            if entry.startswith('postings-') and entry != postings_file:
+                try:
+                    os.remove(os.path.join(repo_dir, entry))
+                except OSError:
+                    pass
+
+        return os.stat(meta_path).st_mtime_ns
+
+    def _read(self, repo_id: str) -> RepoKeywordIndex:
+        repo_dir = self._repo_dir(repo_id)
+        with open(os.path.join(repo_dir, self.META_FILE), 'rb') as f:
+            meta = json.loads(f.read().decode('utf-8'))
+        with open(os.path.join(repo_dir, meta['postings_file']), 'rb') as f:
+            data = f.read()
+
+        parts: Dict[str, Dict[str, Any]] = {}
+        for name, part, dtype, offset, count in meta['segments']:
+            parts.setdefault(name, {})[part] = np.frombuffer(data, dtype=dtype, count=count, offset=offset)
+
+        fields = {
+            name: FieldPostings(avg_length=meta['avg_lengths'].get(name, 0.0), **field_parts)
+            for name, field_parts in parts.items()
+        }
+        return RepoKeywordIndex(
+            repo_id=meta['repo_id'],
+            build_id=meta['build_id'],
+            paths=meta['paths'],
+            vocab=meta['vocab'],
+            fields=fields
+        )
+
+    @staticmethod
+    def _atomic_write(path: str, data: bytes) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+
+# Global instance
+keyword_index = KeywordIndex()
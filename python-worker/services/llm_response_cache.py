@@ -0,0 +1,181 @@
+"""
+Shared cache of deterministic LLM responses.
+
+Identical prompts are regenerated constantly (file summaries of unchanged
+files on every re-analysis, categorization of repeat questions, retried PR
+descriptions). Responses are keyed by model route, temperature, max_tokens
+and SHA-256 of the prompt, and only cached for temperature-0 calls or task
+types configured as cacheable:
+
+1. In-process LRU bounded by entry count, with a TTL
+2. Optional Redis tier shared by every process, with its own (longer) TTL
+
+Each entry remembers its original latency and token estimate, so hits can be
+reported as saved tokens and saved seconds.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+
+from config.settings import get_settings
+from services.rate_limiter import estimate_tokens
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def llm_cache_key(version: str, route: str, prompt: str, temperature: float, max_tokens: int) -> str:
+    """Cache key for a prompt sent through a model route with given sampling settings."""
+    digest = hashlib.sha256(prompt.encode('utf-8', errors='replace')).hexdigest()
+    return f"llm:{version}:{route}:t{float(temperature):g}:m{int(max_tokens)}:{digest}"
+
+
+class LLMResponseCache:
+    """Two-tier (memory LRU + Redis) cache of LLM responses."""
+
+    def __init__(
+        self,
+        enabled: Optional[bool] = None,
+        task_types: Optional[str] = None,
+        max_entries: Optional[int] = None,
+        memory_ttl: Optional[int] = None,
+        redis_enabled: Optional[bool] = None,
+        redis_ttl: Optional[int] = None,
+        version: Optional[str] = None
+    ):
+        settings = get_settings()
+        self.enabled = enabled if enabled is not None else settings.llm_cache_enabled
+        task_types = task_types if task_types is not None else settings.llm_cache_task_types
+        self.task_types: Set[str] = {t.strip() for t in task_types.split(',') if t.strip()}
+        self.max_entries = max_entries if max_entries is not None else settings.llm_cache_max_entries
+        self.memory_ttl = memory_ttl or settings.llm_cache_memory_ttl
+        self.redis_enabled = redis_enabled if redis_enabled is not None else settings.llm_cache_redis_enabled
+        self.redis_ttl = redis_ttl or settings.llm_cache_redis_ttl
+        self.version = version or settings.llm_cache_version
+
+        # key -> (expires_at, entry)
+        self._memory: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.RLock()
+
+        self.stats = {
+            'memory_hits': 0,
+            'redis_hits': 0,
+            'misses': 0,
+            'stores': 0,
+            'bypassed': 0,
+            'evictions': 0,
+            'redis_errors': 0,
+            'saved_tokens': 0,
+            'saved_latency_seconds': 0.0
+        }
+
+    @property
+    def redis(self):
+        """Connected redis.asyncio client, or None (the Redis tier is skipped)."""
+        if not self.redis_enabled:
+            return None
+        from services.redis_client import redis_client
+        return redis_client.redis
+
+    def is_cacheable(self, temperature: float, task_type: str) -> bool:
+        """Whether a call's response may be served from (and stored in) the cache."""
+        cacheable = self.enabled and (temperature == 0 or task_type in self.task_types)
+        if self.enabled and not cacheable:
+            self.stats['bypassed'] += 1
+        return cacheable
+
+    async def get(self, route: str, prompt: str, temperature: float, max_tokens: int) -> Optional[str]:
+        """Cached response, or None."""
+        key = llm_cache_key(self.version, route, prompt, temperature, max_tokens)
+
+        with self._lock:
+            cached = self._memory.get(key)
+            if cached is not None and cached[0] <= time.time():
+                del self._memory[key]
+                cached = None
+            if cached is not None:
+                self._memory.move_to_end(key)
+                self.stats['memory_hits'] += 1
+                return self._record_hit(cached[1])
+
+        redis = self.redis
+        if redis is not None:
+            try:
+                value = await redis.get(key)
+            except Exception as e:
+                self.stats['redis_errors'] += 1
+                logger.debug(f"LLM response cache Redis read failed: {str(e)}")
+                value = None
+            if value:
+                try:
+                    entry = json.loads(value)
+                    text = entry['text']
+                except (TypeError, ValueError, KeyError):
+                    entry, text = None, None
+                if text:
+                    self._put_memory(key, entry)
+                    self.stats['redis_hits'] += 1
+                    return self._record_hit(entry)
+
+        self.stats['misses'] += 1
+        return None
+
+    async def put(
+        self, route: str, prompt: str, temperature: float, max_tokens: int, text: str, latency: float
+    ) -> None:
+        """Store a response in both tiers (empty responses are not cached)."""
+        if not text:
+            return
+        key = llm_cache_key(self.version, route, prompt, temperature, max_tokens)
+        entry = {
+            'text': text,
+            'latency': round(latency, 3),
+            'tokens': estimate_tokens(prompt) + estimate_tokens(text)
+        }
+        self._put_memory(key, entry)
+        self.stats['stores'] += 1
+
+        redis = self.redis
+        if redis is not None:
+            try:
+                await redis.setex(key, self.redis_ttl, json.dumps(entry))
+            except Exception as e:
+                self.stats['redis_errors'] += 1
+                logger.debug(f"LLM response cache Redis write failed: {str(e)}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss and savings metrics for both tiers."""
+        with self._lock:
+            hits = self.stats['memory_hits'] + self.stats['redis_hits']
+            lookups = hits + self.stats['misses']
+            return {
+                **self.stats,
+                'saved_latency_seconds': round(self.stats['saved_latency_seconds'], 3),
+                'hit_rate': hits / lookups if lookups else 0.0,
+                'memory_entries': len(self._memory),
+                'max_entries': self.max_entries,
+                'cacheable_task_types': sorted(self.task_types),
+                'redis_enabled': self.redis_enabled
+            }
+
+    def _record_hit(self, entry: Dict[str, Any]) -> str:
+        self.stats['saved_tokens'] += int(entry.get('tokens', 0))
+        self.stats['saved_latency_seconds'] += float(entry.get('latency', 0.0))
+        return entry['text']
+
+    def _put_memory(self, key: str, entry: Dict[str, Any]) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._memory[key] = (time.time() + self.memory_ttl, entry)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+                self.stats['evictions'] += 1
+
+
+# Global instance
+llm_response_cache = LLMResponseCache()
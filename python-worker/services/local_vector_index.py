@@ -0,0 +1,388 @@
+"""
+In-process vector index for hot repositories.
+
+Semantic search normally goes to Qdrant over the network. For repositories
+that are queried repeatedly, their chunk vectors are pulled from Qdrant once,
+stored on disk as a normalized float32 matrix (`vectors.npy`, memory-mapped on
+load) plus ids and payloads (`points.json`), and searched by brute-force dot
+product in process.
+
+Consistency follows the repository content cache: each repository directory has
+a VERSION token that every write through the Qdrant client (upserts, deletes,
+re-indexing) replaces. Snapshots are stored per version, so a write in any
+process sharing the directory makes other processes reload on their next query.
+
+Loaded snapshots are evicted LRU under a byte budget. When Qdrant is
+unavailable, the newest snapshot on disk is served even if it is stale
+(offline mode).
+"""
+import asyncio
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import uuid
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+# Optional import - numpy comes with qdrant-client/pandas, but the index is disabled without it
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+from config.settings import get_settings
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class RepoVectors:
+    """One repository's vectors (rows L2-normalized) with their point ids and payloads."""
+    repo_id: str
+    version: str
+    ids: List[str]
+    payloads: List[Dict[str, Any]]
+    vectors: Any  # np.ndarray or np.memmap, shape (len(ids), dimension)
+    payload_bytes: int = 0
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.vectors.nbytes) + self.payload_bytes
+
+    def search(self, query_embedding: List[float], limit: int, score_threshold: float) -> List[Dict[str, Any]]:
+        """Top-k cosine matches, formatted like QuadrantVectorClient.search_similar."""
+        if not self.ids or limit <= 0:
+            return []
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(query))
+        if norm == 0.0 or query.shape[0] != self.vectors.shape[1]:
+            return []
+        scores = self.vectors @ (query / norm)
+
+        k = min(limit, len(self.ids))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            {"id": self.ids[i], "score": float(scores[i]), "metadata": self.payloads[i]}
+            for i in top
+            if scores[i] >= score_threshold
+        ]
+
+
+class LocalVectorIndex:
+    """Loads, caches and searches per-repository vector snapshots."""
+
+    VERSION_FILE = "VERSION"
+    VECTORS_FILE = "vectors.npy"
+    POINTS_FILE = "points.json"
+
+    def __init__(
+        self,
+        enabled: Optional[bool] = None,
+        index_dir: Optional[str] = None,
+        memory_budget_bytes: Optional[int] = None,
+        hot_threshold: Optional[int] = None
+    ):
+        settings = get_settings()
+        self.enabled = NUMPY_AVAILABLE and (
+            enabled if enabled is not None else settings.local_vector_index_enabled
+        )
+        self.index_dir = (
+            index_dir or settings.local_vector_index_dir
+            or os.path.join(tempfile.gettempdir(), "gittldr_vector_index")
+        )
+        self.memory_budget_bytes = (
+            memory_budget_bytes if memory_budget_bytes is not None
+            else settings.local_vector_index_memory_bytes
+        )
+        self.hot_threshold = hot_threshold if hot_threshold is not None else settings.local_vector_index_hot_threshold
+
+        self._loaded: "OrderedDict[str, RepoVectors]" = OrderedDict()
+        self._memory_bytes = 0
+        self._queries: Counter = Counter()
+        self._load_locks: Dict[str, asyncio.Lock] = {}
+        self._lock = threading.RLock()
+
+        self.stats = {
+            'local_searches': 0,
+            'offline_searches': 0,
+            'loads_from_disk': 0,
+            'loads_from_qdrant': 0,
+            'evictions': 0,
+            'invalidations': 0
+        }
+
+    @property
+    def qdrant_client(self):
+        from services.qdrant_client import qdrant_client
+        return qdrant_client
+
+    # ------------------------------------------------------------------
+    # Versioning
+    # ------------------------------------------------------------------
+
+    def _repo_dir(self, repo_id: str) -> str:
+        return os.path.join(self.index_dir, re.sub(r'[^A-Za-z0-9_.-]', '_', repo_id))
+
+    def get_version(self, repo_id: str) -> str:
+        """Current version token of a repository's vectors ("" if none was written yet)."""
+        try:
+            with open(os.path.join(self._repo_dir(repo_id), self.VERSION_FILE), 'r', encoding='utf-8') as f:
+                return f.read().strip()
+        except OSError:
+            return ""
+
+    def invalidate(self, repo_id: str) -> None:
+        """Mark a repository's vectors as changed (called on every write to its points)."""
+        if not self.enabled or not repo_id:
+            return
+        repo_dir = self._repo_dir(repo_id)
+        try:
+            os.makedirs(repo_dir, exist_ok=True)
+            self._atomic_write(os.path.join(repo_dir, self.VERSION_FILE), uuid.uuid4().hex.encode('utf-8'))
+        except OSError as e:
+            logger.warning(f"Failed to invalidate local vector index for {repo_id}: {str(e)}")
+        with self._lock:
+            self._drop(repo_id)
+            self.stats['invalidations'] += 1
+
+    def invalidate_for_points(self, points: List[Dict[str, Any]]) -> None:
+        """Invalidate every repository referenced by the payloads of upserted points."""
+        if not self.enabled:
+            return
+        for repo_id in {(p.get('payload') or {}).get('repo_id') for p in points}:
+            if repo_id:
+                self.invalidate(repo_id)
+
+    def can_serve(self, repo_id: str) -> bool:
+        """Whether a snapshot of the repository is loaded or on disk."""
+        if not self.enabled:
+            return False
+        with self._lock:
+            if repo_id in self._loaded:
+                return True
+        return self._latest_snapshot_dir(repo_id) is not None
+
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+
+    async def search(
+        self,
+        repo_id: str,
+        query_embedding: List[float],
+        limit: int = 10,
+        score_threshold: float = 0.3,
+        online: bool = True
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Search a repository locally.
+
+        Args:
+            online: Whether Qdrant is reachable. When it is, cold repositories are left
+                to Qdrant until they have been queried hot_threshold times.
+
+        Returns:
+            Results, or None if the caller should search Qdrant instead
+        """
+        results = await self.search_many(repo_id, [query_embedding], limit, score_threshold, online=online)
+        return results[0] if results is not None else None
+
+    async def search_many(
+        self,
+        repo_id: str,
+        query_embeddings: List[List[float]],
+        limit: int = 10,
+        score_threshold: float = 0.3,
+        online: bool = True
+    ) -> Optional[List[List[Dict[str, Any]]]]:
+        """Search a repository locally for several queries (counted as one query for hotness)."""
+        snapshot = await self._acquire(repo_id, online)
+        if snapshot is None:
+            return None
+
+        with self._lock:
+            self.stats['local_searches'] += len(query_embeddings)
+            if not online:
+                self.stats['offline_searches'] += len(query_embeddings)
+        return await asyncio.to_thread(
+            lambda: [snapshot.search(embedding, limit, score_threshold) for embedding in query_embeddings]
+        )
+
+    async def _acquire(self, repo_id: str, online: bool) -> Optional[RepoVectors]:
+        """The snapshot to search, loading it if the repository is hot (or Qdrant is down)."""
+        if not self.enabled:
+            return None
+
+        version = self.get_version(repo_id)
+        with self._lock:
+            self._queries[repo_id] += 1
+            snapshot = self._loaded.get(repo_id)
+            if snapshot and (snapshot.version == version or not online):
+                self._loaded.move_to_end(repo_id)
+                return snapshot
+            hot = self._queries[repo_id] >= self.hot_threshold
+
+        if online and not hot:
+            return None
+        return await self._load(repo_id, version, online)
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    async def _load(self, repo_id: str, version: str, online: bool) -> Optional[RepoVectors]:
+        lock = self._load_locks.setdefault(repo_id, asyncio.Lock())
+        async with lock:
+            with self._lock:
+                snapshot = self._loaded.get(repo_id)
+            if snapshot and snapshot.version == version:
+                return snapshot
+
+            snapshot_dir = os.path.join(self._repo_dir(repo_id), version) if version else None
+            if not (snapshot_dir and os.path.exists(os.path.join(snapshot_dir, self.POINTS_FILE))):
+                snapshot_dir = None
+                if online:
+                    try:
+                        snapshot_dir = await self._snapshot_from_qdrant(repo_id, version)
+                    except Exception as e:
+                        logger.warning(f"Failed to build local vector snapshot for {repo_id}: {str(e)}")
+                if snapshot_dir is None and not online:
+                    # Offline: the newest snapshot is better than no semantic search at all
+                    snapshot_dir = self._latest_snapshot_dir(repo_id)
+            if snapshot_dir is None:
+                return None
+
+            try:
+                snapshot = await asyncio.to_thread(self._read_snapshot, repo_id, snapshot_dir)
+            except Exception as e:
+                logger.warning(f"Failed to read local vector snapshot for {repo_id}: {str(e)}")
+                return None
+
+            with self._lock:
+                self.stats['loads_from_disk'] += 1
+                self._put(snapshot)
+            logger.info(
+                f"Loaded local vector index for {repo_id}",
+                points=len(snapshot.ids),
+                bytes=snapshot.nbytes
+            )
+            return snapshot
+
+    async def _snapshot_from_qdrant(self, repo_id: str, version: str) -> Optional[str]:
+        """Pull a repository's points from Qdrant and write them as a snapshot for `version`."""
+        if not version:
+            # First snapshot of this repository: start versioning it
+            self.invalidate(repo_id)
+            version = self.get_version(repo_id)
+
+        points = await asyncio.to_thread(self.qdrant_client.get_repository_points, repo_id)
+        if not points:
+            return None
+        snapshot_dir = os.path.join(self._repo_dir(repo_id), version)
+        await asyncio.to_thread(self._write_snapshot, snapshot_dir, points)
+        with self._lock:
+            self.stats['loads_from_qdrant'] += 1
+        return snapshot_dir
+
+    def _write_snapshot(self, snapshot_dir: str, points: List[Tuple[str, List[float], Dict[str, Any]]]) -> None:
+        vectors = np.asarray([vector for _, vector, _ in points], dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors /= np.where(norms == 0, 1.0, norms)
+
+        os.makedirs(snapshot_dir, exist_ok=True)
+        tmp_vectors = os.path.join(snapshot_dir, f".tmp-{uuid.uuid4().hex}.npy")
+        np.save(tmp_vectors, vectors)
+        os.replace(tmp_vectors, os.path.join(snapshot_dir, self.VECTORS_FILE))
+        # points.json is written last: its presence marks the snapshot complete
+        data = json.dumps({
+            'ids': [str(point_id) for point_id, _, _ in points],
+            'payloads': [payload or {} for _, _, payload in points]
+        }).encode('utf-8')
+        self._atomic_write(os.path.join(snapshot_dir, self.POINTS_FILE), data)
+
+        # Remove snapshots of previous versions
+        repo_dir = os.path.dirname(snapshot_dir)
+        for entry in os.listdir(repo_dir):
+            entry_path = os.path.join(repo_dir, entry)
+            if entry_path != snapshot_dir and os.path.isdir(entry_path):
+                shutil.rmtree(entry_path, ignore_errors=True)
+
+    def _read_snapshot(self, repo_id: str, snapshot_dir: str) -> RepoVectors:
+        points_path = os.path.join(snapshot_dir, self.POINTS_FILE)
+        with open(points_path, 'r', encoding='utf-8') as f:
+            points = json.load(f)
+        vectors = np.load(os.path.join(snapshot_dir, self.VECTORS_FILE), mmap_mode='r')
+        return RepoVectors(
+            repo_id=repo_id,
+            version=os.path.basename(snapshot_dir),
+            ids=points['ids'],
+            payloads=points['payloads'],
+            vectors=vectors,
+            payload_bytes=os.path.getsize(points_path)
+        )
+
+    def _latest_snapshot_dir(self, repo_id: str) -> Optional[str]:
+        repo_dir = self._repo_dir(repo_id)
+        try:
+            candidates = [
+                os.path.join(repo_dir, entry) for entry in os.listdir(repo_dir)
+                if os.path.exists(os.path.join(repo_dir, entry, self.POINTS_FILE))
+            ]
+        except OSError:
+            return None
+        return max(candidates, key=os.path.getmtime) if candidates else None
+
+    # ------------------------------------------------------------------
+    # Memory tier
+    # ------------------------------------------------------------------
+
+    def _put(self, snapshot: RepoVectors) -> None:
+        self._drop(snapshot.repo_id)
+        self._loaded[snapshot.repo_id] = snapshot
+        self._memory_bytes += snapshot.nbytes
+        while self._memory_bytes > self.memory_budget_bytes and len(self._loaded) > 1:
+            oldest = next(iter(self._loaded))
+            self._drop(oldest)
+            self.stats['evictions'] += 1
+
+    def _drop(self, repo_id: str) -> None:
+        snapshot = self._loaded.pop(repo_id, None)
+        if snapshot:
+            self._memory_bytes -= snapshot.nbytes
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Search/load counters and the repositories currently loaded."""
+        with self._lock:
+            return {
+                **self.stats,
+                'enabled': self.enabled,
+                'memory_bytes': self._memory_bytes,
+                'memory_budget_bytes': self.memory_budget_bytes,
+                'loaded': {repo_id: len(s.ids) for repo_id, s in self._loaded.items()}
+            }
+
+    @staticmethod
+    def _atomic_write(path: str, data: bytes) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+
+# Global instance
+local_vector_index = LocalVectorIndex()
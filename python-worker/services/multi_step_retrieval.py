@@ -11,6 +11,7 @@ from services.database_service import database_service
 from services.neo4j_client import neo4j_client
 from services.smart_context_builder import smart_context_builder
 from services.hybrid_retrieval import hybrid_retrieval
+from services.keyword_index import keyword_index, KeywordMatch, NO_MATCH
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -73,9 +74,12 @@ class MultiStepRetrieval:
             'total_tokens_used': 0
         }
         
-        # OPTIMIZATION: Load all files with content ONCE at the beginning
-        logger_instance.info("📥 Loading all repository files with content (one-time operation)")
-        all_files_with_content = await database_service.get_files_with_content(repository_id)
+        # OPTIMIZATION: Load file METADATA once; content is only fetched for shortlisted files
+        logger_instance.info("📥 Loading repository file handles (metadata-first, lazy content)")
+        all_files_with_content = initial_context.get('file_handles')
+        if all_files_with_content is None:
+            all_files_with_content = await database_service.get_file_handles(repository_id)
+        all_files_with_content = list(all_files_with_content)
         
         # Add attachments to the files list if provided
         if initial_context.get('attachments'):
@@ -131,7 +135,7 @@ class MultiStepRetrieval:
                 }
             }
         
-        logger_instance.info(f"✅ Loaded {len(all_files_with_content)} files with content (including attachments)")
+        logger_instance.info(f"✅ Loaded {len(all_files_with_content)} file handles (including attachments)")
         
         # Step 1: Initial context retrieval (pass all_files_with_content)
         current_context = await self._initial_retrieval(
@@ -215,10 +219,10 @@ class MultiStepRetrieval:
         logger.info("🚀 Using HYBRID retrieval (embeddings + graph + summaries + smart context)")
         
         try:
-            selected_files, retrieval_stats = await hybrid_retrieval.retrieve_context(
+            selected_files, retrieval_stats = await hybrid_retrieval.retrieve_context_lazy(
                 repository_id=repository_id,
                 question=question,
-                all_files=files_with_content,
+                file_handles=files_with_content,
                 max_files=15
             )
             
@@ -310,10 +314,19 @@ class MultiStepRetrieval:
             logger.info("Using smart context builder for additional files")
             question_analysis = smart_context_builder.analyze_question(question)
             
+            # Shortlist on metadata, then download content only for the shortlist
+            shortlist = [
+                file_info for _, file_info in smart_context_builder.rank_by_metadata(
+                    question_analysis, files_with_content, question, repository_id=repository_id
+                )
+            ]
+            await database_service.hydrate_file_handles(shortlist)
+            
             smart_files, relevant_paths = smart_context_builder.build_smart_context(
                 question_analysis,
-                files_with_content,
-                question
+                shortlist,
+                question,
+                repository_id
             )
             
             for file_content in smart_files:
@@ -507,13 +520,36 @@ If you still need more information:
         
         # Fallback to database search
         if len(additional_files) < 3:
+            # Shortlist on path/name/summary, then check content of the shortlist only
+            candidates = self._shortlist_by_metadata(
+                all_files, search_targets, retrieval_history['files_retrieved']
+            )
+            await database_service.hydrate_file_handles(candidates)
+            
+            # Entity/keyword matches from the keyword index (None: scan contents)
+            index = keyword_index.get(repository_id)
+            if index:
+                entity_matches = index.match(
+                    search_targets.get('entities', []), fields=('name', 'identifier', 'content')
+                )
+                keyword_matches = index.match(
+                    search_targets.get('keywords', [])[:5], fields=('path', 'content')
+                )
+            
             # Search by keywords in file paths and content
-            for file_info in all_files:
+            for file_info in candidates:
                 if file_info.get('path') in retrieval_history['files_retrieved']:
                     continue
                 
+                indexed_matches = None
+                if index and file_info.get('path') in index:
+                    indexed_matches = (
+                        entity_matches.get(file_info['path'], NO_MATCH),
+                        keyword_matches.get(file_info['path'], NO_MATCH)
+                    )
+                
                 # Check if file might be relevant
-                if self._is_file_relevant(file_info, search_targets):
+                if self._is_file_relevant(file_info, search_targets, indexed_matches):
                     retrieval_history['files_retrieved'].add(file_info['path'])
                     additional_files.append(self._format_file_content(file_info))
                     
@@ -554,17 +590,56 @@ If you still need more information:
         
         return targets
     
-    def _is_file_relevant(self, file_info: Dict[str, Any], search_targets: Dict[str, Any]) -> bool:
-        """Check if file is relevant to search targets."""
+    def _shortlist_by_metadata(
+        self,
+        files: List[Dict[str, Any]],
+        search_targets: Dict[str, Any],
+        already_retrieved: set,
+        limit: int = 25
+    ) -> List[Dict[str, Any]]:
+        """Rank not-yet-retrieved files on path, name and summary before loading content."""
+        scored = []
+        for file_info in files:
+            path = file_info.get('path', '')
+            if path in already_retrieved:
+                continue
+            
+            metadata_text = f"{path} {file_info.get('name', '')} {file_info.get('summary') or ''}".lower()
+            score = sum(2 for p in search_targets.get('file_patterns', []) if p.lower() in metadata_text)
+            score += sum(1 for e in search_targets.get('entities', []) if e.lower() in metadata_text)
+            score += sum(1 for k in search_targets.get('keywords', [])[:5] if k in metadata_text)
+            if score > 0:
+                scored.append((score, file_info))
+        
+        scored.sort(key=lambda x: x[0], reverse=True)
+        return [file_info for _, file_info in scored[:limit]]
+    
+    def _is_file_relevant(
+        self,
+        file_info: Dict[str, Any],
+        search_targets: Dict[str, Any],
+        indexed_matches: Optional[Tuple[KeywordMatch, KeywordMatch]] = None
+    ) -> bool:
+        """
+        Check if file is relevant to search targets.
+        
+        indexed_matches holds the file's (entity, keyword) matches from the
+        repository keyword index; without them the content is scanned.
+        """
         path = file_info.get('path', '').lower()
-        name = file_info.get('name', '').lower()
-        content = file_info.get('content', '').lower()
         
         # Check file patterns
         for pattern in search_targets.get('file_patterns', []):
             if pattern.lower() in path:
                 return True
         
+        if indexed_matches is not None:
+            entity_match, keyword_match = indexed_matches
+            return entity_match.matched > 0 or keyword_match.matched >= 2
+        
+        name = file_info.get('name', '').lower()
+        content = (file_info.get('content') or '').lower()
+        
         # Check entities
         for entity in search_targets.get('entities', []):
             entity_lower = entity.lower()
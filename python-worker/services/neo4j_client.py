@@ -3,6 +3,7 @@ Neo4j client for code graph storage and retrieval.
 Manages code relationships, dependencies, and semantic connections.
 """
 import asyncio
+import re
 from typing import Dict, Any, List, Optional, Set, Tuple
 from neo4j import AsyncGraphDatabase
 from neo4j.exceptions import ServiceUnavailable, AuthError
@@ -13,6 +14,29 @@ from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Full-text indexes used for entry-node lookup
+FULLTEXT_INDEXES = {
+    'File': 'file_search_index',
+    'Symbol': 'symbol_search_index',
+    'Module': 'module_search_index'
+}
+
+_LUCENE_SPECIAL = re.compile(r'([+\-!(){}\[\]^"~*?:\\/]|&&|\|\|)')
+
+
+def build_fulltext_query(repository_id: str, keywords: List[str]) -> str:
+    """
+    Lucene query matching any keyword exactly (boosted), as a prefix or as an infix,
+    restricted to one repository.
+    """
+    clauses = []
+    for keyword in keywords:
+        term = _LUCENE_SPECIAL.sub(r'\\\1', keyword.lower())
+        if term:
+            clauses.append(f"{term}^3 OR {term}*^2 OR *{term}*")
+    repo = _LUCENE_SPECIAL.sub(r'\\\1', repository_id)
+    return f'+repository_id:"{repo}" +({" OR ".join(clauses)})'
+
 
 class Neo4jClient:
     """
@@ -89,6 +113,13 @@ class Neo4jClient:
             "CREATE INDEX module_name_index IF NOT EXISTS FOR (m:Module) ON (m.name)",
             "CREATE TEXT INDEX file_content_index IF NOT EXISTS FOR (f:File) ON (f.content_summary)",
             "CREATE TEXT INDEX function_description_index IF NOT EXISTS FOR (fn:Function) ON (fn.description)",
+            # Full-text indexes for entry-node lookup (repository_id is indexed so queries can filter on it)
+            f"CREATE FULLTEXT INDEX {FULLTEXT_INDEXES['File']} IF NOT EXISTS "
+            "FOR (f:File) ON EACH [f.path, f.name, f.repository_id]",
+            f"CREATE FULLTEXT INDEX {FULLTEXT_INDEXES['Symbol']} IF NOT EXISTS "
+            "FOR (n:Function|Class) ON EACH [n.name, n.qualified_name, n.repository_id]",
+            f"CREATE FULLTEXT INDEX {FULLTEXT_INDEXES['Module']} IF NOT EXISTS "
+            "FOR (m:Module) ON EACH [m.name, m.repository_id]",
         ]
         
         async with self.driver.session() as session:
@@ -323,6 +354,120 @@ class Neo4jClient:
                 parent_class=parent_class
             )
     
+    async def _run_write_batches(
+        self,
+        query: str,
+        repository_id: str,
+        rows: List[Any],
+        batch_size: int = 2000,
+        **params
+    ) -> int:
+        """Run an `UNWIND $rows` write query in batches; sums the `count` each batch returns."""
+        async def work(tx, batch):
+            result = await tx.run(query, repository_id=repository_id, rows=batch, **params)
+            record = await result.single()
+            return record['count'] if record else 0
+        
+        total = 0
+        for start in range(0, len(rows), batch_size):
+            async with self.driver.session() as session:
+                total += await session.execute_write(work, rows[start:start + batch_size])
+        return total
+    
+    async def get_file_hashes(self, repository_id: str) -> Dict[str, Optional[str]]:
+        """Content hash stored on each File node of a repository (None for legacy nodes)."""
+        query = """
+        MATCH (f:File {repository_id: $repository_id})
+        RETURN f.path AS path, f.content_hash AS content_hash
+        """
+        
+        hashes = {}
+        async with self.driver.session() as session:
+            result = await session.run(query, repository_id=repository_id)
+            async for record in result:
+                hashes[record['path']] = record['content_hash']
+        return hashes
+    
+    async def clear_outgoing_edges(self, repository_id: str, file_paths: List[str]) -> int:
+        """Remove IMPORTS edges and the CALLS/INHERITS edges of contained nodes for files about to be rebuilt."""
+        query = """
+        UNWIND $rows AS path
+        MATCH (f:File {path: path, repository_id: $repository_id})
+        OPTIONAL MATCH (f)-[imp:IMPORTS]->()
+        DELETE imp
+        WITH DISTINCT f
+        OPTIONAL MATCH (f)-[:CONTAINS]->()-[edge:CALLS|INHERITS]->()
+        DELETE edge
+        RETURN count(edge) AS count
+        """
+        return await self._run_write_batches(query, repository_id, file_paths)
+    
+    async def delete_stale_nodes(self, repository_id: str, file_paths: List[str], build_id: str) -> int:
+        """Delete Function/Class nodes of rebuilt files that the current build did not write."""
+        query = """
+        UNWIND $rows AS path
+        MATCH (f:File {path: path, repository_id: $repository_id})-[:CONTAINS]->(n)
+        WHERE (n:Function OR n:Class) AND coalesce(n.build_id, '') <> $build_id
+        DETACH DELETE n
+        RETURN count(*) AS count
+        """
+        return await self._run_write_batches(query, repository_id, file_paths, build_id=build_id)
+    
+    async def delete_file_subgraphs(self, repository_id: str, file_paths: List[str]) -> int:
+        """Delete File nodes (and the nodes they contain) for files removed from the repository."""
+        query = """
+        UNWIND $rows AS path
+        MATCH (f:File {path: path, repository_id: $repository_id})
+        OPTIONAL MATCH (f)-[:CONTAINS]->(n)
+        WITH f, collect(n) AS children
+        FOREACH (child IN children | DETACH DELETE child)
+        DETACH DELETE f
+        RETURN count(*) AS count
+        """
+        return await self._run_write_batches(query, repository_id, file_paths)
+    
+    async def delete_orphan_modules(self, repository_id: str) -> int:
+        """Delete Module nodes no file imports any more."""
+        query = """
+        MATCH (m:Module {repository_id: $repository_id})
+        WHERE NOT ()-[:IMPORTS]->(m)
+        DETACH DELETE m
+        RETURN count(*) AS count
+        """
+        async with self.driver.session() as session:
+            result = await session.run(query, repository_id=repository_id)
+            record = await result.single()
+            return record['count'] if record else 0
+    
+    async def finalize_graph_build(
+        self,
+        repository_id: str,
+        file_hashes: Dict[str, str],
+        build_id: str
+    ) -> None:
+        """Record content hashes of the rebuilt files and the repository's graph version."""
+        query = """
+        UNWIND $rows AS row
+        MATCH (f:File {path: row.path, repository_id: $repository_id})
+        SET f.content_hash = row.content_hash
+        RETURN count(*) AS count
+        """
+        await self._run_write_batches(
+            query,
+            repository_id,
+            [{'path': path, 'content_hash': digest} for path, digest in file_hashes.items()]
+        )
+        
+        async with self.driver.session() as session:
+            await session.run(
+                "MATCH (r:Repository {repository_id: $repository_id}) SET r.graph_version = $build_id",
+                repository_id=repository_id,
+                build_id=build_id
+            )
+        
+        from services.graph_traversal import graph_traversal
+        graph_traversal.invalidate(repository_id)
+    
     async def graph_based_context_retrieval(
         self,
         repository_id: str,
@@ -363,11 +508,74 @@ class Neo4jClient:
         return context
     
     async def _find_entry_nodes(
+        self,
+        repository_id: str,
+        keywords: List[str],
+        limit: int = 50
+    ) -> List[Dict[str, Any]]:
+        """
+        Find entry point nodes based on keywords.
+        
+        Queries the File, Function/Class and Module full-text indexes in one
+        UNION subquery and returns the best-scoring nodes. Falls back to a
+        label scan if the full-text indexes are unavailable.
+        """
+        keyword_lower_list = [keyword.lower() for keyword in keywords[:10]]  # Limit to 10 keywords
+        
+        if not keyword_lower_list:
+            return []
+        
+        query = """
+        CALL {
+            CALL db.index.fulltext.queryNodes($file_index, $search, {limit: $limit}) YIELD node, score
+            RETURN node, score
+            UNION
+            CALL db.index.fulltext.queryNodes($symbol_index, $search, {limit: $limit}) YIELD node, score
+            RETURN node, score
+            UNION
+            CALL db.index.fulltext.queryNodes($module_index, $search, {limit: $limit}) YIELD node, score
+            RETURN node, score
+        }
+        WITH node, score
+        WHERE node.repository_id = $repository_id
+        RETURN
+            labels(node)[0] AS type,
+            elementId(node) AS id,
+            node.path AS path,
+            COALESCE(node.qualified_name, node.name) AS name,
+            score
+        ORDER BY score DESC
+        LIMIT $limit
+        """
+        
+        try:
+            entry_nodes = []
+            async with self.driver.session() as session:
+                result = await session.run(
+                    query,
+                    repository_id=repository_id,
+                    search=build_fulltext_query(repository_id, keyword_lower_list),
+                    file_index=FULLTEXT_INDEXES['File'],
+                    symbol_index=FULLTEXT_INDEXES['Symbol'],
+                    module_index=FULLTEXT_INDEXES['Module'],
+                    limit=limit
+                )
+                async for record in result:
+                    node = {'type': record['type'], 'id': record['id'], 'name': record['name'], 'score': record['score']}
+                    if record['path']:
+                        node['path'] = record['path']
+                    entry_nodes.append(node)
+            return entry_nodes
+        except Exception as e:
+            logger.warning(f"Full-text entry lookup failed, falling back to label scan: {str(e)}")
+            return await self._find_entry_nodes_scan(repository_id, keyword_lower_list)
+    
+    async def _find_entry_nodes_scan(
         self,
         repository_id: str,
         keywords: List[str]
     ) -> List[Dict[str, Any]]:
-        """Find entry point nodes based on keywords."""
+        """Find entry point nodes with CONTAINS over every node (slow; used without full-text indexes)."""
         # Build keyword matching conditions
         keyword_lower_list = [keyword.lower() for keyword in keywords[:10]]  # Limit to 10 keywords
         
@@ -430,27 +638,45 @@ class Neo4jClient:
         max_depth: int = 3,
         max_nodes: int = 20
     ) -> List[Dict[str, Any]]:
-        """Traverse graph from start nodes to find related code."""
+        """
+        Traverse graph from start nodes to find related code.
+        
+        Uses the cached in-memory adjacency snapshot (CALLS/IMPORTS/INHERITS/CONTAINS
+        only, with per-type fan-out caps); falls back to a typed Cypher expansion.
+        """
         # Build start node IDs
         start_ids = [node.get('id') for node in start_nodes if node.get('id')]
         
         if not start_ids:
             return start_nodes[:max_nodes]
         
-        # Use variable-length path pattern to find related nodes
-        query = '''
+        try:
+            from services.graph_traversal import graph_traversal
+            return await graph_traversal.traverse(
+                self.driver,
+                repository_id,
+                start_ids,
+                max_depth=max_depth,
+                max_nodes=max_nodes
+            )
+        except Exception as e:
+            logger.warning(f"Snapshot traversal failed, falling back to Cypher expansion: {str(e)}")
+        
+        # Relationship types are fixed and the Repository hub is never expanded
+        query = f'''
         MATCH (start)
         WHERE elementId(start) IN $start_ids
-        MATCH path = (start)-[*1..3]-(related)
+        MATCH path = (start)-[:CALLS|IMPORTS|INHERITS|CONTAINS*0..{max(1, int(max_depth))}]-(related)
         WHERE related.repository_id = $repository_id
-        WITH DISTINCT related, length(path) as distance
+          AND NONE(n IN nodes(path) WHERE n:Repository)
+        WITH related, min(length(path)) as distance
         ORDER BY distance ASC
         LIMIT $max_nodes
         RETURN 
             labels(related)[0] as node_type,
             elementId(related) as id,
             related.name as name,
-            related.path as path,
+            COALESCE(related.path, related.file_path) as path,
             COALESCE(related.qualified_name, related.name) as qualified_name,
             related.description as description,
             related.content_summary as content_summary,
@@ -497,25 +723,31 @@ class Neo4jClient:
         
         # Fetch all files from database
         from services.database_service import database_service
-        from services.b2_storage_sdk_fixed import B2StorageService
+        from services.b2_transfer_engine import b2_transfer_engine
         
-        b2_storage_service = B2StorageService()
         all_files = await database_service.get_repository_files(repository_id)
+        files_by_path = {f['path']: f for f in all_files}
+        
+        # Download the needed files concurrently in one batch
+        try:
+            downloaded = await b2_transfer_engine.download_many(
+                files_by_path[path]['file_key']
+                for path in files_to_fetch
+                if path in files_by_path and files_by_path[path].get('file_key')
+            )
+        except Exception as e:
+            logger.warning(f"Failed to load graph context contents: {str(e)}")
+            downloaded = {}
         
-        # Filter to only files we need and load their content
+        # Filter to only files we need and attach their content
         context = []
         for file_path in files_to_fetch:
             # Find matching file in database results
-            file_info = next((f for f in all_files if f['path'] == file_path), None)
+            file_info = files_by_path.get(file_path)
             
             if file_info:
-                # Load content from B2 if file_key exists
-                content = None
-                if file_info.get('file_key'):
-                    try:
-                        content = await b2_storage_service.download_file_content(file_info['file_key'])
-                    except Exception as e:
-                        logger.warning(f"Failed to load content for {file_path}: {str(e)}")
+                content_bytes = downloaded.get(file_info.get('file_key'))
+                content = content_bytes.decode('utf-8', errors='ignore') if content_bytes else None
                 
                 context.append({
                     'path': file_path,
@@ -556,6 +788,8 @@ class Neo4jClient:
             result = await session.run(query, repository_id=repository_id)
             record = await result.single()
             count = record['deleted_count'] if record else 0
+            from services.graph_traversal import graph_traversal
+            graph_traversal.invalidate(repository_id)
             logger.info(f"Deleted {count} nodes for repository {repository_id}")
             return count
     
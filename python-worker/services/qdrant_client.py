@@ -1,13 +1,14 @@
 """
 Qdrant vector database client.
 """
-from typing import List, Dict, Any, Optional
-from qdrant_client import QdrantClient
+from typing import List, Dict, Any, Optional, Set
+from qdrant_client import QdrantClient, AsyncQdrantClient
 from qdrant_client.http.models import (
     Distance, VectorParams, PointStruct, Filter, 
-    FieldCondition, MatchValue, SearchRequest,
-    PayloadSchemaType, CreateFieldIndex
+    FieldCondition, MatchValue, QueryRequest,
+    PayloadSchemaType, CreateFieldIndex, PointIdsList
 )
+import asyncio
 import uuid
 import time
 
@@ -21,6 +22,7 @@ except ImportError:
 
 from config.settings import get_settings
 from utils.logger import get_logger
+from services.local_vector_index import local_vector_index
 
 logger = get_logger(__name__)
 
@@ -29,10 +31,19 @@ class QuadrantVectorClient:
     """Quadrant client for vector storage and retrieval."""
     def __init__(self):
         self.settings = None
+        # Sync client for startup/admin calls and helpers run in threads;
+        # async client for the request path so searches don't block the event loop
         self.client: Optional[QdrantClient] = None
+        self.async_client: Optional[AsyncQdrantClient] = None
         self._initialized = False
         self._embedder = None  # Lazy initialization
         self.embedding_dimension = 768
+        # Collections verified to exist (they are never dropped by the worker)
+        self._known_collections: Set[str] = set()
+        # Cached health state, refreshed in the background
+        self._healthy = False
+        self._health_checked_at = 0.0
+        self._health_task: Optional[asyncio.Task] = None
 
     def _get_embedder(self):
         """Lazily initialize the embedder when needed."""
@@ -53,46 +64,105 @@ class QuadrantVectorClient:
             if not self._initialized:
                 self.settings = get_settings()
                 self._initialized = True
-                
+            
+            client_kwargs = {
+                "url": self.settings.qdrant_url,
+                "timeout": 60,  # Increased timeout for slow connections
+                "prefer_grpc": self.settings.qdrant_prefer_grpc,
+                "grpc_port": self.settings.qdrant_grpc_port
+            }
             if self.settings.qdrant_api_key:
-                self.client = QdrantClient(
-                    url=self.settings.qdrant_url,
-                    api_key=self.settings.qdrant_api_key,
-                    timeout=60.0  # Increased timeout for slow connections
-                )
-            else:
-                self.client = QdrantClient(
-                    url=self.settings.qdrant_url,
-                    timeout=60.0  # Increased timeout for slow connections
-                )
+                client_kwargs["api_key"] = self.settings.qdrant_api_key
+            
+            # Reconnecting: don't leak the previous connection pools
+            await self._close_clients()
+            self.client = QdrantClient(**client_kwargs)
+            self.async_client = AsyncQdrantClient(**client_kwargs)
                 
             # Test connection
-            collections = self.client.get_collections()
-            logger.info("Connected to Qdrant", collections_count=len(collections.collections))
+            collections = await self.async_client.get_collections()
+            self._set_health(True)
+            logger.info(
+                "Connected to Qdrant",
+                collections_count=len(collections.collections),
+                grpc=self.settings.qdrant_prefer_grpc
+            )
             
             # Create collection if it doesn't exist
             await self._ensure_collection_exists()
             
+            if self._health_task is None or self._health_task.done():
+                self._health_task = asyncio.create_task(self._health_loop())
+            
         except Exception as e:
+            self._set_health(False)
             logger.error("Failed to connect to Quadrant", error=str(e))
             raise
 
+    async def disconnect(self) -> None:
+        """Stop the health probe and close both clients."""
+        if self._health_task and not self._health_task.done():
+            self._health_task.cancel()
+        self._health_task = None
+        await self._close_clients()
+        self._set_health(False)
+        logger.info("Disconnected from Qdrant")
+
+    async def _close_clients(self) -> None:
+        """Close both clients (a connection that is already broken may fail to close)."""
+        if self.async_client:
+            try:
+                await self.async_client.close()
+            except Exception as e:
+                logger.debug(f"Failed to close Qdrant async client: {str(e)}")
+        if self.client:
+            try:
+                self.client.close()
+            except Exception as e:
+                logger.debug(f"Failed to close Qdrant client: {str(e)}")
+
     async def check_connection(self) -> bool:
-        """Check if Qdrant connection is working."""
+        """
+        Check if Qdrant connection is working.
+
+        Returns the cached health state; only probes inline when the background
+        refresh has not run recently (e.g. it died with its event loop).
+        """
+        if not self.async_client:
+            return False
+        interval = self.settings.qdrant_health_interval
+        if time.monotonic() - self._health_checked_at > interval * 2:
+            await self._refresh_health()
+        return self._healthy
+
+    async def _refresh_health(self) -> bool:
         try:
-            if not self.client:
-                return False
-            collections = self.client.get_collections()
-            return True
+            await asyncio.wait_for(self.async_client.get_collections(), timeout=5)
+            self._set_health(True)
         except Exception as e:
-            logger.error(f"Qdrant connection test failed: {str(e)}")
-            return False
+            if self._healthy:
+                logger.error(f"Qdrant connection test failed: {str(e)}")
+            self._set_health(False)
+        return self._healthy
+
+    def _set_health(self, healthy: bool) -> None:
+        self._healthy = healthy
+        self._health_checked_at = time.monotonic()
+
+    async def _health_loop(self) -> None:
+        """Refresh the cached health state every qdrant_health_interval seconds."""
+        while True:
+            await asyncio.sleep(self.settings.qdrant_health_interval)
+            was_healthy = self._healthy
+            if await self._refresh_health() and not was_healthy:
+                logger.info("Qdrant connection recovered")
             
     async def _ensure_collection_exists(self) -> None:
         """Ensure the main collection exists."""        
         try:
             collections = self.client.get_collections()
             collection_names = [c.name for c in collections.collections]
+            self._known_collections.update(collection_names)
             
             # Ensure main collection exists
             if self.settings.collection_name not in collection_names:
@@ -104,6 +174,7 @@ class QuadrantVectorClient:
                     ),
                 )
                 logger.info("Created collection", name=self.settings.collection_name)
+                self._known_collections.add(self.settings.collection_name)
                 
                 # Create indexes for filtering
                 try:
@@ -178,6 +249,7 @@ class QuadrantVectorClient:
                     ),
                 )
                 logger.info(f"Created meeting collection {meeting_collection} with dimension {meeting_dimension}")
+                self._known_collections.add(meeting_collection)
                 
                 # Create indexes for meeting collection
                 try:
@@ -231,7 +303,9 @@ class QuadrantVectorClient:
             raise
             
     def ensure_collection_exists(self, collection_name: str, dimension: int) -> None:
-        """Ensure a collection with the given name and dimension exists."""
+        """Ensure a collection with the given name and dimension exists (verified once per process)."""
+        if collection_name in self._known_collections:
+            return
         collections = self.client.get_collections()
         collection_names = [c.name for c in collections.collections]
         if collection_name not in collection_names:
@@ -245,6 +319,8 @@ class QuadrantVectorClient:
             logger.info(f"Created collection {collection_name} with dimension {dimension}")
         else:
             logger.info(f"Collection {collection_name} already exists")
+        self._known_collections.update(collection_names)
+        self._known_collections.add(collection_name)
 
     async def store_embedding(
         self,
@@ -261,8 +337,9 @@ class QuadrantVectorClient:
             collection_name = self.settings.collection_name
         if not dimension:
             dimension = self.settings.embedding_dimension
-        # Ensure collection exists
-        self.ensure_collection_exists(collection_name, dimension)
+        # Ensure collection exists (cached after the first check)
+        if collection_name not in self._known_collections:
+            await asyncio.to_thread(self.ensure_collection_exists, collection_name, dimension)
         try:
             # Generate ID if not provided
             if not point_id:
@@ -276,18 +353,212 @@ class QuadrantVectorClient:
             )
             
             # Store point
-            self.client.upsert(
+            await self.async_client.upsert(
                 collection_name=collection_name,
                 points=[point]
             )
             
+            if collection_name == self.settings.collection_name:
+                local_vector_index.invalidate(metadata.get('repo_id'))
+            
             logger.info(f"Stored embedding in collection {collection_name}")
             return point_id
             
         except Exception as e:
             logger.error(f"Failed to store embedding: {str(e)}")
             raise
-            
+
+    async def upsert_points(
+        self,
+        points: List[Dict[str, Any]],
+        collection_name: Optional[str] = None,
+        batch_size: int = 256
+    ) -> int:
+        """
+        Upsert many points in chunks.
+
+        Unlike store_embedding, this does not check the collection per call;
+        callers ensure it exists once per job.
+
+        Args:
+            points: Dicts with 'id', 'vector' and 'payload'
+            collection_name: Target collection (defaults to the main collection)
+            batch_size: Points per upsert request
+
+        Returns:
+            Number of points upserted
+        """
+        if not self.client:
+            raise RuntimeError("Quadrant client not connected")
+        if not collection_name:
+            collection_name = self.settings.collection_name
+
+        upserted = 0
+        for start in range(0, len(points), batch_size):
+            batch = [
+                PointStruct(id=p['id'], vector=p['vector'], payload=p['payload'])
+                for p in points[start:start + batch_size]
+            ]
+            await self.async_client.upsert(
+                collection_name=collection_name,
+                points=batch
+            )
+            upserted += len(batch)
+
+        if collection_name == self.settings.collection_name:
+            local_vector_index.invalidate_for_points(points)
+        logger.debug(f"Upserted {upserted} points into {collection_name}")
+        return upserted
+
+    def get_repository_point_index(
+        self,
+        repo_id: str,
+        payload_fields: Optional[List[str]] = None,
+        collection_name: Optional[str] = None,
+        page_size: int = 1000
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        List every point stored for a repository (without vectors).
+
+        Returns:
+            Dict of point id -> selected payload fields
+        """
+        if not self.client:
+            raise RuntimeError("Quadrant client not connected")
+        if not collection_name:
+            collection_name = self.settings.collection_name
+
+        scroll_filter = Filter(must=[FieldCondition(key="repo_id", match=MatchValue(value=repo_id))])
+        index: Dict[str, Dict[str, Any]] = {}
+        offset = None
+        while True:
+            records, offset = self.client.scroll(
+                collection_name=collection_name,
+                scroll_filter=scroll_filter,
+                limit=page_size,
+                offset=offset,
+                with_payload=payload_fields or False,
+                with_vectors=False
+            )
+            for record in records:
+                index[str(record.id)] = record.payload or {}
+            if offset is None:
+                break
+        return index
+
+    def get_repository_points(
+        self,
+        repo_id: str,
+        collection_name: Optional[str] = None,
+        page_size: int = 1000
+    ) -> List[tuple]:
+        """
+        List every point stored for a repository with its vector and payload.
+
+        Returns:
+            List of (point id, vector, payload)
+        """
+        if not self.client:
+            raise RuntimeError("Quadrant client not connected")
+        if not collection_name:
+            collection_name = self.settings.collection_name
+
+        scroll_filter = Filter(must=[FieldCondition(key="repo_id", match=MatchValue(value=repo_id))])
+        points = []
+        offset = None
+        while True:
+            records, offset = self.client.scroll(
+                collection_name=collection_name,
+                scroll_filter=scroll_filter,
+                limit=page_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=True
+            )
+            points.extend((str(record.id), record.vector, record.payload or {}) for record in records)
+            if offset is None:
+                break
+        return points
+
+    def delete_points(
+        self,
+        point_ids: List[str],
+        collection_name: Optional[str] = None,
+        batch_size: int = 1000
+    ) -> int:
+        """Delete points by id in chunks."""
+        if not self.client:
+            raise RuntimeError("Quadrant client not connected")
+        if not collection_name:
+            collection_name = self.settings.collection_name
+
+        for start in range(0, len(point_ids), batch_size):
+            self.client.delete(
+                collection_name=collection_name,
+                points_selector=PointIdsList(points=point_ids[start:start + batch_size])
+            )
+        logger.info(f"Deleted {len(point_ids)} points from {collection_name}")
+        return len(point_ids)
+
+    def set_point_payloads(
+        self,
+        payloads: Dict[str, Dict[str, Any]],
+        collection_name: Optional[str] = None
+    ) -> int:
+        """Merge payload fields into existing points without touching their vectors."""
+        if not self.client:
+            raise RuntimeError("Quadrant client not connected")
+        if not collection_name:
+            collection_name = self.settings.collection_name
+
+        for point_id, payload in payloads.items():
+            self.client.set_payload(
+                collection_name=collection_name,
+                payload=payload,
+                points=[point_id]
+            )
+        return len(payloads)
+
+    @staticmethod
+    def _build_filter(filter_conditions: Optional[Dict[str, Any]]) -> Optional[Filter]:
+        if not filter_conditions:
+            return None
+        return Filter(must=[
+            FieldCondition(key=key, match=MatchValue(value=value))
+            for key, value in filter_conditions.items()
+        ])
+
+    async def _query_batch(
+        self,
+        query_embeddings: List[List[float]],
+        limit: int,
+        score_threshold: float,
+        filter_conditions: Optional[Dict[str, Any]] = None,
+        collection_name: Optional[str] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """Run several vector searches in one query_batch_points round trip (main collection by default)."""
+        if not self.client:
+            raise RuntimeError("Quadrant client not connected")
+
+        query_filter = self._build_filter(filter_conditions)
+        responses = await self.async_client.query_batch_points(
+            collection_name=collection_name or self.settings.collection_name,
+            requests=[
+                QueryRequest(
+                    query=embedding,
+                    filter=query_filter,
+                    limit=limit,
+                    score_threshold=score_threshold,
+                    with_payload=True
+                )
+                for embedding in query_embeddings
+            ]
+        )
+        return [
+            [{"id": point.id, "score": point.score, "metadata": point.payload} for point in response.points]
+            for response in responses
+        ]
+
     async def search_similar(
         self,
         query_embedding: List[float],
@@ -296,37 +567,10 @@ class QuadrantVectorClient:
         filter_conditions: Optional[Dict[str, Any]] = None
     ) -> List[Dict[str, Any]]:
         """Search for similar embeddings."""
-        if not self.client:
-            raise RuntimeError("Quadrant client not connected")
-            
         try:
-            # Build filter if provided
-            search_filter = None
-            if filter_conditions:
-                conditions = []
-                for key, value in filter_conditions.items():
-                    conditions.append(
-                        FieldCondition(key=key, match=MatchValue(value=value))
-                    )
-                search_filter = Filter(must=conditions)
-                
-            # Search
-            results = self.client.search(
-                collection_name=self.settings.collection_name,
-                query_vector=query_embedding,
-                limit=limit,
-                score_threshold=score_threshold,
-                query_filter=search_filter
-            )
-            
-            # Format results
-            formatted_results = []
-            for result in results:
-                formatted_results.append({
-                    "id": result.id,
-                    "score": result.score,
-                    "metadata": result.payload
-                })
+            formatted_results = (await self._query_batch(
+                [query_embedding], limit, score_threshold, filter_conditions
+            ))[0]
                 
             logger.debug(
                 "Search completed",
@@ -340,6 +584,48 @@ class QuadrantVectorClient:
         except Exception as e:
             logger.error("Failed to search embeddings", error=str(e))
             raise
+
+    async def search_many(
+        self,
+        query_embeddings: List[List[float]],
+        repo_id: Optional[str] = None,
+        limit: int = 10,
+        score_threshold: float = 0.3,
+        filter_conditions: Optional[Dict[str, Any]] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Search for several query embeddings at once.
+
+        All queries go to Qdrant in a single batch request. With repo_id, results
+        are scoped to the repository and may be served by the local vector index
+        (hot repositories, or any snapshot while Qdrant is unavailable).
+
+        Returns:
+            One result list per query embedding, in order
+        """
+        if not query_embeddings:
+            return []
+
+        if repo_id:
+            online = self.async_client is not None and self._healthy
+            results = await local_vector_index.search_many(
+                repo_id, query_embeddings, limit, score_threshold, online=online
+            )
+            if results is not None:
+                return results
+            filter_conditions = {**(filter_conditions or {}), 'repo_id': repo_id}
+
+        try:
+            return await self._query_batch(query_embeddings, limit, score_threshold, filter_conditions)
+        except Exception as e:
+            if repo_id:
+                results = await local_vector_index.search_many(
+                    repo_id, query_embeddings, limit, score_threshold, online=False
+                )
+                if results is not None:
+                    return results
+            logger.error("Failed to search embeddings", error=str(e), queries=len(query_embeddings))
+            raise
             
     async def delete_embeddings(self, filter_conditions: Dict[str, Any]) -> int:
         """Delete embeddings matching filter conditions."""
@@ -356,11 +642,12 @@ class QuadrantVectorClient:
             delete_filter = Filter(must=conditions)
             
             # Delete
-            result = self.client.delete(
+            result = await self.async_client.delete(
                 collection_name=self.settings.collection_name,
                 points_selector=delete_filter
             )
             
+            local_vector_index.invalidate(filter_conditions.get('repo_id'))
             logger.info("Deleted embeddings", conditions=filter_conditions)
             return result.status
             
@@ -373,7 +660,7 @@ class QuadrantVectorClient:
             raise RuntimeError("Quadrant client not connected")
             
         try:
-            info = self.client.get_collection(self.settings.collection_name)
+            info = await self.async_client.get_collection(self.settings.collection_name)
             return {
                 "name": self.settings.collection_name,
                 "points_count": info.points_count,
@@ -391,7 +678,7 @@ class QuadrantVectorClient:
             raise RuntimeError("Quadrant client not connected")
         
         try:
-            collections = self.client.get_collections()
+            collections = await self.async_client.get_collections()
             return [c.name for c in collections.collections]
         except Exception as e:
             logger.error("Failed to list collections", error=str(e))
@@ -432,14 +719,19 @@ class QuadrantVectorClient:
         limit: int = 10,
         score_threshold: float = 0.3
     ) -> List[Dict[str, Any]]:
-        """Search for similar embeddings within a specific repository."""
-        filter_conditions = {'repo_id': repo_id}
-        return await self.search_similar(
-            query_embedding=query_embedding,
+        """
+        Search for similar embeddings within a specific repository.
+
+        Hot repositories are served from the local vector index, which also
+        answers (from its last snapshot) while Qdrant is unavailable.
+        """
+        results = await self.search_many(
+            [query_embedding],
+            repo_id=repo_id,
             limit=limit,
-            score_threshold=score_threshold,
-            filter_conditions=filter_conditions
+            score_threshold=score_threshold
         )
+        return results[0]
 
     async def delete_repository_embeddings(self, repo_id: str) -> bool:
         """Delete all embeddings for a repository."""
@@ -498,7 +790,7 @@ class QuadrantVectorClient:
             
             # Store in Qdrant
             if points:
-                self.client.upsert(
+                await self.async_client.upsert(
                     collection_name=meeting_collection,
                     points=points
                 )
@@ -528,34 +820,19 @@ class QuadrantVectorClient:
             await self._ensure_meeting_collection_exists()
             
             # Build filter conditions - meeting_id is now optional
-            conditions = []
+            filter_conditions = {}
             if meeting_id is not None:
-                conditions.append(FieldCondition(key="meeting_id", match=MatchValue(value=meeting_id)))
+                filter_conditions["meeting_id"] = meeting_id
             if segment_index is not None:
-                conditions.append(FieldCondition(key="segment_index", match=MatchValue(value=segment_index)))
-            
-            search_filter = Filter(must=conditions) if conditions else None
+                filter_conditions["segment_index"] = segment_index
                 
             # Use the meeting collection, not the main collection
             meeting_collection = getattr(self.settings, "meeting_qdrant_collection", "meeting_segments")
             
             # Search in the meeting collection
-            results = self.client.search(
-                collection_name=meeting_collection,
-                query_vector=query_embedding,
-                limit=limit,
-                score_threshold=score_threshold,
-                query_filter=search_filter
-            )
-            
-            # Format results
-            formatted_results = []
-            for result in results:
-                formatted_results.append({
-                    "id": result.id,
-                    "score": result.score,
-                    "metadata": result.payload
-                })
+            formatted_results = (await self._query_batch(
+                [query_embedding], limit, score_threshold, filter_conditions, collection_name=meeting_collection
+            ))[0]
                 
             logger.debug(
                 "Meeting search completed",
@@ -575,16 +852,19 @@ class QuadrantVectorClient:
         """Ensure the meeting collection exists."""
         if not self.client:
             return
+        
+        meeting_collection = getattr(self.settings, "meeting_qdrant_collection", "meeting_segments")
+        if meeting_collection in self._known_collections:
+            return
             
         try:
-            collections = self.client.get_collections()
+            collections = await self.async_client.get_collections()
             collection_names = [c.name for c in collections.collections]
             
-            meeting_collection = getattr(self.settings, "meeting_qdrant_collection", "meeting_segments")
             meeting_dimension = getattr(self.settings, "embedding_dimension_meeting", 384)
             
             if meeting_collection not in collection_names:
-                self.client.create_collection(
+                await self.async_client.create_collection(
                     collection_name=meeting_collection,
                     vectors_config=VectorParams(
                         size=meeting_dimension,
@@ -592,11 +872,12 @@ class QuadrantVectorClient:
                     ),
                 )
                 logger.info(f"Created meeting collection {meeting_collection} with dimension {meeting_dimension}")
+                self._known_collections.add(meeting_collection)
                 
                 # Create indexes for meeting collection
                 try:
                     # Index for meeting_id field (for meeting Q&A)
-                    self.client.create_payload_index(
+                    await self.async_client.create_payload_index(
                         collection_name=meeting_collection,
                         field_name="meeting_id",
                         field_schema=PayloadSchemaType.KEYWORD
@@ -604,7 +885,7 @@ class QuadrantVectorClient:
                     logger.info("Created index for meeting_id field")
                     
                     # Index for segment_index field (for meeting segments)
-                    self.client.create_payload_index(
+                    await self.async_client.create_payload_index(
                         collection_name=meeting_collection,
                         field_name="segment_index",
                         field_schema=PayloadSchemaType.INTEGER
@@ -615,6 +896,7 @@ class QuadrantVectorClient:
                     logger.error(f"Failed to create indexes for meeting collection: {str(e)}")
             else:
                 logger.debug(f"Meeting collection {meeting_collection} already exists")
+                self._known_collections.add(meeting_collection)
                 
         except Exception as e:
             logger.error(f"Failed to ensure meeting collection exists: {str(e)}")
@@ -0,0 +1,412 @@
+"""
+Cluster-wide LLM quota and key-health state in Redis.
+
+The API server, the queue worker and every replica call the same LLM keys,
+usually from the same IP. RateLimiter cooldowns and HealthTracker failure
+streaks keep a local mirror that synchronous code reads; this coordinator
+keeps the mirrors in step with Redis:
+
+1. Token buckets (per key and per IP) are checked and consumed atomically by
+   a Lua script, so every replica draws from one budget
+2. Cooldowns (which only ever extend) and failure streaks (which expire) are
+   written by Lua scripts; writes made from sync code are queued
+3. `sync()` (at most once per `quota_sync_interval`) flushes queued writes
+   and reloads the mirrors
+
+When Redis is unreachable the coordinator runs in local-only mode and retries
+after `quota_redis_retry_interval`; queued writes are replayed then.
+"""
+import asyncio
+import time
+import weakref
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+import redis.asyncio as redis
+
+from config.settings import get_settings
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+IP_FIELD = '*'  # Cooldown hash field of the IP-wide cooldown
+
+# Outcomes of the acquire script
+GRANTED, KEY_COOLDOWN, IP_COOLDOWN, KEY_BUDGET, IP_BUDGET = range(5)
+
+_NOW_MS = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+"""
+
+# KEYS: cooldown hash, bucket hashes...
+# ARGV: key field ('' = none), then per bucket: tokens/ms, capacity, amount, outcome if short
+_ACQUIRE_SCRIPT = _NOW_MS + """
+local ip_ends = tonumber(redis.call('HGET', KEYS[1], '*') or '0')
+if ip_ends > now then return {2, ip_ends - now} end
+if ARGV[1] ~= '' then
+  local key_ends = tonumber(redis.call('HGET', KEYS[1], ARGV[1]) or '0')
+  if key_ends > now then return {1, key_ends - now} end
+end
+local levels, wait, outcome = {}, 0, 0
+for i = 2, #KEYS do
+  local a = (i - 2) * 4 + 2
+  local rate, capacity = tonumber(ARGV[a]), tonumber(ARGV[a + 1])
+  local state = redis.call('HMGET', KEYS[i], 'tokens', 'ts')
+  local tokens = tonumber(state[1]) or capacity
+  tokens = math.min(capacity, tokens + math.max(0, now - (tonumber(state[2]) or now)) * rate)
+  levels[i] = tokens - math.min(tonumber(ARGV[a + 2]), capacity)
+  if levels[i] < 0 and -levels[i] / rate > wait then
+    wait, outcome = -levels[i] / rate, tonumber(ARGV[a + 3])
+  end
+end
+if wait > 0 then return {outcome, math.ceil(wait)} end
+for i = 2, #KEYS do
+  local a = (i - 2) * 4 + 2
+  redis.call('HSET', KEYS[i], 'tokens', tostring(levels[i]), 'ts', now)
+  redis.call('PEXPIRE', KEYS[i], math.ceil(tonumber(ARGV[a + 1]) / tonumber(ARGV[a])) + 60000)
+end
+return {0, 0}
+"""
+
+# KEYS: cooldown hash; ARGV: field, milliseconds
+_COOLDOWN_SCRIPT = _NOW_MS + """
+local entries = redis.call('HGETALL', KEYS[1])
+for i = 1, #entries, 2 do
+  if tonumber(entries[i + 1]) <= now then redis.call('HDEL', KEYS[1], entries[i]) end
+end
+local ends = now + tonumber(ARGV[2])
+if ends > tonumber(redis.call('HGET', KEYS[1], ARGV[1]) or '0') then
+  redis.call('HSET', KEYS[1], ARGV[1], ends)
+end
+if redis.call('PTTL', KEYS[1]) < tonumber(ARGV[2]) then
+  redis.call('PEXPIRE', KEYS[1], tonumber(ARGV[2]) + 60000)
+end
+return ends
+"""
+
+# KEYS: health hash; ARGV: id, streak expiry in milliseconds
+_FAILURE_SCRIPT = _NOW_MS + """
+local failures = 0
+local state = redis.call('HGET', KEYS[1], ARGV[1])
+if state then
+  local count, last = string.match(state, '(%d+):(%d+)')
+  if now - tonumber(last) < tonumber(ARGV[2]) then failures = tonumber(count) end
+end
+failures = failures + 1
+redis.call('HSET', KEYS[1], ARGV[1], failures .. ':' .. now)
+redis.call('PEXPIRE', KEYS[1], tonumber(ARGV[2]) + 60000)
+return failures
+"""
+
+_SCRIPTS = {
+    'acquire': _ACQUIRE_SCRIPT,
+    'cooldown': _COOLDOWN_SCRIPT,
+    'failure': _FAILURE_SCRIPT
+}
+
+# A shared bucket: (name, per minute, capacity, amount, outcome when short)
+BucketSpec = Tuple[str, float, float, float, int]
+
+
+@dataclass
+class _RedisState:
+    """Redis client and scripts of one event loop."""
+    client: Any
+    scripts: Dict[str, Any]
+
+
+class QuotaCoordinator:
+    """Shares limiter cooldowns/buckets and failure streaks through Redis."""
+
+    def __init__(
+        self,
+        enabled: Optional[bool] = None,
+        redis_url: Optional[str] = None,
+        prefix: Optional[str] = None,
+        sync_interval: Optional[float] = None,
+        retry_interval: Optional[float] = None,
+        timeout: Optional[float] = None
+    ):
+        settings = get_settings()
+        self.enabled = enabled if enabled is not None else settings.quota_shared_enabled
+        self.redis_url = redis_url or settings.redis_url
+        self.prefix = prefix or settings.quota_key_prefix
+        self.sync_interval = sync_interval if sync_interval is not None else settings.quota_sync_interval
+        self.retry_interval = retry_interval if retry_interval is not None else settings.quota_redis_retry_interval
+        self.timeout = timeout or settings.quota_redis_timeout
+
+        self._cooldowns: Dict[str, Dict[Optional[str], float]] = {}  # limiter -> mirror
+        self._health: Dict[str, Dict[str, Tuple[int, float]]] = {}  # tracker -> mirror
+        self._pending: Deque[Tuple[tuple, Callable[[], None]]] = deque(maxlen=1000)
+        self._flush_scheduled = False
+        self._tasks = set()
+        self._next_sync = 0.0
+        self._down_until = 0.0
+        self._shared = None  # None until the first Redis round trip
+        # redis.asyncio connections belong to one event loop, like the limiter's locks
+        self._states: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _RedisState]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+        self.stats = {
+            'syncs': 0,
+            'acquires': 0,
+            'remote_waits': 0,
+            'flushed_writes': 0,
+            'redis_errors': 0
+        }
+
+    def register_cooldowns(self, limiter: str, mirror: Dict[Optional[str], float]) -> None:
+        """Keep a limiter's cooldown table (key or None -> wall-clock end) in step with Redis."""
+        self._cooldowns[limiter] = mirror
+
+    def register_health(self, tracker: str, mirror: Dict[str, Tuple[int, float]]) -> None:
+        """Keep a tracker's failure streaks (id -> (failures, last failure)) in step with Redis."""
+        self._health[tracker] = mirror
+
+    async def acquire(
+        self, limiter: str, key: Optional[str], buckets: Sequence[BucketSpec]
+    ) -> Optional[Tuple[int, float]]:
+        """
+        Atomically check cooldowns and consume the shared buckets.
+
+        Returns:
+            (GRANTED, 0) once consumed, (outcome, seconds to wait) when a
+            cooldown or bucket is short, or None in local-only mode
+        """
+        state = self._state()
+        if state is None:
+            return None
+        keys = [self._cooldown_key(limiter)] + [self._bucket_key(limiter, bucket[0]) for bucket in buckets]
+        args: List[Any] = [key or '']
+        for _, per_minute, capacity, amount, outcome in buckets:
+            args += [per_minute / 60000.0, capacity, amount, outcome]
+        try:
+            outcome, wait_ms = await state.scripts['acquire'](keys=keys, args=args)
+        except Exception as e:
+            self._on_error(e)
+            return None
+        self._on_success()
+        self.stats['acquires'] += 1
+        if outcome != GRANTED:
+            self.stats['remote_waits'] += 1
+        return int(outcome), int(wait_ms) / 1000.0
+
+    def set_cooldown(self, limiter: str, key: Optional[str], seconds: float, reapply: Callable[[], None]) -> None:
+        """Queue a cooldown write; `reapply` redoes the local change if a reload races it."""
+        self._enqueue(('cooldown', self._cooldown_key(limiter), key or IP_FIELD, int(seconds * 1000)), reapply)
+
+    def clear_cooldown(self, limiter: str, key: Optional[str], reapply: Callable[[], None]) -> None:
+        self._enqueue(('hdel', self._cooldown_key(limiter), key or IP_FIELD), reapply)
+
+    def record_failure(self, tracker: str, item: str, reset_after: float, reapply: Callable[[], None]) -> None:
+        self._enqueue(('failure', self._health_key(tracker), item, int(reset_after * 1000)), reapply)
+
+    def clear_failures(self, tracker: str, item: str, reapply: Callable[[], None]) -> None:
+        self._enqueue(('hdel', self._health_key(tracker), item), reapply)
+
+    async def sync(self, force: bool = False) -> bool:
+        """Flush queued writes and reload every mirror from Redis (at most once per sync_interval)."""
+        if not self.enabled or (not force and time.monotonic() < self._next_sync):
+            return False
+        self._next_sync = time.monotonic() + self.sync_interval
+        state = self._state()
+        if state is None:
+            return False
+
+        writes = self._take_pending()
+        limiters = list(self._cooldowns)
+        trackers = list(self._health)
+        try:
+            pipe = state.client.pipeline(transaction=False)
+            for write, _ in writes:
+                await self._queue_write(state, pipe, write)
+            pipe.time()
+            for limiter in limiters:
+                pipe.hgetall(self._cooldown_key(limiter))
+            for tracker in trackers:
+                pipe.hgetall(self._health_key(tracker))
+            results = await pipe.execute()
+        except Exception as e:
+            self._restore_pending(writes)
+            self._on_error(e)
+            return False
+        self._on_success()
+
+        results = results[len(writes):]
+        seconds, microseconds = results[0]
+        now_ms = int(seconds) * 1000 + int(microseconds) // 1000
+        offset = time.time() - now_ms / 1000.0  # Redis clock -> local wall clock
+
+        for limiter, entries in zip(limiters, results[1:1 + len(limiters)]):
+            mirror = self._cooldowns[limiter]
+            mirror.clear()
+            for field, ends in entries.items():
+                if int(ends) > now_ms:
+                    mirror[None if field == IP_FIELD else field] = int(ends) / 1000.0 + offset
+
+        for tracker, entries in zip(trackers, results[1 + len(limiters):]):
+            mirror = self._health[tracker]
+            mirror.clear()
+            for item, value in entries.items():
+                failures, _, last_ms = value.partition(':')
+                mirror[item] = (int(failures), int(last_ms) / 1000.0 + offset)
+
+        # Writes queued while the reload was in flight are not in Redis yet
+        for _, reapply in list(self._pending):
+            reapply()
+
+        self.stats['syncs'] += 1
+        self.stats['flushed_writes'] += len(writes)
+        return True
+
+    async def flush(self) -> None:
+        """Send queued writes to Redis (kept queued while in local-only mode)."""
+        self._flush_scheduled = False
+        state = self._state()
+        if state is None or not self._pending:
+            return
+        writes = self._take_pending()
+        try:
+            pipe = state.client.pipeline(transaction=False)
+            for write, _ in writes:
+                await self._queue_write(state, pipe, write)
+            await pipe.execute()
+        except Exception as e:
+            self._restore_pending(writes)
+            self._on_error(e)
+            return
+        self._on_success()
+        self.stats['flushed_writes'] += len(writes)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Mode and Redis round-trip metrics."""
+        return {
+            **self.stats,
+            'mode': 'shared' if self.enabled and self._shared is not False else 'local',
+            'pending_writes': len(self._pending),
+            'limiters': sorted(self._cooldowns),
+            'trackers': sorted(self._health)
+        }
+
+    def _state(self) -> Optional[_RedisState]:
+        if not self.enabled or time.monotonic() < self._down_until:
+            return None
+        loop = asyncio.get_running_loop()
+        state = self._states.get(loop)
+        if state is None:
+            client = redis.from_url(
+                self.redis_url,
+                decode_responses=True,
+                socket_timeout=self.timeout,
+                socket_connect_timeout=self.timeout
+            )
+            scripts = {name: client.register_script(source) for name, source in _SCRIPTS.items()}
+            state = self._states[loop] = _RedisState(client, scripts)
+        return state
+
+    async def _queue_write(self, state: _RedisState, pipe, write: tuple) -> None:
+        kind, redis_key, field, *args = write
+        if kind == 'hdel':
+            pipe.hdel(redis_key, field)
+        else:
+            await state.scripts[kind](keys=[redis_key], args=[field, *args], client=pipe)
+
+    def _enqueue(self, write: tuple, reapply: Callable[[], None]) -> None:
+        if not self.enabled:
+            return
+        self._pending.append((write, reapply))
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # Sent by the next sync() on an event loop
+        if not self._flush_scheduled and time.monotonic() >= self._down_until:
+            self._flush_scheduled = True
+            task = loop.create_task(self.flush())
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def _take_pending(self) -> List[Tuple[tuple, Callable[[], None]]]:
+        writes = []
+        while self._pending:
+            writes.append(self._pending.popleft())
+        return writes
+
+    def _restore_pending(self, writes: List[Tuple[tuple, Callable[[], None]]]) -> None:
+        # Back in front of writes queued meanwhile, so they are replayed in their original order
+        self._pending.extendleft(reversed(writes))
+
+    def _on_success(self) -> None:
+        if self._shared is False:
+            logger.info("Shared LLM quota state reachable again, leaving local-only mode")
+        self._shared = True
+
+    def _on_error(self, error: Exception) -> None:
+        self.stats['redis_errors'] += 1
+        self._down_until = time.monotonic() + self.retry_interval
+        if self._shared is not False:
+            logger.warning(
+                f"Shared LLM quota state unavailable, using local-only limits for {self.retry_interval:.0f}s: {str(error)}"
+            )
+        self._shared = False
+
+    def _cooldown_key(self, limiter: str) -> str:
+        return f"{self.prefix}:{limiter}:cooldowns"
+
+    def _bucket_key(self, limiter: str, bucket: str) -> str:
+        return f"{self.prefix}:{limiter}:bucket:{bucket}"
+
+    def _health_key(self, tracker: str) -> str:
+        return f"{self.prefix}:health:{tracker}"
+
+
+class HealthTracker:
+    """
+    Consecutive-failure streaks per id (API key, tier, client), the state
+    behind circuit breakers. A streak expires `reset_after` seconds after its
+    last failure; with a coordinator it is shared by every replica.
+    """
+
+    def __init__(self, name: str, reset_after: float, coordinator: Optional[QuotaCoordinator] = None):
+        self.name = name
+        self.reset_after = reset_after
+        self.coordinator = coordinator
+        self._streaks: Dict[str, Tuple[int, float]] = {}  # id -> (failures, last failure wall-clock time)
+        if coordinator is not None:
+            coordinator.register_health(name, self._streaks)
+
+    def failures(self, item: str) -> int:
+        """Current streak length (0 once it expired)."""
+        failures, last = self._streaks.get(item, (0, 0.0))
+        return failures if time.time() - last < self.reset_after else 0
+
+    def last_failure(self, item: str) -> Optional[float]:
+        """Wall-clock time of the last failure in the current streak."""
+        return self._streaks[item][1] if self.failures(item) else None
+
+    def record_failure(self, item: str) -> int:
+        """Extend the streak; returns its new length."""
+        def apply():
+            self._streaks[item] = (self.failures(item) + 1, time.time())
+
+        apply()
+        if self.coordinator is not None:
+            self.coordinator.record_failure(self.name, item, self.reset_after, apply)
+        return self.failures(item)
+
+    def reset(self, item: str) -> None:
+        """End the streak (after a success or a manual reset)."""
+        def apply():
+            self._streaks.pop(item, None)
+
+        if item not in self._streaks:
+            return  # Nothing to clear (the mirror is at most one sync interval old)
+        apply()
+        if self.coordinator is not None:
+            self.coordinator.clear_failures(self.name, item, apply)
+
+
+# Global instance
+quota_coordinator = QuotaCoordinator()
@@ -0,0 +1,335 @@
+"""
+Asyncio-native rate limiting for LLM provider calls.
+
+Every caller awaits `RateLimiter.acquire` before a request instead of
+sleeping, so throttling never blocks the event loop (and with it the API
+server's health checks). A limiter holds, per scope (e.g. text generation vs
+embeddings):
+
+1. A token bucket per API key for requests per minute (RPM) and tokens per
+   minute (TPM)
+2. A token bucket shared by every key from this host (per-IP), again RPM/TPM
+3. Cooldowns, per key and IP-wide, set after provider rate-limit responses
+
+Waiters are served in arrival order: per key first, then through one FIFO
+queue per scope for the shared IP budget. A waiter whose key goes into
+cooldown gives up its place in the IP queue so other keys keep flowing.
+
+With a QuotaCoordinator the buckets and cooldowns are also shared with every
+other process through Redis (see services.quota_coordinator); the local
+buckets still apply, and alone enforce the budgets in local-only mode.
+"""
+import asyncio
+import hashlib
+import time
+import weakref
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from config.settings import get_settings
+from services.quota_coordinator import (
+    IP_BUDGET, IP_COOLDOWN, KEY_BUDGET, KEY_COOLDOWN, QuotaCoordinator, quota_coordinator
+)
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def key_id(api_key: str) -> str:
+    """Stable, non-secret identifier of an API key (for limiter state, logs and Redis)."""
+    return hashlib.sha256(api_key.encode()).hexdigest()[:16]
+
+
+def estimate_tokens(text: str, max_output_tokens: int = 0) -> int:
+    """Rough request size for TPM budgets (~4 characters per token plus the output cap)."""
+    return len(text or '') // 4 + max_output_tokens
+
+
+@dataclass
+class RateBudget:
+    """Per-key and per-IP budgets of one scope; None means unlimited."""
+    key_rpm: Optional[float] = None
+    key_tpm: Optional[float] = None
+    ip_rpm: Optional[float] = None
+    ip_tpm: Optional[float] = None
+    ip_burst: Optional[float] = None  # Requests the IP bucket may burst (default: one minute's worth)
+
+
+class TokenBucket:
+    """Continuously refilling token bucket."""
+
+    def __init__(self, per_minute: float, burst: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, burst if burst is not None else per_minute)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` tokens are available (requests larger than the bucket wait for a full one)."""
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.tokens
+        return missing / self.rate if missing > 0 else 0.0
+
+    def consume(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self.tokens -= min(amount, self.capacity)
+
+
+class RateLimitTimeout(Exception):
+    """Raised when a request would wait longer than the caller allows."""
+
+    def __init__(self, limiter: str, retry_after: float):
+        self.retry_after = retry_after
+        super().__init__(f"{limiter} request budget exhausted locally, next slot in {retry_after:.1f}s")
+
+
+class RateLimiter:
+    """Per-key and per-IP token buckets with cooldowns and FIFO waiters."""
+
+    def __init__(self, name: str, budgets: Dict[str, RateBudget], default_scope: str = "generate",
+                 coordinator: Optional[QuotaCoordinator] = None):
+        self.name = name
+        self.budgets = budgets
+        self.default_scope = default_scope
+        self.coordinator = coordinator
+
+        self._buckets: Dict[Tuple[str, str, str], TokenBucket] = {}
+        self._cooldowns: Dict[Optional[str], float] = {}  # key (None = IP-wide) -> wall-clock end
+        self._holdoffs: Dict[Tuple[str, Optional[str]], float] = {}  # (scope, key or None) -> monotonic end
+        if coordinator is not None:
+            coordinator.register_cooldowns(name, self._cooldowns)
+        # asyncio locks belong to one event loop; the API server and worker threads run their own
+        self._locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Lock]]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+        self.stats = {
+            'acquired': 0,
+            'waited': 0,
+            'wait_seconds': 0.0,
+            'timeouts': 0,
+            'cooldowns': 0
+        }
+
+    async def acquire(
+        self,
+        key: Optional[str] = None,
+        tokens: int = 0,
+        scope: Optional[str] = None,
+        max_wait: Optional[float] = None
+    ) -> float:
+        """
+        Wait for budget and reserve it for one request.
+
+        Args:
+            key: Key identifier (see key_id); None uses only the IP budget
+            tokens: Estimated request tokens (for TPM budgets)
+            scope: Budget scope (defaults to default_scope)
+            max_wait: Give up (RateLimitTimeout) rather than wait longer than this
+
+        Returns:
+            Seconds spent waiting
+        """
+        scope = scope or self.default_scope
+        started = time.monotonic()
+        deadline = started + max_wait if max_wait is not None else None
+        if self.coordinator is not None:
+            await self.coordinator.sync()
+
+        async with self._lock(f"key:{scope}:{key}"):
+            while True:
+                await self._wait(lambda now: self._key_wait(scope, key, tokens, now), deadline)
+                async with self._lock(f"ip:{scope}"):
+                    await self._wait(lambda now: self._ip_wait(scope, tokens, now), deadline)
+                    if (self._key_wait(scope, key, tokens, time.monotonic()) <= 0
+                            and await self._acquire_shared(scope, key, tokens)):
+                        self._consume(scope, key, tokens, time.monotonic())
+                        break
+                # The key went into cooldown while queued for the IP budget, or another
+                # process spent the shared budget: requeue
+
+        waited = time.monotonic() - started
+        self.stats['acquired'] += 1
+        if waited > 0.001:
+            self.stats['waited'] += 1
+            self.stats['wait_seconds'] += waited
+            logger.debug(f"{self.name} limiter: waited {waited:.2f}s for {scope} budget")
+        return waited
+
+    def cooldown(self, seconds: float, key: Optional[str] = None) -> None:
+        """Block a key (or, with key=None, every key from this IP) for `seconds`."""
+        until = time.time() + seconds
+
+        def apply():
+            if until > self._cooldowns.get(key, 0.0):
+                self._cooldowns[key] = until
+
+        apply()
+        self.stats['cooldowns'] += 1
+        if self.coordinator is not None:
+            self.coordinator.set_cooldown(self.name, key, seconds, apply)
+
+    def clear_cooldown(self, key: Optional[str] = None) -> None:
+        def apply():
+            self._cooldowns.pop(key, None)
+
+        if key not in self._cooldowns:
+            return  # Nothing to clear (the mirror is at most one sync interval old)
+        apply()
+        if self.coordinator is not None:
+            self.coordinator.clear_cooldown(self.name, key, apply)
+
+    def cooldown_remaining(self, key: Optional[str] = None) -> float:
+        """Seconds left in a key's own cooldown (key=None: the IP-wide cooldown)."""
+        return max(0.0, self._cooldowns.get(key, 0.0) - time.time())
+
+    def is_available(self, key: Optional[str] = None) -> bool:
+        """Whether neither the key nor the IP is cooling down."""
+        return self.cooldown_remaining(None) <= 0 and (key is None or self.cooldown_remaining(key) <= 0)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Waiting/cooldown metrics."""
+        return {
+            **self.stats,
+            'ip_cooldown_remaining': self.cooldown_remaining(None),
+            'keys_in_cooldown': sum(
+                1 for key in self._cooldowns if key is not None and self.cooldown_remaining(key) > 0
+            ),
+            'budgets': {scope: vars(budget) for scope, budget in self.budgets.items()}
+        }
+
+    def _lock(self, name: str) -> asyncio.Lock:
+        locks = self._locks.setdefault(asyncio.get_running_loop(), {})
+        lock = locks.get(name)
+        if lock is None:
+            lock = locks[name] = asyncio.Lock()
+        return lock
+
+    async def _wait(self, wait_for, deadline: Optional[float]) -> None:
+        while True:
+            now = time.monotonic()
+            wait = wait_for(now)
+            if wait <= 0:
+                return
+            if deadline is not None and now + wait > deadline:
+                self.stats['timeouts'] += 1
+                raise RateLimitTimeout(self.name, wait)
+            await asyncio.sleep(wait)
+
+    def _bucket(self, scope: str, owner: str, kind: str, per_minute: Optional[float],
+                burst: Optional[float] = None) -> Optional[TokenBucket]:
+        if not per_minute:
+            return None
+        bucket_key = (scope, owner, kind)
+        bucket = self._buckets.get(bucket_key)
+        if bucket is None:
+            bucket = self._buckets[bucket_key] = TokenBucket(per_minute, burst)
+        return bucket
+
+    def _key_buckets(self, scope: str, key: Optional[str]):
+        if key is None:
+            return []
+        budget = self.budgets[scope]
+        return [
+            (self._bucket(scope, key, 'requests', budget.key_rpm), 1),
+            (self._bucket(scope, key, 'tokens', budget.key_tpm), None)
+        ]
+
+    def _ip_buckets(self, scope: str):
+        budget = self.budgets[scope]
+        return [
+            (self._bucket(scope, '', 'requests', budget.ip_rpm, budget.ip_burst), 1),
+            (self._bucket(scope, '', 'tokens', budget.ip_tpm), None)
+        ]
+
+    def _key_wait(self, scope: str, key: Optional[str], tokens: int, now: float) -> float:
+        waits = [self.cooldown_remaining(key) if key is not None else 0.0]
+        waits.append(self._holdoffs.get((scope, key), 0.0) - now if key is not None else 0.0)
+        waits += [
+            bucket.wait_time(amount or tokens, now)
+            for bucket, amount in self._key_buckets(scope, key) if bucket is not None
+        ]
+        return max(waits)
+
+    def _ip_wait(self, scope: str, tokens: int, now: float) -> float:
+        waits = [self.cooldown_remaining(None), self._holdoffs.get((scope, None), 0.0) - now]
+        waits += [
+            bucket.wait_time(amount or tokens, now)
+            for bucket, amount in self._ip_buckets(scope) if bucket is not None
+        ]
+        return max(waits)
+
+    def _consume(self, scope: str, key: Optional[str], tokens: int, now: float) -> None:
+        for bucket, amount in self._key_buckets(scope, key) + self._ip_buckets(scope):
+            if bucket is not None:
+                bucket.consume(amount or tokens, now)
+
+    async def _acquire_shared(self, scope: str, key: Optional[str], tokens: int) -> bool:
+        """Consume the cluster-wide budget; False (after noting how long to wait) when it is short."""
+        if self.coordinator is None:
+            return True
+        budget = self.budgets[scope]
+        buckets = []
+        if key is not None:
+            buckets += [
+                (f"{scope}:{key}:requests", budget.key_rpm, budget.key_rpm, 1, KEY_BUDGET),
+                (f"{scope}:{key}:tokens", budget.key_tpm, budget.key_tpm, tokens, KEY_BUDGET)
+            ]
+        ip_burst = budget.ip_burst if budget.ip_burst is not None else budget.ip_rpm
+        buckets += [
+            (f"{scope}:*:requests", budget.ip_rpm, ip_burst, 1, IP_BUDGET),
+            (f"{scope}:*:tokens", budget.ip_tpm, budget.ip_tpm, tokens, IP_BUDGET)
+        ]
+        result = await self.coordinator.acquire(self.name, key, [
+            (name, per_minute, max(1.0, capacity), amount, outcome)
+            for name, per_minute, capacity, amount, outcome in buckets if per_minute and amount
+        ])
+        if result is None:
+            return True  # Local-only mode: the local buckets alone apply
+        outcome, wait = result
+        if outcome == KEY_COOLDOWN:
+            self._cooldowns[key] = max(self._cooldowns.get(key, 0.0), time.time() + wait)
+        elif outcome == IP_COOLDOWN:
+            self._cooldowns[None] = max(self._cooldowns.get(None, 0.0), time.time() + wait)
+        elif outcome in (KEY_BUDGET, IP_BUDGET):
+            self._holdoffs[(scope, key if outcome == KEY_BUDGET else None)] = time.monotonic() + wait
+        else:
+            return True
+        return False
+
+
+def _gemini_budgets(settings) -> Dict[str, RateBudget]:
+    return {
+        'generate': RateBudget(
+            key_rpm=settings.gemini_key_rpm,
+            key_tpm=settings.gemini_key_tpm,
+            ip_rpm=settings.gemini_ip_rpm,
+            ip_burst=settings.gemini_ip_burst
+        ),
+        'embed': RateBudget(
+            key_rpm=settings.gemini_embedding_key_rpm,
+            ip_rpm=settings.gemini_embedding_ip_rpm
+        )
+    }
+
+
+def _github_models_budgets(settings) -> Dict[str, RateBudget]:
+    return {
+        'generate': RateBudget(
+            key_rpm=settings.github_models_key_rpm,
+            ip_rpm=settings.github_models_ip_rpm
+        )
+    }
+
+
+_settings = get_settings()
+
+# Global instances (Gemini keys are shared by GeminiClient, UnifiedAIClient and the meeting summarizer)
+gemini_rate_limiter = RateLimiter("gemini", _gemini_budgets(_settings), coordinator=quota_coordinator)
+github_models_rate_limiter = RateLimiter(
+    "github_models", _github_models_budgets(_settings), coordinator=quota_coordinator
+)
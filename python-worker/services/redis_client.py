@@ -85,17 +85,34 @@ class RedisClient:
     async def update_task_status(
         self, task_id: str, status: str, result: Optional[Dict[str, Any]] = None
     ) -> None:
-        """Update task status."""
+        """Update task status (status SET, result SET and job update PUBLISH in one MULTI)."""
         if not self.redis:
             raise RuntimeError("Redis client not connected")
 
+        pipe = self.redis.pipeline(transaction=True)
+        self.queue_task_status(pipe, task_id, status, result)
+        await pipe.execute()
+
+        logger.info("Task status updated", task_id=task_id, status=status)
+
+    @staticmethod
+    def queue_task_status(
+        pipe, task_id: str, status: str, result: Optional[Dict[str, Any]] = None,
+        stored_result: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """
+        Add the commands for one task status update to a pipeline.
+
+        stored_result is written to the result key when the update itself
+        carries no result (used when several updates are coalesced).
+        """
         status_key = f"task:{task_id}:status"
         result_key = f"task:{task_id}:result"
 
-        await self.redis.set(status_key, status, ex=3600)  # Expire in 1 hour
+        pipe.set(status_key, status, ex=3600)  # Expire in 1 hour
 
-        if result:
-            await self.redis.set(result_key, json.dumps(result), ex=3600)
+        if result or stored_result:
+            pipe.set(result_key, json.dumps(result or stored_result), ex=3600)
 
         # Publish job update for Node.js worker to pick up
         update_message = {
@@ -105,9 +122,7 @@ class RedisClient:
             "result": result,
             "error": None if status != "failed" else str(result.get("error", "Unknown error")) if result else None
         }
-        await self.publish("job_updates", json.dumps(update_message))
-
-        logger.info("Task status updated", task_id=task_id, status=status)
+        pipe.publish("job_updates", json.dumps(update_message))
 
     async def get_task_status(self, task_id: str) -> Optional[str]:
         """Get task status."""
@@ -129,6 +144,23 @@ class RedisClient:
             raise RuntimeError("Redis client not connected")
         return await self.redis.hgetall(key)
 
+    async def hgetall_many(self, keys: List[str]) -> List[Dict[str, str]]:
+        """Get all fields of several hashes in one pipelined round trip."""
+        if not self.redis:
+            raise RuntimeError("Redis client not connected")
+        if not keys:
+            return []
+        pipe = self.redis.pipeline(transaction=False)
+        for key in keys:
+            pipe.hgetall(key)
+        return await pipe.execute()
+
+    async def smembers(self, key: str) -> List[str]:
+        """Get all members of a set."""
+        if not self.redis:
+            raise RuntimeError("Redis client not connected")
+        return list(await self.redis.smembers(key))
+
     async def lpush(self, key: str, *values) -> int:
         """Push values to list."""
         if not self.redis:
@@ -141,12 +173,24 @@ class RedisClient:
             raise RuntimeError("Redis client not connected")
         await self.redis.publish(channel, message)
 
+    def pipeline(self, transaction: bool = False):
+        """Create a pipeline to send several commands in one round trip."""
+        if not self.redis:
+            raise RuntimeError("Redis client not connected")
+        return self.redis.pipeline(transaction=transaction)
+
     async def keys(self, pattern: str) -> List[str]:
         """Get keys matching pattern."""
         if not self.redis:
             raise RuntimeError("Redis client not connected")
         return await self.redis.keys(pattern)
 
+    async def scan_keys(self, pattern: str, count: int = 1000) -> List[str]:
+        """Get keys matching pattern with incremental SCAN (does not block Redis like KEYS)."""
+        if not self.redis:
+            raise RuntimeError("Redis client not connected")
+        return [key async for key in self.redis.scan_iter(match=pattern, count=count)]
+
     async def get(self, key: str) -> Optional[str]:
         """Get value from Redis."""
         if not self.redis:
@@ -0,0 +1,298 @@
+"""
+Repository content cache for Q&A and issue-fix retrieval.
+
+Keeps downloaded file contents so repeated questions against the same
+repository don't re-download every file from B2:
+1. In-process LRU tier bounded by a byte budget
+2. On-disk tier shared by the API and worker processes
+
+Entries are keyed by repository version + file_key. The version is bumped
+whenever a repository is re-ingested, which invalidates every entry at once.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+from config.settings import get_settings
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class RepositoryContentCache:
+    """Two-tier (memory + disk) cache of repository file contents."""
+
+    VERSION_FILE = "VERSION"
+
+    def __init__(
+        self,
+        memory_budget_bytes: Optional[int] = None,
+        cache_dir: Optional[str] = None,
+        disk_enabled: Optional[bool] = None
+    ):
+        settings = get_settings()
+
+        self.memory_budget_bytes = (
+            memory_budget_bytes if memory_budget_bytes is not None
+            else settings.content_cache_memory_bytes
+        )
+        self.disk_enabled = (
+            disk_enabled if disk_enabled is not None
+            else settings.content_cache_disk_enabled
+        )
+        self.cache_dir = (
+            cache_dir or settings.content_cache_dir
+            or os.path.join(tempfile.gettempdir(), "gittldr_content_cache")
+        )
+
+        self._memory: "OrderedDict[Tuple[str, str, str], str]" = OrderedDict()
+        self._entry_sizes: Dict[Tuple[str, str, str], int] = {}
+        self._memory_bytes = 0
+        self._versions: Dict[str, Tuple[int, str]] = {}  # repo_id -> (mtime_ns, version)
+        self._lock = threading.RLock()
+
+        self.stats = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'bytes_served': 0,
+            'bytes_stored': 0,
+            'evictions': 0,
+            'invalidations': 0
+        }
+
+    # ------------------------------------------------------------------
+    # Versioning
+    # ------------------------------------------------------------------
+
+    def _repo_dir(self, repository_id: str) -> str:
+        return os.path.join(self.cache_dir, repository_id)
+
+    def get_version(self, repository_id: str) -> str:
+        """
+        Get the current cache version of a repository.
+
+        The version lives in a small file on disk so that an invalidation done
+        by the worker process is visible to the API process as well.
+        """
+        if not self.disk_enabled:
+            with self._lock:
+                cached = self._versions.get(repository_id)
+                if cached:
+                    return cached[1]
+                version = uuid.uuid4().hex
+                self._versions[repository_id] = (0, version)
+                return version
+
+        version_path = os.path.join(self._repo_dir(repository_id), self.VERSION_FILE)
+        try:
+            mtime_ns = os.stat(version_path).st_mtime_ns
+        except FileNotFoundError:
+            return self._write_version(repository_id)
+        except OSError as e:
+            logger.warning(f"Content cache version lookup failed for {repository_id}: {str(e)}")
+            return "0"
+
+        with self._lock:
+            cached = self._versions.get(repository_id)
+            if cached and cached[0] == mtime_ns:
+                return cached[1]
+
+        try:
+            with open(version_path, 'r', encoding='utf-8') as f:
+                version = f.read().strip() or "0"
+        except OSError:
+            version = "0"
+
+        with self._lock:
+            self._versions[repository_id] = (mtime_ns, version)
+        return version
+
+    def _write_version(self, repository_id: str) -> str:
+        """Write a fresh version token for a repository and return it."""
+        version = uuid.uuid4().hex
+        repo_dir = self._repo_dir(repository_id)
+        try:
+            os.makedirs(repo_dir, exist_ok=True)
+            self._atomic_write(os.path.join(repo_dir, self.VERSION_FILE), version.encode('utf-8'))
+            mtime_ns = os.stat(os.path.join(repo_dir, self.VERSION_FILE)).st_mtime_ns
+        except OSError as e:
+            logger.warning(f"Failed to write content cache version for {repository_id}: {str(e)}")
+            mtime_ns = 0
+
+        with self._lock:
+            self._versions[repository_id] = (mtime_ns, version)
+        return version
+
+    # ------------------------------------------------------------------
+    # Lookup / store
+    # ------------------------------------------------------------------
+
+    def get(self, repository_id: str, file_key: str, version: Optional[str] = None) -> Optional[str]:
+        """Return cached content for a file, or None on a miss."""
+        if not repository_id or not file_key:
+            return None
+
+        version = version or self.get_version(repository_id)
+        key = (repository_id, version, file_key)
+
+        with self._lock:
+            content = self._memory.get(key)
+            if content is not None:
+                self._memory.move_to_end(key)
+                self.stats['memory_hits'] += 1
+                self.stats['bytes_served'] += self._entry_sizes.get(key, 0)
+                return content
+
+        if self.disk_enabled:
+            content = self._read_disk(repository_id, version, file_key)
+            if content is not None:
+                self._put_memory(key, content)
+                with self._lock:
+                    self.stats['disk_hits'] += 1
+                    self.stats['bytes_served'] += self._entry_sizes.get(key, len(content))
+                return content
+
+        with self._lock:
+            self.stats['misses'] += 1
+        return None
+
+    def put(self, repository_id: str, file_key: str, content: str, version: Optional[str] = None) -> None:
+        """Store content for a file in both tiers."""
+        if not repository_id or not file_key or content is None:
+            return
+
+        version = version or self.get_version(repository_id)
+        key = (repository_id, version, file_key)
+
+        self._put_memory(key, content)
+        if self.disk_enabled:
+            self._write_disk(repository_id, version, file_key, content)
+
+    def invalidate(self, repository_id: str) -> str:
+        """
+        Invalidate all cached content of a repository.
+
+        Bumps the repository version (visible to every process sharing the
+        cache directory) and drops old entries from both tiers.
+
+        Returns:
+            The new repository version
+        """
+        with self._lock:
+            stale_keys = [k for k in self._memory if k[0] == repository_id]
+            for key in stale_keys:
+                self._drop_memory(key)
+            self.stats['invalidations'] += 1
+
+        if not self.disk_enabled:
+            with self._lock:
+                version = uuid.uuid4().hex
+                self._versions[repository_id] = (0, version)
+            return version
+
+        repo_dir = self._repo_dir(repository_id)
+        new_version = self._write_version(repository_id)
+
+        # Remove content directories of previous versions
+        try:
+            for entry in os.listdir(repo_dir):
+                entry_path = os.path.join(repo_dir, entry)
+                if entry != new_version and os.path.isdir(entry_path):
+                    shutil.rmtree(entry_path, ignore_errors=True)
+        except OSError as e:
+            logger.warning(f"Failed to clean content cache for {repository_id}: {str(e)}")
+
+        logger.info(f"Invalidated content cache for repository {repository_id}")
+        return new_version
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss/bytes metrics for the cache."""
+        with self._lock:
+            hits = self.stats['memory_hits'] + self.stats['disk_hits']
+            lookups = hits + self.stats['misses']
+            return {
+                **self.stats,
+                'hit_rate': hits / lookups if lookups else 0.0,
+                'memory_entries': len(self._memory),
+                'memory_bytes': self._memory_bytes,
+                'memory_budget_bytes': self.memory_budget_bytes,
+                'disk_enabled': self.disk_enabled
+            }
+
+    # ------------------------------------------------------------------
+    # Memory tier
+    # ------------------------------------------------------------------
+
+    def _put_memory(self, key: Tuple[str, str, str], content: str) -> None:
+        size = len(content.encode('utf-8'))
+        if size > self.memory_budget_bytes:
+            return
+
+        with self._lock:
+            if key in self._memory:
+                self._drop_memory(key)
+
+            self._memory[key] = content
+            self._entry_sizes[key] = size
+            self._memory_bytes += size
+            self.stats['bytes_stored'] += size
+
+            while self._memory_bytes > self.memory_budget_bytes and self._memory:
+                oldest_key = next(iter(self._memory))
+                self._drop_memory(oldest_key)
+                self.stats['evictions'] += 1
+
+    def _drop_memory(self, key: Tuple[str, str, str]) -> None:
+        self._memory.pop(key, None)
+        self._memory_bytes -= self._entry_sizes.pop(key, 0)
+
+    # ------------------------------------------------------------------
+    # Disk tier
+    # ------------------------------------------------------------------
+
+    def _disk_path(self, repository_id: str, version: str, file_key: str) -> str:
+        digest = hashlib.sha256(file_key.encode('utf-8')).hexdigest()
+        return os.path.join(self._repo_dir(repository_id), version, digest[:2], digest)
+
+    def _read_disk(self, repository_id: str, version: str, file_key: str) -> Optional[str]:
+        path = self._disk_path(repository_id, version, file_key)
+        try:
+            with open(path, 'rb') as f:
+                return f.read().decode('utf-8')
+        except FileNotFoundError:
+            return None
+        except (OSError, UnicodeDecodeError) as e:
+            logger.debug(f"Content cache disk read failed for {file_key}: {str(e)}")
+            return None
+
+    def _write_disk(self, repository_id: str, version: str, file_key: str, content: str) -> None:
+        path = self._disk_path(repository_id, version, file_key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._atomic_write(path, content.encode('utf-8'))
+        except OSError as e:
+            logger.debug(f"Content cache disk write failed for {file_key}: {str(e)}")
+
+    @staticmethod
+    def _atomic_write(path: str, data: bytes) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+
+# Global instance
+repository_content_cache = RepositoryContentCache()
@@ -119,8 +119,14 @@ class SmartContextBuilder:
     def build_smart_context(self, 
                           question_analysis: Dict[str, Any], 
                           available_files: List[Dict[str, Any]],
-                          question: str) -> Tuple[List[str], List[str]]:
-        """Build smart context based on question analysis."""
+                          question: str,
+                          repository_id: Optional[str] = None) -> Tuple[List[str], List[str]]:
+        """
+        Build smart context based on question analysis.
+
+        When repository_id is given and the repository has a keyword index,
+        keyword relevance comes from the index instead of scanning contents.
+        """
         relevant_files = []
         relevant_paths = []
         
@@ -137,7 +143,7 @@ class SmartContextBuilder:
         # If no specific files found or need broader context
         if not relevant_files or question_analysis['needs_deep_analysis']:
             additional_files, additional_paths = self._find_contextual_files(
-                question_analysis, available_files, question
+                question_analysis, available_files, question, repository_id
             )
             relevant_files.extend(additional_files)
             relevant_paths.extend(additional_paths)
@@ -157,6 +163,106 @@ class SmartContextBuilder:
         logger.info(f"Built context with {len(final_files)} files")
         return final_files, final_paths
     
+    def rank_by_metadata(self,
+                         question_analysis: Dict[str, Any],
+                         available_files: List[Dict[str, Any]],
+                         question: str,
+                         limit: int = 30,
+                         repository_id: Optional[str] = None) -> List[Tuple[float, Dict[str, Any]]]:
+        """
+        Rank files without their content: path, name, summary and (when the
+        repository has one) the keyword index built from file contents.
+
+        Used to shortlist files before their content is downloaded; the
+        shortlist can then go through build_smart_context as usual. Places
+        left after the matching files are filled (with score 0) by default
+        importance, as the content scorer would have ranked them, so questions
+        matching nothing on metadata still get files to hydrate.
+        """
+        from services.keyword_index import keyword_index
+
+        question_lower = question.lower()
+        index = keyword_index.get(repository_id)
+        matches = index.match(question_analysis['keywords']) if index else {}
+        scored_files = []
+        unmatched_files = []
+
+        for file_info in available_files:
+            file_path = file_info.get('path', '')
+            file_name = os.path.basename(file_path)
+            file_path_lower = file_path.lower()
+            summary_lower = (file_info.get('summary') or '').lower()
+            score = 0.0
+
+            # User-provided attachments always make the shortlist
+            if file_path.startswith('attachment/') or file_info.get('is_attachment', False):
+                score += 10.0
+
+            if question_analysis['type'] == 'file_specific':
+                for target in question_analysis['specific_files']:
+                    if (self._path_matches(target, file_path) or
+                        self._path_matches(target, file_name) or
+                        self._fuzzy_path_match(target, file_path)):
+                        score += 10.0
+            elif question_analysis['type'] == 'folder_specific':
+                for target_folder in question_analysis['specific_folders']:
+                    if self._file_in_folder(file_path, target_folder):
+                        score += 8.0
+
+            for keyword in question_analysis['keywords']:
+                if keyword in file_path_lower:
+                    score += 1.5
+                if keyword in summary_lower:
+                    score += 1.0
+
+            keyword_match = matches.get(file_path)
+            if keyword_match is not None:
+                score += 2.0 * keyword_match.field_hits('content')
+                score += keyword_match.score
+
+            if question_analysis['type'] == 'configuration':
+                if any(file_path.endswith(ext) for ext in self.code_extensions['config']):
+                    score += 5.0
+
+            if question_analysis['type'] == 'architectural':
+                if any(file_path.endswith(ext) for ext in
+                      self.code_extensions['python'] + self.code_extensions['javascript'] +
+                      self.code_extensions['typescript'] + self.code_extensions['java']):
+                    score += 3.0
+
+            if 'readme' in file_name.lower() and 'readme' not in question_lower:
+                score *= 0.3
+
+            important_files = ['main', 'index', 'app', 'server', 'config', 'settings']
+            if any(important in file_name.lower() for important in important_files):
+                score += 2.0
+
+            if score > 0:
+                scored_files.append((score, file_info))
+            else:
+                unmatched_files.append(file_info)
+
+        scored_files.sort(key=lambda x: x[0], reverse=True)
+        if len(scored_files) < limit:
+            unmatched_files.sort(key=self._default_importance, reverse=True)
+            scored_files.extend((0.0, file_info) for file_info in unmatched_files[:limit - len(scored_files)])
+        return scored_files[:limit]
+
+    def _default_importance(self, file_info: Dict[str, Any]) -> Tuple[float, int]:
+        """Question-independent rank of a file: the content scorer's size bonus, code files, shallow paths."""
+        file_path = file_info.get('path', '')
+        size = file_info.get('size') or 0
+        importance = 0.0
+        if size > 100:
+            importance += 1.0
+        if size > 1000:
+            importance += 2.0
+        code_extensions = [ext for kind, exts in self.code_extensions.items()
+                           if kind not in ('docs', 'data') for ext in exts]
+        if any(file_path.endswith(ext) for ext in code_extensions):
+            importance += 1.0
+        return importance, -file_path.count('/')
+
     def _clean_path(self, path: str) -> str:
         """Clean and normalize file paths."""
         # Remove common noise words and punctuation
@@ -233,10 +339,16 @@ class SmartContextBuilder:
         
         return found_files, found_paths
     
-    def _find_contextual_files(self, question_analysis: Dict[str, Any], available_files: List[Dict[str, Any]], question: str) -> Tuple[List[str], List[str]]:
+    def _find_contextual_files(self, question_analysis: Dict[str, Any], available_files: List[Dict[str, Any]], question: str,
+                               repository_id: Optional[str] = None) -> Tuple[List[str], List[str]]:
         """Find contextually relevant files based on question analysis."""
+        from services.keyword_index import keyword_index, NO_MATCH
+        
         scored_files = []
         
+        index = keyword_index.get(repository_id)
+        matches = index.match(question_analysis['keywords']) if index else {}
+        
         for file_info in available_files:
             file_path = file_info.get('path', '')
             file_name = os.path.basename(file_path)
@@ -245,8 +357,10 @@ class SmartContextBuilder:
             if not content:
                 continue
             
+            # Files missing from the index (attachments, newer files) are scanned
+            keyword_match = matches.get(file_path, NO_MATCH) if index and file_path in index else None
             score = self._calculate_relevance_score(
-                file_path, file_name, content, question_analysis, question
+                file_path, file_name, content, question_analysis, question, keyword_match
             )
             
             if score > 0:
@@ -303,10 +417,15 @@ class SmartContextBuilder:
         return folder_norm in path_parts or any(folder_norm in part for part in path_parts)
     
     def _calculate_relevance_score(self, file_path: str, file_name: str, content: str, 
-                                 question_analysis: Dict[str, Any], question: str) -> float:
-        """Calculate relevance score for a file."""
+                                 question_analysis: Dict[str, Any], question: str,
+                                 keyword_match=None) -> float:
+        """
+        Calculate relevance score for a file.
+
+        keyword_match is the file's KeywordMatch from the repository keyword
+        index; without it, keywords are matched by scanning content and path.
+        """
         score = 0.0
-        content_lower = content.lower()
         file_path_lower = file_path.lower()
         question_lower = question.lower()
         
@@ -320,11 +439,17 @@ class SmartContextBuilder:
                 score += 5.0
         
         # Keyword matching in content
-        for keyword in question_analysis['keywords']:
-            if keyword in content_lower:
-                score += 2.0
-            if keyword in file_path_lower:
-                score += 1.5
+        if keyword_match is not None:
+            score += 2.0 * keyword_match.field_hits('content')
+            score += 1.5 * keyword_match.field_hits('path')
+            score += keyword_match.score  # BM25: rarer terms and denser matches rank higher
+        else:
+            content_lower = content.lower()
+            for keyword in question_analysis['keywords']:
+                if keyword in content_lower:
+                    score += 2.0
+                if keyword in file_path_lower:
+                    score += 1.5
         
         # Question type specific scoring
         if question_analysis['type'] == 'configuration':
@@ -0,0 +1,157 @@
+"""
+Coalescing task status publisher.
+
+Every status change used to cost three round trips (status SET, result SET,
+PUBLISH on `job_updates`). The publisher keeps only the latest update per job
+for a short window and writes all buffered jobs in a single pipeline. Terminal
+states are flushed immediately so node-worker never waits on a final result.
+Flushes are serialized, so a terminal update is never overtaken by an older
+batch still in flight, and a failed flush puts its updates back.
+"""
+import asyncio
+import weakref
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from config.settings import get_settings
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Job statuses after which node-worker stops waiting for further updates
+TERMINAL_STATUSES = {
+    "completed", "failed", "cancelled", "ready_for_review", "needs_clarification"
+}
+
+
+@dataclass
+class PendingStatus:
+    """Latest buffered update for one job."""
+    status: str
+    result: Optional[Dict[str, Any]] = None
+    # Most recent non-empty result, so a coalesced result SET is not lost
+    stored_result: Optional[Dict[str, Any]] = None
+
+
+class StatusPublisher:
+    """Buffers task status updates per job and writes them in pipelines."""
+
+    def __init__(self, window_seconds: Optional[float] = None):
+        if window_seconds is None:
+            window_seconds = get_settings().status_coalesce_window_ms / 1000
+        self.window_seconds = max(0.0, window_seconds)
+
+        self._pending: Dict[str, PendingStatus] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        # asyncio locks belong to one event loop (like the rate limiter's)
+        self._locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self.stats = {
+            'updates': 0,
+            'coalesced': 0,
+            'flushes': 0,
+            'jobs_written': 0
+        }
+
+    async def publish_status(
+        self, task_id: str, status: str, result: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """
+        Record a status update for a job.
+
+        Intermediate updates are written after the coalescing window; terminal
+        ones (or any update when the window is 0) flush the job right away.
+        """
+        self.stats['updates'] += 1
+        previous = self._pending.get(task_id)
+        if previous is not None:
+            self.stats['coalesced'] += 1
+        self._pending[task_id] = PendingStatus(
+            status=status,
+            result=result,
+            stored_result=result or (previous.stored_result if previous else None)
+        )
+
+        if status in TERMINAL_STATUSES or self.window_seconds == 0:
+            await self.flush(task_id)
+        elif self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def flush(self, task_id: Optional[str] = None) -> int:
+        """
+        Write buffered updates (one job, or all of them) in a single pipeline.
+
+        Waits for a flush already in flight; if the pipeline fails, its updates
+        are buffered again (behind any newer update of the same job) and the
+        error is raised.
+
+        Returns:
+            Number of jobs written
+        """
+        from services.redis_client import redis_client
+
+        async with self._lock():
+            if task_id is not None:
+                update = self._pending.pop(task_id, None)
+                batch = {task_id: update} if update else {}
+            else:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+
+            pipe = redis_client.pipeline(transaction=len(batch) == 1)
+            for job_id, update in batch.items():
+                redis_client.queue_task_status(
+                    pipe, job_id, update.status, update.result, update.stored_result
+                )
+            try:
+                await pipe.execute()
+            except Exception:
+                self._restore(batch)
+                raise
+
+        self.stats['flushes'] += 1
+        self.stats['jobs_written'] += len(batch)
+        logger.debug(
+            f"Flushed {len(batch)} task status updates",
+            statuses={job_id: update.status for job_id, update in batch.items()}
+        )
+        return len(batch)
+
+    async def close(self) -> None:
+        """Wait for a scheduled flush and write anything still buffered."""
+        if self._flush_task and not self._flush_task.done():
+            await self._flush_task
+        await self.flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Counters for monitoring."""
+        return {**self.stats, 'buffered': len(self._pending)}
+
+    def _restore(self, batch: Dict[str, PendingStatus]) -> None:
+        """Buffer the updates of a failed flush again, unless a newer update of the job arrived meanwhile."""
+        for job_id, update in batch.items():
+            newer = self._pending.get(job_id)
+            if newer is None:
+                self._pending[job_id] = update
+            elif newer.stored_result is None:
+                newer.stored_result = update.stored_result
+
+    def _lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        lock = self._locks.get(loop)
+        if lock is None:
+            lock = self._locks[loop] = asyncio.Lock()
+        return lock
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.window_seconds)
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.warning("Failed to flush task status updates, keeping them buffered", error=str(e))
+
+
+# Global instance
+status_publisher = StatusPublisher()
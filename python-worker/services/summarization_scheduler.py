@@ -0,0 +1,337 @@
+"""
+Concurrent, rate-limit-aware scheduling of LLM summarization requests.
+
+Files used to be summarized one at a time. The scheduler runs requests
+concurrently under an AIMD limit: the number in flight grows by one per
+window of successes and halves on a rate-limit signal (a 429-style error, a
+limiter timeout or the shared Gemini IP cooldown). Pacing itself stays with
+the shared rate limiter, which every request still awaits.
+
+For repository ingestion it also:
+
+1. Orders files so READMEs, entry points and configs are summarized first
+   (and dispatches them in batches when small files are packed per request)
+2. Streams completed summaries to `file_summary_queue` in small batches
+3. Records them (with a content hash) in a Redis progress hash, so a retried
+   task only summarizes files that are missing or changed
+"""
+import asyncio
+import json
+import os
+import time
+import weakref
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar, Union
+
+from config.settings import get_settings
+from services.rate_limiter import RateLimitTimeout, gemini_rate_limiter
+from utils.hashing import content_hash
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+FILE_SUMMARY_QUEUE = "file_summary_queue"
+
+_RATE_LIMIT_MARKERS = ("429", "rate limit", "rate_limit", "quota", "resource_exhausted",
+                       "resource has been exhausted", "too many requests")
+
+_ENTRY_POINT_STEMS = {'main', 'index', 'app', 'server', 'cli', 'manage', 'wsgi', 'asgi', '__main__', 'worker'}
+_CONFIG_NAMES = {
+    'package.json', 'pyproject.toml', 'setup.py', 'setup.cfg', 'requirements.txt', 'cargo.toml',
+    'go.mod', 'pom.xml', 'build.gradle', 'dockerfile', 'docker-compose.yml', 'docker-compose.yaml',
+    'makefile', 'tsconfig.json', 'composer.json', 'gemfile'
+}
+_CONFIG_EXTENSIONS = ('.toml', '.yml', '.yaml', '.ini', '.cfg', '.conf')
+
+
+def summary_priority(path: str) -> Tuple[int, int, str]:
+    """Sort key: README, entry points, configs, docs, then other files; shallow paths first."""
+    name = os.path.basename(path).lower()
+    stem = name.split('.', 1)[0]
+    depth = path.count('/')
+    if stem == 'readme':
+        tier = 0
+    elif stem in _ENTRY_POINT_STEMS:
+        tier = 1
+    elif name in _CONFIG_NAMES or (depth == 0 and name.endswith(_CONFIG_EXTENSIONS)):
+        tier = 2
+    elif name.endswith(('.md', '.rst', '.txt')):
+        tier = 3
+    else:
+        tier = 4
+    return tier, depth, path
+
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """Whether a failed request signals that we are sending too fast."""
+    if isinstance(error, RateLimitTimeout):
+        return True
+    message = str(error).lower()
+    return any(marker in message for marker in _RATE_LIMIT_MARKERS)
+
+
+class AdaptiveConcurrency:
+    """AIMD limit on requests in flight: +1 per `limit` successes, halved on a rate-limit signal."""
+
+    def __init__(self, initial: int, maximum: int, minimum: int = 1):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        # asyncio conditions belong to one event loop (like the rate limiter's locks)
+        self._conditions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Condition]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self.stats = {
+            'increases': 0,
+            'decreases': 0,
+            'peak_in_flight': 0
+        }
+
+    async def acquire(self) -> float:
+        """Wait for a free slot; returns the start time to pass to release()."""
+        condition = self._condition()
+        async with condition:
+            await condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+            self.stats['peak_in_flight'] = max(self.stats['peak_in_flight'], self.in_flight)
+        return time.monotonic()
+
+    async def release(self, started: float, rate_limited: bool = False) -> None:
+        """Free a slot and adapt the limit to the request's outcome."""
+        condition = self._condition()
+        async with condition:
+            self.in_flight -= 1
+            if rate_limited:
+                # Requests sent before the last decrease reflect the old limit: halve once per round
+                if started >= self._last_decrease:
+                    self.limit = max(self.minimum, self.limit / 2)
+                    self._last_decrease = time.monotonic()
+                    self.stats['decreases'] += 1
+                    logger.info(f"Summarization concurrency halved to {int(self.limit)} after a rate limit")
+            else:
+                previous = int(self.limit)
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+                if int(self.limit) > previous:
+                    self.stats['increases'] += 1
+            condition.notify_all()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, 'limit': int(self.limit), 'in_flight': self.in_flight}
+
+    def _condition(self) -> asyncio.Condition:
+        loop = asyncio.get_running_loop()
+        condition = self._conditions.get(loop)
+        if condition is None:
+            condition = self._conditions[loop] = asyncio.Condition()
+        return condition
+
+
+class _SummaryStream:
+    """Pushes completed summaries to the node-worker queue in batches and records them as progress."""
+
+    def __init__(self, repo_id: str, progress_key: str, batch_size: int, interval: float, ttl: int, task_logger):
+        self.repo_id = repo_id
+        self.progress_key = progress_key
+        self.batch_size = batch_size
+        self.interval = interval
+        self.ttl = ttl
+        self.task_logger = task_logger
+        self.updates: List[Dict[str, Any]] = []
+        self.progress: Dict[str, str] = {}
+        self.last_flush = time.monotonic()
+        self.queued = 0
+
+    async def add(self, path: str, digest: str, summary: str) -> None:
+        self.updates.append({
+            "type": "file_summary",
+            "repository_id": self.repo_id,
+            "file_path": path,
+            "summary": summary,
+            "updated_at": datetime.utcnow().isoformat()
+        })
+        self.progress[path] = json.dumps({"sha": digest, "summary": summary})
+        if len(self.updates) >= self.batch_size or time.monotonic() - self.last_flush >= self.interval:
+            await self.flush()
+
+    async def flush(self) -> None:
+        from services.redis_client import redis_client
+
+        # Take the batch before awaiting: other requests keep completing meanwhile
+        updates, progress = self.updates, self.progress
+        self.updates, self.progress = [], {}
+        self.last_flush = time.monotonic()
+        if not updates:
+            return
+        try:
+            pipe = redis_client.pipeline(transaction=False)
+            pipe.lpush(FILE_SUMMARY_QUEUE, *[json.dumps(update) for update in updates])
+            pipe.hset(self.progress_key, mapping=progress)
+            pipe.expire(self.progress_key, self.ttl)
+            await pipe.execute()
+            self.queued += len(updates)
+        except Exception as e:
+            self.task_logger.warning(f"Failed to queue {len(updates)} file summary updates: {str(e)}")
+
+
+class SummarizationScheduler:
+    """Runs summarization requests concurrently under a shared AIMD limit."""
+
+    def __init__(
+        self,
+        initial_concurrency: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        stream_batch_size: Optional[int] = None,
+        stream_interval: Optional[float] = None,
+        progress_ttl: Optional[int] = None,
+        congested: Optional[Callable[[], bool]] = None
+    ):
+        settings = get_settings()
+        self.concurrency = AdaptiveConcurrency(
+            initial_concurrency or settings.summary_concurrency_initial,
+            max_concurrency or settings.summary_concurrency_max
+        )
+        self.stream_batch_size = stream_batch_size or settings.summary_stream_batch_size
+        self.stream_interval = stream_interval if stream_interval is not None else settings.summary_stream_interval
+        self.progress_ttl = progress_ttl or settings.summary_progress_ttl
+        # Shared congestion signal: Gemini's IP-wide cooldown (set by any process after a 429)
+        self.congested = congested or (lambda: not gemini_rate_limiter.is_available())
+
+    async def map(
+        self,
+        items: Sequence[T],
+        call: Callable[[T], Awaitable[R]],
+        rate_limited: Optional[Callable[[R], bool]] = None
+    ) -> List[Union[R, Exception]]:
+        """
+        Run `call` for every item, starting them in order under the adaptive limit.
+
+        Args:
+            rate_limited: Whether a returned result carries a rate-limit signal
+                (raised rate-limit errors always count)
+
+        Returns:
+            Results in item order; a failed call's exception takes its place
+        """
+        results: List[Union[R, Exception]] = [None] * len(items)
+
+        async def run_one(index: int, item: T, started: float) -> None:
+            limited = False
+            try:
+                results[index] = await call(item)
+                limited = rate_limited is not None and rate_limited(results[index])
+            except Exception as e:
+                limited = is_rate_limit_error(e)
+                results[index] = e
+            finally:
+                await self.concurrency.release(started, limited or self.congested())
+
+        tasks = []
+        for index, item in enumerate(items):
+            started = await self.concurrency.acquire()
+            tasks.append(asyncio.create_task(run_one(index, item, started)))
+        if tasks:
+            await asyncio.gather(*tasks)
+        return results
+
+    async def run(
+        self,
+        repo_id: str,
+        files: List[Dict[str, Any]],
+        summarize: Callable[[List[Dict[str, Any]]], Awaitable[List[Union[Optional[str], Exception]]]],
+        task_logger,
+        pack: Optional[Callable[[List[Dict[str, Any]]], List[List[Dict[str, Any]]]]] = None
+    ) -> Dict[str, Any]:
+        """
+        Summarize repository files, most important first, setting file_data['summary'].
+
+        Summaries already produced for the same content by an earlier attempt
+        of the task are reused instead of requested again.
+
+        Args:
+            summarize: Summarizes a batch of files; returns, per file, its summary,
+                None to skip it, or the exception it failed with
+            pack: Groups the pending files (in priority order) into batches;
+                one file per batch by default
+
+        Returns:
+            Counts of created, resumed and failed summaries and of batches dispatched
+        """
+        progress_key = f"file_summary_progress:{repo_id}"
+        done = await self._load_progress(progress_key, task_logger)
+
+        stats = {'created': 0, 'resumed': 0, 'failed': 0}
+        pending = []
+        for file_data in files:
+            entry = done.get(file_data.get('path', ''))
+            if entry and entry.get('sha') == content_hash(file_data.get('content', '')) and entry.get('summary'):
+                file_data['summary'] = entry['summary']
+                stats['resumed'] += 1
+            else:
+                pending.append(file_data)
+        pending.sort(key=lambda file_data: summary_priority(file_data.get('path', '')))
+        batches = pack(pending) if pack else [[file_data] for file_data in pending]
+
+        stream = _SummaryStream(
+            repo_id, progress_key, self.stream_batch_size, self.stream_interval, self.progress_ttl, task_logger
+        )
+
+        async def summarize_and_stream(batch: List[Dict[str, Any]]) -> List[Union[Optional[str], Exception]]:
+            outcomes = await summarize(batch)
+            for file_data, outcome in zip(batch, outcomes):
+                if outcome and not isinstance(outcome, Exception):
+                    file_data['summary'] = outcome
+                    await stream.add(file_data['path'], content_hash(file_data.get('content', '')), outcome)
+            return outcomes
+
+        # Per-file failures are returned, not raised: a rate-limited file still halves the limit
+        results = await self.map(batches, summarize_and_stream, rate_limited=lambda outcomes: any(
+            isinstance(outcome, Exception) and is_rate_limit_error(outcome) for outcome in outcomes
+        ))
+        await stream.flush()
+
+        for batch, outcomes in zip(batches, results):
+            if isinstance(outcomes, Exception):
+                outcomes = [outcomes] * len(batch)
+            for file_data, outcome in zip(batch, outcomes):
+                if isinstance(outcome, Exception):
+                    stats['failed'] += 1
+                    task_logger.warning(
+                        f"Failed to create summary for {file_data.get('path', 'unknown')}: {str(outcome)}"
+                    )
+                elif outcome:
+                    stats['created'] += 1
+
+        return {
+            **stats,
+            'batches': len(batches),
+            'queued': stream.queued,
+            'concurrency': self.concurrency.get_stats()
+        }
+
+    async def _load_progress(self, progress_key: str, task_logger) -> Dict[str, Dict[str, str]]:
+        from services.redis_client import redis_client
+
+        try:
+            entries = await redis_client.hgetall(progress_key)
+        except Exception as e:
+            task_logger.debug(f"No summary progress available: {str(e)}")
+            return {}
+        progress = {}
+        for path, value in entries.items():
+            try:
+                progress[path] = json.loads(value)
+            except (TypeError, ValueError):
+                continue
+        if progress:
+            task_logger.info(f"Resuming file summaries: {len(progress)} already generated by an earlier attempt")
+        return progress
+
+
+# Global instance (its concurrency limit is shared by every repository being ingested)
+summarization_scheduler = SummarizationScheduler()
@@ -0,0 +1,124 @@
+"""
+Packing of many small summarization inputs into one LLM request.
+
+Most repository files are small, so a request per file spends most of its
+round trip (and rate-limit budget) on overhead. Items are grouped up to a
+prompt token budget; the model is asked for a JSON array with one summary
+per numbered item, and the response is validated before being split back
+into per-item summaries. Items the response does not cover cleanly are left
+for the caller to summarize individually.
+"""
+import json
+import re
+from typing import Any, Callable, Dict, List, Optional, Sequence, TypeVar
+
+from config.settings import get_settings
+from services.rate_limiter import estimate_tokens
+
+T = TypeVar('T')
+
+_FENCE_RE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+def pack_items(
+    items: Sequence[T],
+    text: Callable[[T], str],
+    max_tokens: Optional[int] = None,
+    max_items: Optional[int] = None,
+    item_max_tokens: Optional[int] = None
+) -> List[List[T]]:
+    """
+    Group items (keeping their order) into packs that fit one summarization prompt.
+
+    Items larger than item_max_tokens get a pack of their own.
+    """
+    settings = get_settings()
+    max_tokens = max_tokens or settings.summary_pack_max_tokens
+    max_items = max_items or settings.summary_pack_max_files
+    item_max_tokens = item_max_tokens or settings.summary_pack_file_max_tokens
+
+    packs: List[List[T]] = []
+    current: List[T] = []
+    current_tokens = 0
+    for item in items:
+        tokens = estimate_tokens(text(item))
+        oversized = tokens > item_max_tokens
+        if current and (oversized or current_tokens + tokens > max_tokens or len(current) >= max_items):
+            packs.append(current)
+            current, current_tokens = [], 0
+        if oversized:
+            packs.append([item])
+            continue
+        current.append(item)
+        current_tokens += tokens
+    if current:
+        packs.append(current)
+    return packs
+
+
+def format_packed_text(items: Sequence[Dict[str, str]]) -> str:
+    """Number each item's content ('name', 'text', 'context') so the response can refer back to it."""
+    blocks = []
+    for index, item in enumerate(items, start=1):
+        blocks.append(f"=== ITEM {index}: {item['name']} ({item.get('context', 'file')}) ===\n{item['text']}")
+    return "\n\n".join(blocks)
+
+
+def packed_output_instructions(count: int) -> str:
+    """Output section for a packed summary prompt."""
+    return f"""Summarize EACH of the {count} items above separately, in 2-4 sentences each.
+Respond with ONLY a JSON array of {count} objects, in item order, and no other text:
+[{{"id": 1, "name": "<item name>", "summary": "<summary>"}}, ...]
+"""
+
+
+def parse_packed_summaries(response: str, items: Sequence[Dict[str, str]]) -> Dict[int, str]:
+    """
+    Validate a packed response and split it into summaries by item index.
+
+    Entries with an unknown id, a name that does not match the item, an empty
+    summary or a duplicate id are dropped; an unparseable response yields {}.
+    """
+    if not response:
+        return {}
+    text = _FENCE_RE.sub("", response.strip())
+    start, end = text.find('['), text.rfind(']')
+    if start == -1 or end <= start:
+        return {}
+    try:
+        entries = json.loads(text[start:end + 1])
+    except ValueError:
+        return {}
+    if not isinstance(entries, list):
+        return {}
+
+    summaries: Dict[int, str] = {}
+    seen = set()
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        index = _entry_index(entry, len(items))
+        summary = entry.get('summary')
+        if index is None or not isinstance(summary, str) or not summary.strip():
+            continue
+        name = entry.get('name')
+        if name is not None and _normalize_name(name) != _normalize_name(items[index]['name']):
+            continue  # Guard against summaries attributed to the wrong file
+        if index in seen:
+            summaries.pop(index, None)  # Ambiguous: let the caller retry it alone
+            continue
+        seen.add(index)
+        summaries[index] = summary.strip()
+    return summaries
+
+
+def _normalize_name(name: Any) -> str:
+    return str(name).strip().lstrip('./')
+
+
+def _entry_index(entry: Dict[str, Any], count: int) -> Optional[int]:
+    try:
+        index = int(entry.get('id')) - 1
+    except (TypeError, ValueError):
+        return None
+    return index if 0 <= index < count else None
@@ -0,0 +1,207 @@
+"""
+Concurrent task dispatcher for the worker.
+
+Runs up to `max_concurrency` tasks at once, with optional per-type caps so a
+long `issue_fix` or `full_analysis` cannot starve interactive `answer_question`
+tasks. Tasks whose type is saturated wait in a small local FIFO buffer and are
+started as soon as a slot of their type frees up. A full buffer stops only
+batch work: while a global slot is free, interactive tasks are still accepted.
+"""
+import asyncio
+import time
+from collections import Counter, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, List, Optional
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+TaskHandler = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+def parse_type_limits(spec: Optional[str]) -> Dict[str, int]:
+    """Parse "issue_fix:1,full_analysis:1" into {'issue_fix': 1, 'full_analysis': 1}."""
+    limits: Dict[str, int] = {}
+    for part in (spec or "").split(','):
+        if ':' not in part:
+            continue
+        task_type, _, value = part.partition(':')
+        try:
+            limits[task_type.strip()] = max(1, int(value))
+        except ValueError:
+            logger.warning(f"Ignoring invalid task concurrency limit: {part.strip()}")
+    return limits
+
+
+class TaskDispatcher:
+    """Bounded, per-type limited concurrent task runner."""
+
+    def __init__(
+        self,
+        handler: TaskHandler,
+        max_concurrency: int,
+        type_limits: Optional[Dict[str, int]] = None,
+        max_pending: Optional[int] = None,
+        interactive_types: Optional[Iterable[str]] = None
+    ):
+        self.handler = handler
+        self.max_concurrency = max(1, max_concurrency)
+        self.type_limits = type_limits or {}
+        self.max_pending = max_pending if max_pending is not None else self.max_concurrency
+        self.interactive_types = set(interactive_types or ())
+
+        self._in_flight: Dict[asyncio.Task, str] = {}
+        self._in_flight_by_type: Counter = Counter()
+        self._pending: Deque[Dict[str, Any]] = deque()
+        self._changed = asyncio.Event()
+
+        # Last sampled length of the Redis queue (set by the worker)
+        self.queue_depth: Optional[int] = None
+        self.stats = {
+            'started': 0,
+            'completed': 0,
+            'failed': 0,
+            'deferred': 0
+        }
+
+    @staticmethod
+    def task_type(task_data: Dict[str, Any]) -> str:
+        return task_data.get("type", "unknown")
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._in_flight)
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def has_capacity(self) -> bool:
+        """Whether the worker should lease another task (of any type, or an interactive one)."""
+        return self.free_slots() > 0 or self.interactive_slots() > 0
+
+    def free_slots(self) -> int:
+        """How many more tasks of any type can be accepted right now."""
+        return max(0, min(self.max_concurrency - len(self._in_flight), self.max_pending - len(self._pending)))
+
+    def interactive_slots(self) -> int:
+        """
+        How many interactive tasks can be accepted, even when the buffer is full.
+
+        Buffered tasks are waiting on their type cap, not on a global slot, so
+        tasks deferred behind e.g. one running full_analysis must not keep an
+        answer_question waiting for that analysis to finish.
+        """
+        if not self.interactive_types:
+            return 0
+        waiting_interactive = sum(1 for t in self._pending if self.task_type(t) in self.interactive_types)
+        return max(0, self.max_concurrency - len(self._in_flight) - waiting_interactive)
+
+    async def wait_for_capacity(self, timeout: Optional[float] = None) -> bool:
+        """Wait until another task can be accepted. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.has_capacity():
+            self._changed.clear()
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                return False
+        return True
+
+    def submit(self, task_data: Dict[str, Any]) -> None:
+        """Start the task now if its type has a free slot, otherwise buffer it (FIFO)."""
+        self._pending.append(task_data)
+        self._start_pending()
+        if self._pending and self._pending[-1] is task_data:
+            self.stats['deferred'] += 1
+            logger.info(
+                f"⏸️ Deferred {self.task_type(task_data)} task (type at capacity)",
+                in_flight=dict(self._in_flight_by_type),
+                pending=len(self._pending)
+            )
+
+    def take_pending(self) -> List[Dict[str, Any]]:
+        """Remove and return buffered tasks that have not started (e.g. to requeue on shutdown)."""
+        pending = list(self._pending)
+        self._pending.clear()
+        self._changed.set()
+        return pending
+
+    async def drain(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for in-flight tasks (and buffered tasks they unblock) to finish.
+
+        Returns:
+            True if everything finished, False if the timeout expired
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._in_flight:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            await asyncio.wait(list(self._in_flight), timeout=remaining)
+        return not self._pending
+
+    async def cancel_all(self) -> int:
+        """Cancel every in-flight task and wait for the cancellations to settle."""
+        tasks = list(self._in_flight)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        return len(tasks)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Gauges and counters for monitoring."""
+        return {
+            **self.stats,
+            'in_flight': len(self._in_flight),
+            'in_flight_by_type': dict(+self._in_flight_by_type),
+            'pending': len(self._pending),
+            'queue_depth': self.queue_depth,
+            'max_concurrency': self.max_concurrency,
+            'type_limits': dict(self.type_limits)
+        }
+
+    def _can_start(self, task_type: str) -> bool:
+        if len(self._in_flight) >= self.max_concurrency:
+            return False
+        limit = self.type_limits.get(task_type)
+        return limit is None or self._in_flight_by_type[task_type] < limit
+
+    def _start_pending(self) -> None:
+        """Start buffered tasks in FIFO order, skipping types that are at their cap."""
+        waiting: Deque[Dict[str, Any]] = deque()
+        while self._pending:
+            task_data = self._pending.popleft()
+            if self._can_start(self.task_type(task_data)):
+                self._start(task_data)
+            else:
+                waiting.append(task_data)
+        self._pending = waiting
+
+    def _start(self, task_data: Dict[str, Any]) -> None:
+        task_type = self.task_type(task_data)
+        task = asyncio.create_task(self._run(task_data))
+        self._in_flight[task] = task_type
+        self._in_flight_by_type[task_type] += 1
+        self.stats['started'] += 1
+        task.add_done_callback(self._on_done)
+
+    async def _run(self, task_data: Dict[str, Any]) -> None:
+        try:
+            await self.handler(task_data)
+            self.stats['completed'] += 1
+        except Exception:
+            # The handler reports task failures itself
+            self.stats['failed'] += 1
+
+    def _on_done(self, task: asyncio.Task) -> None:
+        task_type = self._in_flight.pop(task, None)
+        if task_type is not None:
+            self._in_flight_by_type[task_type] -= 1
+        self._start_pending()
+        self._changed.set()
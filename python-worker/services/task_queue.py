@@ -0,0 +1,344 @@
+"""
+Reliable task queue on Redis lists.
+
+Producers (node-worker, frontend, RedisClient.push_task) keep LPUSHing the same
+JSON payloads onto `queue_name`. The worker side adds:
+
+- Priority lanes: fetched jobs are triaged by `type` into an interactive and a
+  batch lane; interactive jobs are always served first.
+- Leases: triaged jobs are wrapped in an envelope with a unique lease id;
+  every fetched job is recorded (by lease id) in an in-flight ZSET scored by
+  its lease deadline and must be acknowledged. Jobs whose lease expires (worker
+  crash, OOM kill) are redelivered, like a visibility timeout.
+- Dead-lettering: a job delivered `max_attempts` times (or that is not a JSON
+  object with a `type`) is moved to `<queue>:dead` instead of being retried forever.
+- Multi-fetch: one Lua round trip triages, reclaims expired leases and leases
+  up to N jobs.
+
+Blocking waits use BLMOVE from the intake list into a holding list, so a job is
+never only in client memory between Redis and the worker.
+"""
+import json
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.settings import get_settings
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# KEYS: intake, triage, interactive lane, batch lane, in-flight zset, attempts hash, dead list,
+#       leased envelopes hash, lease id counter
+# ARGV: now, visibility timeout, max fetch, max attempts, triage limit, interactive only (0/1),
+#       interactive types...
+_FETCH_SCRIPT = """
+local now = tonumber(ARGV[1])
+local visibility = tonumber(ARGV[2])
+local max_fetch = tonumber(ARGV[3])
+local max_attempts = tonumber(ARGV[4])
+local triage_limit = tonumber(ARGV[5])
+local interactive_only = ARGV[6] == '1'
+local interactive = {}
+for i = 7, #ARGV do interactive[ARGV[i]] = true end
+
+local function lane_for(raw)
+  local ok, job = pcall(cjson.decode, raw)
+  -- Only JSON objects with a type are jobs (arrays also decode to tables)
+  if not ok or type(job) ~= 'table' or type(job['type']) ~= 'string' then
+    return nil
+  end
+  if interactive[job['type']] then
+    return KEYS[3]
+  end
+  return KEYS[4]
+end
+
+-- Envelopes give every delivery of a payload its own lease id, so identical
+-- payloads in flight never share a lease or an attempt counter
+local function wrap(raw)
+  local id = tostring(redis.call('INCR', KEYS[9]))
+  return id, cjson.encode({lease_id = id, job = raw})
+end
+
+local function unwrap(item)
+  local ok, envelope = pcall(cjson.decode, item)
+  if ok and type(envelope) == 'table' and envelope['lease_id'] and type(envelope['job']) == 'string' then
+    return tostring(envelope['lease_id']), item, envelope['job']
+  end
+  -- Queued before envelopes existed
+  local id, wrapped = wrap(item)
+  return id, wrapped, item
+end
+
+local dead = 0
+local function triage(key)
+  local moved = 0
+  while moved < triage_limit do
+    local raw = redis.call('RPOP', key)
+    if not raw then break end
+    local lane = lane_for(raw)
+    if lane then
+      local _, envelope = wrap(raw)
+      redis.call('LPUSH', lane, envelope)
+    else
+      redis.call('LPUSH', KEYS[7], raw)
+      dead = dead + 1
+    end
+    moved = moved + 1
+  end
+end
+triage(KEYS[2])
+triage(KEYS[1])
+
+-- Redeliver (or dead-letter) jobs whose lease expired
+local reclaimed = 0
+local expired = redis.call('ZRANGEBYSCORE', KEYS[5], '-inf', now, 'LIMIT', 0, 100)
+for _, member in ipairs(expired) do
+  redis.call('ZREM', KEYS[5], member)
+  local attempts = tonumber(redis.call('HGET', KEYS[6], member) or '0')
+  local envelope = redis.call('HGET', KEYS[8], member)
+  local raw = member  -- Leased before envelopes existed: the member is the payload itself
+  if envelope then
+    local _, _, job = unwrap(envelope)
+    raw = job
+  end
+  redis.call('HDEL', KEYS[6], member)
+  redis.call('HDEL', KEYS[8], member)
+  if attempts >= max_attempts then
+    redis.call('LPUSH', KEYS[7], raw)
+    dead = dead + 1
+  else
+    -- A fresh lease id, so a late ack from the stalled worker cannot end the new delivery's lease
+    local id, wrapped = wrap(raw)
+    redis.call('HSET', KEYS[6], id, attempts)
+    -- Front of its lane (lanes are consumed with RPOP)
+    redis.call('RPUSH', lane_for(raw) or KEYS[4], wrapped)
+    reclaimed = reclaimed + 1
+  end
+end
+
+local jobs = {}
+local lanes = {KEYS[3], KEYS[4]}
+if interactive_only then lanes = {KEYS[3]} end
+for _, lane in ipairs(lanes) do
+  while #jobs < max_fetch * 2 do
+    local item = redis.call('RPOP', lane)
+    if not item then break end
+    local id, envelope = unwrap(item)
+    redis.call('ZADD', KEYS[5], now + visibility, id)
+    redis.call('HSET', KEYS[8], id, envelope)
+    local attempts = redis.call('HINCRBY', KEYS[6], id, 1)
+    table.insert(jobs, envelope)
+    table.insert(jobs, attempts)
+  end
+end
+
+return {jobs, reclaimed, dead}
+"""
+
+
+@dataclass
+class QueuedTask:
+    """A leased job: the decoded payload plus the lease id and envelope that identify it in Redis."""
+    task_data: Dict[str, Any]
+    receipt: str
+    attempts: int
+    lane: str
+    envelope: str
+
+
+class ReliableTaskQueue:
+    """Lane-prioritised, leased, dead-lettering consumer for the task queue."""
+
+    def __init__(self, queue_name: Optional[str] = None):
+        settings = get_settings()
+        self.queue_name = queue_name or settings.queue_name
+        self.interactive_types = [
+            t.strip() for t in settings.interactive_task_types.split(',') if t.strip()
+        ]
+        self.visibility_timeout = settings.queue_visibility_timeout
+        self.max_attempts = settings.queue_max_attempts
+        self.triage_limit = 100
+
+        self.intake_key = self.queue_name
+        self.triage_key = f"{self.queue_name}:triage"
+        self.interactive_key = f"{self.queue_name}:lane:interactive"
+        self.batch_key = f"{self.queue_name}:lane:batch"
+        self.inflight_key = f"{self.queue_name}:inflight"
+        self.attempts_key = f"{self.queue_name}:attempts"
+        self.dead_key = f"{self.queue_name}:dead"
+        self.leased_key = f"{self.queue_name}:leased"
+        self.lease_seq_key = f"{self.queue_name}:lease_seq"
+
+        self._fetch_script = None
+        self._blmove_supported = True
+        self.stats = {
+            'fetched': 0,
+            'acked': 0,
+            'released': 0,
+            'reclaimed': 0,
+            'dead_lettered': 0
+        }
+
+    @property
+    def redis(self):
+        from services.redis_client import redis_client
+        if not redis_client.redis:
+            raise RuntimeError("Redis client not connected")
+        return redis_client.redis
+
+    def _lane_for(self, task_data: Dict[str, Any]) -> str:
+        return self.interactive_key if task_data.get("type") in self.interactive_types else self.batch_key
+
+    async def fetch(self, max_tasks: int, interactive_only: bool = False) -> List[QueuedTask]:
+        """
+        Lease up to max_tasks jobs (interactive lane first) in one round trip.
+
+        Also triages newly pushed jobs into lanes and redelivers expired leases.
+        With interactive_only, the batch lane is left untouched.
+        """
+        if max_tasks <= 0:
+            return []
+        if self._fetch_script is None:
+            self._fetch_script = self.redis.register_script(_FETCH_SCRIPT)
+
+        jobs, reclaimed, dead = await self._fetch_script(
+            keys=[
+                self.intake_key, self.triage_key, self.interactive_key, self.batch_key,
+                self.inflight_key, self.attempts_key, self.dead_key, self.leased_key, self.lease_seq_key
+            ],
+            args=[
+                time.time(), self.visibility_timeout, max_tasks, self.max_attempts,
+                self.triage_limit, 1 if interactive_only else 0, *self.interactive_types
+            ]
+        )
+
+        if reclaimed:
+            self.stats['reclaimed'] += int(reclaimed)
+            logger.warning(f"♻️ Redelivering {reclaimed} tasks whose lease expired")
+        if dead:
+            self.stats['dead_lettered'] += int(dead)
+            logger.error(f"☠️ Moved {dead} tasks to dead-letter queue {self.dead_key}")
+
+        leased = []
+        malformed = []
+        for envelope, attempts in zip(jobs[::2], jobs[1::2]):
+            try:
+                wrapped = json.loads(envelope)
+                task_data = json.loads(wrapped["job"])
+                if not isinstance(task_data, dict):
+                    raise ValueError("job is not a JSON object")
+            except (TypeError, ValueError, KeyError) as e:
+                malformed.append((envelope, e))
+                continue
+            leased.append(QueuedTask(
+                task_data=task_data,
+                receipt=str(wrapped["lease_id"]),
+                attempts=int(attempts),
+                lane='interactive' if task_data.get("type") in self.interactive_types else 'batch',
+                envelope=envelope
+            ))
+        if malformed:
+            await self._dead_letter(malformed)
+
+        if leased:
+            self.stats['fetched'] += len(leased)
+            logger.info(
+                f"Leased {len(leased)} tasks from queue",
+                task_types=[t.task_data.get("type") for t in leased]
+            )
+        return leased
+
+    async def _dead_letter(self, malformed: List[Tuple[str, Exception]]) -> None:
+        """Move leased items that cannot be decoded into jobs to the dead-letter list."""
+        pipe = self.redis.pipeline(transaction=True)
+        for envelope, error in malformed:
+            try:
+                wrapped = json.loads(envelope)
+                receipt, raw = str(wrapped["lease_id"]), wrapped["job"]
+            except (TypeError, ValueError, KeyError):
+                receipt, raw = envelope, envelope
+            pipe.zrem(self.inflight_key, receipt)
+            pipe.hdel(self.attempts_key, receipt)
+            pipe.hdel(self.leased_key, receipt)
+            pipe.lpush(self.dead_key, raw)
+            logger.error(f"☠️ Moved undecodable task to dead-letter queue {self.dead_key}: {str(error)}")
+        await pipe.execute()
+        self.stats['dead_lettered'] += len(malformed)
+
+    async def wait_for_tasks(self, timeout: int) -> bool:
+        """
+        Block until a job is pushed (or timeout). The job is moved to the
+        holding list and triaged by the next fetch().
+        """
+        if self._blmove_supported:
+            try:
+                moved = await self.redis.blmove(self.intake_key, self.triage_key, timeout, "RIGHT", "LEFT")
+                return moved is not None
+            except Exception as e:
+                if "unknown command" not in str(e).lower():
+                    raise
+                # Redis < 6.2
+                self._blmove_supported = False
+        moved = await self.redis.brpoplpush(self.intake_key, self.triage_key, timeout)
+        return moved is not None
+
+    async def ack(self, task: QueuedTask) -> None:
+        """Acknowledge a finished (completed or failed) job."""
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.zrem(self.inflight_key, task.receipt)
+        pipe.hdel(self.attempts_key, task.receipt)
+        pipe.hdel(self.leased_key, task.receipt)
+        await pipe.execute()
+        self.stats['acked'] += 1
+
+    async def release(self, task: QueuedTask, keep_attempt: bool = False) -> None:
+        """
+        Return a job to the front of its lane.
+
+        Unstarted jobs don't count as a delivery; interrupted ones keep the
+        attempt (keep_attempt=True) so a job that never finishes is eventually dead-lettered.
+        """
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.zrem(self.inflight_key, task.receipt)
+        pipe.hdel(self.leased_key, task.receipt)
+        if not keep_attempt:
+            pipe.hincrby(self.attempts_key, task.receipt, -1)
+        pipe.rpush(self._lane_for(task.task_data), task.envelope)
+        await pipe.execute()
+        self.stats['released'] += 1
+
+    async def extend_leases(self, tasks: List[QueuedTask]) -> None:
+        """Push the lease deadline of long-running jobs forward (heartbeat)."""
+        if not tasks:
+            return
+        deadline = time.time() + self.visibility_timeout
+        await self.redis.zadd(self.inflight_key, {t.receipt: deadline for t in tasks}, xx=True)
+
+    async def get_depths(self) -> Dict[str, int]:
+        """Queue depth gauges per list."""
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.llen(self.intake_key)
+        pipe.llen(self.triage_key)
+        pipe.llen(self.interactive_key)
+        pipe.llen(self.batch_key)
+        pipe.zcard(self.inflight_key)
+        pipe.llen(self.dead_key)
+        intake, triage, interactive, batch, inflight, dead = await pipe.execute()
+        return {
+            'untriaged': intake + triage,
+            'interactive': interactive,
+            'batch': batch,
+            'leased': inflight,
+            'dead': dead,
+            'total_waiting': intake + triage + interactive + batch
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Consumer counters."""
+        return dict(self.stats)
+
+
+# Global instance
+task_queue = ReliableTaskQueue()
@@ -14,8 +14,7 @@ Fallback: GitHub Models (Azure AI)
 
 ADAPTIVE FEATURES:
 ✅ Automatic model cascade (retry on rate limits)
-✅ Exponential backoff (1.5x delay increase per rate limit, max 10x)
-✅ Request smoothing (200ms base interval between calls)
+✅ Shared asyncio rate limiter (per-key and per-IP RPM/TPM budgets, FIFO waiters)
 ✅ Per-issue quota isolation (quotaUser parameter)
 ✅ IP-level cooldown tracking (Gemini shares limits across keys)
 
@@ -52,7 +51,13 @@ PHASE ROUTING:
 import os
 import asyncio
 import time
-from typing import Optional, List, Literal
+from typing import Callable, Optional, List, Literal, Tuple
+from config.settings import get_settings
+from services.quota_coordinator import HealthTracker, quota_coordinator
+from services.llm_response_cache import llm_response_cache
+from services.rate_limiter import (
+    RateLimitTimeout, estimate_tokens, gemini_rate_limiter, github_models_rate_limiter, key_id
+)
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -67,9 +72,21 @@ TaskType = Literal[
     'pr_metadata',       # Use mini
     'meeting',           # Use mini
     'summary',           # Use mini
+    'categorization',    # Use mini
     'general'            # Use mini (default)
 ]
 
+# Phases that prefer GPT-4.1 over GPT-4.1-mini when Gemini is unavailable
+QUALITY_TASK_TYPES = ('generation', 'refinement')
+
+# Model routes (part of response cache keys): Gemini cascade, then GitHub Models by phase
+QUALITY_ROUTE = "gemini-2.5-flash-lite>gpt-4.1>gpt-4.1-mini"
+SPEED_ROUTE = "gemini-2.5-flash-lite>gpt-4.1-mini>gpt-4.1"
+
+# Embedding cache model keys, one per provider model (their vectors never mix)
+GITHUB_EMBEDDING_CACHE_MODEL = "github/text-embedding-3-small@768"
+GEMINI_EMBEDDING_CACHE_MODEL = "gemini/text-embedding-004/RETRIEVAL_DOCUMENT"
+
 # Global API call tracking
 API_CALL_STATS = {
     'grok_3_mini': 0,
@@ -102,26 +119,23 @@ class UnifiedAIClient:
         self.github_tokens = []
         self.grok_mini_idx = 0
         self.grok_full_idx = 0
-        self.github_timestamps = []  # Shared rate limit tracking
         
         # Gemini (Emergency fallback)
         self.gemini_keys = []
         self.gemini_idx = 0
-        self.gemini_cooldowns = {}
-        self.gemini_ip_cooldown = 0
         
-        # Adaptive request smoothing based on model RPM limits
-        self.last_gemini_request_time = 0
-        self.min_request_interval = 0.2  # Base 200ms between requests
+        # Pacing and cooldowns live in the shared limiters (services.rate_limiter)
         self.consecutive_rate_limits = 0  # Track consecutive rate limit errors
-        self.adaptive_delay_multiplier = 1.0  # Increases with rate limits
         
         # quotaUser context tracking
         self.current_quota_user = None  # Will be set by meta_controller
         
         # Client
         self.http_client = None
-        self.tier_failures = {1: 0, 2: 0, 3: 0}  # mini, full, gemini
+        # Consecutive failures per tier ("1" mini, "2" full, "3" gemini), shared by every process
+        self.tier_failures = HealthTracker(
+            "unified_ai_tiers", get_settings().llm_tier_failure_reset, coordinator=quota_coordinator
+        )
         
     def _ensure_initialized(self):
         if self._initialized:
@@ -146,7 +160,7 @@ class UnifiedAIClient:
         logger.info("   ├─ CASCADE: gemini-2.5-flash (" + str(len(self.gemini_keys)) + " keys, 5 RPM/key) → gemma-3-4b (30 RPM/key)")
         logger.info("   ├─ FALLBACK: GPT-4.1 (" + str(len(self.github_tokens)) + " tokens) = " + str(len(self.github_tokens) * 15) + " rpm")
         logger.info("   ├─ FALLBACK: GPT-4.1-mini (" + str(len(self.github_tokens)) + " tokens) = " + str(len(self.github_tokens) * 15) + " rpm")
-        logger.info("   └─ FEATURES: Adaptive throttling, model cascade, exponential backoff")
+        logger.info("   └─ FEATURES: Shared rate limiter, model cascade, quotaUser isolation")
     
     def log_api_stats(self):
         """Log comprehensive API usage statistics"""
@@ -172,82 +186,106 @@ class UnifiedAIClient:
         temperature: float = 0.7, 
         prefer_reasoning: bool = False,
         task_type: TaskType = 'general',
-        quota_user: Optional[str] = None  # NEW: For Gemini quotaUser attribution
+        quota_user: Optional[str] = None,  # NEW: For Gemini quotaUser attribution
+        cache_validator: Optional[Callable[[str], bool]] = None
     ) -> str:
-        """Generate content with phase-aware model selection."""
+        """
+        Generate content with phase-aware model selection (deterministic prompts are cached).
+
+        With cache_validator, a response is only cached (or served from the
+        cache) when the validator accepts it, so a malformed response is
+        regenerated instead of replayed.
+        """
         self._ensure_initialized()
         
         # Store quota_user for Gemini calls
         if quota_user:
             self.current_quota_user = quota_user
         
+        cacheable = llm_response_cache.is_cacheable(temperature, task_type)
+        route = QUALITY_ROUTE if task_type in QUALITY_TASK_TYPES else SPEED_ROUTE
+        if cacheable:
+            cached = await llm_response_cache.get(route, prompt, temperature, max_tokens)
+            if cached is not None and (cache_validator is None or cache_validator(cached)):
+                logger.debug(f"💾 Cached response for {task_type}: {len(cached)} chars")
+                return cached
+        
+        started = time.monotonic()
+        result = await self._generate_uncached(prompt, max_tokens, temperature, task_type)
+        if cacheable and (cache_validator is None or cache_validator(result)):
+            await llm_response_cache.put(route, prompt, temperature, max_tokens, result, time.monotonic() - started)
+        return result
+    
+    async def _generate_uncached(self, prompt: str, max_tokens: int, temperature: float, task_type: TaskType) -> str:
+        """Try Gemini, then the GitHub Models pair ordered for the task's phase."""
         errors = []
+        await quota_coordinator.sync()  # Other processes' tier failures and cooldowns
         
         # PRIMARY: Try Gemini first (with quotaUser for quota isolation)
-        if self.tier_failures[3] < 5:  # Allow more failures for primary
+        if self.tier_failures.failures("3") < 5:  # Allow more failures for primary
             try:
                 logger.debug(f"🟢 PRIMARY: Trying Gemini for {task_type}")
                 result = await self._try_gemini(prompt, max_tokens, temperature, quota_user=self.current_quota_user)
                 if result:
-                    self.tier_failures[3] = 0
+                    self.tier_failures.reset("3")
                     return result
             except Exception as e:
                 errors.append(f"Gemini: {str(e)}")
-                self.tier_failures[3] += 1
+                self.tier_failures.record_failure("3")
                 logger.warning(f"❌ Gemini failed: {str(e)[:100]}")
         
         # FALLBACK: Try GitHub models based on task type
-        use_grok_full = task_type in ['generation', 'refinement']
+        use_grok_full = task_type in QUALITY_TASK_TYPES
         
         if use_grok_full:
             # Quality-critical: Try GPT-4.1 → GPT-4.1-mini as fallback
             logger.debug(f"🎯 FALLBACK: Quality path for {task_type}: GPT-4.1 → GPT-4.1-mini")
             
-            if self.tier_failures[2] < 3:
+            if self.tier_failures.failures("2") < 3:
                 try:
                     result = await self._try_gpt41_full(prompt, max_tokens, temperature)
                     if result:
-                        self.tier_failures[2] = 0
+                        self.tier_failures.reset("2")
                         return result
                 except Exception as e:
                     errors.append(f"GPT-4.1: {str(e)}")
-                    self.tier_failures[2] += 1
+                    self.tier_failures.record_failure("2")
                     logger.warning(f"❌ GPT-4.1 failed: {str(e)[:100]}")
             
-            if self.tier_failures[1] < 3:
+            if self.tier_failures.failures("1") < 3:
                 try:
                     result = await self._try_gpt41_mini(prompt, max_tokens, temperature)
                     if result:
-                        self.tier_failures[1] = 0
+                        self.tier_failures.reset("1")
                         return result
                 except Exception as e:
                     errors.append(f"GPT-4.1-mini: {str(e)}")
-                    self.tier_failures[1] += 1
+                    self.tier_failures.record_failure("1")
                     logger.warning(f"❌ GPT-4.1-mini failed: {str(e)[:100]}")
         else:
             # Speed-optimized: Try GPT-4.1-mini → GPT-4.1 as fallback
             logger.debug(f"⚡ FALLBACK: Speed path for {task_type}: GPT-4.1-mini → GPT-4.1")
             
-            if self.tier_failures[1] < 3:
+            if self.tier_failures.failures("1") < 3:
                 try:
                     result = await self._try_gpt41_mini(prompt, max_tokens, temperature)
                     if result:
-                        self.tier_failures[1] = 0
+                        self.tier_failures.reset("1")
                         return result
                 except Exception as e:
                     errors.append(f"GPT-4.1-mini: {str(e)}")
-                    self.tier_failures[1] += 1
+                    self.tier_failures.record_failure("1")
                     logger.warning(f"❌ GPT-4.1-mini failed: {str(e)[:100]}")
             
-            if self.tier_failures[2] < 3:
+            if self.tier_failures.failures("2") < 3:
                 try:
                     result = await self._try_gpt41_full(prompt, max_tokens, temperature)
                     if result:
-                        self.tier_failures[2] = 0
+                        self.tier_failures.reset("2")
                         return result
                 except Exception as e:
                     errors.append(f"GPT-4.1: {str(e)}")
-                    self.tier_failures[2] += 1
+                    self.tier_failures.record_failure("2")
                     logger.warning(f"❌ GPT-4.1 failed: {str(e)[:100]}")
         
         # All tiers failed
@@ -265,8 +303,12 @@ class UnifiedAIClient:
             token_idx = (self.grok_mini_idx + attempt) % len(self.github_tokens)
             token = self.github_tokens[token_idx]
             
+            if not github_models_rate_limiter.is_available(key_id(token)):
+                logger.debug(f"Token {token_idx + 1} cooling down, trying next")
+                continue
+            
             try:
-                await self._rate_limit_github()
+                await self._rate_limit_github(token, estimate_tokens(prompt, min(max_tokens, 4000)))
                 
                 response = await self.http_client.post(
                     "https://models.inference.ai.azure.com/chat/completions",
@@ -289,6 +331,7 @@ class UnifiedAIClient:
                     return text
                 
                 elif response.status_code == 429:
+                    self._cooldown_github_token(token, response)
                     logger.debug(f"Token {token_idx + 1} rate limited, trying next")
                     continue
                 
@@ -313,8 +356,12 @@ class UnifiedAIClient:
             token_idx = (self.grok_full_idx + attempt) % len(self.github_tokens)
             token = self.github_tokens[token_idx]
             
+            if not github_models_rate_limiter.is_available(key_id(token)):
+                logger.debug(f"Token {token_idx + 1} cooling down, trying next")
+                continue
+            
             try:
-                await self._rate_limit_github()
+                await self._rate_limit_github(token, estimate_tokens(prompt, min(max_tokens, 4000)))
                 
                 response = await self.http_client.post(
                     "https://models.inference.ai.azure.com/chat/completions",
@@ -337,6 +384,7 @@ class UnifiedAIClient:
                     return text
                 
                 elif response.status_code == 429:
+                    self._cooldown_github_token(token, response)
                     logger.debug(f"Token {token_idx + 1} rate limited, trying next")
                     continue
                 
@@ -350,17 +398,19 @@ class UnifiedAIClient:
         
         return None
     
-    async def _rate_limit_github(self):
-        """100 calls/min rate limit."""
-        now = time.time()
-        self.github_timestamps = [t for t in self.github_timestamps if now - t < 60]
-        
-        if len(self.github_timestamps) >= 100:
-            wait = 60 - (now - self.github_timestamps[0])
-            if wait > 0:
-                await asyncio.sleep(wait)
-        
-        self.github_timestamps.append(now)
+    async def _rate_limit_github(self, token: str, tokens: int = 0):
+        """Wait for the token's RPM budget and the shared GitHub Models budget (100 calls/min)."""
+        await github_models_rate_limiter.acquire(
+            key_id(token), tokens, max_wait=get_settings().llm_rate_limit_max_wait
+        )
+    
+    def _cooldown_github_token(self, token: str, response) -> None:
+        """Keep a rate-limited token out of rotation until its Retry-After (default 60s) passes."""
+        try:
+            retry_after = float(response.headers.get("retry-after", 60))
+        except (TypeError, ValueError):
+            retry_after = 60.0
+        github_models_rate_limiter.cooldown(retry_after, key=key_id(token))
     
     async def _try_gemini(self, prompt: str, max_tokens: int, temperature: float, quota_user: Optional[str] = None) -> Optional[str]:
         """
@@ -370,27 +420,14 @@ class UnifiedAIClient:
         if not self.gemini_keys:
             return None
         
-        # ADAPTIVE REQUEST SMOOTHING: Exponential backoff after rate limits
-        now = time.time()
-        
-        # Calculate adaptive delay (increases after rate limits, decreases on success)
-        adaptive_interval = self.min_request_interval * self.adaptive_delay_multiplier
-        
-        time_since_last = now - self.last_gemini_request_time
-        if time_since_last < adaptive_interval:
-            wait_time = adaptive_interval - time_since_last
-            if self.adaptive_delay_multiplier > 1.0:
-                logger.info(f"⏱️ Adaptive throttling: waiting {wait_time*1000:.0f}ms (multiplier: {self.adaptive_delay_multiplier:.1f}x)")
-            else:
-                logger.debug(f"⏱️ Request smoothing: waiting {wait_time*1000:.0f}ms")
-            await asyncio.sleep(wait_time)
+        settings = get_settings()
         
         # CRITICAL FIX: Check IP-level cooldown FIRST (affects ALL keys)
-        if time.time() < self.gemini_ip_cooldown:
-            remaining = self.gemini_ip_cooldown - time.time()
+        remaining = gemini_rate_limiter.cooldown_remaining()
+        if remaining > 0:
             logger.warning(
                 f"⏸️ Gemini IP rate limited - ALL {len(self.gemini_keys)} keys on cooldown "
-                f"for {remaining:.1f}s more (until {time.strftime('%H:%M:%S', time.localtime(self.gemini_ip_cooldown))})"
+                f"for {remaining:.1f}s more (until {time.strftime('%H:%M:%S', time.localtime(time.time() + remaining))})"
             )
             return None
         
@@ -410,12 +447,22 @@ class UnifiedAIClient:
         for attempt in range(len(self.gemini_keys)):
             key_idx = (starting_key_idx + attempt) % len(self.gemini_keys)
             
-            # Check cooldown
-            if time.time() < self.gemini_cooldowns.get(key_idx, 0):
-                logger.debug(f"⏭️ Skipping key {key_idx + 1} (cooldown: {self.gemini_cooldowns[key_idx] - time.time():.1f}s remaining)")
+            api_key = self.gemini_keys[key_idx]
+            
+            # Check cooldown (shared with GeminiClient's key manager)
+            key_cooldown = gemini_rate_limiter.cooldown_remaining(key_id(api_key))
+            if key_cooldown > 0:
+                logger.debug(f"⏭️ Skipping key {key_idx + 1} (cooldown: {key_cooldown:.1f}s remaining)")
                 continue
             
-            api_key = self.gemini_keys[key_idx]
+            # Wait (without blocking the loop) for this key's and the IP's budget
+            try:
+                await gemini_rate_limiter.acquire(
+                    key_id(api_key), estimate_tokens(prompt, max_tokens), max_wait=settings.llm_rate_limit_max_wait
+                )
+            except RateLimitTimeout as e:
+                logger.debug(f"⏭️ Skipping key {key_idx + 1} ({e})")
+                continue
             
             # Update quotaUser for current key
             if quota_user:
@@ -459,9 +506,6 @@ class UnifiedAIClient:
                     }
                 }
                 
-                # Update last request time (for smoothing)
-                self.last_gemini_request_time = time.time()
-                
                 # Try models in cascade until one succeeds
                 last_error = None
                 for model_idx, (model_name, rpm_limit) in enumerate(models_to_try):
@@ -520,11 +564,10 @@ class UnifiedAIClient:
                             API_CALL_STATS['gemini_2_0_flash'] += 1
                             API_CALL_STATS['total_calls'] += 1
                             
-                            # SUCCESS: Reset adaptive throttling
+                            # SUCCESS: Reset rate limit streak
                             if self.consecutive_rate_limits > 0:
-                                logger.info(f"✅ Rate limits cleared, resetting adaptive delay (was {self.adaptive_delay_multiplier:.1f}x)")
+                                logger.info(f"✅ Rate limits cleared after {self.consecutive_rate_limits} consecutive hits")
                             self.consecutive_rate_limits = 0
-                            self.adaptive_delay_multiplier = 1.0
                             
                             quota_info = f" [quotaUser={quota_user_param}]" if quota_user_param else ""
                             logger.info(f"✅ Gemini key {key_idx + 1}: {len(text)} chars{quota_info} (next: key {self.gemini_idx + 1})")
@@ -535,18 +578,16 @@ class UnifiedAIClient:
             
             except httpx.HTTPStatusError as e:
                 if e.response.status_code == 429 or "quota" in str(e).lower() or "resource_exhausted" in str(e).lower():
-                    # ADAPTIVE THROTTLING: Increase delay exponentially
                     self.consecutive_rate_limits += 1
-                    self.adaptive_delay_multiplier = min(10.0, self.adaptive_delay_multiplier * 1.5)
-                    logger.warning(f"⚠️ Rate limit #{self.consecutive_rate_limits}, increasing delay to {self.adaptive_delay_multiplier:.1f}x")
+                    logger.warning(f"⚠️ Rate limit #{self.consecutive_rate_limits}")
                     
                     # CRITICAL: Gemini uses IP-based rate limiting, not per-key
                     # When ANY key hits limit, ALL keys from same IP are rate limited
-                    cooldown_until = time.time() + 180  # 3 minutes to be safe
-                    self.gemini_ip_cooldown = cooldown_until  # ← Affects ALL keys
+                    cooldown = settings.gemini_rate_limit_cooldown
+                    gemini_rate_limiter.cooldown(cooldown)  # ← Affects ALL keys (and GeminiClient)
                     logger.error(
                         f"🚫 Gemini IP RATE LIMITED (HTTP {e.response.status_code}) - ALL {len(self.gemini_keys)} keys affected! "
-                        f"Cooldown for 180s (until {time.strftime('%H:%M:%S', time.localtime(cooldown_until))}). "
+                        f"Cooldown for {cooldown}s (until {time.strftime('%H:%M:%S', time.localtime(time.time() + cooldown))}). "
                         f"⚠️ Gemini has IP-based rate limits varying by model (10-30 req/min shared across all keys)."
                     )
                     # Don't try other keys - they're all rate limited too
@@ -556,15 +597,13 @@ class UnifiedAIClient:
             
             except Exception as e:
                 if "429" in str(e) or "quota" in str(e).lower() or "resource_exhausted" in str(e).lower():
-                    # ADAPTIVE THROTTLING
                     self.consecutive_rate_limits += 1
-                    self.adaptive_delay_multiplier = min(10.0, self.adaptive_delay_multiplier * 1.5)
                     
-                    cooldown_until = time.time() + 180
-                    self.gemini_ip_cooldown = cooldown_until
+                    cooldown = settings.gemini_rate_limit_cooldown
+                    gemini_rate_limiter.cooldown(cooldown)
                     logger.error(
                         f"🚫 Gemini IP RATE LIMITED - ALL {len(self.gemini_keys)} keys affected! "
-                        f"Cooldown for 180s (until {time.strftime('%H:%M:%S', time.localtime(cooldown_until))}). "
+                        f"Cooldown for {cooldown}s (until {time.strftime('%H:%M:%S', time.localtime(time.time() + cooldown))}). "
                         f"⚠️ Gemini has IP-based rate limits varying by model (10-30 req/min shared across all keys)."
                     )
                     return None
@@ -574,11 +613,16 @@ class UnifiedAIClient:
         return None
     
     async def generate_embedding(self, text: str) -> List[float]:
-        """GitHub embeddings with Gemini fallback."""
+        """GitHub embeddings with Gemini fallback (cached per provider model)."""
+        from services.embedding_cache import embedding_cache
         self._ensure_initialized()
+        original_text = text
         
         # Try GitHub
         if self.github_tokens and self.http_client:
+            cached = await embedding_cache.get(GITHUB_EMBEDDING_CACHE_MODEL, original_text)
+            if cached is not None:
+                return cached
             try:
                 token = self.github_tokens[self.github_idx % len(self.github_tokens)]
                 
@@ -593,18 +637,24 @@ class UnifiedAIClient:
                 )
                 
                 if response.status_code == 200:
-                    return response.json()["data"][0]["embedding"]
+                    embedding = response.json()["data"][0]["embedding"]
+                    await embedding_cache.put(GITHUB_EMBEDDING_CACHE_MODEL, original_text, embedding)
+                    return embedding
             
             except Exception as e:
                 logger.debug(f"GitHub embedding failed: {str(e)[:50]}")
         
         # Fallback to Gemini REST API
         if self.gemini_keys and self.http_client:
+            cached = await embedding_cache.get(GEMINI_EMBEDDING_CACHE_MODEL, original_text)
+            if cached is not None:
+                return cached
             api_key = self.gemini_keys[0]
             if len(text) > 8000:
                 text = text[:8000]
             
             try:
+                await gemini_rate_limiter.acquire(key_id(api_key), estimate_tokens(text), scope="embed")
                 base_url = "https://generativelanguage.googleapis.com/v1beta/models/text-embedding-004:embedContent"
                 params = {"key": api_key}
                 headers = {"Content-Type": "application/json"}
@@ -617,13 +667,101 @@ class UnifiedAIClient:
                 response = await self.http_client.post(base_url, params=params, headers=headers, json=data, timeout=30.0)
                 response.raise_for_status()
                 result = response.json()
-                return result['embedding']['values']
+                embedding = result['embedding']['values']
+                await embedding_cache.put(GEMINI_EMBEDDING_CACHE_MODEL, original_text, embedding)
+                return embedding
             except Exception as e:
                 logger.error(f"Gemini embedding failed: {e}")
         
         raise Exception("No embedding providers available")
-    
-    
+
+    async def generate_embeddings_batch(self, texts: List[str], use_cache: bool = False) -> List[List[float]]:
+        """
+        Batched embeddings: one GitHub request per batch, Gemini batchEmbedContents fallback.
+
+        Uses the same providers/models as generate_embedding so batch and
+        single vectors live in the same space. With use_cache (query embeddings,
+        not bulk ingestion), cached vectors are reused and new ones cached.
+        """
+        self._ensure_initialized()
+        if not texts:
+            return []
+        if not use_cache:
+            return (await self._generate_embeddings_batch(texts))[1]
+
+        from services.embedding_cache import embedding_cache
+        primary_model = GITHUB_EMBEDDING_CACHE_MODEL if self.github_tokens else GEMINI_EMBEDDING_CACHE_MODEL
+        embeddings = await embedding_cache.get_many(primary_model, texts)
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if not missing:
+            return embeddings
+
+        model, generated = await self._generate_embeddings_batch([texts[i] for i in missing])
+        if model != primary_model and len(missing) < len(texts):
+            # The fallback provider answered: don't mix its vectors with cached primary ones
+            missing = list(range(len(texts)))
+            model, generated = await self._generate_embeddings_batch(texts)
+        for i, embedding in zip(missing, generated):
+            embeddings[i] = embedding
+        await embedding_cache.put_many(model, [texts[i] for i in missing], generated)
+        return embeddings
+
+    async def _generate_embeddings_batch(self, texts: List[str]) -> Tuple[str, List[List[float]]]:
+        """Embed texts with the first provider that answers; returns (cache model key, embeddings)."""
+        texts = [text[:8000] if len(text) > 8000 else text for text in texts]
+
+        # Try GitHub (OpenAI-compatible endpoint accepts a list input)
+        if self.github_tokens and self.http_client:
+            try:
+                token = self.github_tokens[self.github_idx % len(self.github_tokens)]
+
+                response = await self.http_client.post(
+                    "https://models.inference.ai.azure.com/embeddings",
+                    headers={"Authorization": f"Bearer {token}", "Content-Type": "application/json"},
+                    json={"model": "text-embedding-3-small", "input": texts, "dimensions": 768},
+                    timeout=60.0
+                )
+
+                if response.status_code == 200:
+                    data = sorted(response.json()["data"], key=lambda item: item.get("index", 0))
+                    if len(data) == len(texts):
+                        return GITHUB_EMBEDDING_CACHE_MODEL, [item["embedding"] for item in data]
+
+            except Exception as e:
+                logger.debug(f"GitHub batch embedding failed: {str(e)[:50]}")
+
+        # Fallback to Gemini batchEmbedContents (max 100 requests per call)
+        if self.gemini_keys and self.http_client:
+            api_key = self.gemini_keys[0]
+            base_url = "https://generativelanguage.googleapis.com/v1beta/models/text-embedding-004:batchEmbedContents"
+            params = {"key": api_key}
+            headers = {"Content-Type": "application/json"}
+
+            try:
+                embeddings = []
+                for start in range(0, len(texts), 100):
+                    await gemini_rate_limiter.acquire(
+                        key_id(api_key), sum(estimate_tokens(text) for text in texts[start:start + 100]), scope="embed"
+                    )
+                    data = {
+                        "requests": [
+                            {
+                                "model": "models/text-embedding-004",
+                                "content": {"parts": [{"text": text}]},
+                                "taskType": "RETRIEVAL_DOCUMENT"
+                            }
+                            for text in texts[start:start + 100]
+                        ]
+                    }
+                    response = await self.http_client.post(base_url, params=params, headers=headers, json=data, timeout=60.0)
+                    response.raise_for_status()
+                    embeddings.extend(item['values'] for item in response.json()['embeddings'])
+                return GEMINI_EMBEDDING_CACHE_MODEL, embeddings
+            except Exception as e:
+                logger.error(f"Gemini batch embedding failed: {e}")
+
+        raise Exception("No embedding providers available")
+
     def generate_content_sync(self, prompt: str, max_tokens: int = 500, temperature: float = 0.7, task_type: TaskType = 'general', quota_user: Optional[str] = None) -> str:
         """Sync wrapper with task type support."""
         return asyncio.get_event_loop().run_until_complete(
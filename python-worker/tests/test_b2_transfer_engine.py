@@ -0,0 +1,170 @@
+"""
+Unit tests for b2_transfer_engine.py - Bounded, retrying B2 transfers.
+Tests cover the loop-bound concurrency limit, retries with full jitter,
+missing files and partial failures of the batch APIs.
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from services.b2_transfer_engine import B2TransferEngine
+
+
+class FakeStorage:
+    """Blocking stand-in for B2StorageService with scripted failures per key."""
+
+    def __init__(self, failures=None, delay=0.0):
+        self.failures = {key: list(errors) for key, errors in (failures or {}).items()}
+        self.delay = delay
+        self.calls = []
+        self.running = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def _call(self, key):
+        with self._lock:
+            self.calls.append(key)
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        try:
+            time.sleep(self.delay)
+            errors = self.failures.get(key)
+            if errors:
+                raise errors.pop(0)
+        finally:
+            with self._lock:
+                self.running -= 1
+
+    def download_file_bytes(self, file_key):
+        self._call(file_key)
+        return f"content of {file_key}".encode()
+
+    def upload_file_content_sync(self, repo_id, file_path, content):
+        self._call(file_path)
+        return {'file_key': f"{repo_id}/{file_path}", 'size': len(content.encode())}
+
+
+@pytest.fixture
+def jitter_bounds(monkeypatch):
+    """Records the (low, high) range of every backoff delay; the delays themselves are 0."""
+    bounds = []
+
+    def uniform(low, high):
+        bounds.append((low, high))
+        return 0.0
+
+    monkeypatch.setattr("services.b2_transfer_engine.random.uniform", uniform)
+    return bounds
+
+
+@pytest.fixture
+def engine(jitter_bounds):
+    engine = B2TransferEngine(max_concurrency=2, max_retries=3, retry_base_delay=0.5)
+    yield engine
+    engine._executor.shutdown(wait=True)
+
+
+class TestB2TransferEngine:
+    """Tests for B2TransferEngine."""
+
+    def test_semaphore_is_bound_to_the_running_loop(self, engine):
+        """Test that each event loop (API server, worker) gets its own semaphore."""
+        async def semaphores():
+            return engine._get_semaphore(), engine._get_semaphore()
+
+        first, again = asyncio.run(semaphores())
+        second, _ = asyncio.run(semaphores())
+
+        assert first is again
+        assert second is not first
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_bounded(self, engine):
+        """Test that no more than max_concurrency blocking calls run at once."""
+        storage = FakeStorage(delay=0.02)
+
+        downloaded = await engine.download_many([f"f{n}" for n in range(6)], storage=storage)
+
+        assert len(downloaded) == 6
+        assert storage.peak == 2
+
+    @pytest.mark.asyncio
+    async def test_retries_with_full_jitter(self, engine, jitter_bounds):
+        """Test that transient failures are retried with a random delay under a doubling cap."""
+        storage = FakeStorage(failures={'a': [ConnectionError("reset"), ConnectionError("reset")]})
+
+        assert await engine.download_bytes('a', storage=storage) == b"content of a"
+
+        assert storage.calls == ['a', 'a', 'a']
+        assert jitter_bounds == [(0, 0.5), (0, 1.0)]
+        assert engine.stats['retries'] == 2 and engine.stats['failures'] == 0
+        assert engine.stats['downloads'] == 1 and engine.stats['bytes_downloaded'] == len(b"content of a")
+
+    @pytest.mark.asyncio
+    async def test_gives_up_after_max_retries(self, engine, jitter_bounds):
+        """Test that a call failing every attempt raises after max_retries retries."""
+        engine.retry_max_delay = 1.0
+        storage = FakeStorage(failures={'a': [ConnectionError("reset")] * 4})
+
+        with pytest.raises(ConnectionError):
+            await engine.download_bytes('a', storage=storage)
+
+        assert len(storage.calls) == 4
+        assert jitter_bounds == [(0, 0.5), (0, 1.0), (0, 1.0)]  # Capped at retry_max_delay
+        assert engine.stats['failures'] == 1
+
+    @pytest.mark.asyncio
+    async def test_missing_file_is_not_retried(self, engine):
+        """Test that B2's not_found error surfaces as FileNotFoundError without retries."""
+        from services.b2_storage_sdk_fixed import B2StorageService
+
+        class Bucket:
+            calls = 0
+
+            def download_file_by_name(self, file_key):
+                Bucket.calls += 1
+                raise Exception("not_found: File with such name does not exist")
+
+        storage = B2StorageService.__new__(B2StorageService)
+        storage.bucket = Bucket()
+
+        with pytest.raises(FileNotFoundError):
+            await engine.download_bytes('repo/missing.py', storage=storage)
+
+        assert Bucket.calls == 1
+        assert engine.stats['retries'] == 0
+
+    @pytest.mark.asyncio
+    async def test_download_many_omits_failed_keys(self, engine):
+        """Test that download_many deduplicates keys and returns only the files it could download."""
+        storage = FakeStorage(failures={
+            'missing': [FileNotFoundError("missing")],
+            'broken': [RuntimeError("boom")] * 4
+        })
+
+        downloaded = await engine.download_many(['a', 'missing', '', 'broken', 'a'], storage=storage)
+
+        assert downloaded == {'a': b"content of a"}
+        assert storage.calls.count('a') == 1
+        assert storage.calls.count('missing') == 1
+        assert storage.calls.count('broken') == 4
+
+    @pytest.mark.asyncio
+    async def test_upload_many_returns_failures_in_place(self, engine):
+        """Test that upload_many aligns results with items and returns failures as exceptions."""
+        storage = FakeStorage(failures={'bad.py': [RuntimeError("boom")] * 4})
+        items = [
+            {'repo_id': 'r1', 'file_path': 'a.py', 'content': 'print(1)'},
+            {'repo_id': 'r1', 'file_path': 'bad.py', 'content': 'x'},
+            {'repo_id': 'r1', 'file_path': 'b.py', 'content': 'pass'}
+        ]
+
+        results = await engine.upload_many(items, storage=storage)
+
+        assert results[0] == {'file_key': 'r1/a.py', 'size': 8}
+        assert isinstance(results[1], RuntimeError)
+        assert results[2] == {'file_key': 'r1/b.py', 'size': 4}
+        assert engine.stats['uploads'] == 2 and engine.stats['bytes_uploaded'] == 12
+        assert engine.stats['failures'] == 1
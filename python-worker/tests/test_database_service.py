@@ -177,3 +177,33 @@ class TestDatabaseServiceEdgeCases:
         
         assert isinstance(result, list)
         assert len(result) == 0
+
+
+class TestDatabaseServiceKeywordSearch:
+    """Tests for search_files_by_keywords."""
+
+    @pytest.mark.asyncio
+    async def test_keywords_are_bound_parameters_and_ranked(self):
+        """Test that keywords never reach the SQL text and rows keep their ts_rank order."""
+        from services.database_service import DatabaseService
+
+        service = DatabaseService()
+        connection = MagicMock()
+        connection.fetch = AsyncMock(return_value=[
+            {"path": "src/auth.py", "file_key": "k1", "rank": 0.6},
+            {"path": "docs/auth.md", "file_key": "k2", "rank": 0.2},
+        ])
+        pool = MagicMock()
+        pool.acquire.return_value.__aenter__ = AsyncMock(return_value=connection)
+        pool.acquire.return_value.__aexit__ = AsyncMock(return_value=False)
+        service.connection_pool = pool
+        service._load_file_contents_bulk = AsyncMock(return_value={"k1": "def login(): ...", "k2": "# Auth"})
+
+        results = await service.search_files_by_keywords("repo-1", ["auth", "50%_off'; DROP TABLE x;--"])
+
+        query, *args = connection.fetch.call_args.args
+        assert "auth" not in query and "DROP" not in query
+        assert args[:3] == ["repo-1", "(auth:*) | (50:* & off:* & drop:* & table:* & x:*)", 10]
+        assert args[3:] == ["%auth%", "%50\\%\\_off'; DROP TABLE x;--%"]
+        assert [r["file_path"] for r in results] == ["src/auth.py", "docs/auth.md"]
+        assert results[0]["match_score"] == pytest.approx(0.8)
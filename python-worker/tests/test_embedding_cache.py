@@ -0,0 +1,79 @@
+"""
+Unit tests for embedding_cache.py - Query embedding cache.
+Tests cover stable keys, LRU eviction and the shared Redis tier.
+"""
+from unittest.mock import patch
+
+import pytest
+
+from services.embedding_cache import EmbeddingCache, embedding_cache_key
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def setex(self, key, ttl, value):
+        self.commands.append((key, value))
+
+    async def execute(self):
+        self.redis.data.update(self.commands)
+
+
+class FakeRedis:
+    """Stores string values like a decode_responses=True redis.asyncio client."""
+
+    def __init__(self):
+        self.data = {}
+        self.mgets = 0
+
+    async def mget(self, keys):
+        self.mgets += 1
+        return [self.data.get(key) for key in keys]
+
+    def pipeline(self, transaction=False):
+        return FakePipeline(self)
+
+
+class TestEmbeddingCache:
+    """Tests for EmbeddingCache."""
+
+    def test_keys_are_stable_and_model_scoped(self):
+        """Test that keys depend only on the model and the text content."""
+        assert embedding_cache_key("m1", "question") == embedding_cache_key("m1", "question")
+        assert embedding_cache_key("m1", "question") != embedding_cache_key("m2", "question")
+
+    @pytest.mark.asyncio
+    async def test_lru_evicts_least_recently_used(self):
+        """Test that a full cache keeps caching by evicting the oldest entry."""
+        cache = EmbeddingCache(max_entries=2, redis_enabled=False)
+
+        await cache.put("m", "a", [1.0])
+        await cache.put("m", "b", [2.0])
+        await cache.get("m", "a")  # 'a' becomes most recently used
+        await cache.put("m", "c", [3.0])
+
+        assert await cache.get("m", "b") is None
+        assert await cache.get_many("m", ["a", "c"]) == [[1.0], [3.0]]
+        stats = cache.get_stats()
+        assert stats["evictions"] == 1
+        assert stats["hit_rate"] == pytest.approx(3 / 4)
+
+    @pytest.mark.asyncio
+    async def test_redis_tier_is_shared_between_processes(self):
+        """Test that an embedding cached by one process is served from Redis to another."""
+        redis = FakeRedis()
+        with patch.object(EmbeddingCache, "redis", redis):
+            writer = EmbeddingCache(max_entries=10, redis_dtype="float16")
+            reader = EmbeddingCache(max_entries=10)
+
+            await writer.put("m", "question", [0.25, -0.5, 0.1])
+            first, missing = await reader.get_many("m", ["question", "other"])
+            again = await reader.get("m", "question")
+
+        assert first == pytest.approx([0.25, -0.5, 0.1], abs=1e-3)
+        assert missing is None
+        assert again == first
+        assert redis.mgets == 1
+        assert reader.get_stats()["redis_hits"] == 1
@@ -0,0 +1,161 @@
+"""
+Unit tests for embedding_pipeline.py - Batched embedding ingestion.
+Tests cover batching, chunked upserts, the per-item fallback, throughput stats
+and incremental re-indexing with deterministic chunk ids.
+"""
+import pytest
+
+from services.embedding_pipeline import EmbeddingPipeline, chunk_point_id
+from utils.hashing import content_hash
+
+
+class FakeEmbedder:
+    def __init__(self, fail_batches=False):
+        self.fail_batches = fail_batches
+        self.batch_sizes = []
+        self.single_calls = 0
+
+    async def generate_embeddings_batch(self, texts):
+        self.batch_sizes.append(len(texts))
+        if self.fail_batches:
+            raise RuntimeError("batch endpoint unavailable")
+        return [[float(len(t))] for t in texts]
+
+    async def generate_embedding(self, text):
+        self.single_calls += 1
+        if text == "bad":
+            raise RuntimeError("cannot embed")
+        return [float(len(text))]
+
+
+class FakeVectorStore:
+    def __init__(self, existing=None):
+        self.ensure_calls = 0
+        self.upserts = []
+        self.existing = existing or {}
+        self.deleted = []
+        self.payload_updates = {}
+
+    def ensure_collection_exists(self, collection_name, dimension):
+        self.ensure_calls += 1
+
+    async def upsert_points(self, points, collection_name=None, batch_size=256):
+        self.upserts.append(list(points))
+        return len(points)
+
+    def get_repository_point_index(self, repo_id, payload_fields=None, collection_name=None):
+        return dict(self.existing)
+
+    def delete_points(self, point_ids, collection_name=None):
+        self.deleted.extend(point_ids)
+        return len(point_ids)
+
+    def set_point_payloads(self, payloads, collection_name=None):
+        self.payload_updates.update(payloads)
+        return len(payloads)
+
+
+def make_items(count, text="x"):
+    return [
+        {'id': f"id-{i}", 'text': text, 'payload': {'file_path': f"file_{i % 3}.py"}}
+        for i in range(count)
+    ]
+
+
+class TestEmbeddingPipeline:
+    """Tests for the producer/consumer embedding pipeline."""
+
+    @pytest.mark.asyncio
+    async def test_batches_and_chunked_upserts(self):
+        """Test that texts are embedded in batches and upserted in chunks."""
+        embedder, store = FakeEmbedder(), FakeVectorStore()
+        pipeline = EmbeddingPipeline(batch_size=4, upsert_batch_size=5, embed_workers=2, queue_size=2)
+
+        stats = await pipeline.run(make_items(10), collection_name="test", dimension=1,
+                                   embedder=embedder, vector_store=store)
+
+        assert store.ensure_calls == 1
+        assert sorted(embedder.batch_sizes) == [2, 4, 4]
+        assert all(len(chunk) <= 5 for chunk in store.upserts)
+        assert sum(len(chunk) for chunk in store.upserts) == 10
+        assert stats['points_created'] == 10
+        assert stats['files_embedded'] == 3
+        assert stats['points_per_second'] > 0
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_single_embeddings(self):
+        """Test that a failed batch is retried item by item and bad items are counted."""
+        embedder, store = FakeEmbedder(fail_batches=True), FakeVectorStore()
+        pipeline = EmbeddingPipeline(batch_size=8, upsert_batch_size=8, embed_workers=1, queue_size=1)
+        items = make_items(2) + [{'id': 'id-bad', 'text': 'bad', 'payload': {'file_path': 'bad.py'}}]
+
+        stats = await pipeline.run(items, collection_name="test", dimension=1,
+                                   embedder=embedder, vector_store=store)
+
+        assert embedder.single_calls == 3
+        assert stats['points_created'] == 2
+        assert stats['points_failed'] == 1
+
+
+def make_chunk_item(path, index, text, start_line=1):
+    return {
+        'id': chunk_point_id("repo-1", path, index, content_hash(text)),
+        'text': text,
+        'payload': {'file_path': path, 'start_line': start_line, 'end_line': start_line + 1}
+    }
+
+
+class TestIncrementalReindex:
+    """Tests for deterministic chunk ids and diff-based re-indexing."""
+
+    def test_chunk_point_id_is_deterministic(self):
+        """Test that ids depend only on repo, path, chunk index and content."""
+        same = chunk_point_id("repo-1", "a.py", 0, content_hash("x = 1"))
+        assert same == chunk_point_id("repo-1", "a.py", 0, content_hash("x = 1"))
+        assert same != chunk_point_id("repo-1", "a.py", 0, content_hash("x = 2"))
+        assert same != chunk_point_id("repo-1", "a.py", 1, content_hash("x = 1"))
+
+    @pytest.mark.asyncio
+    async def test_only_changed_chunks_are_embedded(self):
+        """Test that unchanged chunks are skipped and stale points are deleted."""
+        unchanged = make_chunk_item("a.py", 0, "x = 1")
+        moved = make_chunk_item("a.py", 1, "y = 2", start_line=5)
+        changed = make_chunk_item("b.py", 0, "z = 3 # edited")
+        existing = {
+            unchanged['id']: {'start_line': 1, 'end_line': 2},
+            moved['id']: {'start_line': 3, 'end_line': 4},
+            'stale-id': {'start_line': 1, 'end_line': 2}
+        }
+        embedder, store = FakeEmbedder(), FakeVectorStore(existing)
+        pipeline = EmbeddingPipeline(batch_size=8, upsert_batch_size=8, embed_workers=1, queue_size=1)
+
+        stats = await pipeline.reindex("repo-1", [unchanged, moved, changed], collection_name="test",
+                                       dimension=1, embedder=embedder, vector_store=store)
+
+        assert [p['id'] for chunk in store.upserts for p in chunk] == [changed['id']]
+        assert store.deleted == ['stale-id']
+        assert store.payload_updates == {moved['id']: {'start_line': 5, 'end_line': 6}}
+        assert stats['chunks_unchanged'] == 2
+        assert stats['points_deleted'] == 1
+
+    @pytest.mark.asyncio
+    async def test_keeps_stale_points_of_files_that_failed_to_embed(self):
+        """Test that a changed file keeps its old vectors when its new chunks cannot be embedded."""
+        kept = make_chunk_item("a.py", 0, "x = 1")
+        failed = make_chunk_item("b.py", 0, "bad")
+        replaced = make_chunk_item("c.py", 0, "w = 4 # edited")
+        existing = {
+            kept['id']: {'start_line': 1, 'end_line': 2, 'file_path': 'a.py'},
+            'old-b': {'start_line': 1, 'end_line': 2, 'file_path': 'b.py'},
+            'old-c': {'start_line': 1, 'end_line': 2, 'file_path': 'c.py'}
+        }
+        embedder, store = FakeEmbedder(fail_batches=True), FakeVectorStore(existing)
+        pipeline = EmbeddingPipeline(batch_size=8, upsert_batch_size=8, embed_workers=1, queue_size=1)
+
+        stats = await pipeline.reindex("repo-1", [kept, failed, replaced], collection_name="test",
+                                       dimension=1, embedder=embedder, vector_store=store)
+
+        assert [p['id'] for chunk in store.upserts for p in chunk] == [replaced['id']]
+        assert stats['failed_files'] == ['b.py']
+        assert store.deleted == ['old-c']
+        assert stats['stale_points_kept'] == 1
@@ -0,0 +1,67 @@
+"""
+Unit tests for file_handle.py - Lazy file handles for metadata-first retrieval.
+Tests cover memoized content loading, failed loads and hydration.
+"""
+import asyncio
+
+import pytest
+
+from services.file_handle import FileHandle, hydrate
+
+
+def counting_loader(contents, delay=0.0):
+    calls = []
+
+    async def loader(file_info):
+        calls.append(file_info["path"])
+        await asyncio.sleep(delay)
+        content = contents[file_info["path"]]
+        if isinstance(content, Exception):
+            raise content
+        return content
+
+    return loader, calls
+
+
+class TestFileHandle:
+    """Tests for FileHandle."""
+
+    @pytest.mark.asyncio
+    async def test_content_is_loaded_once(self):
+        """Test that concurrent and repeated loads share one download."""
+        loader, calls = counting_loader({"a.py": "print('a')"}, delay=0.01)
+        handle = FileHandle({"path": "a.py", "summary": "Prints a", "content": None}, loader)
+
+        assert not handle.is_loaded and handle.content is None
+        assert handle.get("content", "") == ""  # Metadata-only until hydrated
+
+        results = await asyncio.gather(handle.load_content(), handle.load_content())
+        assert results == ["print('a')", "print('a')"]
+        assert await handle.load_content() == "print('a')"
+        assert calls == ["a.py"]
+        assert handle.is_loaded and handle["summary"] == "Prints a"
+
+    @pytest.mark.asyncio
+    async def test_failed_load_resolves_to_empty_content(self):
+        """Test that a failed download leaves an empty, loaded handle instead of raising."""
+        loader, calls = counting_loader({"a.py": RuntimeError("B2 down")})
+        handle = FileHandle({"path": "a.py"}, loader)
+
+        assert await handle.load_content() == ""
+        assert await handle.load_content() == ""
+        assert calls == ["a.py"]
+        assert handle.is_loaded
+
+    @pytest.mark.asyncio
+    async def test_hydrate_loads_only_pending_handles(self):
+        """Test that hydrate loads unloaded handles, keeps order and passes plain dicts through."""
+        loader, calls = counting_loader({"a.py": "a", "b.py": "b"})
+        loaded = FileHandle({"path": "b.py", "content": "cached"}, loader)
+        attachment = {"path": "attachment/notes.txt", "content": "notes"}
+        files = [FileHandle({"path": "a.py"}, loader), attachment, loaded]
+
+        result = await hydrate(files)
+
+        assert result == files
+        assert [f["content"] for f in result] == ["a", "notes", "cached"]
+        assert calls == ["a.py"]
@@ -0,0 +1,99 @@
+"""
+Unit tests for file_index.py - Per-repository file index.
+Tests cover index replacement on write, SCAN backfill and pipelined lookups.
+"""
+import fnmatch
+from unittest.mock import patch
+
+import pytest
+
+from services.file_index import FileIndex, REPO_INDEX_KEY, file_index_key
+
+
+class FakePipeline:
+    """Applies queued commands to the fake store on execute()."""
+
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def delete(self, key):
+        self.commands.append(lambda: self.client.data.pop(key, None))
+
+    def sadd(self, key, *members):
+        self.commands.append(lambda: self.client.data.setdefault(key, set()).update(members))
+
+    async def execute(self):
+        self.client.round_trips += 1
+        return [command() for command in self.commands]
+
+
+class FakeRedisClient:
+    """In-memory stand-in for the RedisClient methods used by FileIndex."""
+
+    def __init__(self, data):
+        self.data = data
+        self.round_trips = 0
+
+    def pipeline(self, transaction=False):
+        return FakePipeline(self)
+
+    async def smembers(self, key):
+        return list(self.data.get(key, set()))
+
+    async def hgetall_many(self, keys):
+        self.round_trips += 1
+        return [self.data.get(key, {}) for key in keys]
+
+    async def scan_keys(self, pattern, count=1000):
+        return [key for key in self.data if fnmatch.fnmatchcase(key, pattern)]
+
+
+@pytest.fixture
+def fake_redis():
+    client = FakeRedisClient({
+        "file:repo-1:src/app.py": {"path": "src/app.py", "content": "print(1)"},
+        "file:repo-1:README.md": {"path": "README.md"},
+        "file:repo-2:src/app.py": {"path": "src/app.py", "content": "print(2)"},
+    })
+    with patch.object(FileIndex, "redis_client", client):
+        yield client
+
+
+class TestFileIndex:
+    """Tests for index maintenance and lookups."""
+
+    @pytest.mark.asyncio
+    async def test_missing_index_is_backfilled_with_scan(self, fake_redis):
+        """Test that a repository without an index is indexed from its file hashes."""
+        index = FileIndex()
+
+        assert await index.get_paths("repo-1") == ["README.md", "src/app.py"]
+        assert fake_redis.data[file_index_key("repo-1")] == {"README.md", "src/app.py"}
+        assert "repo-1" in fake_redis.data[REPO_INDEX_KEY]
+
+    @pytest.mark.asyncio
+    async def test_replace_drops_removed_paths(self, fake_redis):
+        """Test that re-ingesting a repository replaces its indexed paths."""
+        index = FileIndex()
+        await index.get_paths("repo-1")
+
+        pipe = fake_redis.pipeline(transaction=True)
+        index.queue_replace(pipe, "repo-1", ["src/app.py"])
+        await pipe.execute()
+
+        assert await index.get_paths("repo-1") == ["src/app.py"]
+
+    @pytest.mark.asyncio
+    async def test_lookups_are_pipelined(self, fake_redis):
+        """Test that metadata for many paths and repositories is fetched in one round trip."""
+        index = FileIndex()
+        await index.migrate_all()
+        fake_redis.round_trips = 0
+
+        metadata = await index.get_metadata("repo-1", ["src/app.py", "README.md", "missing.py"])
+        matches = await index.find_in_repositories(["src/app.py"], exclude_repo_id="repo-1")
+
+        assert sorted(metadata) == ["README.md", "src/app.py"]
+        assert [(m["repo_id"], m["metadata"]["content"]) for m in matches] == [("repo-2", "print(2)")]
+        assert fake_redis.round_trips == 2
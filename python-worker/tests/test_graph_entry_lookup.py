@@ -0,0 +1,110 @@
+"""
+Tests for full-text entry-node lookup in neo4j_client.py.
+Covers Lucene query construction and a benchmark of the full-text lookup
+against the legacy label scan on a synthetic 50k-node graph.
+
+The benchmark needs a live Neo4j (configured via NEO4J_URI etc.) and only runs
+when GRAPH_BENCHMARK=1:
+
+    GRAPH_BENCHMARK=1 python -m pytest tests/test_graph_entry_lookup.py -m slow -s
+"""
+import os
+import time
+import uuid
+
+import pytest
+
+from services.neo4j_client import build_fulltext_query
+
+
+class TestBuildFulltextQuery:
+    """Tests for build_fulltext_query."""
+
+    def test_keywords_are_boosted_prefixed_and_infixed(self):
+        """Test that each keyword matches exactly, as a prefix and as an infix, within one repository."""
+        query = build_fulltext_query("repo-1", ["Auth", "login"])
+
+        assert query == (
+            '+repository_id:"repo\\-1" '
+            '+(auth^3 OR auth*^2 OR *auth* OR login^3 OR login*^2 OR *login*)'
+        )
+
+    def test_lucene_syntax_is_escaped(self):
+        """Test that keywords cannot inject Lucene operators."""
+        query = build_fulltext_query("repo", ["a:b", "(x)"])
+
+        assert "a\\:b^3" in query
+        assert "\\(x\\)^3" in query
+
+
+BENCHMARK_FILES = 5000
+FUNCTIONS_PER_FILE = 7
+CLASSES_PER_FILE = 2
+BENCHMARK_KEYWORDS = [["auth"], ["payment", "handler"], ["file_42"], ["nonexistent"]]
+
+
+@pytest.mark.slow
+@pytest.mark.integration
+@pytest.mark.skipif(os.getenv("GRAPH_BENCHMARK") != "1", reason="set GRAPH_BENCHMARK=1 to run against Neo4j")
+class TestEntryLookupBenchmark:
+    """Full-text vs label-scan entry lookup on ~50k File/Function/Class/Module nodes."""
+
+    @pytest.mark.asyncio
+    async def test_fulltext_lookup_is_faster_than_scan(self):
+        """Build a synthetic graph, then time both lookups for several keyword sets."""
+        from services.graph_writer import GraphBatchWriter
+        from services.neo4j_client import Neo4jClient
+
+        client = Neo4jClient()
+        await client.connect()
+        repository_id = f"benchmark-{uuid.uuid4().hex[:8]}"
+        domains = ["auth", "payment", "user", "billing", "search", "cache", "report", "handler"]
+
+        try:
+            await client.create_repository_node(repository_id, {"name": repository_id})
+            writer = GraphBatchWriter(client.driver, repository_id, batch_size=5000, build_id="benchmark")
+            for i in range(BENCHMARK_FILES):
+                domain = domains[i % len(domains)]
+                path = f"src/{domain}/file_{i}.py"
+                await writer.add('files', {
+                    'path': path, 'name': f"file_{i}.py", 'extension': '.py',
+                    'content_summary': None, 'size': 0, 'language': 'python'
+                })
+                for j in range(FUNCTIONS_PER_FILE):
+                    await writer.add('functions', {
+                        'file_path': path, 'name': f"{domain}_fn_{j}",
+                        'qualified_name': f"{path}::{domain}_fn_{j}", 'start_line': j * 10,
+                        'signature': None, 'description': None, 'end_line': j * 10 + 9,
+                        'complexity': 1, 'is_async': False, 'parameters': [], 'return_type': None
+                    })
+                for j in range(CLASSES_PER_FILE):
+                    await writer.add('classes', {
+                        'file_path': path, 'name': f"{domain.title()}Model{j}",
+                        'qualified_name': f"{path}::{domain.title()}Model{j}", 'start_line': 100 + j,
+                        'description': None, 'end_line': 120 + j, 'base_classes': [],
+                        'methods': [], 'attributes': []
+                    })
+                await writer.add('imports', {'from_file': path, 'to_module': f"lib_{i % 1000}", 'import_type': 'import'})
+            await writer.flush()
+
+            async with client.driver.session() as session:
+                await session.run("CALL db.awaitIndexes(300)")
+
+            for keywords in BENCHMARK_KEYWORDS:
+                started = time.perf_counter()
+                scan_nodes = await client._find_entry_nodes_scan(repository_id, keywords)
+                scan_ms = (time.perf_counter() - started) * 1000
+
+                started = time.perf_counter()
+                fulltext_nodes = await client._find_entry_nodes(repository_id, keywords)
+                fulltext_ms = (time.perf_counter() - started) * 1000
+
+                print(
+                    f"{keywords}: scan {scan_ms:.1f}ms ({len(scan_nodes)} nodes), "
+                    f"fulltext {fulltext_ms:.1f}ms ({len(fulltext_nodes)} nodes)"
+                )
+                assert bool(fulltext_nodes) == bool(scan_nodes)
+                assert fulltext_ms < scan_ms
+        finally:
+            await client.delete_repository_graph(repository_id)
+            await client.disconnect()
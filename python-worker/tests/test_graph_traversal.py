@@ -0,0 +1,119 @@
+"""
+Unit tests for graph_traversal.py - Bounded traversal over cached adjacency snapshots.
+Tests cover weighted ranking, hop limits, fan-out caps and version-keyed caching.
+"""
+import pytest
+
+from services.graph_traversal import (
+    AdjacencySnapshot,
+    EDGES_QUERY,
+    GraphTraversal,
+    NODES_QUERY,
+    VERSION_QUERY,
+)
+
+
+def node(node_id, node_type='Function', path=None):
+    return {
+        'id': node_id, 'type': node_type, 'name': node_id, 'path': path,
+        'qualified_name': node_id, 'description': None, 'content_summary': None
+    }
+
+
+NODES = [
+    node('a.py', 'File', 'a.py'), node('a.py::main'), node('a.py::helper'),
+    node('b.py::util'), node('c.py::deep'), node('os', 'Module'),
+]
+EDGES = [
+    ('a.py', 'a.py::main', 'CONTAINS'),
+    ('a.py', 'a.py::helper', 'CONTAINS'),
+    ('a.py::main', 'b.py::util', 'CALLS'),
+    ('b.py::util', 'c.py::deep', 'CALLS'),
+    ('a.py', 'os', 'IMPORTS'),
+]
+
+
+class FakeResult:
+    def __init__(self, records):
+        self.records = records
+
+    async def single(self):
+        return self.records[0] if self.records else None
+
+    def __aiter__(self):
+        async def iterate():
+            for record in self.records:
+                yield record
+        return iterate()
+
+
+class FakeSession:
+    def __init__(self, driver):
+        self.driver = driver
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def run(self, query, repository_id):
+        self.driver.queries.append(query)
+        if query == VERSION_QUERY:
+            return FakeResult([{'version': self.driver.version}])
+        if query == NODES_QUERY:
+            return FakeResult(NODES)
+        return FakeResult([{'source': s, 'target': t, 'type': r} for s, t, r in EDGES])
+
+
+class FakeDriver:
+    def __init__(self, version='build-1'):
+        self.version = version
+        self.queries = []
+
+    def session(self):
+        return FakeSession(self)
+
+
+class TestAdjacencySnapshot:
+    """Tests for AdjacencySnapshot.traverse."""
+
+    def test_nodes_are_ranked_by_weighted_distance_within_hop_limit(self):
+        """Test that cheap CONTAINS neighbours rank before CALLS/IMPORTS and the hop limit holds."""
+        snapshot = AdjacencySnapshot.build('v1', NODES, EDGES)
+
+        related = snapshot.traverse(['a.py'], max_depth=2, max_nodes=10)
+
+        assert [n['id'] for n in related] == ['a.py', 'a.py::main', 'a.py::helper', 'os', 'b.py::util']
+        assert (related[-1]['distance'], related[-1]['hops']) == (1.5, 2)
+
+    def test_fanout_caps_bound_expansion(self):
+        """Test that at most the capped number of neighbours of a type is expanded per node."""
+        snapshot = AdjacencySnapshot.build('v1', NODES, EDGES)
+
+        related = snapshot.traverse(['a.py'], max_depth=1, fanout_caps={'CONTAINS': 1, 'IMPORTS': 0})
+
+        assert [n['id'] for n in related] == ['a.py', 'a.py::main']
+
+
+class TestGraphTraversal:
+    """Tests for snapshot caching in GraphTraversal."""
+
+    @pytest.mark.asyncio
+    async def test_snapshot_is_reused_until_graph_version_changes(self):
+        """Test that repeated traversals skip Neo4j and a new build reloads the snapshot."""
+        driver = FakeDriver()
+        traversal = GraphTraversal(cache_size=2, version_ttl=60)
+
+        await traversal.traverse(driver, 'repo-1', ['a.py'])
+        await traversal.traverse(driver, 'repo-1', ['a.py'])
+        assert driver.queries == [VERSION_QUERY, NODES_QUERY, EDGES_QUERY]
+
+        traversal.version_ttl = 0
+        await traversal.traverse(driver, 'repo-1', ['a.py'])
+        assert driver.queries[3:] == [VERSION_QUERY]
+
+        driver.version = 'build-2'
+        await traversal.traverse(driver, 'repo-1', ['a.py'])
+        assert driver.queries[4:] == [VERSION_QUERY, NODES_QUERY, EDGES_QUERY]
+        assert traversal.get_stats()['loads'] == 2
@@ -0,0 +1,160 @@
+"""
+Unit tests for graph_writer.py - Batched UNWIND code graph writer.
+Tests cover batching, node-before-edge write order, throughput stats and
+hash-based incremental rebuilds.
+"""
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from services.graph_writer import GraphBatchWriter, QUERIES
+
+
+class FakeResult:
+    def __init__(self, written):
+        self.written = written
+
+    async def single(self):
+        return {'written': self.written}
+
+
+class FakeTransaction:
+    def __init__(self, driver):
+        self.driver = driver
+
+    async def run(self, query, repository_id, rows, build_id):
+        self.driver.batches.append((query, len(rows)))
+        return FakeResult(len(rows))
+
+
+class FakeSession:
+    def __init__(self, driver):
+        self.driver = driver
+
+    async def __aenter__(self):
+        self.driver.sessions += 1
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute_write(self, work, *args):
+        return await work(FakeTransaction(self.driver), *args)
+
+
+class FakeDriver:
+    def __init__(self):
+        self.batches = []
+        self.sessions = 0
+
+    def session(self):
+        return FakeSession(self)
+
+
+class TestGraphBatchWriter:
+    """Tests for GraphBatchWriter."""
+
+    @pytest.mark.asyncio
+    async def test_rows_are_written_in_batches_nodes_first(self):
+        """Test that edges queued first are still written after the nodes they reference."""
+        driver = FakeDriver()
+        writer = GraphBatchWriter(driver, "repo-1", batch_size=2)
+
+        await writer.add('calls', {'caller': 'a.py::f', 'callee': 'a.py::g', 'context': None})
+        for i in range(5):
+            await writer.add('functions', {'file_path': 'a.py', 'name': f'f{i}'})
+        await writer.add('files', {'path': 'a.py'})
+        await writer.flush()
+
+        assert driver.batches == [
+            (QUERIES['files'], 1),
+            (QUERIES['functions'], 2),
+            (QUERIES['functions'], 2),
+            (QUERIES['functions'], 1),
+            (QUERIES['calls'], 1),
+        ]
+        assert driver.sessions == 5
+
+        stats = writer.get_stats()
+        assert stats['rows_written']['functions'] == 5
+        assert stats['transactions'] == 5
+        assert writer.pending == 0
+
+    @pytest.mark.asyncio
+    async def test_full_buffer_flushes_automatically(self):
+        """Test that the buffer is written once max_pending rows are queued."""
+        driver = FakeDriver()
+        writer = GraphBatchWriter(driver, "repo-1", batch_size=10, max_pending=3)
+
+        for i in range(3):
+            await writer.add('files', {'path': f'{i}.py'})
+
+        assert driver.batches == [(QUERIES['files'], 3)]
+        assert writer.pending == 0
+
+
+class FakeNeo4jClient:
+    """Records the incremental maintenance calls made by CodeGraphBuilder."""
+
+    def __init__(self, existing_hashes):
+        self.driver = FakeDriver()
+        self.existing_hashes = existing_hashes
+        self.calls = {}
+
+    async def create_repository_node(self, repository_id, metadata):
+        return repository_id
+
+    async def get_file_hashes(self, repository_id):
+        return dict(self.existing_hashes)
+
+    async def delete_file_subgraphs(self, repository_id, paths):
+        self.calls['deleted'] = sorted(paths)
+        return len(paths)
+
+    async def clear_outgoing_edges(self, repository_id, paths):
+        self.calls['cleared'] = sorted(paths)
+        return 0
+
+    async def delete_stale_nodes(self, repository_id, paths, build_id):
+        self.calls['pruned'] = sorted(paths)
+        return 0
+
+    async def delete_orphan_modules(self, repository_id):
+        return 0
+
+    async def finalize_graph_build(self, repository_id, file_hashes, build_id):
+        self.calls['hashed'] = sorted(file_hashes)
+
+
+class TestIncrementalGraphBuild:
+    """Tests for hash-based incremental graph updates in CodeGraphBuilder."""
+
+    @pytest.mark.asyncio
+    async def test_only_changed_files_are_rebuilt(self):
+        """Test that unchanged files are skipped and removed files are deleted."""
+        from services.code_graph_builder import CodeGraphBuilder
+        from utils.hashing import content_hash
+
+        files = [
+            {'path': 'same.py', 'content': 'def a():\n    pass\n'},
+            {'path': 'changed.py', 'content': 'def b():\n    pass\n'},
+            {'path': 'new.py', 'content': 'def c():\n    pass\n'},
+        ]
+        client = FakeNeo4jClient({
+            'same.py': content_hash(files[0]['content']),
+            'changed.py': 'stale-hash',
+            'removed.py': 'old-hash',
+        })
+        settings = SimpleNamespace(graph_parse_workers=0, graph_write_batch_size=100)
+
+        with patch('services.code_graph_builder.neo4j_client', client), \
+                patch('services.code_graph_builder.get_settings', return_value=settings):
+            stats = await CodeGraphBuilder().build_repository_graph('repo-1', {}, files)
+
+        assert stats['files_unchanged'] == 1
+        assert stats['files_processed'] == 2
+        assert stats['files_deleted'] == 1
+        assert client.calls['deleted'] == ['removed.py']
+        assert client.calls['cleared'] == ['changed.py']
+        assert client.calls['hashed'] == ['changed.py', 'new.py']
@@ -0,0 +1,114 @@
+"""
+Unit tests for hybrid_retrieval.py - Concurrent retrieval layer fan-out.
+Tests cover per-layer budgets, the overall deadline, failed layers, latency
+reporting and lazy (metadata-first) hydration.
+"""
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from services.file_handle import FileHandle
+from services.hybrid_retrieval import HybridRetrieval
+
+
+def layer(result, delay=0.0):
+    async def run():
+        await asyncio.sleep(delay)
+        return result
+    return run
+
+
+class TestRunLayers:
+    """Tests for HybridRetrieval._run_layers."""
+
+    @pytest.mark.asyncio
+    async def test_layers_run_concurrently_and_report_latency(self):
+        """Test that independent layers overlap instead of running back to back."""
+        retrieval = HybridRetrieval()
+        stats = {}
+
+        started = time.perf_counter()
+        results = await retrieval._run_layers({
+            'semantic': layer([{'file_path': 'a.py'}], delay=0.1),
+            'graph': layer([{'path': 'b.py'}], delay=0.1),
+        }, stats)
+
+        assert time.perf_counter() - started < 0.18
+        assert results['semantic'] == [{'file_path': 'a.py'}]
+        assert stats['layer_status'] == {'semantic': 'ok', 'graph': 'ok'}
+        assert stats['layer_latencies_ms']['graph'] >= 100
+
+    @pytest.mark.asyncio
+    async def test_slow_layers_degrade_to_empty(self):
+        """Test that a layer over its budget or the deadline yields no matches."""
+        retrieval = HybridRetrieval()
+        retrieval.layer_timeouts = {'semantic': 0.05, 'graph': 10}
+        retrieval.deadline = 0.1
+        stats = {}
+
+        results = await retrieval._run_layers({
+            'semantic': layer(['late'], delay=1),
+            'graph': layer(['late'], delay=1),
+            'summary': layer(['fast']),
+        }, stats)
+
+        assert results == {'semantic': [], 'graph': [], 'summary': ['fast']}
+        assert stats['layer_status'] == {'semantic': 'timeout', 'graph': 'cancelled', 'summary': 'ok'}
+
+    @pytest.mark.asyncio
+    async def test_failed_layer_is_reported_as_error(self):
+        """Test that an exception inside a retrieval layer is recorded as 'error', not 'ok'."""
+        retrieval = HybridRetrieval()
+        neo4j_client = MagicMock()
+        neo4j_client.is_connected.return_value = True
+        neo4j_client.graph_based_context_retrieval = AsyncMock(side_effect=RuntimeError("neo4j down"))
+        stats = {'methods_used': [], 'files_per_method': {}}
+
+        results = await retrieval._run_layers({
+            'graph': lambda: retrieval._graph_layer(neo4j_client, 'repo-1', ['auth'], stats),
+            'summary': layer(['fast']),
+        }, stats)
+
+        assert results == {'graph': [], 'summary': ['fast']}
+        assert stats['layer_status'] == {'graph': 'error', 'summary': 'ok'}
+        assert 'graph' not in stats['methods_used']
+
+
+class TestRetrieveContextLazy:
+    """Tests for HybridRetrieval.retrieve_context_lazy."""
+
+    @pytest.mark.asyncio
+    async def test_hydrates_only_shortlist_and_replaces_failed_loads(self):
+        """Test that only max_files + overfetch candidates are downloaded and failed ones are replaced."""
+        loaded = []
+
+        async def loader(file_info):
+            loaded.append(file_info['path'])
+            if file_info['path'] == 'f1.py':
+                raise RuntimeError("B2 down")
+            return f"content of {file_info['path']}"
+
+        handles = [FileHandle({'path': f"f{n}.py", 'summary': f"File {n}"}, loader) for n in range(10)]
+        retrieval = HybridRetrieval()
+
+        async def summary_layer(files, *args):
+            return [{'file': f, 'score': 1.0 - n / 20, 'method': 'summary'} for n, f in enumerate(files)]
+
+        async def no_matches(*args):
+            return []
+
+        retrieval._summary_layer = summary_layer
+        retrieval._semantic_layer = no_matches
+        retrieval._graph_layer = no_matches
+        retrieval._smart_metadata_layer = no_matches
+
+        final_files, stats = await retrieval.retrieve_context_lazy(
+            'repo-1', 'How is auth handled?', handles, max_files=3, overfetch=2
+        )
+
+        assert sorted(loaded) == ['f0.py', 'f1.py', 'f2.py', 'f3.py', 'f4.py']
+        assert [r['file']['path'] for r in final_files] == ['f0.py', 'f2.py', 'f3.py']
+        assert stats['files_hydrated'] == 5
+        assert stats['retrieval_mode'] == 'lazy'
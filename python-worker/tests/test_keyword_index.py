@@ -0,0 +1,91 @@
+"""
+Unit tests for keyword_index.py - Per-repository BM25 inverted index.
+Tests cover tokenization, field matching and persistence across processes.
+"""
+import pytest
+
+pytest.importorskip("numpy")
+
+from services.keyword_index import KeywordIndex, tokenize
+from services.smart_context_builder import SmartContextBuilder
+
+
+FILES = [
+    {
+        "path": "src/auth/AuthService.py",
+        "content": "class AuthService:\n    def validate_token(self, token):\n        return token\n",
+        "summary": "Handles user authentication and token validation."
+    },
+    {
+        "path": "src/db/models.py",
+        "content": "class User:\n    pass\n\n# the auth service stores tokens here\n",
+        "summary": "Database models."
+    },
+    {
+        "path": "README.md",
+        "content": "# Project\nSetup instructions.\n",
+        "summary": ""
+    },
+]
+
+
+def make_index(tmp_path):
+    return KeywordIndex(enabled=True, index_dir=str(tmp_path), cache_size=4, max_content_chars=10000)
+
+
+class TestTokenize:
+    """Tests for tokenize."""
+
+    def test_identifiers_are_indexed_whole_and_split(self):
+        """Test that snake_case and camelCase identifiers yield whole and part terms."""
+        assert tokenize("validate_token") == ["validate_token", "validate", "token"]
+        assert tokenize("AuthService.py") == ["authservice", "auth", "service", "py"]
+
+
+class TestKeywordIndex:
+    """Tests for KeywordIndex."""
+
+    def test_fields_prefixes_and_bm25_ranking(self, tmp_path):
+        """Test per-field hits, prefix matching and that the defining file ranks first."""
+        index = make_index(tmp_path).build("repo-1", FILES)
+
+        matches = index.match(["auth", "token"])
+
+        assert set(matches) == {"src/auth/AuthService.py", "src/db/models.py"}
+        service = matches["src/auth/AuthService.py"]
+        assert service.matched == 2
+        assert service.field_hits("path") == 1
+        assert service.field_hits("identifier") == 2  # AuthService, validate_token
+        assert service.field_hits("summary") == 2  # "authentication" via prefix, "token"
+        assert service.score > matches["src/db/models.py"].score
+
+        assert index.match(["auth"], prefix=False).keys() == {"src/auth/AuthService.py", "src/db/models.py"}
+        assert index.match(["authen"], fields=("summary",), prefix=False) == {}
+
+    def test_index_persists_and_reloads_after_rebuild(self, tmp_path):
+        """Test that another process loads the index from disk and picks up rebuilds."""
+        make_index(tmp_path).build("repo-1", FILES)
+
+        reader = make_index(tmp_path)
+        assert reader.get("missing") is None
+        index = reader.get("repo-1")
+        assert "README.md" in index
+        assert set(index.match(["setup"])) == {"README.md"}
+
+        make_index(tmp_path).build("repo-1", FILES[:2])
+        assert "README.md" not in reader.get("repo-1")
+        assert reader.get_stats()["loads"] == 2
+
+    def test_smart_context_scores_from_index(self, tmp_path, monkeypatch):
+        """Test that the smart context builder ranks indexed files without scanning content."""
+        import services.keyword_index as keyword_index_module
+
+        index_service = make_index(tmp_path)
+        index_service.build("repo-1", FILES)
+        monkeypatch.setattr(keyword_index_module, "keyword_index", index_service)
+
+        builder = SmartContextBuilder()
+        analysis = builder.analyze_question("How does token validation work in auth?")
+        _, paths = builder.build_smart_context(analysis, FILES, "How does token validation work in auth?", "repo-1")
+
+        assert paths[0] == "src/auth/AuthService.py"
@@ -0,0 +1,131 @@
+"""
+Unit tests for llm_response_cache.py - Deterministic LLM response cache.
+Tests cover cacheability, keys, TTL/LRU behaviour, the shared Redis tier and savings metrics.
+"""
+from unittest.mock import patch
+
+import pytest
+
+from services.llm_response_cache import LLMResponseCache, llm_cache_key
+from services.unified_ai_client import UnifiedAIClient
+
+
+class FakeRedis:
+    """Stores string values like a decode_responses=True redis.asyncio client."""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def setex(self, key, ttl, value):
+        self.data[key] = value
+
+
+def make_cache(**kwargs):
+    kwargs.setdefault("redis_enabled", False)
+    return LLMResponseCache(enabled=True, task_types="summary", **kwargs)
+
+
+class TestLLMResponseCache:
+    """Tests for LLMResponseCache."""
+
+    def test_cacheability_and_keys(self):
+        """Test that only deterministic or cacheable-task calls are cached, keyed on every input."""
+        cache = make_cache()
+
+        assert cache.is_cacheable(0, "generation")
+        assert cache.is_cacheable(0.3, "summary")
+        assert not cache.is_cacheable(0.7, "generation")
+        assert cache.get_stats()["bypassed"] == 1
+
+        key = llm_cache_key("v1", "route", "prompt", 0.0, 500)
+        assert key == llm_cache_key("v1", "route", "prompt", 0, 500)
+        assert key != llm_cache_key("v1", "route", "prompt", 0.3, 500)
+        assert key != llm_cache_key("v1", "route", "prompt", 0, 1000)
+        assert key != llm_cache_key("v1", "other", "prompt", 0, 500)
+        assert key != llm_cache_key("v2", "route", "prompt", 0, 500)
+
+    @pytest.mark.asyncio
+    async def test_memory_tier_lru_ttl_and_savings(self):
+        """Test LRU eviction, TTL expiry and the saved token/latency metrics."""
+        cache = make_cache(max_entries=2)
+
+        await cache.put("r", "a", 0, 100, "A" * 40, latency=1.5)
+        await cache.put("r", "b", 0, 100, "B", latency=1.0)
+        assert await cache.get("r", "a", 0, 100) == "A" * 40  # 'a' becomes most recently used
+        await cache.put("r", "c", 0, 100, "C", latency=1.0)
+
+        assert await cache.get("r", "b", 0, 100) is None
+        stats = cache.get_stats()
+        assert stats["evictions"] == 1
+        assert stats["saved_tokens"] == 10
+        assert stats["saved_latency_seconds"] == pytest.approx(1.5)
+
+        expiring = make_cache(memory_ttl=1)
+        await expiring.put("r", "a", 0, 100, "A", latency=1.0)
+        with patch("services.llm_response_cache.time.time", return_value=10 ** 12):
+            assert await expiring.get("r", "a", 0, 100) is None
+
+    @pytest.mark.asyncio
+    async def test_redis_tier_is_shared_between_processes(self):
+        """Test that a response cached by one process is served from Redis to another."""
+        redis = FakeRedis()
+        with patch.object(LLMResponseCache, "redis", redis):
+            writer = make_cache(redis_enabled=True)
+            reader = make_cache(redis_enabled=True)
+
+            await writer.put("r", "summarize this", 0.3, 1000, "A summary.", latency=2.0)
+            assert await reader.get("r", "summarize this", 0.3, 1000) == "A summary."
+            assert await reader.get("r", "summarize this", 0.3, 1000) == "A summary."
+
+        stats = reader.get_stats()
+        assert stats["redis_hits"] == 1 and stats["memory_hits"] == 1
+        assert stats["saved_latency_seconds"] == pytest.approx(4.0)
+
+    @pytest.mark.asyncio
+    async def test_unified_client_serves_repeated_prompts_from_cache(self, monkeypatch):
+        """Test that generate_content_async calls a provider once for a repeated cacheable prompt."""
+        cache = make_cache()
+        monkeypatch.setattr("services.unified_ai_client.llm_response_cache", cache)
+        client = UnifiedAIClient()
+        calls = []
+
+        async def generate_uncached(prompt, max_tokens, temperature, task_type):
+            calls.append(prompt)
+            return f"response {len(calls)}"
+
+        monkeypatch.setattr(client, "_generate_uncached", generate_uncached)
+
+        first = await client.generate_content_async("same prompt", temperature=0.3, task_type="summary")
+        second = await client.generate_content_async("same prompt", temperature=0.3, task_type="summary")
+        creative = await client.generate_content_async("same prompt", temperature=0.7, task_type="generation")
+
+        assert first == second == "response 1"
+        assert creative == "response 2"
+        assert len(calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_responses_rejected_by_validator_are_not_cached(self, monkeypatch):
+        """Test that a response failing cache_validator is regenerated instead of replayed."""
+        cache = make_cache()
+        monkeypatch.setattr("services.unified_ai_client.llm_response_cache", cache)
+        client = UnifiedAIClient()
+        responses = ["[truncated", '[{"id": 1}]']
+
+        async def generate_uncached(prompt, max_tokens, temperature, task_type):
+            return responses.pop(0)
+
+        monkeypatch.setattr(client, "_generate_uncached", generate_uncached)
+
+        def complete(text):
+            return text.endswith("]")
+
+        results = [
+            await client.generate_content_async("pack", temperature=0.3, task_type="summary", cache_validator=complete)
+            for _ in range(3)
+        ]
+
+        assert results == ["[truncated", '[{"id": 1}]', '[{"id": 1}]']
+        assert cache.stats["stores"] == 1 and cache.stats["memory_hits"] == 1
@@ -0,0 +1,79 @@
+"""
+Unit tests for local_vector_index.py - In-process vector index for hot repositories.
+Tests cover hot-repository loading, version invalidation and offline search.
+"""
+from unittest.mock import patch
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from services.local_vector_index import LocalVectorIndex
+
+
+class FakeQdrant:
+    """Serves repository points like QuadrantVectorClient.get_repository_points."""
+
+    def __init__(self):
+        self.points = {
+            "repo-1": [
+                ("p1", [1.0, 0.0], {"file_path": "auth.py"}),
+                ("p2", [0.6, 0.8], {"file_path": "login.py"}),
+                ("p3", [0.0, 1.0], {"file_path": "README.md"}),
+            ]
+        }
+        self.scrolls = 0
+
+    def get_repository_points(self, repo_id):
+        self.scrolls += 1
+        return list(self.points.get(repo_id, []))
+
+
+@pytest.fixture
+def fake_qdrant():
+    qdrant = FakeQdrant()
+    with patch.object(LocalVectorIndex, "qdrant_client", qdrant):
+        yield qdrant
+
+
+def make_index(tmp_path, **kwargs):
+    return LocalVectorIndex(enabled=True, index_dir=str(tmp_path), memory_budget_bytes=1 << 20, **kwargs)
+
+
+class TestLocalVectorIndex:
+    """Tests for LocalVectorIndex."""
+
+    @pytest.mark.asyncio
+    async def test_hot_repository_is_loaded_and_searched_locally(self, tmp_path, fake_qdrant):
+        """Test that cold repositories defer to Qdrant and hot ones are answered locally."""
+        index = make_index(tmp_path, hot_threshold=2)
+
+        assert await index.search("repo-1", [2.0, 0.0], limit=2, score_threshold=0.5) is None
+        results = await index.search("repo-1", [2.0, 0.0], limit=2, score_threshold=0.5)
+
+        assert [r["id"] for r in results] == ["p1", "p2"]
+        assert results[0]["score"] == pytest.approx(1.0)
+        assert results[1]["metadata"] == {"file_path": "login.py"}
+
+        await index.search("repo-1", [0.0, 1.0], limit=1, score_threshold=0.0)
+        assert fake_qdrant.scrolls == 1
+
+    @pytest.mark.asyncio
+    async def test_writes_invalidate_and_offline_serves_last_snapshot(self, tmp_path, fake_qdrant):
+        """Test that a write forces a reload and that a stale snapshot is used without Qdrant."""
+        index = make_index(tmp_path, hot_threshold=1)
+        await index.search("repo-1", [1.0, 0.0])
+
+        fake_qdrant.points["repo-1"].append(("p4", [1.0, 0.1], {"file_path": "auth_utils.py"}))
+        index.invalidate_for_points([{"id": "p4", "payload": {"repo_id": "repo-1"}}])
+        results = await index.search("repo-1", [1.0, 0.0], limit=5)
+        assert "p4" in [r["id"] for r in results]
+        assert fake_qdrant.scrolls == 2
+
+        # Another process with Qdrant down, after a write it has no snapshot for
+        index.invalidate("repo-1")
+        offline = make_index(tmp_path)
+        assert offline.can_serve("repo-1")
+        results = await offline.search("repo-1", [1.0, 0.0], limit=5, online=False)
+        assert "p4" in [r["id"] for r in results]
+        assert offline.get_stats()["offline_searches"] == 1
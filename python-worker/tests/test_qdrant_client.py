@@ -0,0 +1,192 @@
+"""
+Unit tests for qdrant_client.py - Batched vector search.
+Tests cover search_many's single round trip, repository scoping, meeting search,
+cached health state, collection checks and reconnects.
+"""
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from services.qdrant_client import QuadrantVectorClient
+
+
+def collections_response(names):
+    return SimpleNamespace(collections=[SimpleNamespace(name=name) for name in names])
+
+
+class FakeSyncQdrant:
+    """Sync client with an in-memory collection list; counts admin calls."""
+
+    def __init__(self, collections=(), **kwargs):
+        self.collections = set(collections)
+        self.get_collections_calls = 0
+        self.created = []
+        self.closed = False
+
+    def get_collections(self):
+        self.get_collections_calls += 1
+        return collections_response(self.collections)
+
+    def create_collection(self, collection_name, vectors_config):
+        self.collections.add(collection_name)
+        self.created.append(collection_name)
+
+    def create_payload_index(self, collection_name, field_name, field_schema):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+class FakeAsyncQdrant:
+    """Answers query_batch_points with one hit per request."""
+
+    def __init__(self, **kwargs):
+        self.calls = []
+        self.get_collections_calls = 0
+        self.fail = False
+        self.closed = False
+
+    async def get_collections(self):
+        self.get_collections_calls += 1
+        if self.fail:
+            raise ConnectionError("connection refused")
+        return collections_response(["gittldr_embeddings"])
+
+    async def close(self):
+        self.closed = True
+
+    async def query_batch_points(self, collection_name, requests):
+        self.calls.append((collection_name, requests))
+        return [
+            SimpleNamespace(points=[SimpleNamespace(id=f"p{i}", score=0.9, payload={"file_path": f"{i}.py"})])
+            for i, _ in enumerate(requests)
+        ]
+
+
+@pytest.fixture
+def client():
+    client = QuadrantVectorClient()
+    client.settings = SimpleNamespace(
+        collection_name="gittldr_embeddings", meeting_qdrant_collection="meeting_segments",
+        embedding_dimension=768, qdrant_health_interval=30, qdrant_url="http://qdrant:6333",
+        qdrant_prefer_grpc=False, qdrant_grpc_port=6334, qdrant_api_key=None
+    )
+    client.client = object()
+    client.async_client = FakeAsyncQdrant()
+    client._healthy = True
+    return client
+
+
+class TestSearchMany:
+    """Tests for QuadrantVectorClient.search_many."""
+
+    @pytest.mark.asyncio
+    async def test_queries_share_one_batch_request(self, client):
+        """Test that several query embeddings are searched in one request, scoped to the repository."""
+        results = await client.search_many([[1.0, 0.0], [0.0, 1.0], [0.5, 0.5]], repo_id="repo-1", limit=5)
+
+        assert [[r["id"] for r in query_results] for query_results in results] == [["p0"], ["p1"], ["p2"]]
+        assert len(client.async_client.calls) == 1
+        collection_name, requests = client.async_client.calls[0]
+        assert collection_name == "gittldr_embeddings"
+        assert [r.limit for r in requests] == [5, 5, 5]
+        assert requests[0].filter.must[0].key == "repo_id"
+        assert requests[0].filter.must[0].match.value == "repo-1"
+
+    @pytest.mark.asyncio
+    async def test_single_repo_search_uses_batch_path(self, client):
+        """Test that search_similar_in_repo returns the first (only) result list."""
+        results = await client.search_similar_in_repo([1.0, 0.0], repo_id="repo-1")
+
+        assert results == [{"id": "p0", "score": 0.9, "metadata": {"file_path": "0.py"}}]
+
+
+class TestSearchMeetingSegments:
+    """Tests for QuadrantVectorClient.search_meeting_segments."""
+
+    @pytest.mark.asyncio
+    async def test_queries_the_meeting_collection(self, client, monkeypatch):
+        """Test that meeting search goes through query_batch_points on the meeting collection."""
+        async def collection_exists():
+            return None
+
+        monkeypatch.setattr(client, "_ensure_meeting_collection_exists", collection_exists)
+
+        results = await client.search_meeting_segments([1.0, 0.0], meeting_id="m-1", limit=3)
+
+        assert [r["id"] for r in results] == ["p0"]
+        collection_name, requests = client.async_client.calls[0]
+        assert collection_name == "meeting_segments"
+        assert requests[0].limit == 3
+        assert [(c.key, c.match.value) for c in requests[0].filter.must] == [("meeting_id", "m-1")]
+
+
+class TestConnectionState:
+    """Tests for cached health, collection checks and reconnects."""
+
+    @pytest.mark.asyncio
+    async def test_check_connection_uses_cached_health_until_stale(self, client):
+        """Test that a fresh health state is returned as is and a stale one is probed inline."""
+        client._set_health(True)
+        client.async_client.fail = True
+
+        assert await client.check_connection()  # Fresh: the failing server is not probed
+        assert client.async_client.get_collections_calls == 0
+
+        client._health_checked_at = time.monotonic() - 61  # The background refresh stopped
+        assert not await client.check_connection()
+        assert client.async_client.get_collections_calls == 1
+
+        client.async_client.fail = False
+        assert not await client.check_connection()  # Just probed: cached until stale again
+        client._health_checked_at = time.monotonic() - 61
+        assert await client.check_connection()
+
+    @pytest.mark.asyncio
+    async def test_health_loop_refreshes_in_background(self, client):
+        """Test that the background loop updates the cached state every interval."""
+        client.settings.qdrant_health_interval = 0.01
+        client._set_health(True)
+        client.async_client.fail = True
+
+        task = asyncio.create_task(client._health_loop())
+        await asyncio.sleep(0.05)
+        task.cancel()
+
+        assert not client._healthy
+        assert client.async_client.get_collections_calls >= 1
+
+    def test_collections_are_verified_once(self, client):
+        """Test that a collection is checked (and created) on first use only."""
+        client.client = FakeSyncQdrant(collections=["gittldr_embeddings"])
+
+        client.ensure_collection_exists("repo_chunks", 384)
+        client.ensure_collection_exists("repo_chunks", 384)
+        client.ensure_collection_exists("gittldr_embeddings", 768)
+
+        assert client.client.created == ["repo_chunks"]
+        assert client.client.get_collections_calls == 1
+
+    @pytest.mark.asyncio
+    async def test_reconnect_closes_previous_clients(self, client, monkeypatch):
+        """Test that connecting again closes both old clients and keeps one health loop."""
+        monkeypatch.setattr("services.qdrant_client.QdrantClient", FakeSyncQdrant)
+        monkeypatch.setattr("services.qdrant_client.AsyncQdrantClient", FakeAsyncQdrant)
+        client._initialized = True
+        client.client = client.async_client = None
+
+        await client.connect()
+        first_sync, first_async, health_task = client.client, client.async_client, client._health_task
+        await client.connect()
+
+        assert first_sync.closed and first_async.closed
+        assert client.client is not first_sync and not client.client.closed
+        assert client._health_task is health_task
+        assert client._healthy
+
+        await client.disconnect()
+        assert client.client.closed and client.async_client.closed
+        assert not client._healthy
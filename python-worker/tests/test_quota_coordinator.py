@@ -0,0 +1,124 @@
+"""
+Unit tests for quota_coordinator.py - Redis-shared LLM quota and key health.
+Tests cover the local-only fallback, replay of queued writes and how limiters
+apply shared outcomes.
+"""
+import asyncio
+import time
+
+import pytest
+
+from services.quota_coordinator import (
+    _SCRIPTS, GRANTED, KEY_BUDGET, KEY_COOLDOWN, HealthTracker, QuotaCoordinator, _RedisState
+)
+from services.rate_limiter import RateBudget, RateLimiter, RateLimitTimeout
+
+
+def make_coordinator(**kwargs):
+    # Nothing listens on port 1: every Redis call fails fast
+    return QuotaCoordinator(enabled=True, redis_url="redis://127.0.0.1:1", sync_interval=0,
+                            retry_interval=60, timeout=0.5, **kwargs)
+
+
+class TestQuotaCoordinator:
+    """Tests for QuotaCoordinator."""
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_local_only_mode(self):
+        """Test that limits and health keep working locally when Redis is unreachable."""
+        coordinator = make_coordinator()
+        limiter = RateLimiter("test", {"generate": RateBudget(key_rpm=60)}, coordinator=coordinator)
+        health = HealthTracker("test", reset_after=60, coordinator=coordinator)
+
+        assert await limiter.acquire("k1", max_wait=1) < 0.5
+        limiter.cooldown(60, key="k2")
+        assert health.record_failure("k1") == 1
+        assert health.record_failure("k1") == 2
+
+        stats = coordinator.get_stats()
+        assert stats["mode"] == "local"
+        assert stats["redis_errors"] == 1  # Not retried until retry_interval passes
+        assert stats["pending_writes"] == 3  # Replayed once Redis is back
+        assert not limiter.is_available("k2")
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_keeps_writes_queued(self):
+        """Test that writes taken by a failed pipeline are queued again and sent by the next sync."""
+        fakeredis = pytest.importorskip("fakeredis")
+        pytest.importorskip("lupa")
+        client = fakeredis.FakeAsyncRedis(decode_responses=True)
+        pipeline = client.pipeline
+        failures = [ConnectionError("connection reset")]
+
+        def flaky_pipeline(**kwargs):
+            pipe = pipeline(**kwargs)
+            if failures:
+                error = failures.pop()
+
+                async def execute(*args, **kw):
+                    raise error
+
+                pipe.execute = execute
+            return pipe
+
+        client.pipeline = flaky_pipeline
+        coordinator = make_coordinator()
+        coordinator._states[asyncio.get_running_loop()] = _RedisState(
+            client, {name: client.register_script(source) for name, source in _SCRIPTS.items()}
+        )
+        health = HealthTracker("test", reset_after=60, coordinator=coordinator)
+
+        health.record_failure("k1")
+        health.record_failure("k2")
+        await coordinator.flush()
+        assert coordinator.stats["redis_errors"] == 1
+        assert coordinator.get_stats()["pending_writes"] == 2
+
+        coordinator._down_until = 0  # Redis is back
+        health.reset("k2")
+        assert await coordinator.sync(force=True)
+
+        assert coordinator.get_stats()["pending_writes"] == 0
+        assert coordinator.stats["flushed_writes"] == 3
+        assert set(await client.hgetall(coordinator._health_key("test"))) == {"k1"}
+        assert health.failures("k1") == 1 and health.failures("k2") == 0
+        await client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_limiter_applies_shared_outcomes(self, monkeypatch):
+        """Test that shared cooldowns and spent shared budgets make the limiter wait."""
+        coordinator = QuotaCoordinator(enabled=False)
+        limiter = RateLimiter("test", {"generate": RateBudget(key_rpm=60)}, coordinator=coordinator)
+        outcomes = [(KEY_BUDGET, 0.2), (GRANTED, 0.0), (KEY_COOLDOWN, 60.0)]
+
+        async def shared_acquire(name, key, buckets):
+            assert [bucket[0] for bucket in buckets] == ["generate:k:requests"]
+            return outcomes.pop(0)
+
+        monkeypatch.setattr(coordinator, "acquire", shared_acquire)
+
+        waited = await limiter.acquire("k")
+        assert waited == pytest.approx(0.2, abs=0.1)
+
+        with pytest.raises(RateLimitTimeout):
+            await limiter.acquire("k", max_wait=1)
+        assert limiter.cooldown_remaining("k") > 59
+
+
+class TestHealthTracker:
+    """Tests for HealthTracker."""
+
+    def test_failure_streaks_expire_and_reset(self):
+        """Test that streaks count consecutive failures and end on expiry or reset."""
+        health = HealthTracker("test", reset_after=0.05)
+
+        health.record_failure("a")
+        assert health.record_failure("a") == 2
+        assert health.last_failure("a") == pytest.approx(time.time(), abs=1)
+        time.sleep(0.06)
+        assert health.failures("a") == 0
+        assert health.last_failure("a") is None
+
+        health.record_failure("a")
+        health.reset("a")
+        assert health.failures("a") == 0
@@ -0,0 +1,104 @@
+"""
+Unit tests for rate_limiter.py - Asyncio-native LLM rate limiting.
+Tests cover FIFO ordering, non-blocking waits, cooldowns and wait limits.
+"""
+import asyncio
+import time
+
+import pytest
+
+from services.rate_limiter import RateBudget, RateLimiter, RateLimitTimeout
+
+
+def make_limiter(**budget):
+    return RateLimiter("test", {"generate": RateBudget(**budget)})
+
+
+class TestRateLimiter:
+    """Tests for RateLimiter."""
+
+    @pytest.mark.asyncio
+    async def test_waiters_are_served_in_arrival_order(self):
+        """Test that queued requests on the shared IP budget run FIFO."""
+        limiter = make_limiter(ip_rpm=600, ip_burst=1)  # one slot every 0.1s
+        order = []
+
+        async def request(name):
+            await limiter.acquire(name)
+            order.append(name)
+
+        tasks = []
+        for name in ["a", "b", "c", "d"]:
+            tasks.append(asyncio.create_task(request(name)))
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+
+        assert order == ["a", "b", "c", "d"]
+        assert limiter.get_stats()["waited"] == 3
+
+    @pytest.mark.asyncio
+    async def test_waiting_does_not_block_the_event_loop(self):
+        """Test that a throttled request yields to other coroutines."""
+        limiter = make_limiter(ip_rpm=300, ip_burst=1)  # 0.2s between requests
+        await limiter.acquire("k")
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        waited = await limiter.acquire("k")
+        task.cancel()
+
+        assert waited == pytest.approx(0.2, abs=0.1)
+        assert ticks >= 5
+
+    @pytest.mark.asyncio
+    async def test_cooldowns_and_max_wait(self):
+        """Test key and IP cooldowns, and giving up instead of waiting too long."""
+        limiter = make_limiter(key_rpm=60)
+
+        limiter.cooldown(60, key="k1")
+        assert not limiter.is_available("k1")
+        assert limiter.is_available("k2")
+        with pytest.raises(RateLimitTimeout):
+            await limiter.acquire("k1", max_wait=1)
+        assert await limiter.acquire("k2", max_wait=1) < 0.01
+
+        limiter.cooldown(60)
+        assert not limiter.is_available("k2")
+        started = time.monotonic()
+        with pytest.raises(RateLimitTimeout) as exc_info:
+            await limiter.acquire("k3", max_wait=1)
+        assert time.monotonic() - started < 0.5
+        assert exc_info.value.retry_after > 59
+
+        limiter.clear_cooldown()
+        limiter.clear_cooldown("k1")
+        assert limiter.is_available("k1")
+        assert limiter.get_stats()["timeouts"] == 2
+
+    @pytest.mark.asyncio
+    async def test_key_entering_cooldown_gives_up_its_ip_slot(self):
+        """Test that a waiter whose key cools down requeues and lets other keys through."""
+        limiter = make_limiter(ip_rpm=600, ip_burst=1)
+        await limiter.acquire("a")
+        served = []
+
+        async def request(name):
+            await limiter.acquire(name, max_wait=1)
+            served.append(name)
+
+        blocked = asyncio.create_task(request("a"))
+        await asyncio.sleep(0)
+        other = asyncio.create_task(request("b"))
+        await asyncio.sleep(0)
+        limiter.cooldown(60, key="a")
+
+        await other
+        with pytest.raises(RateLimitTimeout):
+            await blocked
+        assert served == ["b"]
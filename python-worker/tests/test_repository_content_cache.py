@@ -0,0 +1,65 @@
+"""
+Unit tests for repository_content_cache.py - Repository content cache.
+Tests cover LRU byte budget, disk tier sharing and invalidation.
+"""
+import pytest
+
+from services.repository_content_cache import RepositoryContentCache
+
+
+class TestRepositoryContentCacheMemory:
+    """Tests for the in-process LRU tier."""
+
+    def test_put_and_get(self, tmp_path):
+        """Test that stored content is returned from memory."""
+        cache = RepositoryContentCache(memory_budget_bytes=1024, cache_dir=str(tmp_path), disk_enabled=False)
+
+        cache.put("repo-1", "repositories/repo-1/files/a.py", "print('a')")
+
+        assert cache.get("repo-1", "repositories/repo-1/files/a.py") == "print('a')"
+        assert cache.get_stats()["memory_hits"] == 1
+
+    def test_miss_is_counted(self, tmp_path):
+        """Test that unknown keys are counted as misses."""
+        cache = RepositoryContentCache(memory_budget_bytes=1024, cache_dir=str(tmp_path), disk_enabled=False)
+
+        assert cache.get("repo-1", "missing") is None
+        assert cache.get_stats()["misses"] == 1
+
+    def test_byte_budget_evicts_least_recently_used(self, tmp_path):
+        """Test that the byte budget evicts the oldest entries first."""
+        cache = RepositoryContentCache(memory_budget_bytes=10, cache_dir=str(tmp_path), disk_enabled=False)
+
+        cache.put("repo-1", "a", "12345")
+        cache.put("repo-1", "b", "12345")
+        cache.get("repo-1", "a")  # 'a' becomes most recently used
+        cache.put("repo-1", "c", "12345")
+
+        assert cache.get("repo-1", "b") is None
+        assert cache.get("repo-1", "a") == "12345"
+        assert cache.get_stats()["memory_bytes"] <= 10
+
+
+class TestRepositoryContentCacheDisk:
+    """Tests for the on-disk tier and invalidation."""
+
+    def test_disk_tier_shared_between_instances(self, tmp_path):
+        """Test that a second cache instance reads entries written by the first."""
+        writer = RepositoryContentCache(memory_budget_bytes=1024, cache_dir=str(tmp_path), disk_enabled=True)
+        reader = RepositoryContentCache(memory_budget_bytes=1024, cache_dir=str(tmp_path), disk_enabled=True)
+
+        writer.put("repo-1", "a", "content")
+
+        assert reader.get("repo-1", "a") == "content"
+        assert reader.get_stats()["disk_hits"] == 1
+
+    def test_invalidate_drops_all_entries(self, tmp_path):
+        """Test that invalidation bumps the version and hides old entries."""
+        cache = RepositoryContentCache(memory_budget_bytes=1024, cache_dir=str(tmp_path), disk_enabled=True)
+        cache.put("repo-1", "a", "old")
+        old_version = cache.get_version("repo-1")
+
+        new_version = cache.invalidate("repo-1")
+
+        assert new_version != old_version
+        assert cache.get("repo-1", "a") is None
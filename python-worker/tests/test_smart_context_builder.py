@@ -0,0 +1,68 @@
+"""
+Unit tests for smart_context_builder.py - Question-aware context selection.
+Tests cover metadata-only shortlisting before file contents are downloaded.
+"""
+import pytest
+
+from services.smart_context_builder import SmartContextBuilder
+
+
+FILES = [
+    {"path": "docs/guide.md", "summary": "User guide.", "size": 4000},
+    {"path": "src/auth/session.py", "summary": "Login sessions and token refresh.", "size": 2500},
+    {"path": "src/utils/strings.py", "summary": "String helpers.", "size": 50},
+    {"path": "src/payments/billing.py", "summary": "Invoices.", "size": 3000},
+    {"path": "src/auth/tokens.py", "summary": "", "size": 1200},
+]
+
+
+@pytest.fixture
+def builder():
+    return SmartContextBuilder()
+
+
+class TestRankByMetadata:
+    """Tests for SmartContextBuilder.rank_by_metadata."""
+
+    def test_matches_rank_first_and_are_padded_by_importance(self, builder):
+        """Test that path/summary matches lead and unmatched files fill the limit by default importance."""
+        question = "Where are sessions refreshed?"
+        analysis = builder.analyze_question(question)
+
+        ranked = builder.rank_by_metadata(analysis, FILES, question, limit=4)
+
+        assert [f["path"] for _, f in ranked] == [
+            "src/auth/session.py",  # Summary match
+            "src/payments/billing.py",  # Padding: large code files, then shallower paths
+            "src/auth/tokens.py",
+            "docs/guide.md"
+        ]
+        assert ranked[0][0] > 0 and all(score == 0 for score, _ in ranked[1:])
+
+    def test_no_metadata_match_still_shortlists_files(self, builder):
+        """Test that a question matching only file contents still gets a full shortlist to hydrate."""
+        question = "Which function computes the checksum?"
+        analysis = builder.analyze_question(question)
+
+        ranked = builder.rank_by_metadata(analysis, FILES, question, limit=3)
+
+        assert len(ranked) == 3
+        assert "src/utils/strings.py" not in [f["path"] for _, f in ranked]  # Smallest file is left out
+
+    def test_keyword_index_finds_content_only_matches(self, builder, tmp_path, monkeypatch):
+        """Test that files matching the question only in their content are ranked from the keyword index."""
+        pytest.importorskip("numpy")
+        import services.keyword_index as keyword_index_module
+        from services.keyword_index import KeywordIndex
+
+        index_service = KeywordIndex(enabled=True, index_dir=str(tmp_path), cache_size=4, max_content_chars=10000)
+        contents = {"src/utils/strings.py": "def checksum(data):\n    return sum(data) % 256\n"}
+        index_service.build("repo-1", [{**f, "content": contents.get(f["path"], "pass")} for f in FILES])
+        monkeypatch.setattr(keyword_index_module, "keyword_index", index_service)
+        question = "Which function computes the checksum?"
+        analysis = builder.analyze_question(question)
+
+        ranked = builder.rank_by_metadata(analysis, FILES, question, limit=3, repository_id="repo-1")
+
+        assert ranked[0][1]["path"] == "src/utils/strings.py"
+        assert ranked[0][0] > 0
@@ -0,0 +1,135 @@
+"""
+Unit tests for status_publisher.py - Coalescing task status publisher.
+Tests cover coalescing within the window, terminal flushes, batched writes,
+ordering against a batch in flight and failed flushes.
+"""
+import asyncio
+import json
+from unittest.mock import patch
+
+import pytest
+
+from services.redis_client import redis_client
+from services.status_publisher import StatusPublisher
+
+
+class FakePipeline:
+    """Records queued commands; execute() counts as one round trip."""
+
+    def __init__(self, executed):
+        self.commands = []
+        self.executed = executed
+
+    def set(self, key, value, ex=None):
+        self.commands.append(("set", key, value))
+
+    def publish(self, channel, message):
+        self.commands.append(("publish", channel, json.loads(message)))
+
+    async def execute(self):
+        self.executed.append(self.commands)
+
+
+@pytest.fixture
+def executed():
+    round_trips = []
+    with patch.object(redis_client, "pipeline", side_effect=lambda transaction=False: FakePipeline(round_trips)):
+        yield round_trips
+
+
+class TestStatusPublisher:
+    """Tests for coalesced, pipelined status updates."""
+
+    @pytest.mark.asyncio
+    async def test_intermediate_updates_are_coalesced(self, executed):
+        """Test that rapid updates of a job are written once, with the latest status."""
+        publisher = StatusPublisher(window_seconds=0.01)
+
+        await publisher.publish_status("job-1", "analyzing")
+        await publisher.publish_status("job-1", "retrieving", {"files": 3})
+        await publisher.publish_status("job-1", "generating")
+        await publisher.publish_status("job-2", "processing")
+        assert executed == []
+
+        await asyncio.sleep(0.05)
+
+        assert len(executed) == 1
+        commands = executed[0]
+        assert ("set", "task:job-1:status", "generating") in commands
+        assert ("set", "task:job-1:result", json.dumps({"files": 3})) in commands
+        assert ("set", "task:job-2:status", "processing") in commands
+        assert len([c for c in commands if c[0] == "publish"]) == 2
+        assert publisher.get_stats()["coalesced"] == 2
+
+    @pytest.mark.asyncio
+    async def test_terminal_status_flushes_immediately(self, executed):
+        """Test that a terminal status replaces the buffered update and is written at once."""
+        publisher = StatusPublisher(window_seconds=10)
+
+        await publisher.publish_status("job-1", "processing")
+        await publisher.publish_status("job-1", "failed", {"error": "boom"})
+
+        assert len(executed) == 1
+        message = [c for c in executed[0] if c[0] == "publish"][0][2]
+        assert message["status"] == "failed"
+        assert message["error"] == "boom"
+        assert publisher.get_stats()["buffered"] == 0
+
+    @pytest.mark.asyncio
+    async def test_terminal_flush_waits_for_batch_in_flight(self):
+        """Test that a terminal status is written after an older batch that is still executing."""
+        executed = []
+        release = asyncio.Event()
+        pipelines = []
+
+        class SlowPipeline(FakePipeline):
+            async def execute(self):
+                if self is pipelines[0]:
+                    await release.wait()  # The batch is slow, the terminal flush is not
+                self.executed.append(self.commands)
+
+        def pipeline(transaction=False):
+            pipelines.append(SlowPipeline(executed))
+            return pipelines[-1]
+
+        publisher = StatusPublisher(window_seconds=0.01)
+        with patch.object(redis_client, "pipeline", side_effect=pipeline):
+            await publisher.publish_status("job-1", "processing")
+            await asyncio.sleep(0.05)  # Batch flush is now waiting on Redis
+            terminal = asyncio.create_task(publisher.publish_status("job-1", "completed", {"ok": True}))
+            await asyncio.sleep(0.01)
+            release.set()
+            await terminal
+
+        statuses = [[c[2] for c in commands if c[1] == "task:job-1:status"] for commands in executed]
+        assert statuses == [["processing"], ["completed"]]
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_keeps_updates_buffered(self):
+        """Test that a failed flush buffers its updates again without replacing newer ones."""
+        executed = []
+        failures = [ConnectionError("connection reset")]
+
+        class FlakyPipeline(FakePipeline):
+            async def execute(self):
+                if failures:
+                    await asyncio.sleep(0.02)
+                    raise failures.pop()
+                self.executed.append(self.commands)
+
+        publisher = StatusPublisher(window_seconds=0.01)
+        with patch.object(redis_client, "pipeline", side_effect=lambda transaction=False: FlakyPipeline(executed)):
+            await publisher.publish_status("job-1", "retrieving", {"files": 3})
+            await publisher.publish_status("job-2", "processing")
+            await asyncio.sleep(0.015)  # Batch flush in flight
+            await publisher.publish_status("job-1", "generating")
+            await asyncio.sleep(0.05)
+
+            assert executed == []
+            assert publisher.get_stats()["buffered"] == 2
+            assert await publisher.flush() == 2
+
+        commands = executed[0]
+        assert ("set", "task:job-1:status", "generating") in commands
+        assert ("set", "task:job-1:result", json.dumps({"files": 3})) in commands
+        assert ("set", "task:job-2:status", "processing") in commands
@@ -0,0 +1,132 @@
+"""
+Unit tests for summarization_scheduler.py - concurrent file summarization.
+Tests cover AIMD concurrency, file prioritization, streaming and resumption.
+"""
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from services.rate_limiter import RateLimitTimeout
+from services.redis_client import redis_client
+from services.summarization_scheduler import (
+    AdaptiveConcurrency, SummarizationScheduler, summary_priority
+)
+from utils.hashing import content_hash
+
+
+def make_scheduler(**kwargs):
+    kwargs.setdefault("congested", lambda: False)
+    return SummarizationScheduler(stream_batch_size=2, stream_interval=60, progress_ttl=60, **kwargs)
+
+
+class TestAdaptiveConcurrency:
+    """Tests for AdaptiveConcurrency."""
+
+    @pytest.mark.asyncio
+    async def test_grows_on_success_and_halves_once_per_round(self):
+        """Test additive increase and a single halving for a round of rate-limited requests."""
+        concurrency = AdaptiveConcurrency(initial=2, maximum=8)
+
+        for _ in range(4):
+            await concurrency.release(await concurrency.acquire())
+        assert concurrency.get_stats()["limit"] == 3
+
+        first = await concurrency.acquire()
+        second = await concurrency.acquire()
+        await concurrency.release(first, rate_limited=True)
+        await concurrency.release(second, rate_limited=True)  # Sent before the decrease
+        assert concurrency.get_stats()["limit"] == 1
+        assert concurrency.stats["decreases"] == 1
+
+    @pytest.mark.asyncio
+    async def test_map_respects_limit_and_keeps_order(self):
+        """Test that map never exceeds the limit and returns results (or errors) in order."""
+        scheduler = make_scheduler(initial_concurrency=3, max_concurrency=3)
+        running = 0
+        peak = 0
+
+        async def call(n):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01 * (5 - n))
+            running -= 1
+            if n == 2:
+                raise ValueError("boom")
+            return n * 10
+
+        results = await scheduler.map(list(range(5)), call)
+
+        assert peak == 3
+        assert results[:2] == [0, 10] and results[3:] == [30, 40]
+        assert isinstance(results[2], ValueError)
+
+
+class TestSummarizationScheduler:
+    """Tests for SummarizationScheduler."""
+
+    def test_summary_priority(self):
+        """Test that READMEs, entry points and configs sort ahead of other files."""
+        paths = ["src/utils/helpers.py", "package.json", "docs/guide.md", "src/main.py", "README.md"]
+        assert sorted(paths, key=summary_priority) == [
+            "README.md", "src/main.py", "package.json", "docs/guide.md", "src/utils/helpers.py"
+        ]
+
+    @pytest.mark.asyncio
+    async def test_streams_summaries_and_resumes(self, monkeypatch):
+        """Test that summaries are streamed in batches and reused by a retried task."""
+        pipe = MagicMock()
+        pipe.execute = AsyncMock()
+        mock_redis = MagicMock()
+        mock_redis.pipeline.return_value = pipe
+        mock_redis.hgetall = AsyncMock(return_value={
+            "README.md": json.dumps({"sha": content_hash("# Demo"), "summary": "Project readme"}),
+            "app.py": json.dumps({"sha": content_hash("old"), "summary": "Stale summary"})
+        })
+        monkeypatch.setattr(redis_client, "redis", mock_redis)
+
+        files = [
+            {"path": "lib/util.py", "content": "def util(): pass"},
+            {"path": "app.py", "content": "print('app')"},
+            {"path": "README.md", "content": "# Demo"}
+        ]
+        requested = []
+
+        async def summarize(batch):
+            requested.extend(file_data["path"] for file_data in batch)
+            return [f"Summary of {file_data['path']}" for file_data in batch]
+
+        stats = await make_scheduler(initial_concurrency=1).run("repo-1", files, summarize, MagicMock())
+
+        assert requested == ["app.py", "lib/util.py"]  # Unchanged README reused, entry point first
+        assert [f["summary"] for f in files] == ["Summary of lib/util.py", "Summary of app.py", "Project readme"]
+        assert stats["created"] == 2 and stats["resumed"] == 1 and stats["queued"] == 2
+        assert stats["batches"] == 2
+
+        pushed = [json.loads(update) for update in pipe.lpush.call_args.args[1:]]
+        assert {update["file_path"] for update in pushed} == {"app.py", "lib/util.py"}
+        assert pipe.hset.call_args.args[0] == "file_summary_progress:repo-1"
+        assert set(pipe.hset.call_args.kwargs["mapping"]) == {"app.py", "lib/util.py"}
+
+    @pytest.mark.asyncio
+    async def test_returned_rate_limit_errors_halve_concurrency(self, monkeypatch):
+        """Test that a rate limit returned for one file of a packed batch still halves the limit."""
+        mock_redis = MagicMock()
+        mock_redis.pipeline.return_value.execute = AsyncMock()
+        mock_redis.hgetall = AsyncMock(return_value={})
+        monkeypatch.setattr(redis_client, "redis", mock_redis)
+        files = [{"path": f"src/f{n}.py", "content": f"x = {n}"} for n in range(4)]
+
+        async def summarize(batch):
+            return [RateLimitTimeout("gemini", 5.0) if file_data["path"] == "src/f1.py" else "ok"
+                    for file_data in batch]
+
+        scheduler = make_scheduler(initial_concurrency=4, max_concurrency=4)
+        stats = await scheduler.run("repo-1", files, summarize, MagicMock(),
+                                    pack=lambda pending: [pending[:2], pending[2:]])
+
+        assert stats["created"] == 3 and stats["failed"] == 1
+        assert stats["concurrency"]["limit"] == 2
+        assert stats["concurrency"]["decreases"] == 1
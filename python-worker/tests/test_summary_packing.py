@@ -0,0 +1,57 @@
+"""
+Unit tests for summary_packing.py - packed multi-file summarization.
+Tests cover grouping by token budget and validation of packed responses.
+"""
+import json
+
+from services.summary_packing import format_packed_text, pack_items, parse_packed_summaries
+
+
+ITEMS = [
+    {"name": "README.md", "text": "# Demo", "context": "file (markdown)"},
+    {"name": "src/app.py", "text": "print('hi')", "context": "file (python)"},
+    {"name": "src/util.py", "text": "def f(): pass", "context": "file (python)"}
+]
+
+
+class TestPackItems:
+    """Tests for pack_items."""
+
+    def test_groups_in_order_up_to_budgets(self):
+        """Test that packs respect token and size limits and large items go alone."""
+        texts = ["a" * 400, "b" * 400, "c" * 8000, "d" * 400, "e" * 400, "f" * 400]
+        packs = pack_items(texts, text=lambda t: t, max_tokens=250, max_items=2, item_max_tokens=1000)
+
+        assert [[t[0] for t in pack] for pack in packs] == [["a", "b"], ["c"], ["d", "e"], ["f"]]
+
+
+class TestParsePackedSummaries:
+    """Tests for parse_packed_summaries."""
+
+    def test_splits_fenced_json_array(self):
+        """Test that a fenced JSON array is split into summaries by item."""
+        response = "```json\n" + json.dumps([
+            {"id": 1, "name": "README.md", "summary": "Project overview."},
+            {"id": 2, "name": "./src/app.py", "summary": "Prints a greeting."},
+            {"id": 3, "name": "src/util.py", "summary": "Helper function."}
+        ]) + "\n```"
+
+        assert parse_packed_summaries(response, ITEMS) == {
+            0: "Project overview.", 1: "Prints a greeting.", 2: "Helper function."
+        }
+        assert "=== ITEM 2: src/app.py (file (python)) ===" in format_packed_text(ITEMS)
+
+    def test_drops_invalid_entries(self):
+        """Test that mismatched, empty, unknown and duplicate entries are left for single requests."""
+        response = json.dumps([
+            {"id": 1, "name": "src/app.py", "summary": "Wrong file."},
+            {"id": 2, "summary": "Prints a greeting."},
+            {"id": 3, "summary": "First."},
+            {"id": 3, "summary": "Second."},
+            {"id": 7, "summary": "Unknown."},
+            {"id": 1, "summary": ""}
+        ])
+
+        assert parse_packed_summaries(response, ITEMS) == {1: "Prints a greeting."}
+        assert parse_packed_summaries("Sorry, I cannot help with that.", ITEMS) == {}
+        assert parse_packed_summaries("[not json]", ITEMS) == {}
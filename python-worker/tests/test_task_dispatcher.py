@@ -0,0 +1,127 @@
+"""
+Unit tests for task_dispatcher.py - Concurrent task dispatcher.
+Tests cover global and per-type concurrency caps, deferral order and draining.
+"""
+import asyncio
+
+import pytest
+
+from services.task_dispatcher import TaskDispatcher, parse_type_limits
+
+
+class RecordingHandler:
+    """Handler that blocks each task until released."""
+
+    def __init__(self):
+        self.running = []
+        self.started = []
+        self.releases = {}
+
+    async def __call__(self, task_data):
+        task_id = task_data["id"]
+        self.started.append(task_id)
+        self.running.append(task_id)
+        self.releases[task_id] = asyncio.Event()
+        try:
+            await self.releases[task_id].wait()
+        finally:
+            self.running.remove(task_id)
+
+    def release(self, task_id):
+        self.releases[task_id].set()
+
+
+def task(task_id, task_type):
+    return {"id": task_id, "type": task_type}
+
+
+class TestParseTypeLimits:
+    """Tests for the "type:n,..." settings format."""
+
+    def test_parses_valid_entries_and_skips_invalid(self):
+        """Test that malformed entries are ignored."""
+        assert parse_type_limits("issue_fix:1, answer_question:4,bad,x:y") == {
+            "issue_fix": 1,
+            "answer_question": 4
+        }
+
+
+class TestTaskDispatcher:
+    """Tests for concurrent dispatching."""
+
+    @pytest.mark.asyncio
+    async def test_type_cap_does_not_block_other_types(self):
+        """Test that a saturated type is deferred while other types keep running."""
+        handler = RecordingHandler()
+        dispatcher = TaskDispatcher(handler, max_concurrency=3, type_limits={"issue_fix": 1})
+
+        dispatcher.submit(task("fix-1", "issue_fix"))
+        dispatcher.submit(task("fix-2", "issue_fix"))
+        dispatcher.submit(task("qa-1", "answer_question"))
+        await asyncio.sleep(0)
+
+        assert sorted(handler.running) == ["fix-1", "qa-1"]
+        assert dispatcher.get_stats()["pending"] == 1
+
+        handler.release("fix-1")
+        await asyncio.sleep(0.01)
+
+        assert "fix-2" in handler.running
+        assert dispatcher.get_stats()["deferred"] == 1
+
+    @pytest.mark.asyncio
+    async def test_global_cap_and_capacity(self):
+        """Test that no more than max_concurrency tasks run and capacity reflects the buffer."""
+        handler = RecordingHandler()
+        dispatcher = TaskDispatcher(handler, max_concurrency=2, max_pending=1)
+
+        for i in range(3):
+            dispatcher.submit(task(f"t{i}", "embed_file"))
+        await asyncio.sleep(0)
+
+        assert len(handler.running) == 2
+        assert not dispatcher.has_capacity()
+        assert await dispatcher.wait_for_capacity(timeout=0.01) is False
+
+        handler.release("t0")  # t2 takes the freed slot
+        await asyncio.sleep(0.01)
+        assert "t2" in handler.running
+        assert not dispatcher.has_capacity()
+
+        handler.release("t1")
+        assert await dispatcher.wait_for_capacity(timeout=1) is True
+
+    @pytest.mark.asyncio
+    async def test_full_buffer_of_capped_tasks_still_accepts_interactive(self):
+        """Test that analyses deferred behind their type cap do not block answer_question."""
+        handler = RecordingHandler()
+        dispatcher = TaskDispatcher(handler, max_concurrency=4, type_limits={"full_analysis": 1},
+                                    interactive_types=["answer_question"])
+
+        for i in range(5):
+            dispatcher.submit(task(f"analysis-{i}", "full_analysis"))
+        await asyncio.sleep(0)
+
+        assert handler.running == ["analysis-0"]
+        assert dispatcher.free_slots() == 0
+        assert dispatcher.interactive_slots() == 3
+        assert await dispatcher.wait_for_capacity(timeout=0.01) is True
+
+        dispatcher.submit(task("qa-1", "answer_question"))
+        await asyncio.sleep(0)
+        assert handler.running == ["analysis-0", "qa-1"]
+        assert dispatcher.interactive_slots() == 2
+
+    @pytest.mark.asyncio
+    async def test_drain_waits_then_cancel_all(self):
+        """Test that drain times out on stuck tasks and cancel_all stops them."""
+        handler = RecordingHandler()
+        dispatcher = TaskDispatcher(handler, max_concurrency=2)
+        dispatcher.submit(task("done", "qna"))
+        dispatcher.submit(task("stuck", "qna"))
+        await asyncio.sleep(0)
+        handler.release("done")
+
+        assert await dispatcher.drain(timeout=0.05) is False
+        assert await dispatcher.cancel_all() == 1
+        assert dispatcher.in_flight == 0
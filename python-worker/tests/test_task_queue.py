@@ -0,0 +1,161 @@
+"""
+Unit tests for task_queue.py - Reliable task queue.
+Runs the real fetch script against fakeredis (with Lua) to cover lane triage,
+leases, redelivery, dead-lettering, acknowledgement and lease heartbeats.
+"""
+import json
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")
+
+from services.redis_client import redis_client
+from services.task_queue import ReliableTaskQueue
+
+
+@pytest.fixture
+async def queue(monkeypatch):
+    redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+    monkeypatch.setattr(redis_client, "redis", redis)
+    task_queue = ReliableTaskQueue(queue_name="test_tasks")
+    task_queue.interactive_types = ["answer_question"]
+    task_queue.visibility_timeout = 60
+    task_queue.max_attempts = 2
+    yield task_queue
+    await redis.aclose()
+
+
+def set_time(monkeypatch, now):
+    monkeypatch.setattr("services.task_queue.time.time", lambda: now)
+
+
+async def push(queue, *jobs):
+    for job in jobs:
+        await queue.redis.lpush(queue.intake_key, job if isinstance(job, str) else json.dumps(job))
+
+
+class TestReliableTaskQueue:
+    """Tests for ReliableTaskQueue."""
+
+    @pytest.mark.asyncio
+    async def test_triages_lanes_and_dead_letters_invalid_json(self, queue, monkeypatch):
+        """Test that interactive jobs are leased first and unparseable payloads go to :dead."""
+        set_time(monkeypatch, 1000)
+        await push(queue, {"type": "full_analysis", "n": 1}, "not json", {"type": "answer_question", "n": 2})
+
+        first = await queue.fetch(1)
+        second = await queue.fetch(5)
+
+        assert [t.task_data["n"] for t in first] == [2] and first[0].lane == "interactive"
+        assert [t.task_data["n"] for t in second] == [1] and second[0].lane == "batch"
+        assert await queue.redis.lrange(queue.dead_key, 0, -1) == ["not json"]
+        assert (await queue.get_depths())["leased"] == 2
+
+    @pytest.mark.asyncio
+    async def test_dead_letters_payloads_that_are_not_jobs(self, queue, monkeypatch):
+        """Test that JSON arrays, scalars and untyped objects never strand the jobs leased with them."""
+        set_time(monkeypatch, 1000)
+        await push(queue, "[1,2]", {"type": "answer_question", "n": 1}, '"text"', {"n": 2})
+        # Already triaged into a lane (e.g. by an older worker) but not a job object
+        await queue.redis.lpush(queue.interactive_key, json.dumps({"lease_id": "old-1", "job": "[3]"}))
+
+        leased = await queue.fetch(5)
+
+        assert [t.task_data["n"] for t in leased] == [1]
+        assert sorted(await queue.redis.lrange(queue.dead_key, 0, -1)) == sorted(
+            ["[1,2]", '"text"', json.dumps({"n": 2}), "[3]"]
+        )
+        assert await queue.redis.zrange(queue.inflight_key, 0, -1) == [leased[0].receipt]
+        assert await queue.redis.hkeys(queue.leased_key) == [leased[0].receipt]
+        assert queue.stats["dead_lettered"] == 4
+
+    @pytest.mark.asyncio
+    async def test_identical_payloads_get_separate_leases(self, queue, monkeypatch):
+        """Test that acking one of two identical jobs keeps the other's lease and redelivery."""
+        set_time(monkeypatch, 1000)
+        job = {"type": "full_analysis", "repositoryId": "r1"}
+        await push(queue, job, job)
+
+        first, second = await queue.fetch(2)
+        assert first.receipt != second.receipt
+        await queue.ack(first)
+        assert await queue.redis.zrange(queue.inflight_key, 0, -1) == [second.receipt]
+
+        # The other worker crashes: its lease expires and the job is redelivered
+        set_time(monkeypatch, 1061)
+        redelivered = await queue.fetch(1)
+        assert [t.task_data for t in redelivered] == [job]
+        assert redelivered[0].attempts == 2
+        assert redelivered[0].receipt != second.receipt
+
+        await queue.ack(second)  # A late ack from the stalled worker
+        assert await queue.redis.zrange(queue.inflight_key, 0, -1) == [redelivered[0].receipt]
+
+    @pytest.mark.asyncio
+    async def test_expired_lease_goes_to_front_then_dead_letter(self, queue, monkeypatch):
+        """Test redelivery ahead of waiting jobs and dead-lettering after max_attempts."""
+        set_time(monkeypatch, 1000)
+        await push(queue, {"type": "full_analysis", "n": 1})
+        await queue.fetch(1)
+        await push(queue, {"type": "full_analysis", "n": 2})
+
+        set_time(monkeypatch, 1061)
+        redelivered = await queue.fetch(1)
+        assert [(t.task_data["n"], t.attempts) for t in redelivered] == [(1, 2)]
+        assert queue.stats["reclaimed"] == 1
+
+        set_time(monkeypatch, 1122)
+        next_jobs = await queue.fetch(1)
+        assert [t.task_data["n"] for t in next_jobs] == [2]
+        assert [json.loads(raw)["n"] for raw in await queue.redis.lrange(queue.dead_key, 0, -1)] == [1]
+        assert queue.stats["dead_lettered"] == 1
+        assert await queue.redis.hlen(queue.attempts_key) == 1
+        assert await queue.redis.hlen(queue.leased_key) == 1
+
+    @pytest.mark.asyncio
+    async def test_ack_and_release(self, queue, monkeypatch):
+        """Test that ack clears the lease and release requeues at the front, optionally keeping the attempt."""
+        set_time(monkeypatch, 1000)
+        await push(queue, {"type": "full_analysis", "n": 1}, {"type": "full_analysis", "n": 2})
+
+        first, second = await queue.fetch(2)
+        await queue.release(second)
+        await queue.release(first, keep_attempt=True)
+
+        assert (await queue.get_depths())["leased"] == 0
+        again = await queue.fetch(2)
+        assert [(t.task_data["n"], t.attempts) for t in again] == [(1, 2), (2, 1)]
+
+        for task in again:
+            await queue.ack(task)
+        assert (await queue.get_depths())["leased"] == 0
+        assert await queue.redis.hlen(queue.attempts_key) == 0
+        assert await queue.redis.hlen(queue.leased_key) == 0
+
+    @pytest.mark.asyncio
+    async def test_extend_leases(self, queue, monkeypatch):
+        """Test that heartbeats push deadlines forward without re-adding acknowledged jobs."""
+        set_time(monkeypatch, 1000)
+        await push(queue, {"type": "full_analysis", "n": 1}, {"type": "full_analysis", "n": 2})
+        running, finished = await queue.fetch(2)
+        await queue.ack(finished)
+
+        set_time(monkeypatch, 1050)
+        await queue.extend_leases([running, finished])
+        assert await queue.redis.zrange(queue.inflight_key, 0, -1, withscores=True) == [(running.receipt, 1110)]
+
+        set_time(monkeypatch, 1061)
+        assert await queue.fetch(1) == []
+        assert queue.stats["reclaimed"] == 0
+
+    @pytest.mark.asyncio
+    async def test_interactive_only_fetch_leaves_batch_lane(self, queue, monkeypatch):
+        """Test that an interactive-only fetch (dispatcher buffer full) skips batch jobs."""
+        set_time(monkeypatch, 1000)
+        await push(queue, {"type": "full_analysis", "n": 1}, {"type": "answer_question", "n": 2})
+
+        leased = await queue.fetch(5, interactive_only=True)
+
+        assert [t.task_data["n"] for t in leased] == [2]
+        assert (await queue.get_depths())["batch"] == 1
@@ -0,0 +1,12 @@
+"""
+Content hashing shared by ingestion stages.
+
+Embedding chunks, graph file nodes and summary progress all record which
+version of a text they were built from with the same digest.
+"""
+import hashlib
+
+
+def content_hash(text: str) -> str:
+    """SHA-256 hex digest of a text (invalid surrogates are replaced)."""
+    return hashlib.sha256(text.encode('utf-8', errors='replace')).hexdigest()
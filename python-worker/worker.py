@@ -10,6 +10,7 @@ This worker handles AI-powered processing tasks:
 import asyncio
 import signal
 import json
+import socket
 from typing import Dict, Any, Optional
 from datetime import datetime
 import os
@@ -31,6 +32,9 @@ from services.gemini_client import gemini_client
 from services.qdrant_client import qdrant_client
 from services.neo4j_client import neo4j_client
 from services.database_service import database_service
+from services.task_dispatcher import TaskDispatcher, parse_type_limits
+from services.task_queue import task_queue, QueuedTask
+from services.status_publisher import status_publisher
 from services.gemini_function_caller import GeminiFunctionCaller
 from services.github_api_client import GitHubClient
 from services.tools.tool_registry import ToolRegistry
@@ -66,6 +70,17 @@ class GitTLDRWorker:
             "issue_fix": IssueFixProcessor(),  # Keep old processor as fallback
         }
         
+        # Concurrent execution: max_workers tasks in flight, with per-type caps
+        self.dispatcher = TaskDispatcher(
+            handler=self._process_leased_task,
+            max_concurrency=self.settings.max_workers,
+            type_limits=parse_type_limits(self.settings.task_concurrency_limits),
+            interactive_types=task_queue.interactive_types
+        )
+        self._leases: Dict[int, QueuedTask] = {}  # id(task_data) -> lease, for ack/release
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._stop_event = asyncio.Event()
+        
         # No architecture flags needed - using standard RATFV pipeline
         
 
@@ -94,6 +109,7 @@ class GitTLDRWorker:
         """Stop the worker gracefully."""
         logger.info("Stopping worker")
         self.running = False
+        self._stop_event.set()
         
     async def _connect_services(self) -> None:
         """Connect to external services."""
@@ -117,36 +133,164 @@ class GitTLDRWorker:
         logger.info("All services connected")
         
     async def _process_loop(self) -> None:
-        """Main processing loop with exponential backoff."""
-        logger.info("Starting task processing loop")
+        """Main processing loop: leases tasks and dispatches them concurrently, with exponential backoff when idle."""
+        logger.info(
+            "Starting task processing loop",
+            max_workers=self.dispatcher.max_concurrency,
+            type_limits=self.dispatcher.type_limits,
+            interactive_types=task_queue.interactive_types
+        )
         
         idle_count = 0
         max_timeout = 300  # Maximum 5 minutes
         base_timeout = 10  # Start with 10 seconds
         
-        while self.running:
-            try:
-                # Calculate timeout with exponential backoff
-                timeout = min(base_timeout * (2 ** min(idle_count, 4)), max_timeout)
-                
-                # Pop task from queue
-                task_data = await redis_client.pop_task(timeout=timeout)
-                
-                if not task_data:
-                    idle_count += 1
-                    logger.debug(f"No tasks found, sleeping for {timeout}s (idle_count: {idle_count})")
-                    continue  # Timeout, continue loop with longer timeout
-                
-                # Reset idle count when task is found
-                idle_count = 0
+        background = [
+            asyncio.create_task(self._report_gauges()),
+            asyncio.create_task(self._heartbeat_leases())
+        ]
+        try:
+            while self.running:
+                try:
+                    # Backpressure: only lease tasks that can be started or buffered
+                    if not await self.dispatcher.wait_for_capacity(timeout=5):
+                        continue
                     
-                # Process task
-                await self._process_task(task_data)
-                
+                    # Lease a batch of tasks (interactive lane first) in one round trip;
+                    # with the buffer full of capped batch tasks, lease interactive ones only
+                    free_slots = self.dispatcher.free_slots()
+                    interactive_only = free_slots == 0
+                    leased = await task_queue.fetch(
+                        self.dispatcher.interactive_slots() if interactive_only else free_slots,
+                        interactive_only=interactive_only
+                    )
+                    
+                    if not leased:
+                        if interactive_only:
+                            # Batch jobs may be waiting: re-check capacity soon instead of backing off
+                            await self._wait_for_tasks_unless_stopped(5)
+                            continue
+                        # Calculate timeout with exponential backoff
+                        timeout = min(base_timeout * (2 ** min(idle_count, 4)), max_timeout)
+                        if await self._wait_for_tasks_unless_stopped(timeout):
+                            idle_count = 0
+                        else:
+                            idle_count += 1
+                            logger.debug(f"No tasks found, sleeping for {timeout}s (idle_count: {idle_count})")
+                        continue
+                    
+                    # Reset idle count when tasks are found
+                    idle_count = 0
+                    
+                    # Process tasks concurrently
+                    for lease in leased:
+                        self._leases[id(lease.task_data)] = lease
+                        self.dispatcher.submit(lease.task_data)
+                    
+                except Exception as e:
+                    logger.error("Error in processing loop", error=str(e))
+                    idle_count += 1
+                    await asyncio.sleep(5)  # Brief pause before retrying
+        finally:
+            for task in background:
+                task.cancel()
+            await self._drain_tasks()
+    
+    async def _wait_for_tasks_unless_stopped(self, timeout: int) -> bool:
+        """Block until a task is pushed, returning early if stop() is called."""
+        wait = asyncio.ensure_future(task_queue.wait_for_tasks(timeout))
+        stopped = asyncio.ensure_future(self._stop_event.wait())
+        done, _ = await asyncio.wait({wait, stopped}, return_when=asyncio.FIRST_COMPLETED)
+        
+        if wait in done:
+            stopped.cancel()
+            return wait.result()
+        
+        # Safe to abandon: BLMOVE moves the task server-side, the next fetch triages it
+        wait.cancel()
+        return False
+    
+    async def _process_leased_task(self, task_data: Dict[str, Any]) -> None:
+        """Process a leased task and acknowledge it once it has completed or failed."""
+        try:
+            await self._process_task(task_data)
+        except asyncio.CancelledError:
+            # Cancelled after the shutdown drain timed out: hand it to another worker
+            lease = self._leases.pop(id(task_data), None)
+            if lease:
+                try:
+                    await task_queue.release(lease, keep_attempt=True)
+                except Exception as e:
+                    # The lease expires and the task is redelivered anyway
+                    logger.error("Failed to release cancelled task", error=str(e), task_type=task_data.get("type"))
+            raise
+        finally:
+            lease = self._leases.pop(id(task_data), None)
+            if lease:
+                try:
+                    await task_queue.ack(lease)
+                except Exception as e:
+                    logger.error("Failed to acknowledge task", error=str(e), task_type=task_data.get("type"))
+    
+    async def _drain_tasks(self) -> None:
+        """Graceful drain: release buffered tasks, let in-flight tasks finish, cancel stragglers."""
+        pending = self.dispatcher.take_pending()
+        # Release newest first so the oldest ends up at the consuming end of its lane
+        for task_data in reversed(pending):
+            lease = self._leases.pop(id(task_data), None)
+            if not lease:
+                continue
+            try:
+                await task_queue.release(lease)
             except Exception as e:
-                logger.error("Error in processing loop", error=str(e))
-                idle_count += 1
-                await asyncio.sleep(5)  # Brief pause before retrying
+                # The lease expires and the task is redelivered anyway
+                logger.error("Failed to release buffered task", error=str(e), task_type=task_data.get("type"))
+        
+        if not self.dispatcher.in_flight:
+            return
+        
+        logger.info(
+            f"Draining {self.dispatcher.in_flight} in-flight tasks",
+            timeout=self.settings.worker_drain_timeout
+        )
+        if not await self.dispatcher.drain(timeout=self.settings.worker_drain_timeout):
+            cancelled = await self.dispatcher.cancel_all()
+            logger.warning(f"Drain timed out, released {cancelled} in-flight tasks back to the queue")
+    
+    async def _heartbeat_leases(self) -> None:
+        """Keep leases of long-running tasks alive so they are not redelivered."""
+        interval = max(5, task_queue.visibility_timeout // 3)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await task_queue.extend_leases(list(self._leases.values()))
+            except Exception as e:
+                logger.warning("Failed to extend task leases", error=str(e))
+    
+    async def _report_gauges(self) -> None:
+        """Periodically sample queue depths and publish dispatcher gauges."""
+        interval = self.settings.worker_stats_interval
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                depths = await task_queue.get_depths()
+                self.dispatcher.queue_depth = depths['total_waiting']
+                stats = {
+                    **self.dispatcher.get_stats(),
+                    'queue': depths,
+                    'queue_consumer': task_queue.get_stats(),
+                    'status_publisher': status_publisher.get_stats()
+                }
+                logger.info(
+                    "📊 Worker gauges",
+                    queue_depths=depths,
+                    in_flight=stats['in_flight'],
+                    in_flight_by_type=stats['in_flight_by_type'],
+                    pending=stats['pending']
+                )
+                await redis_client.setex(f"worker:stats:{self.worker_id}", interval * 3, json.dumps(stats))
+            except Exception as e:
+                logger.warning("Failed to report worker gauges", error=str(e))
                 
     async def _process_task(self, task_data: Dict[str, Any]) -> None:
         """Process a single task."""
@@ -157,7 +301,7 @@ class GitTLDRWorker:
             try:
                 # Update status to processing (if enabled)
                 if not self.settings.skip_intermediate_task_status:
-                    await redis_client.update_task_status(task_id, "processing")
+                    await status_publisher.publish_status(task_id, "processing")
                 
                 # Route to appropriate processor
                 result = await self._route_task(task_data, task_logger)
@@ -169,14 +313,14 @@ class GitTLDRWorker:
                     task_logger.info(f"Task processed successfully (status already set by MetaController)")
                 else:
                     # For other task types, update final status to completed
-                    await redis_client.update_task_status(
+                    await status_publisher.publish_status(
                         task_id, "completed", result
                     )
                     task_logger.info("Task processed successfully")
                 
             except Exception as e:
                 # Always update final status to failed
-                await redis_client.update_task_status(
+                await status_publisher.publish_status(
                     task_id, "failed", {"error": str(e)}
                 )
                 
@@ -676,6 +820,11 @@ class GitTLDRWorker:
         """Cleanup resources."""
         logger.info("Cleaning up resources")
         
+        try:
+            await status_publisher.close()
+        except Exception as e:
+            logger.error("Error flushing task status updates", error=str(e))
+        
         try:
             await redis_client.disconnect()
         except Exception as e: